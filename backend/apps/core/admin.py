@@ -3,7 +3,7 @@ from django.utils.html import format_html
 from django.shortcuts import render, redirect
 from django.urls import path, reverse
 from django.contrib import messages
-from .models import ButtonAccess
+from .models import ButtonAccess, ImportJob
 
 
 @admin.register(ButtonAccess)
@@ -305,3 +305,17 @@ class ButtonAccessAdmin(admin.ModelAdmin):
     class Meta:
         verbose_name = 'Доступ к кнопке'
         verbose_name_plural = 'Матрица доступа к кнопкам'
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    """
+    Просмотр фоновых заданий импорта из Excel (только чтение).
+    """
+
+    list_display = ('id', 'import_type', 'mode', 'status', 'progress', 'user', 'company', 'created_at', 'finished_at')
+    list_filter = ('import_type', 'status', 'company')
+    readonly_fields = [field.name for field in ImportJob._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
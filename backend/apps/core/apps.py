@@ -7,3 +7,9 @@ class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.core"
     verbose_name = "Базовые компоненты"
+
+    def ready(self):
+        from .global_search import connect_signals
+
+        # Обновление общего поискового индекса при сохранении/удалении объектов
+        connect_signals()
@@ -0,0 +1,328 @@
+"""
+Общий поиск по проектам, замечаниям, заявкам, задачам, тендерам и пользователям.
+
+Тексты объектов копируются в одну таблицу SearchEntry вместе с полями
+видимости (компания, проект, автор, исполнитель), поэтому поиск - один
+запрос: права пользователя проверяются в SQL теми же правилами, что и в
+списках соответствующих ViewSet, а лучшие N результатов каждого типа
+отбираются оконной функцией ROW_NUMBER() OVER (PARTITION BY entity_type).
+
+Записи индекса обновляются сигналами post_save/post_delete одним запросом
+INSERT ... ON CONFLICT DO UPDATE. Сохранение только с update_fields, не
+затрагивающими индексируемые поля (например, смена статуса или last_login),
+индекс не трогает. Пакетные операции (bulk_create/bulk_update) обновляют
+индекс явно через index_objects(); весь индекс пересобирает команда
+rebuild_search_index.
+"""
+import logging
+
+from django.apps import apps
+from django.db.models import Exists, F, OuterRef, Q, Window
+from django.db.models.functions import RowNumber, Substr
+from django.db.models.signals import post_delete, post_save
+
+from .models import SearchEntry
+from .search import RANK_FIELD, search_queryset
+
+logger = logging.getLogger(__name__)
+
+# Результатов каждого типа по умолчанию и максимум для ?limit=
+DEFAULT_LIMIT = 5
+MAX_LIMIT = 20
+
+# Длина фрагмента текста в результатах
+SNIPPET_LENGTH = 200
+
+# Поля записи индекса, которые перезаписываются при обновлении
+ENTRY_FIELDS = [
+    'company_id', 'project_id', 'author_id', 'assignee_id', 'restricted',
+    'number', 'title', 'body', 'updated_at',
+]
+
+# Роли, видящие все заявки / тендеры / пользователей компании (как в списках ViewSet)
+REQUEST_FULL_ACCESS_ROLES = (
+    'SUPERADMIN', 'DIRECTOR', 'CHIEF_ENGINEER',
+    'PROJECT_MANAGER', 'CHIEF_POWER_ENGINEER', 'SUPPLY_MANAGER',
+)
+TENDER_FULL_ACCESS_ROLES = ('DIRECTOR', 'CHIEF_ENGINEER', 'PROJECT_MANAGER')
+USER_FULL_ACCESS_ROLES = ('DIRECTOR', 'CHIEF_ENGINEER', 'PROJECT_MANAGER')
+# Роли без доступа к списку пользователей
+USER_FORBIDDEN_ROLES = ('CONTRACTOR', 'SUPERVISOR', 'OBSERVER')
+
+
+def _join(*parts):
+    return '\n'.join(part for part in parts if part)
+
+
+def _project_entry(project):
+    return {
+        'company_id': project.company_id,
+        'project_id': project.pk,
+        'author_id': project.project_manager_id,
+        'title': project.name,
+        'body': _join(project.customer, project.address, project.description),
+    }
+
+
+def _issue_entry(issue):
+    return {
+        'company_id': issue.project.company_id,
+        'project_id': issue.project_id,
+        'author_id': issue.created_by_id,
+        'assignee_id': issue.assigned_to_id,
+        'title': issue.title,
+        'body': _join(issue.description, issue.location_notes),
+    }
+
+
+def _material_request_entry(material_request):
+    return {
+        'company_id': material_request.company_id,
+        'project_id': material_request.project_id,
+        'author_id': material_request.author_id,
+        'number': material_request.request_number,
+        'title': material_request.title,
+        'body': material_request.description,
+    }
+
+
+def _task_entry(task):
+    return {
+        'company_id': task.company_id,
+        'project_id': task.project_id,
+        'author_id': task.created_by_id,
+        'assignee_id': task.assigned_to_user_id,
+        'number': task.task_number,
+        'title': task.title,
+        'body': task.description,
+    }
+
+
+def _tender_entry(tender):
+    return {
+        'company_id': tender.project.company_id,
+        'project_id': tender.project_id,
+        'author_id': tender.created_by_id,
+        'title': tender.title,
+        'body': _join(tender.company_name, tender.city, tender.description),
+    }
+
+
+def _user_entry(user):
+    if not user.is_active:
+        return None
+    return {
+        'company_id': user.company_id,
+        # Подрядчиков остальные роли видят только по своим проектам - в поиске их видит руководство
+        'restricted': user.role == 'CONTRACTOR',
+        'title': user.get_full_name() or user.email,
+        'body': _join(user.email, user.position, user.external_company_name),
+    }
+
+
+# Модель -> (тип записи, функция полей записи, поля модели, от которых зависит запись)
+INDEXED_MODELS = {
+    'projects.Project': (
+        'project', _project_entry,
+        {'company', 'project_manager', 'name', 'customer', 'address', 'description'},
+    ),
+    'issues.Issue': (
+        'issue', _issue_entry,
+        {'project', 'created_by', 'assigned_to', 'title', 'description', 'location_notes'},
+    ),
+    'material_requests.MaterialRequest': (
+        'material_request', _material_request_entry,
+        {'company', 'project', 'author', 'request_number', 'title', 'description'},
+    ),
+    'tasks.Task': (
+        'task', _task_entry,
+        {'company', 'project', 'created_by', 'assigned_to_user', 'task_number', 'title', 'description'},
+    ),
+    'tenders.Tender': (
+        'tender', _tender_entry,
+        {'project', 'created_by', 'title', 'company_name', 'city', 'description'},
+    ),
+    'users.User': (
+        'user', _user_entry,
+        {'company', 'role', 'is_active', 'first_name', 'last_name', 'middle_name',
+         'email', 'position', 'external_company_name'},
+    ),
+}
+
+# Поле мягкого удаления тоже влияет на запись (удаленные объекты не индексируются)
+SOFT_DELETE_FIELDS = {'is_deleted'}
+
+
+def build_entry(instance):
+    """
+    Запись индекса для объекта (не сохраненная).
+
+    Returns:
+        SearchEntry или None, если объект не должен быть в индексе
+        (удален, неактивен, без компании)
+    """
+    entity_type, build, _ = INDEXED_MODELS[instance._meta.label]
+    if getattr(instance, 'is_deleted', False):
+        return None
+    fields = build(instance)
+    if fields is None or not fields['company_id']:
+        return None
+    # Текстовые поля моделей могут быть NULL
+    fields['title'] = (fields['title'] or '')[:500]
+    fields['number'] = fields.get('number') or ''
+    fields['body'] = fields.get('body') or ''
+    return SearchEntry(entity_type=entity_type, object_id=instance.pk, **fields)
+
+
+def index_objects(instances):
+    """
+    Обновляет записи индекса для объектов одной модели: одна вставка с
+    ON CONFLICT DO UPDATE и одно удаление записей, которых не должно быть в индексе.
+    """
+    instances = list(instances)
+    if not instances:
+        return
+    entity_type = INDEXED_MODELS[instances[0]._meta.label][0]
+
+    entries, removed_ids = [], []
+    for instance in instances:
+        entry = build_entry(instance)
+        if entry is None:
+            removed_ids.append(instance.pk)
+        else:
+            entries.append(entry)
+
+    if entries:
+        SearchEntry.objects.bulk_create(
+            entries,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['entity_type', 'object_id'],
+            update_fields=ENTRY_FIELDS,
+        )
+    if removed_ids:
+        remove_from_index(entity_type, removed_ids)
+
+
+def remove_from_index(entity_type, object_ids):
+    """Удаляет записи индекса объектов."""
+    SearchEntry.objects.filter(entity_type=entity_type, object_id__in=object_ids).delete()
+
+
+def _on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    watched = INDEXED_MODELS[sender._meta.label][2] | SOFT_DELETE_FIELDS
+    if update_fields is not None and not watched & set(update_fields):
+        return
+    index_objects([instance])
+
+
+def _on_delete(sender, instance, **kwargs):
+    remove_from_index(INDEXED_MODELS[sender._meta.label][0], [instance.pk])
+
+
+def connect_signals():
+    """Подключает обновление индекса к моделям INDEXED_MODELS (из CoreConfig.ready)."""
+    for label in INDEXED_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(_on_save, sender=model, dispatch_uid=f'search_index_save_{label}')
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=f'search_index_delete_{label}')
+
+
+def _project_member_q(user, team_only=False):
+    """Условие "пользователь закреплен за проектом записи" (EXISTS по project_id)."""
+    from apps.projects.models import Project
+
+    member = Q(Exists(
+        Project.team_members.through.objects.filter(
+            project_id=OuterRef('project_id'), user_id=user.pk, project__is_deleted=False
+        )
+    ))
+    if team_only:
+        return member
+    return member | Q(Exists(
+        Project.objects.filter(pk=OuterRef('project_id'), project_manager_id=user.pk)
+    ))
+
+
+def visibility_q(user):
+    """
+    Условие видимости записей индекса для пользователя (в пределах его компании).
+
+    Повторяет фильтрацию списков: ProjectViewSet, IssueViewSet,
+    MaterialRequestViewSet, TaskViewSet, TenderViewSet и UserViewSet.
+    """
+    def of_type(entity_type, condition=None):
+        q = Q(entity_type=entity_type)
+        return q if condition is None else q & condition
+
+    member = _project_member_q(user)
+    own = Q(author_id=user.pk)
+
+    conditions = [
+        of_type('project', None if user.is_management else member),
+        of_type('task'),
+        of_type('material_request', None if user.role in REQUEST_FULL_ACCESS_ROLES else own | member),
+        of_type('tender', None if user.role in TENDER_FULL_ACCESS_ROLES else _project_member_q(user, team_only=True)),
+    ]
+
+    if user.is_management:
+        conditions.append(of_type('issue'))
+    elif user.is_itr or user.is_supervisor:
+        conditions.append(of_type('issue', member | own))
+    else:
+        conditions.append(of_type('issue', Q(assignee_id=user.pk)))
+
+    if user.role not in USER_FORBIDDEN_ROLES and user.approved:
+        conditions.append(of_type('user', None if user.role in USER_FULL_ACCESS_ROLES else Q(restricted=False)))
+
+    visibility = Q()
+    for condition in conditions:
+        visibility |= condition
+    return visibility
+
+
+def visible_entries(user):
+    """Записи индекса, которые пользователь может видеть."""
+    queryset = SearchEntry.objects.all()
+    if user.is_superuser:
+        return queryset
+    if not user.company_id:
+        return queryset.none()
+    return queryset.filter(company_id=user.company_id).filter(visibility_q(user))
+
+
+def global_search(user, text, limit=DEFAULT_LIMIT):
+    """
+    Лучшие limit результатов каждого типа одним запросом.
+
+    Returns:
+        dict: {тип: [{'id', 'type', 'number', 'title', 'snippet', 'project_id', 'rank'}, ...]}
+              для всех типов SearchEntry.TYPE_CHOICES (пустой список, если ничего не найдено)
+    """
+    results = {entity_type: [] for entity_type, _ in SearchEntry.TYPE_CHOICES}
+    if not text.strip():
+        return results
+
+    entries = search_queryset(visible_entries(user), text, trigram_fields=['number', 'title'])
+    entries = entries.annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=[F('entity_type')],
+            order_by=[F(RANK_FIELD).desc(), F('updated_at').desc()],
+        ),
+        snippet=Substr('body', 1, SNIPPET_LENGTH),
+    ).filter(position__lte=limit).order_by('entity_type', 'position')
+
+    for entry in entries.values('entity_type', 'object_id', 'number', 'title', 'snippet', 'project_id', RANK_FIELD):
+        results[entry['entity_type']].append({
+            'id': entry['object_id'],
+            'type': entry['entity_type'],
+            'number': entry['number'],
+            'title': entry['title'],
+            'snippet': entry['snippet'],
+            'project_id': entry['project_id'],
+            'rank': entry[RANK_FIELD],
+        })
+    return results
@@ -0,0 +1,170 @@
+"""
+Фоновые задания импорта из Excel.
+
+View сохраняет загруженный файл в ImportJob и сразу возвращает id задания,
+разбор и запись в БД выполняет Celery задача core.run_import_job.
+Прогресс отправляется через WebSocket уведомлений событием 'import_job'.
+
+Каждый тип импорта описывается парой функций (см. IMPORT_HANDLERS):
+- parse(job) -> (valid_rows, errors) - разбор и валидация файла. Непустой errors
+  означает, что файл не прошел валидацию и ничего не записывается
+- apply_chunk(job, rows) -> (stats, row_errors) - запись части строк в БД
+
+Валидные строки записываются частями по IMPORT_CHUNK_SIZE, каждая часть - в своей
+транзакции: ошибка в одной части откатывает только ее, остальные части сохраняются.
+Ошибки строк накапливаются в задании и доступны для скачивания отчетом об ошибках.
+"""
+import logging
+from collections import Counter
+from io import BytesIO
+
+import xlsxwriter
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from apps.notifications.utils import send_user_event
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+IMPORT_HANDLERS = {
+    ImportJob.ImportType.USERS: (
+        'apps.users.utils.personnel_import.parse_import_job',
+        'apps.users.utils.personnel_import.apply_import_chunk',
+    ),
+    ImportJob.ImportType.CONTRACTORS: (
+        'apps.users.utils.personnel_import.parse_import_job',
+        'apps.users.utils.personnel_import.apply_import_chunk',
+    ),
+    ImportJob.ImportType.SUPERVISIONS: (
+        'apps.users.utils.personnel_import.parse_import_job',
+        'apps.users.utils.personnel_import.apply_import_chunk',
+    ),
+    ImportJob.ImportType.PROJECTS: (
+        'apps.projects.utils.parse_import_job',
+        'apps.projects.utils.apply_import_chunk',
+    ),
+}
+
+# Доля прогресса, приходящаяся на разбор файла
+PARSE_PROGRESS = 10
+
+
+def wants_background(request, file=None, default=False):
+    """
+    Выполнять ли импорт в фоне.
+
+    Поле формы background=true/false задает режим явно, без него - default.
+    Синхронный импорт допускается только для файлов до IMPORT_SYNC_MAX_BYTES:
+    файл больше этого размера всегда импортируется в фоне.
+    """
+    value = str(request.data.get('background', '')).lower()
+    if value in ('1', 'true', 'yes'):
+        return True
+    if file is not None and file.size > settings.IMPORT_SYNC_MAX_BYTES:
+        return True
+    if value in ('0', 'false', 'no'):
+        return False
+    return default
+
+
+def get_import_handlers(import_type):
+    """Функции (parse, apply_chunk) для типа импорта."""
+    parse_path, apply_path = IMPORT_HANDLERS[import_type]
+    return import_string(parse_path), import_string(apply_path)
+
+
+def create_import_job(user, import_type, mode, file):
+    """Сохраняет файл и ставит задание импорта в очередь после коммита."""
+    from .tasks import run_import_job
+
+    job = ImportJob.objects.create(
+        user=user,
+        company=user.company,
+        import_type=import_type,
+        mode=mode,
+        file=file,
+    )
+    transaction.on_commit(lambda: run_import_job.delay(str(job.id)))
+    return job
+
+
+def notify_import_progress(job, chunk=None):
+    """
+    Отправляет текущее состояние задания пользователю через WebSocket.
+
+    Args:
+        chunk: {'index', 'count', 'errors'} - результат только что записанной части
+    """
+    data = {
+        'id': str(job.id),
+        'import_type': job.import_type,
+        'status': job.status,
+        'progress': job.progress,
+        'stats': job.stats,
+        'error': job.error,
+        'error_count': len(job.errors),
+    }
+    if chunk is not None:
+        data['chunk'] = chunk
+    send_user_event(job.user_id, 'import_job', data)
+
+
+def apply_in_chunks(job, rows, apply_chunk):
+    """
+    Записывает валидные строки частями, обновляя прогресс и ошибки задания.
+
+    Returns:
+        Counter: суммарная статистика частей
+    """
+    chunk_size = settings.IMPORT_CHUNK_SIZE
+    chunk_count = (len(rows) + chunk_size - 1) // chunk_size
+    totals = Counter()
+
+    for index, start in enumerate(range(0, len(rows), chunk_size), start=1):
+        chunk = rows[start:start + chunk_size]
+        try:
+            with transaction.atomic():
+                stats, row_errors = apply_chunk(job, chunk)
+        except Exception as e:
+            logger.exception(f"[Import] Ошибка записи части {index}/{chunk_count} задания {job.id}: {e}")
+            stats = {'failed_rows': len(chunk)}
+            row_errors = [
+                {'row': row.get('row'), 'errors': [f'Ошибка записи: {e}']}
+                for row in chunk
+            ]
+
+        totals.update(stats)
+        job.errors.extend(row_errors)
+        job.stats = {**job.stats, **totals}
+        job.progress = PARSE_PROGRESS + (100 - PARSE_PROGRESS) * (start + len(chunk)) // len(rows)
+        job.save(update_fields=['progress', 'stats', 'errors'])
+        notify_import_progress(job, chunk={'index': index, 'count': chunk_count, 'errors': row_errors})
+
+    return totals
+
+
+def build_error_report(job):
+    """
+    Excel отчет об ошибках строк задания.
+
+    Returns:
+        bytes: содержимое xlsx файла
+    """
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+    worksheet = workbook.add_worksheet('Ошибки')
+
+    header_format = workbook.add_format({'bold': True, 'bg_color': '#4472C4', 'font_color': 'white', 'border': 1})
+    cell_format = workbook.add_format({'border': 1, 'text_wrap': True, 'valign': 'top'})
+
+    worksheet.write_row(0, 0, ['Строка', 'Ошибки'], header_format)
+    for row_num, row_error in enumerate(job.errors, start=1):
+        worksheet.write(row_num, 0, row_error.get('row') or '-', cell_format)
+        worksheet.write(row_num, 1, '\n'.join(row_error.get('errors', [])), cell_format)
+
+    worksheet.set_column('A:A', 10)
+    worksheet.set_column('B:B', 100)
+    workbook.close()
+    return output.getvalue()
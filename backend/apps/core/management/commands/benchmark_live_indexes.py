@@ -0,0 +1,143 @@
+"""
+Management команда для проверки частичных индексов по НЕ удаленным записям.
+
+Для типичных выборок списков (через SoftDeleteManager) выполняет
+EXPLAIN ANALYZE, показывает, какой индекс выбрал планировщик PostgreSQL,
+и среднее время выполнения запроса.
+
+Использование:
+    python manage.py benchmark_live_indexes                   # Компания с наибольшим числом заявок
+    python manage.py benchmark_live_indexes --company 5 --repeat 20
+    python manage.py benchmark_live_indexes --no-seqscan      # Для маленьких dev баз
+    python manage.py benchmark_live_indexes --verbose-plan    # Печатать планы целиком
+
+На маленьких таблицах планировщику дешевле Seq Scan, поэтому --no-seqscan
+(SET LOCAL enable_seqscan = off) показывает, что индекс применим к запросу.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from apps.material_requests.models import MaterialRequest
+from apps.projects.models import Project
+from apps.tasks.models import Task
+from apps.tenders.models import Tender
+from apps.users.models import Company, User
+
+
+def get_benchmark_queries(company_id, project_id):
+    """(описание, ожидаемый индекс, queryset) для типичных выборок списков."""
+    return [
+        (
+            'Проекты компании',
+            'project_company_live_idx',
+            Project.objects.filter(company_id=company_id).order_by('-created_at')[:20],
+        ),
+        (
+            'Инженеры компании',
+            'user_company_role_live_idx',
+            User.objects.filter(company_id=company_id, role=User.Role.ENGINEER),
+        ),
+        (
+            'Заявки компании на согласовании',
+            'mr_company_status_live_idx',
+            MaterialRequest.objects.filter(
+                company_id=company_id, status=MaterialRequest.STATUS_IN_APPROVAL
+            ).order_by('-created_at')[:20],
+        ),
+        (
+            'Входящие директора на согласование',
+            'mr_approval_inbox_live_idx',
+            MaterialRequest.objects.filter(
+                company_id=company_id, current_approval_role='DIRECTOR', status=MaterialRequest.STATUS_IN_APPROVAL
+            ),
+        ),
+        (
+            'Заявки проекта на доставке',
+            'mr_project_status_live_idx',
+            MaterialRequest.objects.filter(project_id=project_id, status=MaterialRequest.STATUS_IN_DELIVERY),
+        ),
+        (
+            'Опубликованные тендеры проекта',
+            'tender_project_status_live_idx',
+            Tender.objects.filter(project_id=project_id, status=Tender.Status.PUBLISHED),
+        ),
+        (
+            'Последние опубликованные тендеры',
+            'tender_status_live_idx',
+            Tender.objects.filter(status=Tender.Status.PUBLISHED).order_by('-created_at')[:20],
+        ),
+        (
+            'Задачи компании в работе',
+            'task_company_status_live_idx',
+            Task.objects.filter(company_id=company_id, status=Task.STATUS_IN_PROGRESS),
+        ),
+        (
+            'Последние задачи компании',
+            'task_company_live_idx',
+            Task.objects.filter(company_id=company_id).order_by('-created_at')[:20],
+        ),
+        (
+            'Задачи проекта',
+            'task_project_live_idx',
+            Task.objects.filter(project_id=project_id),
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Проверяет, что планировщик использует частичные индексы по НЕ удаленным записям'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help='ID компании (по умолчанию - с наибольшим числом заявок)')
+        parser.add_argument('--repeat', type=int, default=10, help='Сколько раз выполнить каждый запрос')
+        parser.add_argument(
+            '--no-seqscan',
+            action='store_true',
+            help='Запретить Seq Scan (SET LOCAL enable_seqscan = off) - для маленьких баз'
+        )
+        parser.add_argument('--verbose-plan', action='store_true', help='Печатать планы целиком')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Частичные индексы и EXPLAIN ANALYZE проверяются только на PostgreSQL')
+
+        company_id = options['company'] or (
+            Company.objects.annotate(requests=Count('material_requests'))
+            .order_by('-requests').values_list('id', flat=True).first()
+        )
+        if company_id is None:
+            raise CommandError('В базе нет компаний')
+        project_id = Project.objects.filter(company_id=company_id).values_list('id', flat=True).first()
+        self.stdout.write(f'Компания {company_id}, проект {project_id}')
+
+        missed = 0
+        with transaction.atomic():
+            if options['no_seqscan']:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for title, index_name, queryset in get_benchmark_queries(company_id, project_id):
+                plan = queryset.explain(analyze=True)
+
+                started = time.perf_counter()
+                for _ in range(options['repeat']):
+                    list(queryset.all())
+                avg_ms = (time.perf_counter() - started) * 1000 / options['repeat']
+
+                used = index_name in plan
+                missed += not used
+                status = self.style.SUCCESS('индекс') if used else self.style.WARNING('БЕЗ индекса')
+                self.stdout.write(f'{status} {index_name:32} {avg_ms:8.2f} мс  {title}')
+                if options['verbose_plan'] or not used:
+                    self.stdout.write(plan)
+
+        if missed:
+            self.stdout.write(self.style.WARNING(
+                f'Запросов без частичного индекса: {missed}. На маленьких таблицах '
+                f'запустите с --no-seqscan или выполните ANALYZE'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('Все запросы используют частичные индексы'))
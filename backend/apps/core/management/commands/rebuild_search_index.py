@@ -0,0 +1,69 @@
+"""
+Management команда для полной пересборки общего поискового индекса (SearchEntry).
+
+Нужна после первого деплоя таблицы индекса и после изменений в обход сигналов
+(QuerySet.update(), правки в БД). Объекты читаются частями, каждая часть
+записывается одной вставкой INSERT ... ON CONFLICT DO UPDATE; записи удаленных
+объектов убираются.
+
+Использование:
+    python manage.py rebuild_search_index                  # Все типы
+    python manage.py rebuild_search_index --type task      # Только задачи
+    python manage.py rebuild_search_index --chunk-size 2000
+"""
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.core.global_search import INDEXED_MODELS, index_objects
+from apps.core.models import SearchEntry
+
+# Связи, нужные для полей записи (компания замечаний и тендеров берется из проекта)
+SELECT_RELATED = {
+    'issues.Issue': ['project'],
+    'tenders.Tender': ['project'],
+}
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает общий поисковый индекс (/api/search/)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            choices=[entity_type for entity_type, _, _ in INDEXED_MODELS.values()],
+            help='Пересобрать только записи этого типа',
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Объектов в одной вставке')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size должен быть больше 0')
+
+        for label, (entity_type, _, _) in INDEXED_MODELS.items():
+            if options['type'] and options['type'] != entity_type:
+                continue
+            model = apps.get_model(label)
+            # Базовый manager: мягко удаленные объекты тоже проходят через index_objects и убираются из индекса
+            queryset = model._base_manager.select_related(*SELECT_RELATED.get(label, [])).order_by('pk')
+
+            indexed = 0
+            last_pk = 0
+            while True:
+                chunk = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+                if not chunk:
+                    break
+                with transaction.atomic():
+                    index_objects(chunk)
+                indexed += len(chunk)
+                last_pk = chunk[-1].pk
+
+            # Записи объектов, которых больше нет в БД
+            stale, _ = SearchEntry.objects.filter(entity_type=entity_type).exclude(
+                object_id__in=model._base_manager.values('pk')
+            ).delete()
+
+            self.stdout.write(f'{entity_type}: обработано {indexed}, удалено устаревших записей {stale}')
+
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс пересобран'))
@@ -0,0 +1,128 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("users", "0020_alter_user_role"),
+        ("core", "0009_add_power_engineer_roles"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "import_type",
+                    models.CharField(
+                        choices=[
+                            ("users", "Персонал"),
+                            ("contractors", "Подрядчики"),
+                            ("supervisions", "Надзоры"),
+                        ],
+                        max_length=30,
+                        verbose_name="Тип импорта",
+                    ),
+                ),
+                (
+                    "mode",
+                    models.CharField(
+                        default="create", max_length=20, verbose_name="Режим"
+                    ),
+                ),
+                (
+                    "file",
+                    models.FileField(
+                        upload_to="imports/%Y/%m/%d/", verbose_name="Файл"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "В очереди"),
+                            ("RUNNING", "Выполняется"),
+                            ("SUCCESS", "Завершен"),
+                            ("FAILED", "Ошибка"),
+                        ],
+                        default="PENDING",
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "progress",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Прогресс, %"
+                    ),
+                ),
+                (
+                    "stats",
+                    models.JSONField(
+                        blank=True, default=dict, verbose_name="Статистика"
+                    ),
+                ),
+                (
+                    "errors",
+                    models.JSONField(
+                        blank=True, default=list, verbose_name="Ошибки строк"
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Ошибка")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Создано"),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Завершено"
+                    ),
+                ),
+                (
+                    "company",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="import_jobs",
+                        to="users.company",
+                        verbose_name="Компания",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="import_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Задание импорта",
+                "verbose_name_plural": "Задания импорта",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["user", "created_at"],
+                        name="core_import_user_id_1b469b_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_importjob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="importjob",
+            name="import_type",
+            field=models.CharField(
+                choices=[
+                    ("users", "Персонал"),
+                    ("contractors", "Подрядчики"),
+                    ("supervisions", "Надзоры"),
+                    ("projects", "Проекты"),
+                ],
+                max_length=30,
+                verbose_name="Тип импорта",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="importjob",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "В очереди"),
+                    ("RUNNING", "Выполняется"),
+                    ("SUCCESS", "Завершен"),
+                    ("PARTIAL", "Завершен с ошибками"),
+                    ("FAILED", "Ошибка"),
+                ],
+                default="PENDING",
+                max_length=20,
+                verbose_name="Статус",
+            ),
+        ),
+    ]
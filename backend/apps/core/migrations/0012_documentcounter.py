@@ -0,0 +1,48 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_alter_importjob_import_type_alter_importjob_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("kind", models.CharField(max_length=50, verbose_name="Вид документа")),
+                (
+                    "scope",
+                    models.CharField(max_length=50, verbose_name="Область нумерации"),
+                ),
+                (
+                    "value",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="Последний выданный номер"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Счетчик номеров документов",
+                "verbose_name_plural": "Счетчики номеров документов",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="documentcounter",
+            constraint=models.UniqueConstraint(
+                fields=("kind", "scope"), name="unique_document_counter"
+            ),
+        ),
+    ]
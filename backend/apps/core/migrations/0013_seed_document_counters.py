@@ -0,0 +1,57 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:55
+
+import re
+from collections import defaultdict
+
+from django.db import migrations
+
+NUMBER_SUFFIX = re.compile(r'-(\d+)$')
+
+
+def seed_document_counters(apps, schema_editor):
+    """
+    Заполняет счетчики по уже выданным номерам.
+
+    - заявки: максимальный порядковый номер в каждой компании
+    - задачи: максимальный порядковый номер за каждый день (TASK-YYYYMMDD-XXX)
+    """
+    MaterialRequest = apps.get_model('material_requests', 'MaterialRequest')
+    Task = apps.get_model('tasks', 'Task')
+    DocumentCounter = apps.get_model('core', 'DocumentCounter')
+
+    counters = defaultdict(int)
+
+    rows = MaterialRequest._base_manager.values_list('company_id', 'request_number')
+    for company_id, request_number in rows.iterator(chunk_size=2000):
+        match = NUMBER_SUFFIX.search(request_number or '')
+        if company_id and match:
+            key = ('material_request', str(company_id))
+            counters[key] = max(counters[key], int(match.group(1)))
+
+    for task_number in Task._base_manager.values_list('task_number', flat=True).iterator(chunk_size=2000):
+        parts = (task_number or '').split('-')
+        if len(parts) == 3 and parts[0] == 'TASK' and parts[2].isdigit():
+            key = ('task', parts[1])
+            counters[key] = max(counters[key], int(parts[2]))
+
+    DocumentCounter.objects.bulk_create(
+        [DocumentCounter(kind=kind, scope=scope, value=value) for (kind, scope), value in counters.items()],
+        batch_size=1000,
+    )
+
+
+def clear_document_counters(apps, schema_editor):
+    apps.get_model('core', 'DocumentCounter').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_documentcounter"),
+        ("material_requests", "0010_soft_delete_live_indexes"),
+        ("tasks", "0004_soft_delete_live_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_document_counters, clear_document_counters),
+    ]
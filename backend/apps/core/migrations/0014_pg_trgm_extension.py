@@ -0,0 +1,16 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:10
+"""Расширение pg_trgm для индексов поиска по части номера и названия."""
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_seed_document_counters"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+    ]
@@ -0,0 +1,165 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:13
+"""
+Таблица общего поискового индекса.
+
+search_vector заполняется триггером core_searchentry_search_vector_update.
+Индекс по существующим данным строится командой rebuild_search_index.
+"""
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.text
+
+SEARCH_VECTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION core_searchentry_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.number, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.body, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_searchentry_search_vector_trigger
+BEFORE INSERT OR UPDATE OF number, title, body ON core_searchentry
+FOR EACH ROW EXECUTE FUNCTION core_searchentry_search_vector_update();
+"""
+
+DROP_SEARCH_VECTOR_FUNCTION = """
+DROP TRIGGER IF EXISTS core_searchentry_search_vector_trigger ON core_searchentry;
+DROP FUNCTION IF EXISTS core_searchentry_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0022_user_live_indexes"),
+        ("core", "0014_pg_trgm_extension"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "entity_type",
+                    models.CharField(
+                        choices=[
+                            ("project", "Проект"),
+                            ("issue", "Замечание"),
+                            ("material_request", "Заявка на материалы"),
+                            ("task", "Задача"),
+                            ("tender", "Тендер"),
+                            ("user", "Пользователь"),
+                        ],
+                        max_length=30,
+                        verbose_name="Тип объекта",
+                    ),
+                ),
+                (
+                    "object_id",
+                    models.PositiveBigIntegerField(verbose_name="ID объекта"),
+                ),
+                (
+                    "project_id",
+                    models.BigIntegerField(
+                        blank=True, null=True, verbose_name="ID проекта"
+                    ),
+                ),
+                (
+                    "author_id",
+                    models.BigIntegerField(
+                        blank=True, null=True, verbose_name="ID автора"
+                    ),
+                ),
+                (
+                    "assignee_id",
+                    models.BigIntegerField(
+                        blank=True, null=True, verbose_name="ID исполнителя"
+                    ),
+                ),
+                (
+                    "restricted",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Запись видят только роли с полным доступом к объектам этого типа",
+                        verbose_name="Только для руководства",
+                    ),
+                ),
+                (
+                    "number",
+                    models.CharField(blank=True, max_length=50, verbose_name="Номер"),
+                ),
+                ("title", models.CharField(max_length=500, verbose_name="Заголовок")),
+                ("body", models.TextField(blank=True, verbose_name="Текст")),
+                (
+                    "search_vector",
+                    django.contrib.postgres.search.SearchVectorField(
+                        editable=False, null=True
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Обновлено"),
+                ),
+                (
+                    "company",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="users.company",
+                        verbose_name="Компания",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Запись поискового индекса",
+                "verbose_name_plural": "Поисковый индекс",
+                "indexes": [
+                    models.Index(
+                        fields=["company", "entity_type"],
+                        name="search_entry_company_idx",
+                    ),
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["search_vector"], name="search_entry_vector_idx"
+                    ),
+                    django.contrib.postgres.indexes.GinIndex(
+                        django.contrib.postgres.indexes.OpClass(
+                            django.db.models.functions.text.Upper("number"),
+                            name="gin_trgm_ops",
+                        ),
+                        name="search_entry_number_trgm_idx",
+                    ),
+                    django.contrib.postgres.indexes.GinIndex(
+                        django.contrib.postgres.indexes.OpClass(
+                            django.db.models.functions.text.Upper("title"),
+                            name="gin_trgm_ops",
+                        ),
+                        name="search_entry_title_trgm_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="searchentry",
+            constraint=models.UniqueConstraint(
+                fields=("entity_type", "object_id"), name="unique_search_entry"
+            ),
+        ),
+        migrations.RunSQL(
+            sql=SEARCH_VECTOR_FUNCTION, reverse_sql=DROP_SEARCH_VECTOR_FUNCTION
+        ),
+    ]
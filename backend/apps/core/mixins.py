@@ -3,13 +3,21 @@
 
 Содержит:
 - SoftDeleteMixin: миксин для мягкого удаления (soft delete)
+- SoftDeleteQuerySet: QuerySet с фильтрами живых/удаленных записей
 - SoftDeleteManager: manager для автоматической фильтрации удаленных записей
+- live_index(): частичный индекс только по НЕ удаленным записям
 """
 
+from datetime import timedelta
+
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+# Срок хранения удаленных записей в корзине (дней)
+SOFT_DELETE_RETENTION_DAYS = 31
+
 
 class SoftDeleteMixin(models.Model):
     """
@@ -23,18 +31,23 @@ class SoftDeleteMixin(models.Model):
     Срок хранения в корзине: 31 день
     После 31 дня записи автоматически удаляются навсегда.
 
+    Отдельного индекса по is_deleted нет: почти все записи живые, поэтому горячие
+    выборки покрываются частичными индексами live_index() в Meta модели.
+
     Использование:
         class MyModel(SoftDeleteMixin, models.Model):
             # ... ваши поля ...
 
             objects = SoftDeleteManager()
             all_objects = models.Manager()
+
+            class Meta:
+                indexes = [live_index('company', '-created_at', name='mymodel_company_live_idx')]
     """
 
     is_deleted = models.BooleanField(
         _('Удалено'),
         default=False,
-        db_index=True,
         help_text=_('Запись помечена как удаленная (soft delete)')
     )
 
@@ -59,12 +72,47 @@ class SoftDeleteMixin(models.Model):
     class Meta:
         abstract = True
 
+    def soft_delete(self, user=None):
+        """Помечает объект как удаленный (перемещает в корзину)."""
+        self.is_deleted = True
+        self.deleted_at = timezone.now()
+        self.deleted_by = user
+        self.save(update_fields=['is_deleted', 'deleted_at', 'deleted_by'])
+
+    def restore(self):
+        """Восстанавливает объект из корзины."""
+        self.is_deleted = False
+        self.deleted_at = None
+        self.deleted_by = None
+        self.save(update_fields=['is_deleted', 'deleted_at', 'deleted_by'])
+
+    @property
+    def days_until_permanent_deletion(self):
+        """Количество дней до окончательного удаления (None, если объект не удален)."""
+        if not self.deleted_at:
+            return None
+        expiration_date = self.deleted_at + timedelta(days=SOFT_DELETE_RETENTION_DAYS)
+        return max(0, (expiration_date - timezone.now()).days)
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """QuerySet моделей с мягким удалением."""
 
-class SoftDeleteManager(models.Manager):
+    def alive(self):
+        """Только НЕ удаленные записи."""
+        return self.filter(is_deleted=False)
+
+    def dead(self):
+        """Только удаленные записи."""
+        return self.filter(is_deleted=True)
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
     """
     Manager для автоматической фильтрации удаленных записей.
 
-    По умолчанию возвращает только НЕ удаленные записи.
+    По умолчанию возвращает только НЕ удаленные записи, поэтому фильтровать
+    is_deleted=False в views не нужно.
 
     Методы:
     - get_queryset(): возвращает только активные записи (is_deleted=False)
@@ -84,12 +132,23 @@ class SoftDeleteManager(models.Manager):
 
     def get_queryset(self):
         """Возвращает только НЕ удаленные записи."""
-        return super().get_queryset().filter(is_deleted=False)
+        return super().get_queryset().alive()
 
     def deleted(self):
         """Возвращает только удаленные записи."""
-        return super().get_queryset().filter(is_deleted=True)
+        return super().get_queryset().dead()
 
     def all_with_deleted(self):
         """Возвращает ВСЕ записи (включая удаленные)."""
         return super().get_queryset()
+
+
+def live_index(*fields, name):
+    """
+    Частичный индекс по НЕ удаленным записям (WHERE is_deleted = false).
+
+    Запросы через SoftDeleteManager всегда содержат условие is_deleted = false,
+    поэтому планировщик PostgreSQL может использовать такой индекс, а удаленные
+    записи не занимают в нем места.
+    """
+    return models.Index(fields=list(fields), name=name, condition=models.Q(is_deleted=False))
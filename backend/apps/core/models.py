@@ -1,67 +1,10 @@
+import uuid
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
 from django.conf import settings
-from django.utils import timezone
-from datetime import timedelta
-
-
-class SoftDeleteMixin(models.Model):
-    """
-    Миксин для мягкого удаления объектов.
-    Вместо физического удаления из БД, объекты помечаются как удаленные.
-    """
-    is_deleted = models.BooleanField(
-        default=False,
-        db_index=True,
-        verbose_name='Удалено'
-    )
-    deleted_at = models.DateTimeField(
-        null=True,
-        blank=True,
-        db_index=True,
-        verbose_name='Дата удаления'
-    )
-    deleted_by = models.ForeignKey(
-        settings.AUTH_USER_MODEL,
-        on_delete=models.SET_NULL,
-        null=True,
-        blank=True,
-        related_name='%(class)s_deleted',
-        verbose_name='Удалил'
-    )
-
-    class Meta:
-        abstract = True
-
-    def soft_delete(self, user=None):
-        """Помечает объект как удаленный"""
-        self.is_deleted = True
-        self.deleted_at = timezone.now()
-        self.deleted_by = user
-        self.save(update_fields=['is_deleted', 'deleted_at', 'deleted_by'])
-
-    def restore(self):
-        """Восстанавливает объект из корзины"""
-        self.is_deleted = False
-        self.deleted_at = None
-        self.deleted_by = None
-        self.save(update_fields=['is_deleted', 'deleted_at', 'deleted_by'])
-
-    @property
-    def days_until_permanent_deletion(self):
-        """Возвращает количество дней до окончательного удаления"""
-        if not self.deleted_at:
-            return None
-        expiration_date = self.deleted_at + timedelta(days=31)
-        days_left = (expiration_date - timezone.now()).days
-        return max(0, days_left)
-
-
-class SoftDeleteManager(models.Manager):
-    """
-    Менеджер, который по умолчанию исключает удаленные объекты из запросов.
-    """
-    def get_queryset(self):
-        return super().get_queryset().filter(is_deleted=False)
 
 
 class ButtonAccess(models.Model):
@@ -221,3 +164,153 @@ class ButtonAccess(models.Model):
                 roles.append(role)
 
         return roles
+
+
+class ImportJob(models.Model):
+    """
+    Фоновое задание импорта из Excel.
+
+    Файл сохраняется при постановке задания, разбор и запись в БД выполняет
+    Celery воркер (см. apps/core/imports.py). Результат (статистика и ошибки строк)
+    хранится в задании и доступен для скачивания отчетом об ошибках.
+    """
+
+    class ImportType(models.TextChoices):
+        USERS = 'users', 'Персонал'
+        CONTRACTORS = 'contractors', 'Подрядчики'
+        SUPERVISIONS = 'supervisions', 'Надзоры'
+        PROJECTS = 'projects', 'Проекты'
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'В очереди'
+        RUNNING = 'RUNNING', 'Выполняется'
+        SUCCESS = 'SUCCESS', 'Завершен'
+        PARTIAL = 'PARTIAL', 'Завершен с ошибками'
+        FAILED = 'FAILED', 'Ошибка'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='import_jobs',
+        verbose_name='Пользователь'
+    )
+    company = models.ForeignKey(
+        'users.Company',
+        on_delete=models.CASCADE,
+        related_name='import_jobs',
+        verbose_name='Компания'
+    )
+
+    import_type = models.CharField(max_length=30, choices=ImportType.choices, verbose_name='Тип импорта')
+    mode = models.CharField(max_length=20, default='create', verbose_name='Режим')
+    file = models.FileField(upload_to='imports/%Y/%m/%d/', verbose_name='Файл')
+
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING, verbose_name='Статус')
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name='Прогресс, %')
+    stats = models.JSONField(default=dict, blank=True, verbose_name='Статистика')
+    errors = models.JSONField(default=list, blank=True, verbose_name='Ошибки строк')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создано')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Завершено')
+
+    class Meta:
+        verbose_name = 'Задание импорта'
+        verbose_name_plural = 'Задания импорта'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_import_type_display()} ({self.get_status_display()}) - {self.user_id}"
+
+
+class DocumentCounter(models.Model):
+    """
+    Счетчик порядковых номеров документов (заявок, задач).
+
+    Одна строка на пару (вид документа, область нумерации), например
+    ('material_request', '<id компании>') или ('task', 'ГГГГММДД').
+    Следующий номер выдается одним запросом INSERT ... ON CONFLICT DO UPDATE
+    ... RETURNING (см. apps/core/numbering.py) без чтения самих документов.
+    """
+
+    kind = models.CharField('Вид документа', max_length=50)
+    scope = models.CharField('Область нумерации', max_length=50)
+    value = models.PositiveBigIntegerField('Последний выданный номер', default=0)
+
+    class Meta:
+        verbose_name = 'Счетчик номеров документов'
+        verbose_name_plural = 'Счетчики номеров документов'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'scope'], name='unique_document_counter'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.scope} = {self.value}"
+
+
+class SearchEntry(models.Model):
+    """
+    Строка общего поискового индекса (/api/search/).
+
+    Денормализованная копия текстовых полей проектов, замечаний, заявок,
+    задач, тендеров и пользователей вместе с полями, по которым проверяется
+    видимость (компания, проект, автор, исполнитель). Строки поддерживаются
+    сигналами post_save/post_delete (см. apps/core/global_search.py),
+    search_vector заполняет триггер БД.
+    """
+
+    TYPE_CHOICES = [
+        ('project', 'Проект'),
+        ('issue', 'Замечание'),
+        ('material_request', 'Заявка на материалы'),
+        ('task', 'Задача'),
+        ('tender', 'Тендер'),
+        ('user', 'Пользователь'),
+    ]
+
+    entity_type = models.CharField('Тип объекта', max_length=30, choices=TYPE_CHOICES)
+    object_id = models.PositiveBigIntegerField('ID объекта')
+    company = models.ForeignKey(
+        'users.Company',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Компания'
+    )
+
+    # Поля видимости (ID без внешних ключей: индекс не мешает удалению объектов)
+    project_id = models.BigIntegerField('ID проекта', null=True, blank=True)
+    author_id = models.BigIntegerField('ID автора', null=True, blank=True)
+    assignee_id = models.BigIntegerField('ID исполнителя', null=True, blank=True)
+    restricted = models.BooleanField(
+        'Только для руководства',
+        default=False,
+        help_text='Запись видят только роли с полным доступом к объектам этого типа'
+    )
+
+    number = models.CharField('Номер', max_length=50, blank=True)
+    title = models.CharField('Заголовок', max_length=500)
+    body = models.TextField('Текст', blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField('Обновлено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Запись поискового индекса'
+        verbose_name_plural = 'Поисковый индекс'
+        constraints = [
+            models.UniqueConstraint(fields=['entity_type', 'object_id'], name='unique_search_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['company', 'entity_type'], name='search_entry_company_idx'),
+            GinIndex(fields=['search_vector'], name='search_entry_vector_idx'),
+            # Поиск по части номера/заголовка (icontains -> UPPER(поле) LIKE)
+            GinIndex(OpClass(Upper('number'), name='gin_trgm_ops'), name='search_entry_number_trgm_idx'),
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='search_entry_title_trgm_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.entity_type}:{self.object_id} {self.title}"
@@ -0,0 +1,38 @@
+"""
+Выдача порядковых номеров документов через таблицу счетчиков DocumentCounter.
+
+Номер выдается одним атомарным запросом:
+
+    INSERT ... VALUES (kind, scope, 1)
+    ON CONFLICT (kind, scope) DO UPDATE SET value = value + 1
+    RETURNING value
+
+Запрос не читает таблицы документов (O(1) вместо поиска последнего номера),
+два одновременных запроса не получат один номер, а строка счетчика блокируется
+только до конца короткой транзакции выдачи номера. Если документ после выдачи
+номера не сохранится, номер пропускается (как у последовательностей PostgreSQL).
+"""
+from django.db import connection, transaction
+
+from .models import DocumentCounter
+
+KIND_MATERIAL_REQUEST = 'material_request'
+KIND_TASK = 'task'
+
+
+def next_number(kind, scope):
+    """
+    Следующий номер счетчика (kind, scope), начиная с 1.
+
+    Вне внешней транзакции номер фиксируется сразу; внутри нее строка счетчика
+    остается заблокированной до коммита внешней транзакции.
+    """
+    table = connection.ops.quote_name(DocumentCounter._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (kind, scope, value) VALUES (%s, %s, 1) '
+            f'ON CONFLICT (kind, scope) DO UPDATE SET value = {table}.value + 1 '
+            f'RETURNING value',
+            [kind, str(scope)],
+        )
+        return cursor.fetchone()[0]
@@ -0,0 +1,198 @@
+"""
+Окончательное удаление просроченных объектов корзины частями.
+
+QuerySet.delete() по всей выборке загружает в память все каскадно удаляемые
+объекты (замечания, фото, позиции заявок, историю) и удаляет их в одной длинной
+транзакции. Здесь объекты удаляются частями по PURGE_CHUNK_SIZE, каждая часть -
+в своей транзакции:
+
+- тяжелые зависимые объекты (PURGE_DEPENDENTS) удаляются до родителя отдельными
+  частями, поэтому коллектор Django каждый раз видит ограниченное число объектов
+- модели с файлами без зависимостей (фото замечаний, чертежи) удаляются одним
+  DELETE без загрузки объектов и сигналов: счетчики места компаний сдвигаются
+  одним UPDATE на компанию, файлы удаляются с диска после коммита части
+- файлы остальных моделей (аватары пользователей) тоже удаляются после коммита
+
+Прерванная очистка безопасна: недоудаленные объекты остаются в корзине и
+дочищаются при следующем запуске.
+"""
+import logging
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from apps.users import storage
+from .recycle_bin import RECYCLE_BIN_MODELS, RETENTION_DAYS, get_recycle_bin_model
+
+logger = logging.getLogger(__name__)
+
+# Зависимые объекты, удаляемые частями до родителя: модель -> [(модель, поле связи с родителем)]
+PURGE_DEPENDENTS = {
+    'projects.Project': [
+        ('issues.Issue', 'project'),
+        ('projects.Drawing', 'project'),
+        ('material_requests.MaterialRequest', 'project'),
+        ('tenders.Tender', 'project'),
+    ],
+    'issues.Issue': [
+        ('issues.IssuePhoto', 'issue'),
+    ],
+}
+
+
+def _tracked_file(model):
+    """(поле файла, поле размера, путь к компании) для модели с учитываемыми файлами, иначе None."""
+    for manager, field_name, size_field, company_path in storage.tracked_files():
+        if manager.model is model:
+            return field_name, size_field, company_path
+    return None
+
+
+def delete_files(names):
+    """Удаляет файлы из хранилища (ошибки отдельных файлов только логируются)."""
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError as e:
+            logger.warning(f'[Purge] Не удалось удалить файл {name}: {e}')
+
+
+def _delete_with_files(model, pks, tracked):
+    """
+    Удаляет объекты с файлами одним DELETE, без загрузки объектов и сигналов.
+
+    Returns:
+        tuple: (удалено записей, файлов к удалению)
+    """
+    field_name, size_field, company_path = tracked
+    queryset = model._base_manager.filter(pk__in=pks)
+    rows = list(queryset.values_list(field_name, size_field, company_path))
+
+    # _raw_delete - тот же быстрый путь, которым коллектор удаляет объекты без сигналов
+    deleted = queryset._raw_delete(queryset.db)
+
+    released = Counter()
+    for _, size, company_id in rows:
+        released[company_id] += size
+    for company_id, size in released.items():
+        storage.add_company_storage(company_id, -size)
+
+    names = [name for name, _, _ in rows if name]
+    transaction.on_commit(lambda: delete_files(names))
+    return deleted, len(names)
+
+
+def _delete_files_on_commit(model, pks, tracked):
+    """
+    Запоминает файлы объектов, удаляемых коллектором, и удаляет их после коммита.
+
+    Returns:
+        int: файлов к удалению
+    """
+    field_name = tracked[0]
+    names = [
+        name for name in model._base_manager.filter(pk__in=pks).values_list(field_name, flat=True)
+        if name
+    ]
+    transaction.on_commit(lambda: delete_files(names))
+    return len(names)
+
+
+def purge_queryset(queryset, stats, chunk_size=None):
+    """
+    Удаляет все объекты выборки частями, каждую часть - в своей транзакции.
+
+    Args:
+        stats: Counter, куда добавляется число удаленных объектов по моделям
+            (включая каскадные) и файлов ('files')
+
+    Returns:
+        int: количество удаленных объектов самой выборки
+    """
+    model = queryset.model
+    chunk_size = chunk_size or settings.PURGE_CHUNK_SIZE
+    tracked = _tracked_file(model)
+    # На модель никто не ссылается - можно удалять без коллектора
+    raw_delete = tracked and not model._meta.related_objects
+    dependents = PURGE_DEPENDENTS.get(model._meta.label, [])
+    deleted = 0
+
+    while True:
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            break
+
+        for dependent_label, link in dependents:
+            dependent = apps.get_model(dependent_label)
+            purge_queryset(dependent._base_manager.filter(**{f'{link}__in': pks}), stats, chunk_size)
+
+        with transaction.atomic():
+            if raw_delete:
+                count, files = _delete_with_files(model, pks, tracked)
+                stats[model._meta.label] += count
+            else:
+                # Счетчики места сдвигают сигналы моделей, файлы удаляем после коммита
+                files = _delete_files_on_commit(model, pks, tracked) if tracked else 0
+                _, per_model = model._base_manager.filter(pk__in=pks).delete()
+                stats.update(per_model)
+            stats['files'] += files
+        deleted += len(pks)
+
+    return deleted
+
+
+def purge_expired(chunk_size=None):
+    """
+    Окончательно удаляет из корзины объекты, удаленные более RETENTION_DAYS дней назад.
+
+    Ошибка одной модели не прерывает очистку остальных.
+
+    Returns:
+        dict: {
+            'deleted_count': объектов корзины удалено,
+            'details': {имя модели: количество},
+            'cascaded': {модель: удалено вместе с зависимыми объектами},
+            'files': удалено файлов,
+            'duration': секунд,
+            'objects_per_second': пропускная способность по всем удаленным объектам,
+        }
+    """
+    expiration_threshold = timezone.now() - timedelta(days=RETENTION_DAYS)
+    started = time.monotonic()
+    stats = Counter()
+    details = {}
+
+    for model_name in RECYCLE_BIN_MODELS:
+        Model = get_recycle_bin_model(model_name)
+        expired_objects = Model.all_objects.filter(is_deleted=True, deleted_at__lte=expiration_threshold)
+        try:
+            count = purge_queryset(expired_objects, stats, chunk_size)
+        except Exception as e:
+            logger.exception(f'[Purge] Ошибка при очистке модели {model_name}: {e}')
+            continue
+        if count:
+            details[model_name] = count
+            logger.info(f'[Purge] Удалено {count} объектов модели {model_name}')
+
+    duration = time.monotonic() - started
+    files = stats.pop('files', 0)
+    total_objects = sum(stats.values())
+    result = {
+        'deleted_count': sum(details.values()),
+        'details': details,
+        'cascaded': dict(stats),
+        'files': files,
+        'duration': round(duration, 3),
+        'objects_per_second': round(total_objects / duration, 1) if duration else total_objects,
+    }
+    logger.info(
+        f"[Purge] Удалено {result['deleted_count']} объектов корзины, всего записей {total_objects}, "
+        f"файлов {files} за {result['duration']} с ({result['objects_per_second']} записей/с)"
+    )
+    return result
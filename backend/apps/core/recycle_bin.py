@@ -0,0 +1,158 @@
+"""
+Выборки корзины (Recycle Bin) по всем моделям с мягким удалением.
+
+Список корзины строится одним запросом UNION ALL по таблицам моделей: название
+записи, ФИО удалившего (JOIN), оставшиеся дни и признак "скоро удалится"
+вычисляются в SQL, сортировка и пагинация тоже выполняются в БД.
+Статистика считается агрегатами, без загрузки объектов.
+"""
+from datetime import timedelta
+
+from django.apps import apps
+from django.db.models import Case, CharField, Count, DurationField, ExpressionWrapper, F, Q, Value, When
+from django.db.models.functions import Coalesce, Concat, ExtractDay, Greatest, NullIf, Trim
+from django.utils import timezone
+
+from .mixins import SOFT_DELETE_RETENTION_DAYS
+
+# Срок хранения удаленных объектов до автоудаления
+RETENTION_DAYS = SOFT_DELETE_RETENTION_DAYS
+
+# Объекты, до автоудаления которых осталось меньше стольких дней, считаются срочными
+EXPIRES_SOON_DAYS = 7
+
+# Модели с поддержкой soft delete: имя модели -> (путь, отображаемое название)
+RECYCLE_BIN_MODELS = {
+    'Project': ('projects.Project', 'Проект'),
+    'User': ('users.User', 'Пользователь'),
+    'MaterialRequest': ('material_requests.MaterialRequest', 'Заявка на материалы'),
+    'Tender': ('tenders.Tender', 'Тендер'),
+}
+
+# Колонки строки корзины (одинаковый порядок во всех частях UNION)
+ITEM_COLUMNS = [
+    'id', 'deleted_at', 'model_name', 'model_verbose_name', 'item_title',
+    'deleted_by_name', 'deleted_by_user_id', 'days_left', 'expires_soon',
+]
+
+
+def get_recycle_bin_model(model_name):
+    """Класс модели по имени ('Project', 'User', ...) или None, если модель не поддерживает корзину."""
+    if model_name not in RECYCLE_BIN_MODELS:
+        return None
+    return apps.get_model(RECYCLE_BIN_MODELS[model_name][0])
+
+
+def _full_name(prefix=''):
+    """ФИО пользователя как в User.get_full_name() (NULL, если пользователя нет)."""
+    return NullIf(
+        Trim(Concat(
+            F(f'{prefix}last_name'), Value(' '),
+            F(f'{prefix}first_name'), Value(' '),
+            F(f'{prefix}middle_name'),
+            output_field=CharField(),
+        )),
+        Value(''),
+    )
+
+
+def _title_expression(model_name):
+    """SQL выражение названия записи для отображения в корзине."""
+    if model_name == 'Project':
+        return F('name')
+    if model_name == 'User':
+        return Coalesce(_full_name(), F('email'), output_field=CharField())
+    if model_name == 'MaterialRequest':
+        return Concat(Value('Заявка №'), F('request_number'), output_field=CharField())
+    return F('title')
+
+
+def deleted_queryset(model_name, user):
+    """Удаленные объекты модели, видимые пользователю."""
+    model = get_recycle_bin_model(model_name)
+    queryset = model.all_objects.filter(is_deleted=True).order_by()
+
+    if user.is_superuser:
+        return queryset
+
+    # Для User и Project фильтруем по компании, для заявок и тендеров - по проектам пользователя
+    if model_name in ('User', 'Project'):
+        if user.company_id:
+            queryset = queryset.filter(company_id=user.company_id)
+    else:
+        queryset = queryset.filter(project__in=user.projects.all())
+
+    return queryset
+
+
+def _annotate_item(queryset, model_name, now):
+    """Добавляет к выборке колонки строки корзины (ITEM_COLUMNS)."""
+    time_left = ExpressionWrapper(
+        F('deleted_at') + timedelta(days=RETENTION_DAYS) - Value(now),
+        output_field=DurationField(),
+    )
+    # days_left < EXPIRES_SOON_DAYS <=> удалено раньше этого момента
+    expires_soon_threshold = now - timedelta(days=RETENTION_DAYS - EXPIRES_SOON_DAYS)
+
+    return queryset.annotate(
+        model_name=Value(model_name, output_field=CharField()),
+        model_verbose_name=Value(RECYCLE_BIN_MODELS[model_name][1], output_field=CharField()),
+        item_title=_title_expression(model_name),
+        deleted_by_name=_full_name('deleted_by__'),
+        deleted_by_user_id=F('deleted_by_id'),
+        days_left=Greatest(ExtractDay(time_left), Value(0)),
+        expires_soon=Case(
+            When(deleted_at__lt=expires_soon_threshold, then=Value(True)),
+            default=Value(False),
+        ),
+    ).values(*ITEM_COLUMNS)
+
+
+def recycle_bin_items(user, model_filter=None, expires_soon_only=False):
+    """
+    Строки корзины всех моделей одним запросом UNION ALL, новые первыми.
+
+    Args:
+        model_filter: имя модели из RECYCLE_BIN_MODELS (None - все модели)
+
+    Returns:
+        QuerySet: словари с колонками ITEM_COLUMNS
+    """
+    now = timezone.now()
+    parts = []
+    for model_name in RECYCLE_BIN_MODELS:
+        if model_filter and model_name != model_filter:
+            continue
+        queryset = deleted_queryset(model_name, user)
+        if expires_soon_only:
+            queryset = queryset.filter(
+                deleted_at__lt=now - timedelta(days=RETENTION_DAYS - EXPIRES_SOON_DAYS)
+            )
+        parts.append(_annotate_item(queryset, model_name, now))
+
+    return parts[0].union(*parts[1:], all=True).order_by('-deleted_at', 'model_name', '-id')
+
+
+def recycle_bin_stats(user):
+    """
+    Количество удаленных объектов по моделям и срочных объектов одним запросом.
+
+    Returns:
+        dict: {имя модели: {'total': int, 'expires_soon': int}}
+    """
+    expires_soon_threshold = timezone.now() - timedelta(days=RETENTION_DAYS - EXPIRES_SOON_DAYS)
+    parts = [
+        deleted_queryset(model_name, user)
+        .annotate(model_name=Value(model_name, output_field=CharField()))
+        .values('model_name')
+        .annotate(
+            total=Count('id'),
+            expires_soon=Count('id', filter=Q(deleted_at__lt=expires_soon_threshold)),
+        )
+        .values('model_name', 'total', 'expires_soon')
+        for model_name in RECYCLE_BIN_MODELS
+    ]
+    stats = {model_name: {'total': 0, 'expires_soon': 0} for model_name in RECYCLE_BIN_MODELS}
+    for row in parts[0].union(*parts[1:], all=True):
+        stats[row['model_name']] = {'total': row['total'], 'expires_soon': row['expires_soon']}
+    return stats
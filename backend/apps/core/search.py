@@ -0,0 +1,102 @@
+"""
+Полнотекстовый поиск по документам (заявки, замечания, задачи).
+
+Каждая модель хранит колонку search_vector (tsvector, словарь 'russian'),
+которую поддерживает триггер БД при изменении текстовых полей, и GIN индекс
+по ней. Номера и названия дополнительно покрыты GIN индексами pg_trgm:
+поиск по части номера или слова (ILIKE '%...%') идет по индексу, а не
+последовательным сканированием.
+
+Слова запроса ищутся с учетом морфологии и как префиксы ('арматур' найдет
+"арматуры", "арматурная"). Результаты сортируются по релевантности:
+ранг полнотекстового совпадения плюс сходство с номером/названием.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+SEARCH_CONFIG = 'russian'
+
+# Аннотация с релевантностью найденной записи
+RANK_FIELD = 'search_rank'
+
+WORD_RE = re.compile(r'\w+')
+
+
+def build_search_query(text):
+    """
+    Запрос tsquery: все слова текста как префиксы ('слово:*' & ...).
+
+    Returns:
+        SearchQuery или None, если в тексте нет слов
+    """
+    words = WORD_RE.findall(text.lower())
+    if not words:
+        return None
+    return SearchQuery(
+        ' & '.join(f'{word}:*' for word in words),
+        config=SEARCH_CONFIG,
+        search_type='raw',
+    )
+
+
+def search_queryset(queryset, text, trigram_fields=()):
+    """
+    Фильтрует queryset по тексту и добавляет аннотацию релевантности RANK_FIELD.
+
+    Args:
+        text: строка поиска
+        trigram_fields: поля с индексом gin_trgm_ops (номер, название) -
+            по ним ищется вхождение подстроки
+
+    Returns:
+        QuerySet без изменения сортировки
+    """
+    text = text.strip()
+    if not text:
+        return queryset
+
+    query = build_search_query(text)
+    condition = Q()
+    rank_parts = []
+    if query is not None:
+        condition |= Q(search_vector=query)
+        rank_parts.append(SearchRank(F('search_vector'), query))
+    for field in trigram_fields:
+        condition |= Q(**{f'{field}__icontains': text})
+        rank_parts.append(TrigramWordSimilarity(text, field))
+
+    if not rank_parts:
+        return queryset.none()
+    rank = rank_parts[0] if len(rank_parts) == 1 else Greatest(*rank_parts)
+    return queryset.filter(condition).annotate(**{RANK_FIELD: rank})
+
+
+def order_by_rank(queryset):
+    """Сортирует найденные записи по релевантности, прежняя сортировка - вторым ключом."""
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    return queryset.order_by(f'-{RANK_FIELD}', *ordering)
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    Поиск по параметру ?search= через search_vector вместо ILIKE по search_fields.
+
+    Поля поиска подстроки задаются атрибутом ViewSet search_trigram_fields.
+    Ставится после OrderingFilter: без явного ?ordering= результаты
+    сортируются по релевантности.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '')
+        if not text.strip():
+            return queryset
+
+        queryset = search_queryset(queryset, text, getattr(view, 'search_trigram_fields', ()))
+        if api_settings.ORDERING_PARAM not in request.query_params:
+            queryset = order_by_rank(queryset)
+        return queryset
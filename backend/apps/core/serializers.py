@@ -4,7 +4,7 @@
 
 from rest_framework import serializers
 from django.contrib.contenttypes.models import ContentType
-from .models import ButtonAccess
+from .models import ButtonAccess, ImportJob
 
 
 class RecycleBinItemSerializer(serializers.Serializer):
@@ -17,10 +17,10 @@ class RecycleBinItemSerializer(serializers.Serializer):
     id = serializers.IntegerField(read_only=True)
     model_name = serializers.CharField(read_only=True)  # 'Project', 'User', 'MaterialRequest', 'Tender'
     model_verbose_name = serializers.CharField(read_only=True)  # 'Проект', 'Пользователь', и т.д.
-    title = serializers.CharField(read_only=True)  # Название записи
+    title = serializers.CharField(source='item_title', read_only=True)  # Название записи
     deleted_at = serializers.DateTimeField(read_only=True)
-    deleted_by = serializers.CharField(source='deleted_by.get_full_name', read_only=True)
-    deleted_by_id = serializers.IntegerField(source='deleted_by.id', read_only=True)
+    deleted_by = serializers.CharField(source='deleted_by_name', read_only=True)  # ФИО удалившего
+    deleted_by_id = serializers.IntegerField(source='deleted_by_user_id', read_only=True)
     days_left = serializers.IntegerField(read_only=True)  # Сколько дней осталось до автоудаления
     expires_soon = serializers.BooleanField(read_only=True)  # True если осталось < 7 дней
     can_restore = serializers.BooleanField(read_only=True)  # Может ли текущий пользователь восстановить
@@ -84,3 +84,25 @@ class ButtonAccessMinimalSerializer(serializers.ModelSerializer):
             'button_name',
             'description',
         ]
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор фонового задания импорта из Excel.
+    """
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id',
+            'import_type',
+            'mode',
+            'status',
+            'progress',
+            'stats',
+            'errors',
+            'error',
+            'created_at',
+            'finished_at',
+        ]
+        read_only_fields = fields
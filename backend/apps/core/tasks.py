@@ -4,10 +4,10 @@ Celery tasks для работы с корзиной (Recycle Bin).
 
 from celery import shared_task
 from django.utils import timezone
-from datetime import timedelta
-from django.apps import apps
 import logging
 
+from .purge import purge_expired
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,63 +16,80 @@ def clean_recycle_bin():
     """
     Периодическая задача для автоматической очистки корзины.
 
-    Удаляет все объекты, которые находятся в корзине более 31 дня.
-    Запускается ежедневно в 03:00 по расписанию Celery Beat.
+    Удаляет все объекты, которые находятся в корзине более 31 дня, частями
+    (см. apps.core.purge). Запускается ежедневно в 03:00 по расписанию Celery Beat.
 
     Returns:
-        dict: Статистика удаления с количеством удаленных объектов по моделям
+        dict: Статистика удаления с количеством удаленных объектов по моделям,
+        числом удаленных файлов и пропускной способностью
     """
     logger.info("[Recycle Bin] Начало автоматической очистки корзины")
 
     now = timezone.now()
-    expiration_threshold = now - timedelta(days=31)
-
-    # Модели с поддержкой soft delete
-    models_with_soft_delete = [
-        'projects.Project',
-        'users.User',
-        'material_requests.MaterialRequest',
-        'tenders.Tender',
-    ]
-
-    deleted_count = 0
-    details = {}
-
-    # Удаляем просроченные объекты из всех моделей
-    for model_path in models_with_soft_delete:
-        app_label, model_name = model_path.split('.')
-
-        try:
-            Model = apps.get_model(app_label, model_name)
-
-            # Получаем просроченные объекты (удаленные более 31 дня назад)
-            expired_objects = Model.all_objects.filter(
-                is_deleted=True,
-                deleted_at__lte=expiration_threshold
-            )
-
-            count = expired_objects.count()
-
-            if count > 0:
-                logger.info(f"[Recycle Bin] Найдено {count} просроченных объектов модели {model_name}")
-
-                # Физически удаляем из БД
-                expired_objects.delete()
-
-                deleted_count += count
-                details[model_name] = count
+    result = purge_expired()
 
-                logger.info(f"[Recycle Bin] Удалено {count} объектов модели {model_name}")
-
-        except Exception as e:
-            logger.error(f"[Recycle Bin] Ошибка при очистке модели {model_name}: {str(e)}")
-            continue
-
-    logger.info(f"[Recycle Bin] Автоматическая очистка завершена. Всего удалено: {deleted_count} объектов")
+    logger.info(f"[Recycle Bin] Автоматическая очистка завершена. Всего удалено: {result['deleted_count']} объектов")
 
     return {
         'status': 'success',
-        'deleted_count': deleted_count,
-        'details': details,
+        **result,
         'timestamp': now.isoformat(),
     }
+
+
+@shared_task(name='core.run_import_job')
+def run_import_job(job_id):
+    """
+    Выполняет фоновое задание импорта из Excel (см. apps/core/imports.py).
+
+    Args:
+        job_id: UUID задания ImportJob
+
+    Returns:
+        str: итоговый статус задания
+    """
+    from .imports import PARSE_PROGRESS, apply_in_chunks, get_import_handlers, notify_import_progress
+    from .models import ImportJob
+
+    job = ImportJob.objects.filter(id=job_id).select_related('company', 'user').first()
+    if not job:
+        logger.warning(f"[Import] Задание {job_id} не найдено")
+        return 'missing'
+
+    job.status = ImportJob.Status.RUNNING
+    job.save(update_fields=['status'])
+    notify_import_progress(job)
+
+    try:
+        parse, apply_chunk = get_import_handlers(job.import_type)
+        valid_rows, errors = parse(job)
+        job.stats = {
+            'total_rows': len(valid_rows) + len(errors),
+            'valid_rows': len(valid_rows),
+            'error_rows': len(errors),
+        }
+
+        if errors:
+            # Как и синхронный импорт: файл с ошибками валидации не записывается
+            job.errors = errors
+            job.status = ImportJob.Status.FAILED
+            job.error = 'Обнаружены ошибки валидации'
+        else:
+            job.progress = PARSE_PROGRESS
+            job.save(update_fields=['progress', 'stats'])
+            notify_import_progress(job)
+
+            apply_in_chunks(job, valid_rows, apply_chunk)
+            job.status = ImportJob.Status.PARTIAL if job.errors else ImportJob.Status.SUCCESS
+            job.progress = 100
+    except Exception as e:
+        logger.exception(f"[Import] Ошибка задания {job_id}: {e}")
+        job.status = ImportJob.Status.FAILED
+        job.error = str(e)
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'progress', 'stats', 'errors', 'error', 'finished_at'])
+    notify_import_progress(job)
+
+    logger.info(f"[Import] Задание {job_id} ({job.import_type}) завершено: {job.status}")
+    return job.status
@@ -1,3 +1,304 @@
-from django.test import TestCase
+import io
 
-# Create your tests here.
+import openpyxl
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from apps.core.imports import build_error_report
+from apps.core.models import ImportJob
+from apps.core.tasks import run_import_job
+
+
+def make_projects_file(names):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['Наименование объекта*', 'Страна', 'Адрес*'])
+    for name in names:
+        sheet.append([name, 'Казахстан', 'Новый адрес'])
+    content = io.BytesIO()
+    workbook.save(content)
+    return SimpleUploadedFile('projects.xlsx', content.getvalue())
+
+
+@pytest.mark.django_db
+class TestImportJob:
+    def test_projects_import_applies_chunks_and_keeps_row_errors(self, settings, tmp_path):
+        from apps.projects.models import Project
+        from apps.users.models import Company, User
+
+        settings.MEDIA_ROOT = str(tmp_path)
+        settings.IMPORT_CHUNK_SIZE = 2
+        company = Company.objects.create(name='Test Company')
+        user = User.objects.create_user(
+            email='director@example.com', password='testpass123', first_name='Test', last_name='User',
+            role=User.Role.DIRECTOR, company=company,
+        )
+        Project.objects.create(name='Существующий', company=company, address='Адрес')
+
+        job = ImportJob.objects.create(
+            user=user, company=company, import_type=ImportJob.ImportType.PROJECTS,
+            file=make_projects_file(['Существующий', 'Объект 1', 'Объект 2']),
+        )
+        run_import_job(str(job.id))
+
+        job.refresh_from_db()
+        assert job.status == ImportJob.Status.PARTIAL
+        assert job.progress == 100
+        assert job.stats['new_records'] == 2
+        assert job.errors == [{'row': 2, 'errors': ['Проект "Существующий" уже существует']}]
+        assert Project.objects.filter(company=company).count() == 3
+
+        report = openpyxl.load_workbook(io.BytesIO(build_error_report(job)))
+        assert list(report.active.values)[1] == (2, 'Проект "Существующий" уже существует')
+
+    def test_projects_upsert_updates_existing_and_skips_file_duplicates(self, settings, tmp_path):
+        from apps.projects.models import Project
+        from apps.users.models import Company, User
+
+        settings.MEDIA_ROOT = str(tmp_path)
+        company = Company.objects.create(name='Test Company')
+        user = User.objects.create_user(
+            email='director@example.com', password='testpass123', first_name='Test', last_name='User',
+            role=User.Role.DIRECTOR, company=company,
+        )
+        project = Project.objects.create(name='Существующий', company=company, address='Старый адрес')
+
+        job = ImportJob.objects.create(
+            user=user, company=company, import_type=ImportJob.ImportType.PROJECTS, mode='upsert',
+            file=make_projects_file(['Существующий', 'Новый', 'Новый']),
+        )
+        run_import_job(str(job.id))
+
+        job.refresh_from_db()
+        project.refresh_from_db()
+        assert job.stats['new_records'] == 1
+        assert job.stats['updated_records'] == 1
+        assert job.errors == [{'row': 4, 'errors': ['Проект "Новый" повторяется в файле']}]
+        assert project.address == 'Новый адрес'
+        assert project.customer == 'Казахстан'
+
+
+@pytest.mark.django_db
+class TestRecycleBin:
+    def test_list_is_single_paginated_query_with_sql_days_left(self, django_assert_max_num_queries):
+        from datetime import timedelta
+        from unittest import mock
+
+        from django.utils import timezone
+        from rest_framework.test import APIClient
+
+        from apps.projects.models import Project
+        from apps.users.models import Company, User
+
+        company = Company.objects.create(name='Test Company')
+        director = User.objects.create_user(
+            email='director@example.com', password='testpass123', first_name='Иван', last_name='Петров',
+            role=User.Role.DIRECTOR, company=company,
+        )
+        now = timezone.now()
+        for days_ago in (1, 2, 28):
+            project = Project.objects.create(name=f'Удален {days_ago} дн.', company=company, address='Адрес')
+            Project.all_objects.filter(pk=project.pk).update(
+                is_deleted=True, deleted_at=now - timedelta(days=days_ago), deleted_by=director,
+            )
+
+        client = APIClient()
+        client.force_authenticate(director)
+        with mock.patch('apps.core.access_helpers.has_button_access', return_value=True) as access:
+            with django_assert_max_num_queries(3):
+                response = client.get('/api/recycle-bin/', {'page_size': 2})
+
+        assert response.status_code == 200
+        assert response.data['count'] == 3
+        assert [item['title'] for item in response.data['results']] == ['Удален 1 дн.', 'Удален 2 дн.']
+        assert response.data['results'][0]['deleted_by'] == 'Петров Иван'
+        assert response.data['results'][0]['days_left'] == 29
+        # Права проверяются один раз на запрос (плюс проверка доступа к корзине)
+        assert access.call_count == 3
+
+        with mock.patch('apps.core.access_helpers.has_button_access', return_value=True):
+            response = client.get('/api/recycle-bin/stats/')
+        assert response.data['projects_count'] == 3
+        assert response.data['expires_soon_count'] == 1
+
+    def test_purge_expired_deletes_in_chunks_with_files(self, settings, tmp_path, django_capture_on_commit_callbacks):
+        import os
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from apps.core.purge import purge_expired
+        from apps.projects.models import Drawing, Project
+        from apps.users.models import Company
+
+        settings.MEDIA_ROOT = str(tmp_path)
+        settings.PURGE_CHUNK_SIZE = 2
+        company = Company.objects.create(name='Test Company')
+        kept = Project.objects.create(name='Активный', company=company, address='Адрес')
+        Drawing.objects.create(project=kept, file=SimpleUploadedFile('kept.pdf', b'x' * 10), file_name='kept.pdf')
+        paths = []
+        for index in range(3):
+            project = Project.objects.create(name=f'Удален {index}', company=company, address='Адрес')
+            drawing = Drawing.objects.create(
+                project=project, file=SimpleUploadedFile('plan.pdf', b'x' * 100), file_name='plan.pdf'
+            )
+            paths.append(drawing.file.path)
+        Project.all_objects.exclude(pk=kept.pk).update(
+            is_deleted=True, deleted_at=timezone.now() - timedelta(days=40),
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            result = purge_expired()
+
+        company.refresh_from_db()
+        assert result['details'] == {'Project': 3}
+        assert result['cascaded']['projects.Drawing'] == 3
+        assert result['files'] == 3
+        assert not any(os.path.exists(path) for path in paths)
+        assert company.storage_used == 10
+        assert list(Project.all_objects.values_list('name', flat=True)) == ['Активный']
+
+
+@pytest.mark.django_db
+class TestSoftDelete:
+    def test_manager_hides_deleted_rows_and_restore_brings_them_back(self):
+        from apps.projects.models import Project
+        from apps.users.models import Company, User
+
+        company = Company.objects.create(name='Test Company')
+        user = User.objects.create_user(
+            email='director@example.com', password='testpass123', first_name='Test', last_name='User',
+            role=User.Role.DIRECTOR, company=company,
+        )
+        project = Project.objects.create(name='Объект', company=company, address='Адрес')
+
+        project.soft_delete(user)
+        assert not Project.objects.filter(pk=project.pk).exists()
+        assert Project.objects.deleted().get().deleted_by == user
+        assert Project.all_objects.filter(company=company).count() == 1
+
+        project.restore()
+        assert Project.objects.alive().get() == project
+
+    def test_hot_lookup_indexes_are_partial(self):
+        from django.db.models import Q
+
+        from apps.material_requests.models import MaterialRequest
+        from apps.tasks.models import Task
+
+        for model in (MaterialRequest, Task):
+            live_indexes = [index for index in model._meta.indexes if index.condition is not None]
+            assert live_indexes
+            assert all(index.condition == Q(is_deleted=False) for index in live_indexes)
+
+
+@pytest.mark.django_db
+class TestDocumentNumbering:
+    def test_counters_are_independent_per_scope(self):
+        from apps.core.models import DocumentCounter
+        from apps.core.numbering import KIND_MATERIAL_REQUEST, KIND_TASK, next_number
+
+        assert [next_number(KIND_MATERIAL_REQUEST, 1) for _ in range(3)] == [1, 2, 3]
+        assert next_number(KIND_MATERIAL_REQUEST, 2) == 1
+        assert next_number(KIND_TASK, '20261019') == 1
+        assert DocumentCounter.objects.get(kind=KIND_MATERIAL_REQUEST, scope='1').value == 3
+
+    def test_request_number_continues_company_counter(self):
+        from django.utils import timezone
+
+        from apps.core.models import DocumentCounter
+        from apps.core.numbering import KIND_MATERIAL_REQUEST
+        from apps.material_requests.models import MaterialRequest
+        from apps.users.models import Company
+
+        company = Company.objects.create(name='Test Company')
+        DocumentCounter.objects.create(kind=KIND_MATERIAL_REQUEST, scope=str(company.id), value=41)
+
+        request = MaterialRequest(company=company)
+        assert request.generate_request_number() == f"{timezone.now().strftime('%d%m%Y')}-42"
+
+
+@pytest.mark.django_db
+class TestGlobalSearch:
+    def test_index_follows_saves_and_soft_deletes(self, django_assert_num_queries):
+        from apps.core.models import SearchEntry
+        from apps.material_requests.models import MaterialRequest
+        from apps.projects.models import Project
+        from apps.users.models import Company, User
+
+        company = Company.objects.create(name='Test Company')
+        director = User.objects.create_user(
+            email='director@example.com', password='testpass123', first_name='Иван', last_name='Петров',
+            role=User.Role.DIRECTOR, company=company,
+        )
+        project = Project.objects.create(name='Жилой комплекс', company=company, address='Адрес')
+        material_request = MaterialRequest.objects.create(
+            company=company, project=project, author=director, title='Арматура', description='Для фундамента'
+        )
+
+        entry = SearchEntry.objects.get(entity_type='material_request', object_id=material_request.id)
+        assert (entry.company_id, entry.project_id, entry.author_id) == (company.id, project.id, director.id)
+        assert entry.number == material_request.request_number
+        assert SearchEntry.objects.get(entity_type='user', object_id=director.id).title == 'Петров Иван'
+
+        # Смена статуса не затрагивает индекс
+        material_request.status = MaterialRequest.STATUS_IN_APPROVAL
+        with django_assert_num_queries(1):
+            material_request.save(update_fields=['status'])
+
+        material_request.title = 'Арматура А500'
+        material_request.save()
+        assert SearchEntry.objects.get(entity_type='material_request', object_id=material_request.id).title == 'Арматура А500'
+
+        material_request.soft_delete(director)
+        assert not SearchEntry.objects.filter(entity_type='material_request', object_id=material_request.id).exists()
+        project.delete()
+        assert not SearchEntry.objects.filter(entity_type='project').exists()
+
+    def test_search_returns_top_hits_per_type_within_visibility(self, django_assert_num_queries):
+        from datetime import timedelta
+
+        from django.utils import timezone
+        from rest_framework.test import APIClient
+
+        from apps.issues.models import Issue
+        from apps.projects.models import Project, Site
+        from apps.tasks.models import Task
+        from apps.users.models import Company, User
+
+        company = Company.objects.create(name='Test Company')
+        director = User.objects.create_user(
+            email='director@example.com', password='testpass123', first_name='Test', last_name='User',
+            role=User.Role.DIRECTOR, company=company,
+        )
+        engineer = User.objects.create_user(
+            email='engineer@example.com', password='testpass123', first_name='Test', last_name='User',
+            role=User.Role.ENGINEER, company=company, approved=True,
+        )
+        own_project = Project.objects.create(name='Объект', company=company, address='Адрес')
+        own_project.team_members.add(engineer)
+        other_project = Project.objects.create(name='Чужой объект', company=company, address='Адрес')
+        own_issue = Issue.objects.create(
+            project=own_project, site=Site.objects.create(project=own_project, name='Участок'),
+            title='Трещина в фундаменте', description='Стена', created_by=director,
+        )
+        Issue.objects.create(
+            project=other_project, site=Site.objects.create(project=other_project, name='Участок'),
+            title='Фундамент залит', description='-', created_by=director,
+        )
+        for number in range(3):
+            Task.objects.create(
+                company=company, created_by=director, title=f'Проверить фундамент {number}',
+                description='Осмотр', deadline=timezone.now() + timedelta(days=1),
+            )
+
+        client = APIClient()
+        client.force_authenticate(engineer)
+        with django_assert_num_queries(1):
+            response = client.get('/api/search/', {'q': 'фундамента', 'limit': 2})
+
+        assert response.status_code == 200
+        results = response.data['results']
+        assert [hit['id'] for hit in results['issue']] == [own_issue.id]
+        assert len(results['task']) == 2
+        assert results['material_request'] == []
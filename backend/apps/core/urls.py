@@ -1,15 +1,20 @@
 """
-URL маршруты для корзины (Recycle Bin), матрицы доступа к кнопкам и формы обратной связи.
+URL маршруты для корзины (Recycle Bin), матрицы доступа к кнопкам формы обратной связи, заданий импорта
+и общего поиска.
 """
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RecycleBinViewSet, ButtonAccessViewSet, ContactFormViewSet
+from .views import (
+    RecycleBinViewSet, ButtonAccessViewSet, ContactFormViewSet, ImportJobViewSet, GlobalSearchViewSet,
+)
 
 router = DefaultRouter()
 router.register(r'recycle-bin', RecycleBinViewSet, basename='recycle-bin')
 router.register(r'button-access', ButtonAccessViewSet, basename='button-access')
 router.register(r'contact-form', ContactFormViewSet, basename='contact-form')
+router.register(r'import-jobs', ImportJobViewSet, basename='import-job')
+router.register(r'search', GlobalSearchViewSet, basename='global-search')
 
 urlpatterns = [
     path('', include(router.urls)),
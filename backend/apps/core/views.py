@@ -1,14 +1,15 @@
 """
-ViewSet для работы с корзиной (Recycle Bin) и матрицей доступа к кнопкам.
+ViewSet для работы с корзиной (Recycle Bin), матрицей доступа к кнопкам, заданиями импорта
+и общим поиском.
 """
 
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
+from django.http import HttpResponse
 from django.utils import timezone
-from datetime import timedelta
-from django.apps import apps
 
 from .permissions import CanAccessRecycleBin, CanRestoreFromRecycleBin, CanPermanentlyDelete
 from .serializers import (
@@ -16,8 +17,24 @@ from .serializers import (
     RecycleBinStatsSerializer,
     ButtonAccessSerializer,
     ButtonAccessMinimalSerializer,
+    ImportJobSerializer,
 )
-from .models import ButtonAccess
+from .models import ButtonAccess, ImportJob
+from .global_search import DEFAULT_LIMIT, MAX_LIMIT, global_search
+from .purge import purge_expired
+from .recycle_bin import (
+    RECYCLE_BIN_MODELS,
+    get_recycle_bin_model,
+    recycle_bin_items,
+    recycle_bin_stats,
+)
+
+
+class RecycleBinPagination(PageNumberPagination):
+    """Пагинация списка корзины (размер страницы можно менять параметром page_size)."""
+
+    page_size_query_param = 'page_size'
+    max_page_size = 100
 
 
 class RecycleBinViewSet(viewsets.ViewSet):
@@ -34,22 +51,6 @@ class RecycleBinViewSet(viewsets.ViewSet):
 
     permission_classes = [IsAuthenticated, CanAccessRecycleBin]
 
-    # Модели с поддержкой soft delete
-    MODELS_WITH_SOFT_DELETE = [
-        'projects.Project',
-        'users.User',
-        'material_requests.MaterialRequest',
-        'tenders.Tender',
-    ]
-
-    # Маппинг названий моделей
-    MODEL_VERBOSE_NAMES = {
-        'Project': 'Проект',
-        'User': 'Пользователь',
-        'MaterialRequest': 'Заявка на материалы',
-        'Tender': 'Тендер',
-    }
-
     def _get_model_title(self, obj):
         """Получает название объекта для отображения в корзине."""
         model_name = obj.__class__.__name__
@@ -65,87 +66,38 @@ class RecycleBinViewSet(viewsets.ViewSet):
         else:
             return str(obj)
 
-    def _calculate_days_left(self, deleted_at):
-        """Вычисляет количество дней до автоудаления (31 день с момента удаления)."""
-        if not deleted_at:
-            return None
-
-        now = timezone.now()
-        expiration_date = deleted_at + timedelta(days=31)
-        days_left = (expiration_date - now).days
-
-        return max(0, days_left)  # Не может быть отрицательным
-
     def list(self, request):
         """
-        Получить список всех удаленных объектов.
+        Получить список всех удаленных объектов (с пагинацией, новые первыми).
 
         Query params:
         - model: фильтр по типу модели ('Project', 'User', 'MaterialRequest', 'Tender')
         - expires_soon: фильтр по срочности (true - только объекты с days_left < 7)
+        - page, page_size: пагинация
         """
-        user = request.user
-        deleted_items = []
-
-        # Фильтры из query params
         model_filter = request.query_params.get('model')
         expires_soon_filter = request.query_params.get('expires_soon', '').lower() == 'true'
 
-        # Собираем удаленные объекты из всех моделей
-        for model_path in self.MODELS_WITH_SOFT_DELETE:
-            app_label, model_name = model_path.split('.')
-            Model = apps.get_model(app_label, model_name)
-
-            # Применяем фильтр по модели
-            if model_filter and model_name != model_filter:
-                continue
-
-            # Получаем удаленные объекты
-            queryset = Model.all_objects.filter(is_deleted=True)
-
-            # Для User и Project фильтруем по компании (если не суперадмин)
-            if model_name in ['User', 'Project'] and not user.is_superuser:
-                if hasattr(Model, 'company') and user.company:
-                    queryset = queryset.filter(company=user.company)
-
-            # Для MaterialRequest и Tender фильтруем по проектам пользователя
-            if model_name in ['MaterialRequest', 'Tender'] and not user.is_superuser:
-                if hasattr(user, 'projects'):
-                    user_projects = user.projects.all()
-                    queryset = queryset.filter(project__in=user_projects)
-
-            for obj in queryset:
-                days_left = self._calculate_days_left(obj.deleted_at)
-                expires_soon = days_left is not None and days_left < 7
-
-                # Применяем фильтр expires_soon
-                if expires_soon_filter and not expires_soon:
-                    continue
-
-                # Проверяем права на восстановление и удаление через ButtonAccess
-                from apps.core.access_helpers import has_button_access
-                can_restore = has_button_access(request.user, 'recycle_bin_restore', 'dashboard')
-                can_delete = has_button_access(request.user, 'recycle_bin_delete', 'dashboard')
-
-                deleted_items.append({
-                    'id': obj.id,
-                    'model_name': model_name,
-                    'model_verbose_name': self.MODEL_VERBOSE_NAMES.get(model_name, model_name),
-                    'title': self._get_model_title(obj),
-                    'deleted_at': obj.deleted_at,
-                    'deleted_by': obj.deleted_by,
-                    'deleted_by_id': obj.deleted_by.id if obj.deleted_by else None,
-                    'days_left': days_left,
-                    'expires_soon': expires_soon,
-                    'can_restore': can_restore,
-                    'can_delete': can_delete,
-                })
+        if model_filter and model_filter not in RECYCLE_BIN_MODELS:
+            return Response(
+                {'detail': f'Модель {model_filter} не поддерживает корзину'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Сортируем по дате удаления (новые первыми)
-        deleted_items.sort(key=lambda x: x['deleted_at'], reverse=True)
+        queryset = recycle_bin_items(request.user, model_filter, expires_soon_filter)
+        paginator = RecycleBinPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
 
-        serializer = RecycleBinItemSerializer(deleted_items, many=True)
-        return Response(serializer.data)
+        # Права одинаковы для всех записей - проверяем один раз на запрос
+        from apps.core.access_helpers import has_button_access
+        can_restore = has_button_access(request.user, 'recycle_bin_restore', 'dashboard')
+        can_delete = has_button_access(request.user, 'recycle_bin_delete', 'dashboard')
+        for item in page:
+            item['can_restore'] = can_restore
+            item['can_delete'] = can_delete
+
+        serializer = RecycleBinItemSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def stats(self, request):
@@ -162,53 +114,16 @@ class RecycleBinViewSet(viewsets.ViewSet):
             "expires_soon_count": 3
         }
         """
-        user = request.user
+        counts = recycle_bin_stats(request.user)
         stats = {
-            'total_items': 0,
-            'projects_count': 0,
-            'users_count': 0,
-            'material_requests_count': 0,
-            'tenders_count': 0,
-            'expires_soon_count': 0,
+            'total_items': sum(count['total'] for count in counts.values()),
+            'projects_count': counts['Project']['total'],
+            'users_count': counts['User']['total'],
+            'material_requests_count': counts['MaterialRequest']['total'],
+            'tenders_count': counts['Tender']['total'],
+            'expires_soon_count': sum(count['expires_soon'] for count in counts.values()),
         }
 
-        # Собираем статистику из всех моделей
-        for model_path in self.MODELS_WITH_SOFT_DELETE:
-            app_label, model_name = model_path.split('.')
-            Model = apps.get_model(app_label, model_name)
-
-            # Получаем удаленные объекты
-            queryset = Model.all_objects.filter(is_deleted=True)
-
-            # Фильтруем по компании/проектам
-            if model_name in ['User', 'Project'] and not user.is_superuser:
-                if hasattr(Model, 'company') and user.company:
-                    queryset = queryset.filter(company=user.company)
-
-            if model_name in ['MaterialRequest', 'Tender'] and not user.is_superuser:
-                if hasattr(user, 'projects'):
-                    user_projects = user.projects.all()
-                    queryset = queryset.filter(project__in=user_projects)
-
-            count = queryset.count()
-            stats['total_items'] += count
-
-            # Подсчет по типам моделей
-            if model_name == 'Project':
-                stats['projects_count'] = count
-            elif model_name == 'User':
-                stats['users_count'] = count
-            elif model_name == 'MaterialRequest':
-                stats['material_requests_count'] = count
-            elif model_name == 'Tender':
-                stats['tenders_count'] = count
-
-            # Подсчет объектов, у которых осталось < 7 дней
-            for obj in queryset:
-                days_left = self._calculate_days_left(obj.deleted_at)
-                if days_left is not None and days_left < 7:
-                    stats['expires_soon_count'] += 1
-
         serializer = RecycleBinStatsSerializer(stats)
         return Response(serializer.data)
 
@@ -233,21 +148,13 @@ class RecycleBinViewSet(viewsets.ViewSet):
             )
 
         # Находим модель
-        model_path = None
-        for path in self.MODELS_WITH_SOFT_DELETE:
-            if path.endswith(f'.{model_name}'):
-                model_path = path
-                break
-
-        if not model_path:
+        Model = get_recycle_bin_model(model_name)
+        if Model is None:
             return Response(
                 {'detail': f'Модель {model_name} не поддерживает корзину'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        app_label, model_name = model_path.split('.')
-        Model = apps.get_model(app_label, model_name)
-
         # Получаем объект
         try:
             obj = Model.all_objects.get(id=object_id, is_deleted=True)
@@ -258,10 +165,7 @@ class RecycleBinViewSet(viewsets.ViewSet):
             )
 
         # Восстанавливаем
-        obj.is_deleted = False
-        obj.deleted_at = None
-        obj.deleted_by = None
-        obj.save(update_fields=['is_deleted', 'deleted_at', 'deleted_by'])
+        obj.restore()
 
         return Response({
             'detail': 'Объект успешно восстановлен из корзины',
@@ -293,21 +197,13 @@ class RecycleBinViewSet(viewsets.ViewSet):
             )
 
         # Находим модель
-        model_path = None
-        for path in self.MODELS_WITH_SOFT_DELETE:
-            if path.endswith(f'.{model_name}'):
-                model_path = path
-                break
-
-        if not model_path:
+        Model = get_recycle_bin_model(model_name)
+        if Model is None:
             return Response(
                 {'detail': f'Модель {model_name} не поддерживает корзину'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        app_label, model_name = model_path.split('.')
-        Model = apps.get_model(app_label, model_name)
-
         # Получаем объект
         try:
             obj = Model.all_objects.get(id=object_id, is_deleted=True)
@@ -345,36 +241,19 @@ class RecycleBinViewSet(viewsets.ViewSet):
                 "User": 3,
                 "MaterialRequest": 4,
                 "Tender": 3
-            }
+            },
+            "cascaded": {"projects.Project": 5, "issues.Issue": 120, ...},
+            "files": 340,
+            "duration": 1.52,
+            "objects_per_second": 310.4
         }
         """
-        now = timezone.now()
-        expiration_threshold = now - timedelta(days=31)
-
-        deleted_count = 0
-        details = {}
-
-        # Удаляем просроченные объекты из всех моделей
-        for model_path in self.MODELS_WITH_SOFT_DELETE:
-            app_label, model_name = model_path.split('.')
-            Model = apps.get_model(app_label, model_name)
-
-            # Получаем просроченные объекты
-            expired_objects = Model.all_objects.filter(
-                is_deleted=True,
-                deleted_at__lte=expiration_threshold
-            )
-
-            count = expired_objects.count()
-            if count > 0:
-                expired_objects.delete()
-                deleted_count += count
-                details[model_name] = count
+        # Удаление частями со своими транзакциями, без загрузки всех каскадных объектов
+        result = purge_expired()
 
         return Response({
-            'detail': f'Удалено {deleted_count} просроченных объектов',
-            'deleted_count': deleted_count,
-            'details': details
+            'detail': f"Удалено {result['deleted_count']} просроченных объектов",
+            **result,
         })
 
 
@@ -568,6 +447,47 @@ class ButtonAccessViewSet(viewsets.ReadOnlyModelViewSet):
         })
 
 
+class ImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet для отслеживания фоновых заданий импорта из Excel.
+
+    Задания создаются view импорта с полем background=true,
+    пользователь видит только свои задания.
+
+    Endpoints:
+    - GET /api/import-jobs/ - список заданий текущего пользователя
+    - GET /api/import-jobs/{id}/ - состояние задания (статус, прогресс, статистика, ошибки)
+    - GET /api/import-jobs/{id}/error-report/ - Excel отчет об ошибках строк
+    """
+
+    serializer_class = ImportJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return ImportJob.objects.filter(user=self.request.user).order_by('-created_at')
+
+    @action(detail=True, methods=['get'], url_path='error-report')
+    def error_report(self, request, pk=None):
+        """
+        Скачать отчет об ошибках строк задания импорта.
+        """
+        from .imports import build_error_report
+
+        job = self.get_object()
+        if not job.errors:
+            return Response(
+                {'error': 'В задании нет ошибок'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        response = HttpResponse(
+            build_error_report(job),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        response['Content-Disposition'] = f'attachment; filename="import_errors_{job.id}.xlsx"'
+        return response
+
+
 class ContactFormViewSet(viewsets.ViewSet):
     """
     ViewSet для обработки формы обратной связи с лендинга.
@@ -668,3 +588,27 @@ Email: {email}
                 'success': True,
                 'message': 'Спасибо за обращение! Мы свяжемся с вами в ближайшее время.'
             })
+
+
+class GlobalSearchViewSet(viewsets.ViewSet):
+    """
+    Общий поиск по проектам, замечаниям, заявкам, задачам, тендерам и пользователям.
+
+    Endpoints:
+    - GET /api/search/?q=арматура&limit=5 - лучшие результаты каждого типа
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit должен быть числом'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(max(limit, 1), MAX_LIMIT)
+
+        return Response({
+            'query': query,
+            'results': global_search(request.user, query, limit),
+        })
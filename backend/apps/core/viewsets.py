@@ -5,7 +5,6 @@ ViewSet миксины для работы с корзиной (soft delete).
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.utils import timezone
 
 
 class SoftDeleteViewSetMixin:
@@ -26,10 +25,7 @@ class SoftDeleteViewSetMixin:
         instance = self.get_object()
 
         # Помечаем как удаленный
-        instance.is_deleted = True
-        instance.deleted_at = timezone.now()
-        instance.deleted_by = request.user
-        instance.save(update_fields=['is_deleted', 'deleted_at', 'deleted_by'])
+        instance.soft_delete(request.user)
 
         # Возвращаем 200 с сообщением вместо 204, так как возвращаем тело ответа
         return Response(
@@ -62,10 +58,7 @@ class SoftDeleteViewSetMixin:
             )
 
         # Восстанавливаем
-        instance.is_deleted = False
-        instance.deleted_at = None
-        instance.deleted_by = None
-        instance.save(update_fields=['is_deleted', 'deleted_at', 'deleted_by'])
+        instance.restore()
 
         return Response(
             {'detail': 'Объект успешно восстановлен из корзины.'},
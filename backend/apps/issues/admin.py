@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Issue, IssuePhoto, IssueComment
+from .models import Issue, IssuePhoto, IssueComment, IssueDailyStat
+from apps.users.storage import format_file_size
 
 
 class IssuePhotoInline(admin.TabularInline):
@@ -145,20 +146,8 @@ class IssuePhotoAdmin(admin.ModelAdmin):
         """
         Отображение размера файла в удобочитаемом формате.
         """
-        if obj.photo and hasattr(obj.photo, 'size'):
-            size_bytes = obj.photo.size
-            # Форматируем размер файла
-            if size_bytes < 1024:
-                return f"{size_bytes} B"
-            elif size_bytes < 1024 * 1024:
-                size_kb = size_bytes / 1024
-                return f"{size_kb:.1f} KB"
-            elif size_bytes < 1024 * 1024 * 1024:
-                size_mb = size_bytes / (1024 * 1024)
-                return f"{size_mb:.2f} MB"
-            else:
-                size_gb = size_bytes / (1024 * 1024 * 1024)
-                return f"{size_gb:.2f} GB"
+        if obj.photo:
+            return format_file_size(obj.file_size)
         return "-"
 
     get_file_size.short_description = 'Размер'
@@ -173,3 +162,19 @@ class IssueCommentAdmin(admin.ModelAdmin):
     search_fields = ['issue__title', 'text', 'author__email']
     date_hierarchy = 'created_at'
     readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(IssueDailyStat)
+class IssueDailyStatAdmin(admin.ModelAdmin):
+    """Admin interface for IssueDailyStat model (только просмотр)."""
+
+    list_display = ['day', 'company', 'project', 'contractor', 'status', 'priority', 'issue_count']
+    list_filter = ['status', 'priority', 'company']
+    date_hierarchy = 'day'
+    list_select_related = ['company', 'project', 'contractor']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
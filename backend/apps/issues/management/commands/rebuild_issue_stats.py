@@ -0,0 +1,31 @@
+"""
+Management команда для пересчета суточных агрегатов замечаний (IssueDailyStat).
+
+Использование:
+    python manage.py rebuild_issue_stats                       # Вся история
+    python manage.py rebuild_issue_stats --from 2025-01-01     # Начиная с даты
+    python manage.py rebuild_issue_stats --from 2025-01-01 --to 2025-01-31
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.issues.metrics import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает суточные агрегаты замечаний по таблице Issue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='Первый день (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Последний день (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        try:
+            date_from = date.fromisoformat(options['date_from']) if options['date_from'] else None
+            date_to = date.fromisoformat(options['date_to']) if options['date_to'] else None
+        except ValueError as exc:
+            raise CommandError(f'Неверный формат даты: {exc}')
+
+        rows = rebuild_daily_stats(date_from=date_from, date_to=date_to)
+        self.stdout.write(self.style.SUCCESS(f'Записано строк агрегата: {rows}'))
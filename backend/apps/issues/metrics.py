@@ -0,0 +1,211 @@
+"""
+Суточные агрегаты замечаний (IssueDailyStat) для аналитики.
+
+Каждое замечание учтено ровно в одной строке агрегата: по дню создания и текущим
+(проект, исполнитель, статус, приоритет). Сумма по диапазону дней дает распределение
+замечаний, созданных в этом диапазоне, а сумма по всем дням совпадает с текущими
+счетчиками таблицы Issue.
+
+Агрегаты обновляются:
+- сигналами Issue (создание, смена статуса/приоритета/исполнителя, удаление)
+- сигналом удаления пользователя: исполнитель замечаний обнуляется через SET_NULL
+  без сигналов Issue, поэтому дни с его замечаниями пересчитываются (rebuild_days)
+- задачей rebuild_issue_daily_stats - ночным пересчетом последних
+  ISSUE_STATS_RECONCILE_DAYS дней и еженедельным пересчетом за всю историю
+- командой rebuild_issue_stats - пересчетом за всю историю вручную
+
+Ограничение: изменения в обход сигналов (QuerySet.update(), bulk_update, SQL,
+смена компании проекта) по замечаниям старше ISSUE_STATS_RECONCILE_DAYS дней
+исправляются только еженедельным полным пересчетом - до него агрегаты этих
+дней могут расходиться с таблицей Issue. Такие массовые изменения должны
+вызывать rebuild_days для затронутых дней.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Count, F, Sum, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.projects.models import Project
+from .models import Issue, IssueDailyStat
+
+logger = logging.getLogger(__name__)
+
+# Поля замечания, от которых зависит строка агрегата
+TRACKED_FIELDS = ('project_id', 'assigned_to_id', 'status', 'priority', 'created_at')
+
+
+def get_loaded_state(issue):
+    """Значения отслеживаемых полей, с которыми замечание было загружено из БД."""
+    loaded = getattr(issue, '_loaded_values', None) or {}
+    if all(field in loaded for field in TRACKED_FIELDS):
+        return {field: loaded[field] for field in TRACKED_FIELDS}
+    # Объект создан вручную или загружен через only()/defer() - читаем из БД
+    return Issue.objects.filter(pk=issue.pk).values(*TRACKED_FIELDS).first()
+
+
+def get_current_state(issue):
+    return {field: getattr(issue, field) for field in TRACKED_FIELDS}
+
+
+def _get_company_id(issue, project_id):
+    if project_id == issue.project_id and Issue.project.is_cached(issue):
+        return issue.project.company_id
+    return Project.all_objects.filter(pk=project_id).values_list('company_id', flat=True).first()
+
+
+def get_stat_key(issue, state):
+    """Ключ строки агрегата для состояния замечания."""
+    return {
+        'day': timezone.localdate(state['created_at']),
+        'company_id': _get_company_id(issue, state['project_id']),
+        'project_id': state['project_id'],
+        'contractor_id': state['assigned_to_id'],
+        'status': state['status'],
+        'priority': state['priority'],
+    }
+
+
+def apply_delta(key, delta):
+    """Атомарно сдвигает счетчик строки агрегата, создавая строку при необходимости."""
+    lookup = {k: v for k, v in key.items() if k != 'company_id'}
+    updated = IssueDailyStat.objects.filter(**lookup).update(issue_count=F('issue_count') + delta)
+    if updated or delta < 0:
+        return
+
+    stat, created = IssueDailyStat.objects.get_or_create(**lookup, defaults={
+        'company_id': key['company_id'],
+        'issue_count': delta,
+    })
+    if not created:
+        # Строку успел создать параллельный запрос
+        IssueDailyStat.objects.filter(pk=stat.pk).update(issue_count=F('issue_count') + delta)
+
+
+def move_issue(old_key, new_key):
+    """Переносит замечание из одной строки агрегата в другую."""
+    if old_key == new_key:
+        return
+    if old_key:
+        apply_delta(old_key, -1)
+    if new_key:
+        apply_delta(new_key, 1)
+
+
+def rebuild_daily_stats(date_from=None, date_to=None):
+    """
+    Пересчитывает агрегаты за диапазон дней по таблице Issue.
+
+    Args:
+        date_from: первый день (включительно), None - с начала истории
+        date_to: последний день (включительно), None - по сегодняшний день
+
+    Returns:
+        int: количество записанных строк агрегата
+    """
+    stats = IssueDailyStat.objects.all()
+    issues = Issue.objects.all()
+    if date_from:
+        stats = stats.filter(day__gte=date_from)
+        issues = issues.filter(created_at__date__gte=date_from)
+    if date_to:
+        stats = stats.filter(day__lte=date_to)
+        issues = issues.filter(created_at__date__lte=date_to)
+
+    count = _rebuild(stats, issues)
+    logger.info(f'[IssueStats] Пересчитано {count} строк агрегата ({date_from} - {date_to})')
+    return count
+
+
+def rebuild_days(days):
+    """
+    Пересчитывает агрегаты отдельных дней (например, затронутых изменением в обход сигналов).
+
+    Returns:
+        int: количество записанных строк агрегата
+    """
+    days = sorted(set(days))
+    if not days:
+        return 0
+    count = _rebuild(
+        IssueDailyStat.objects.filter(day__in=days),
+        Issue.objects.filter(created_at__date__in=days),
+    )
+    logger.info(f'[IssueStats] Пересчитано {count} строк агрегата за {len(days)} дн.')
+    return count
+
+
+def contractor_stat_days(contractor_id):
+    """Дни, в которых есть строки агрегата исполнителя."""
+    return list(
+        IssueDailyStat.objects.filter(contractor_id=contractor_id).values_list('day', flat=True).distinct()
+    )
+
+
+def _rebuild(stats, issues):
+    """Заменяет строки агрегата stats пересчетом по замечаниям issues тех же дней."""
+    rows = issues.annotate(day=TruncDate('created_at')).values(
+        'day', 'project_id', 'project__company_id', 'assigned_to_id', 'status', 'priority'
+    ).annotate(issue_count=Count('id')).order_by()
+
+    with transaction.atomic():
+        stats.delete()
+        created = IssueDailyStat.objects.bulk_create(
+            [
+                IssueDailyStat(
+                    day=row['day'],
+                    company_id=row['project__company_id'],
+                    project_id=row['project_id'],
+                    contractor_id=row['assigned_to_id'],
+                    status=row['status'],
+                    priority=row['priority'],
+                    issue_count=row['issue_count'],
+                )
+                for row in rows.iterator()
+            ],
+            batch_size=1000,
+        )
+    return len(created)
+
+
+def get_user_stats_queryset(user):
+    """
+    Строки агрегата, доступные пользователю.
+
+    Returns:
+        tuple: (QuerySet, exact) - exact=False, если видимость пользователя
+        по таблице Issue шире (замечания, созданные им в чужих проектах)
+    """
+    stats = IssueDailyStat.objects.all()
+
+    if user.is_superuser:
+        return stats, True
+    if not user.company:
+        return stats.none(), True
+
+    stats = stats.filter(company=user.company)
+    if user.is_management:
+        return stats, True
+    if user.is_itr or user.is_supervisor:
+        project_ids = Project.objects.filter(
+            Q(project_manager=user) | Q(team_members=user)
+        ).values('id')
+        return stats.filter(project_id__in=project_ids), False
+    return stats.filter(contractor=user), True
+
+
+def summarize(stats):
+    """Суммы по статусам и приоритетам в формате IssueViewSet.statistics."""
+    totals = stats.aggregate(
+        total=Sum('issue_count'),
+        new=Sum('issue_count', filter=Q(status=Issue.Status.NEW)),
+        in_progress=Sum('issue_count', filter=Q(status=Issue.Status.IN_PROGRESS)),
+        pending_review=Sum('issue_count', filter=Q(status=Issue.Status.PENDING_REVIEW)),
+        completed=Sum('issue_count', filter=Q(status=Issue.Status.COMPLETED)),
+        overdue=Sum('issue_count', filter=Q(status=Issue.Status.OVERDUE)),
+        critical=Sum('issue_count', filter=Q(priority=Issue.Priority.CRITICAL)),
+        high=Sum('issue_count', filter=Q(priority=Issue.Priority.HIGH)),
+        normal=Sum('issue_count', filter=Q(priority=Issue.Priority.NORMAL)),
+    )
+    return {key: value or 0 for key, value in totals.items()}
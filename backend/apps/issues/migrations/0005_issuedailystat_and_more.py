@@ -0,0 +1,173 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_issue_daily_stats(apps, schema_editor):
+    """
+    Заполняет суточные агрегаты по существующим замечаниям одним GROUP BY.
+    Дальше агрегаты поддерживают сигналы и ночная задача пересчета.
+    """
+    from django.db.models import Count
+    from django.db.models.functions import TruncDate
+
+    Issue = apps.get_model("issues", "Issue")
+    IssueDailyStat = apps.get_model("issues", "IssueDailyStat")
+
+    rows = (
+        Issue.objects.annotate(day=TruncDate("created_at"))
+        .values(
+            "day",
+            "project_id",
+            "project__company_id",
+            "assigned_to_id",
+            "status",
+            "priority",
+        )
+        .annotate(issue_count=Count("id"))
+        .order_by()
+    )
+    IssueDailyStat.objects.bulk_create(
+        [
+            IssueDailyStat(
+                day=row["day"],
+                company_id=row["project__company_id"],
+                project_id=row["project_id"],
+                contractor_id=row["assigned_to_id"],
+                status=row["status"],
+                priority=row["priority"],
+                issue_count=row["issue_count"],
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0020_alter_user_role"),
+        ("projects", "0006_project_deleted_at_project_deleted_by_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("issues", "0004_issuecomment_read_by"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IssueDailyStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="День создания")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("NEW", "Новое"),
+                            ("IN_PROGRESS", "В процессе"),
+                            ("PENDING_REVIEW", "На проверке"),
+                            ("COMPLETED", "Исполнено"),
+                            ("OVERDUE", "Просрочено"),
+                            ("REJECTED", "Отклонено"),
+                        ],
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "priority",
+                    models.CharField(
+                        choices=[
+                            ("CRITICAL", "Критичное"),
+                            ("HIGH", "Важное"),
+                            ("NORMAL", "Обычное"),
+                        ],
+                        max_length=20,
+                        verbose_name="Приоритет",
+                    ),
+                ),
+                (
+                    "issue_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Количество замечаний"
+                    ),
+                ),
+                (
+                    "company",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="users.company",
+                        verbose_name="Компания",
+                    ),
+                ),
+                (
+                    "contractor",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Исполнитель",
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="projects.project",
+                        verbose_name="Проект",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Суточная статистика замечаний",
+                "verbose_name_plural": "Суточная статистика замечаний",
+                "ordering": ["-day"],
+                "indexes": [
+                    models.Index(
+                        fields=["company", "day"], name="issues_issu_company_589aa7_idx"
+                    ),
+                    models.Index(
+                        fields=["project", "day"], name="issues_issu_project_e1b94b_idx"
+                    ),
+                    models.Index(
+                        fields=["contractor", "day"],
+                        name="issues_issu_contrac_55be1f_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="issuedailystat",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("contractor__isnull", False)),
+                fields=("day", "project", "contractor", "status", "priority"),
+                name="unique_issue_daily_stat",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="issuedailystat",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("contractor__isnull", True)),
+                fields=("day", "project", "status", "priority"),
+                name="unique_issue_daily_stat_unassigned",
+            ),
+        ),
+        migrations.RunPython(
+            fill_issue_daily_stats, reverse_code=migrations.RunPython.noop
+        ),
+    ]
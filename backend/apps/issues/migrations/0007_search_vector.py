@@ -0,0 +1,73 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:10
+"""
+Полнотекстовый поиск по замечаниям.
+
+Колонка search_vector заполняется триггером issues_issue_search_vector_update
+при изменении title, description, location_notes, существующие записи пересчитываются
+в миграции. GIN индексы создаются CONCURRENTLY.
+"""
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+SEARCH_VECTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION issues_issue_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'B') ||
+        setweight(to_tsvector('russian', coalesce(NEW.location_notes, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER issues_issue_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, description, location_notes ON issues_issue
+FOR EACH ROW EXECUTE FUNCTION issues_issue_search_vector_update();
+
+UPDATE issues_issue SET title = title;
+"""
+
+DROP_SEARCH_VECTOR_FUNCTION = """
+DROP TRIGGER IF EXISTS issues_issue_search_vector_trigger ON issues_issue;
+DROP FUNCTION IF EXISTS issues_issue_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("core", "0014_pg_trgm_extension"),
+        ("issues", "0006_issuephoto_file_size"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="issue",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunSQL(
+            sql=SEARCH_VECTOR_FUNCTION, reverse_sql=DROP_SEARCH_VECTOR_FUNCTION
+        ),
+        AddIndexConcurrently(
+            model_name="issue",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="issue_search_vector_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="issue",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"],
+                name="issue_title_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
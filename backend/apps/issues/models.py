@@ -1,4 +1,7 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from apps.projects.models import Project, Site, Category
@@ -103,6 +106,9 @@ class Issue(models.Model):
     # Additional info
     location_notes = models.CharField(_('Примечания о местоположении'), max_length=500, blank=True)
 
+    # Поисковый вектор (название, описание, местоположение) - заполняет триггер БД, см. apps/core/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
+
     created_at = models.DateTimeField(_('Создано'), auto_now_add=True)
     updated_at = models.DateTimeField(_('Обновлено'), auto_now=True)
 
@@ -114,8 +120,19 @@ class Issue(models.Model):
             models.Index(fields=['status', 'project']),
             models.Index(fields=['assigned_to', 'status']),
             models.Index(fields=['deadline']),
+            # Поиск: полнотекстовый и по части названия (pg_trgm).
+            # icontains строится как UPPER(поле) LIKE UPPER(...), поэтому индекс по UPPER(поле)
+            GinIndex(fields=['search_vector'], name='issue_search_vector_idx'),
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='issue_title_upper_trgm_idx'),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Значения из БД нужны сигналам, чтобы сдвигать суточные агрегаты без лишнего SELECT
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     def __str__(self):
         return f"{self.title} - {self.project.name}"
 
@@ -204,6 +221,7 @@ class IssuePhoto(models.Model):
         _('Фото'),
         upload_to='issues/%Y/%m/%d/'
     )
+    file_size = models.PositiveBigIntegerField(_('Размер файла, байт'), default=0, editable=False)
 
     caption = models.CharField(_('Подпись'), max_length=255, blank=True)
     uploaded_by = models.ForeignKey(
@@ -315,3 +333,67 @@ class IssueComment(models.Model):
 
     def __str__(self):
         return f"Комментарий от {self.author} к {self.issue.title}"
+
+
+class IssueDailyStat(models.Model):
+    """
+    Суточный агрегат замечаний для аналитики.
+
+    Одна строка - количество замечаний, созданных в день day, которые сейчас
+    находятся в данном статусе/приоритете и назначены данному исполнителю.
+    Заполняется сигналами Issue и задачей пересчета (см. metrics.py).
+    """
+
+    day = models.DateField(_('День создания'))
+    company = models.ForeignKey(
+        'users.Company',
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+',
+        verbose_name=_('Компания')
+    )
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('Проект')
+    )
+    # Без ограничения FK: удаление пользователя не должно ломать уникальность агрегатов,
+    # строки удаленных исполнителей исправляет пересчет
+    contractor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='+',
+        verbose_name=_('Исполнитель')
+    )
+    status = models.CharField(_('Статус'), max_length=20, choices=Issue.Status.choices)
+    priority = models.CharField(_('Приоритет'), max_length=20, choices=Issue.Priority.choices)
+    issue_count = models.PositiveIntegerField(_('Количество замечаний'), default=0)
+
+    class Meta:
+        verbose_name = _('Суточная статистика замечаний')
+        verbose_name_plural = _('Суточная статистика замечаний')
+        ordering = ['-day']
+        constraints = [
+            # NULL в unique не совпадает с NULL, поэтому строки без исполнителя - отдельным индексом
+            models.UniqueConstraint(
+                fields=['day', 'project', 'contractor', 'status', 'priority'],
+                condition=models.Q(contractor__isnull=False),
+                name='unique_issue_daily_stat'
+            ),
+            models.UniqueConstraint(
+                fields=['day', 'project', 'status', 'priority'],
+                condition=models.Q(contractor__isnull=True),
+                name='unique_issue_daily_stat_unassigned'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['company', 'day']),
+            models.Index(fields=['project', 'day']),
+            models.Index(fields=['contractor', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.project_id} {self.status}/{self.priority}: {self.issue_count}"
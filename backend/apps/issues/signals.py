@@ -1,7 +1,10 @@
-from django.db.models.signals import post_save, pre_save, pre_delete
+from django.conf import settings
+from django.db.models.signals import post_save, pre_save, pre_delete, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from .models import Issue, IssuePhoto
+from . import metrics
+from apps.users import storage
 from apps.notifications.tasks import send_telegram_notification, send_email_notification
 
 
@@ -77,6 +80,57 @@ def issue_post_save(sender, instance, created, **kwargs):
                 )
 
 
+# ==================== Суточные агрегаты замечаний (IssueDailyStat) ====================
+
+@receiver(pre_save, sender=Issue)
+def remember_issue_stat_state(sender, instance, raw=False, **kwargs):
+    """Запоминает состояние замечания в БД до сохранения."""
+    if raw or not instance.pk:
+        instance._stat_old_state = None
+        return
+    instance._stat_old_state = metrics.get_loaded_state(instance)
+
+
+@receiver(post_save, sender=Issue)
+def update_issue_daily_stats(sender, instance, created, raw=False, **kwargs):
+    """Переносит замечание в строку агрегата, соответствующую новому состоянию."""
+    if raw:
+        return
+
+    old_state = None if created else getattr(instance, '_stat_old_state', None)
+    new_state = metrics.get_current_state(instance)
+    if old_state == new_state:
+        return
+
+    metrics.move_issue(
+        metrics.get_stat_key(instance, old_state) if old_state else None,
+        metrics.get_stat_key(instance, new_state),
+    )
+    # Повторное сохранение того же объекта должно сравниваться с уже записанным состоянием
+    instance._loaded_values = {**getattr(instance, '_loaded_values', {}), **new_state}
+
+
+@receiver(post_delete, sender=Issue)
+def remove_issue_from_daily_stats(sender, instance, **kwargs):
+    """Уменьшает счетчик агрегата при удалении замечания."""
+    loaded = getattr(instance, '_loaded_values', {})
+    state = {field: loaded.get(field, getattr(instance, field)) for field in metrics.TRACKED_FIELDS}
+    metrics.apply_delta(metrics.get_stat_key(instance, state), -1)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def rebuild_daily_stats_of_deleted_contractor(sender, instance, **kwargs):
+    """
+    Пересчитывает агрегаты дней с замечаниями удаленного исполнителя.
+
+    assigned_to обнуляется через SET_NULL без сигналов Issue, строки агрегата
+    остались бы с удаленным исполнителем.
+    """
+    days = metrics.contractor_stat_days(instance.pk)
+    if days:
+        metrics.rebuild_days(days)
+
+
 # ==================== Сигналы для управления файлами IssuePhoto ====================
 
 @receiver(pre_delete, sender=IssuePhoto)
@@ -134,3 +188,25 @@ def delete_old_photo_on_update(sender, instance, **kwargs):
     except IssuePhoto.DoesNotExist:
         # Старая запись не найдена - ничего не делаем
         pass
+
+
+# ==================== Учет места, занятого фото ====================
+
+@receiver(pre_save, sender=IssuePhoto)
+def remember_photo_size(sender, instance, update_fields=None, **kwargs):
+    """Записывает размер нового (уже сконвертированного в WebP) фото в file_size."""
+    storage.remember_file_size(instance, 'photo', 'file_size', update_fields)
+
+
+@receiver(post_save, sender=IssuePhoto)
+def update_company_storage_on_photo_save(sender, instance, **kwargs):
+    """Сдвигает счетчик занятого места компании на разницу размеров фото."""
+    delta = storage.pop_storage_delta(instance)
+    if delta:
+        storage.add_company_storage(storage.get_issue_company_id(instance.issue_id), delta)
+
+
+@receiver(post_delete, sender=IssuePhoto)
+def update_company_storage_on_photo_delete(sender, instance, **kwargs):
+    if instance.file_size:
+        storage.add_company_storage(storage.get_issue_company_id(instance.issue_id), -instance.file_size)
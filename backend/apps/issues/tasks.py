@@ -189,3 +189,23 @@ def send_new_issue_notification(self, issue_id):
         )
         # Повторная попытка при ошибке (максимум 3 попытки с интервалом 60 секунд)
         raise self.retry(exc=exc)
+
+
+@shared_task
+def rebuild_issue_daily_stats(full=False):
+    """
+    Пересчитывает суточные агрегаты замечаний за последние ISSUE_STATS_RECONCILE_DAYS дней.
+
+    Сигналы обновляют агрегаты сразу, пересчет исправляет расхождения
+    от изменений в обход сигналов. Run every night via Celery Beat,
+    with full=True - weekly over the whole history (older days, see metrics.py).
+    """
+    from .metrics import rebuild_daily_stats
+
+    if full:
+        rows = rebuild_daily_stats()
+        return f"Rebuilt {rows} issue stat rows for the whole history"
+
+    date_from = timezone.localdate() - timedelta(days=settings.ISSUE_STATS_RECONCILE_DAYS)
+    rows = rebuild_daily_stats(date_from=date_from)
+    return f"Rebuilt {rows} issue stat rows since {date_from}"
@@ -3,7 +3,8 @@ from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
 from apps.projects.models import Project, Site, Category
-from apps.issues.models import Issue
+from apps.issues.models import Issue, IssueDailyStat
+from apps.issues.metrics import rebuild_daily_stats
 
 User = get_user_model()
 
@@ -110,3 +111,61 @@ class TestIssueAPI:
 
         assert response.status_code == status.HTTP_201_CREATED
         assert Issue.objects.filter(title='New Issue').exists()
+
+
+@pytest.mark.django_db
+class TestIssueDailyStat:
+    def test_status_change_moves_issue_between_rows(self, create_user, create_site):
+        site = create_site()
+        issue = Issue.objects.create(
+            title='Issue 1',
+            description='Description 1',
+            project=site.project,
+            site=site,
+            status=Issue.Status.NEW
+        )
+
+        issue = Issue.objects.get(pk=issue.pk)
+        issue.status = Issue.Status.COMPLETED
+        issue.save(update_fields=['status'])
+
+        counts = dict(IssueDailyStat.objects.values_list('status', 'issue_count'))
+        assert counts.get(Issue.Status.NEW) == 0
+        assert counts[Issue.Status.COMPLETED] == 1
+
+        issue.delete()
+        assert IssueDailyStat.objects.filter(issue_count__gt=0).count() == 0
+
+    def test_rebuild_matches_signal_counters(self, create_user, create_site):
+        site = create_site()
+        for priority in (Issue.Priority.HIGH, Issue.Priority.HIGH, Issue.Priority.NORMAL):
+            Issue.objects.create(
+                title='Issue',
+                description='Description',
+                project=site.project,
+                site=site,
+                priority=priority
+            )
+        before = sorted(IssueDailyStat.objects.values_list('priority', 'status', 'issue_count'))
+
+        rebuild_daily_stats()
+
+        assert sorted(IssueDailyStat.objects.values_list('priority', 'status', 'issue_count')) == before
+
+    def test_deleting_contractor_moves_issues_to_unassigned_row(self, create_user, create_site):
+        site = create_site()
+        contractor = create_user(email='contractor@example.com', role=User.Role.CONTRACTOR)
+        Issue.objects.create(
+            title='Issue',
+            description='Description',
+            project=site.project,
+            site=site,
+            assigned_to=contractor
+        )
+
+        contractor_id = contractor.pk
+        contractor.delete()
+
+        rows = list(IssueDailyStat.objects.filter(issue_count__gt=0).values_list('contractor_id', 'issue_count'))
+        assert rows == [(None, 1)]
+        assert not IssueDailyStat.objects.filter(contractor_id=contractor_id).exists()
@@ -5,12 +5,15 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 from django.db import models
+from datetime import timedelta
 from .models import Issue, IssuePhoto, IssueComment
+from . import metrics
 from .serializers import (
     IssueSerializer, IssueListSerializer, IssueCreateSerializer,
     IssueUpdateSerializer, IssueStatusUpdateSerializer,
     IssuePhotoSerializer, IssueCommentSerializer
 )
+from apps.core.search import FullTextSearchFilter
 from apps.users.permissions import CanCreateIssues, CanVerifyIssues
 from .tasks import send_new_issue_notification
 
@@ -22,9 +25,10 @@ class IssueViewSet(viewsets.ModelViewSet):
         'project', 'site', 'category', 'created_by', 'assigned_to', 'verified_by'
     ).prefetch_related('photos', 'comments')
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # Поиск по search_vector (title, description, location_notes) с сортировкой по релевантности
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['status', 'priority', 'project', 'site', 'category', 'assigned_to']
-    search_fields = ['title', 'description', 'location_notes']
+    search_trigram_fields = ['title']
     ordering_fields = ['created_at', 'deadline', 'priority', 'status']
 
     def get_serializer_class(self):
@@ -255,15 +259,36 @@ class IssueViewSet(viewsets.ModelViewSet):
 
         Query params:
         - project: ID проекта для фильтрации (опционально)
+        - date_from, date_to: диапазон дат создания YYYY-MM-DD (опционально).
+          С диапазоном статистика читается из суточных агрегатов IssueDailyStat.
         """
         from django.db.models import Count, Q
 
+        project_id = request.query_params.get('project')
+        date_from, date_to, error = self._parse_date_range(request)
+        if error:
+            return error
+
+        if date_from or date_to:
+            stats_qs, exact = metrics.get_user_stats_queryset(request.user)
+            if exact:
+                if project_id:
+                    stats_qs = stats_qs.filter(project_id=project_id)
+                if date_from:
+                    stats_qs = stats_qs.filter(day__gte=date_from)
+                if date_to:
+                    stats_qs = stats_qs.filter(day__lte=date_to)
+                return Response(self._format_statistics(metrics.summarize(stats_qs)))
+
         queryset = self.get_queryset()
 
         # Фильтр по проекту (если передан)
-        project_id = request.query_params.get('project')
         if project_id:
             queryset = queryset.filter(project_id=project_id)
+        if date_from:
+            queryset = queryset.filter(created_at__date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(created_at__date__lte=date_to)
 
         # ✅ Один SQL запрос вместо загрузки 1000+ записей в память!
         # Используем агрегацию COUNT с фильтрами Q
@@ -281,8 +306,106 @@ class IssueViewSet(viewsets.ModelViewSet):
             normal=Count('id', filter=Q(priority='NORMAL')),
         )
 
-        # Формируем ответ в том же формате, что и раньше
+        return Response(self._format_statistics(stats))
+
+    @action(detail=False, methods=['get'])
+    def trends(self, request):
+        """
+        Динамика замечаний по дням/неделям/месяцам из суточных агрегатов.
+
+        Query params:
+        - date_from, date_to: диапазон дат создания YYYY-MM-DD (по умолчанию последние 30 дней)
+        - project: ID проекта (опционально)
+        - contractor: ID исполнителя (опционально)
+        - period: day | week | month (по умолчанию day)
+
+        Для каждого периода возвращает количество созданных замечаний
+        с разбивкой по их текущему статусу.
+        """
+        from django.db.models import Sum
+        from django.db.models.functions import TruncWeek, TruncMonth
+
+        date_from, date_to, error = self._parse_date_range(request)
+        if error:
+            return error
+
+        period = request.query_params.get('period', 'day')
+        if period not in ('day', 'week', 'month'):
+            return Response(
+                {'error': 'period должен быть day, week или month'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        date_to = date_to or timezone.localdate()
+        date_from = date_from or date_to - timedelta(days=30)
+
+        stats_qs, _ = metrics.get_user_stats_queryset(request.user)
+        stats_qs = stats_qs.filter(day__gte=date_from, day__lte=date_to)
+
+        project_id = request.query_params.get('project')
+        if project_id:
+            stats_qs = stats_qs.filter(project_id=project_id)
+        contractor_id = request.query_params.get('contractor')
+        if contractor_id:
+            stats_qs = stats_qs.filter(contractor_id=contractor_id)
+
+        if period == 'week':
+            stats_qs = stats_qs.annotate(period=TruncWeek('day'))
+        elif period == 'month':
+            stats_qs = stats_qs.annotate(period=TruncMonth('day'))
+        else:
+            stats_qs = stats_qs.annotate(period=models.F('day'))
+
+        rows = stats_qs.values('period', 'status').annotate(
+            count=Sum('issue_count')
+        ).order_by('period')
+
+        results = {}
+        for row in rows:
+            period_start = row['period']
+            if hasattr(period_start, 'date'):
+                period_start = period_start.date()
+            item = results.setdefault(period_start, {
+                'period': period_start.isoformat(),
+                'total': 0,
+                'by_status': {},
+            })
+            item['total'] += row['count']
+            item['by_status'][row['status']] = row['count']
+
         return Response({
+            'date_from': date_from.isoformat(),
+            'date_to': date_to.isoformat(),
+            'period': period,
+            'results': list(results.values()),
+        })
+
+    def _parse_date_range(self, request):
+        """Разбирает date_from/date_to. Возвращает (date_from, date_to, error_response)."""
+        from django.utils.dateparse import parse_date
+
+        parsed = []
+        for param in ('date_from', 'date_to'):
+            value = request.query_params.get(param)
+            if not value:
+                parsed.append(None)
+                continue
+            try:
+                day = parse_date(value)
+            except ValueError:
+                day = None
+            if day is None:
+                return None, None, Response(
+                    {'error': f'{param}: неверный формат даты, ожидается YYYY-MM-DD'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            parsed.append(day)
+        return parsed[0], parsed[1], None
+
+    @staticmethod
+    def _format_statistics(stats):
+        """Формирует ответ в том же формате, что и раньше."""
+        return {
             'total': stats['total'] or 0,
             'new': stats['new'] or 0,
             'in_progress': stats['in_progress'] or 0,
@@ -294,7 +417,7 @@ class IssueViewSet(viewsets.ModelViewSet):
                 'high': stats['high'] or 0,
                 'normal': stats['normal'] or 0,
             }
-        })
+        }
 
 
 class IssuePhotoViewSet(viewsets.ModelViewSet):
@@ -6,7 +6,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
-from .models import MaterialRequest, MaterialRequestItem, ApprovalStep, MaterialRequestHistory
+from .models import Material, MaterialRequest, MaterialRequestItem, ApprovalStep, MaterialRequestHistory
 
 
 class ProjectFilter(admin.SimpleListFilter):
@@ -538,3 +538,27 @@ class MaterialRequestHistoryAdmin(admin.ModelAdmin):
     ]
 
     readonly_fields = ['created_at']
+
+
+@admin.register(Material)
+class MaterialAdmin(admin.ModelAdmin):
+    """Административная панель для справочника материалов."""
+
+    list_display = [
+        'name',
+        'unit',
+        'company',
+        'created_at',
+    ]
+
+    list_filter = [
+        'company',
+        'unit',
+    ]
+
+    search_fields = [
+        'name',
+        'normalized_name',
+    ]
+
+    readonly_fields = ['normalized_name', 'created_at']
@@ -0,0 +1,231 @@
+"""
+Аналитика потребности и поставок материалов для снабжения.
+
+Запрошенное, поставленное и недопоставленное количество и число позиций по
+статусам считаются одним GROUP BY по позициям заявок компании в разрезе
+материала (справочник, см. catalog.py), единицы, проекта и недели/месяца
+создания заявки. Черновики и удаленные заявки не учитываются, права
+просмотра те же, что в списке заявок.
+
+Снимок (snapshot=true) кэшируется на MATERIAL_ANALYTICS_SNAPSHOT_SECONDS:
+повторные запросы с теми же параметрами не нагружают БД. Выгрузка в Excel
+пишется потоково (write_only), строки читаются из БД через iterator().
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DateField, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, TruncMonth, TruncWeek
+from django.utils import timezone
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+from apps.users.utils.excel_stream import create_workbook, styled_row, workbook_response
+from .inbox import MANAGEMENT_ROLES, project_member_q
+from .models import MaterialRequest, MaterialRequestItem
+
+# Заявки, позиции которых считаются потребностью (все, кроме черновиков)
+DEMAND_STATUSES = [
+    status for status, _ in MaterialRequest.STATUS_CHOICES if status != MaterialRequest.STATUS_DRAFT
+]
+
+QUANTITY_FIELD = DecimalField(max_digits=14, decimal_places=2)
+ZERO = Value(Decimal('0'), output_field=QUANTITY_FIELD)
+
+
+def _unit():
+    return Coalesce(F('material__unit'), F('unit'))
+
+
+# Разрез -> {ключ строки: выражение}. Позиции без ссылки на справочник
+# группируются по названию и единице из заявки.
+DIMENSIONS = {
+    'material': lambda: {
+        'material_id': F('material_id'),
+        'material_name': Coalesce(F('material__name'), F('material_name')),
+        'unit': _unit(),
+    },
+    'unit': lambda: {'unit': _unit()},
+    'project': lambda: {
+        'project_id': F('material_request__project_id'),
+        'project_name': F('material_request__project__name'),
+    },
+    'week': lambda: {'week': TruncWeek('material_request__created_at', output_field=DateField())},
+    'month': lambda: {'month': TruncMonth('material_request__created_at', output_field=DateField())},
+}
+
+# Заголовки колонок Excel для ключей строки
+COLUMN_TITLES = {
+    'material_id': 'ID материала',
+    'material_name': 'Материал',
+    'unit': 'Ед. изм.',
+    'project_id': 'ID проекта',
+    'project_name': 'Проект',
+    'week': 'Неделя (с)',
+    'month': 'Месяц',
+    'requests': 'Заявок',
+    'items': 'Позиций',
+    'requested': 'Запрошено',
+    'delivered': 'Поставлено',
+    'outstanding': 'Осталось поставить',
+}
+STATUS_TITLES = dict(MaterialRequestItem.STATUS_CHOICES)
+
+# Префикс аннотаций разрезов (имена вроде unit и material_id заняты полями модели)
+GROUP_PREFIX = 'group_'
+
+
+def parse_group_by(value):
+    """
+    Разрезы из параметра ?group_by=material,project,week.
+
+    Raises:
+        ValueError: неизвестный разрез
+    """
+    group_by = [part.strip() for part in (value or 'material').split(',') if part.strip()]
+    unknown = [part for part in group_by if part not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f'Неизвестный разрез: {", ".join(unknown)}. Доступны: {", ".join(DIMENSIONS)}')
+    return list(dict.fromkeys(group_by))
+
+
+def has_full_access(user):
+    """Видит ли пользователь заявки всех проектов компании."""
+    return user.role in MANAGEMENT_ROLES or user.role == 'SUPPLY_MANAGER'
+
+
+def demand_queryset(user, group_by, date_from=None, date_to=None, project_id=None):
+    """
+    Один запрос GROUP BY по позициям заявок: строка на каждое сочетание разрезов.
+
+    Args:
+        group_by: разрезы (ключи DIMENSIONS)
+        date_from, date_to: период по дате создания заявки (дни включительно)
+        project_id: только заявки проекта
+    """
+    items = MaterialRequestItem.objects.filter(
+        material_request__company_id=user.company_id,
+        material_request__is_deleted=False,
+        material_request__status__in=DEMAND_STATUSES,
+    )
+    if not has_full_access(user):
+        items = items.filter(Q(material_request__author=user) | project_member_q(user, 'material_request__project_id'))
+    if date_from:
+        items = items.filter(material_request__created_at__date__gte=date_from)
+    if date_to:
+        items = items.filter(material_request__created_at__date__lte=date_to)
+    if project_id:
+        items = items.filter(material_request__project_id=project_id)
+
+    groups = {}
+    for dimension in group_by:
+        groups.update(DIMENSIONS[dimension]())
+    group_names = [f'{GROUP_PREFIX}{key}' for key in groups]
+
+    delivered = Coalesce(F('quantity_actual'), ZERO, output_field=QUANTITY_FIELD)
+    status_counts = {
+        f'status_{status}': Count('id', filter=Q(status=status))
+        for status, _ in MaterialRequestItem.STATUS_CHOICES
+    }
+    return items.values(
+        **{f'{GROUP_PREFIX}{key}': expression for key, expression in groups.items()}
+    ).annotate(
+        requests=Count('material_request', distinct=True),
+        items=Count('id'),
+        requested=Coalesce(Sum('quantity_requested'), ZERO, output_field=QUANTITY_FIELD),
+        delivered=Coalesce(Sum('quantity_actual'), ZERO, output_field=QUANTITY_FIELD),
+        # Перепоставка по одной позиции не уменьшает недопоставку по другим
+        outstanding=Coalesce(
+            Sum(Greatest(F('quantity_requested') - delivered, ZERO, output_field=QUANTITY_FIELD)),
+            ZERO, output_field=QUANTITY_FIELD,
+        ),
+        **status_counts,
+    ).order_by(*group_names)
+
+
+def _row(values):
+    row = {}
+    by_status = {}
+    for key, value in values.items():
+        if key.startswith(GROUP_PREFIX):
+            row[key[len(GROUP_PREFIX):]] = value
+        elif key.startswith('status_'):
+            by_status[key[len('status_'):]] = value
+        else:
+            row[key] = value
+    row['by_status'] = by_status
+    return row
+
+
+def iter_demand_rows(queryset, chunk_size=1000):
+    """Строки аналитики из demand_queryset без загрузки всей выборки в память."""
+    for values in queryset.iterator(chunk_size=chunk_size):
+        yield _row(values)
+
+
+def build_demand_data(user, group_by, date_from=None, date_to=None, project_id=None):
+    """Аналитика для JSON ответа (и снимка в кэше)."""
+    queryset = demand_queryset(user, group_by, date_from, date_to, project_id)
+    return {
+        'group_by': group_by,
+        'date_from': date_from.isoformat() if date_from else None,
+        'date_to': date_to.isoformat() if date_to else None,
+        'project_id': project_id,
+        'generated_at': timezone.now().isoformat(),
+        'rows': [_row(values) for values in queryset],
+    }
+
+
+def snapshot_key(user, group_by, date_from=None, date_to=None, project_id=None):
+    """Ключ снимка: общий для компании, если пользователь видит все ее заявки."""
+    scope = f'company_{user.company_id}' if has_full_access(user) else f'user_{user.pk}'
+    return f'material_demand_{scope}_{",".join(group_by)}_{date_from}_{date_to}_{project_id}'
+
+
+def get_demand_analytics(user, group_by, date_from=None, date_to=None, project_id=None, use_snapshot=False):
+    """Аналитика, при use_snapshot - из снимка в кэше (строится при первом запросе)."""
+    if not use_snapshot:
+        return build_demand_data(user, group_by, date_from, date_to, project_id)
+
+    cache_key = snapshot_key(user, group_by, date_from, date_to, project_id)
+    data = cache.get(cache_key)
+    if data is None:
+        data = build_demand_data(user, group_by, date_from, date_to, project_id)
+        cache.set(cache_key, data, timeout=settings.MATERIAL_ANALYTICS_SNAPSHOT_SECONDS)
+    return data
+
+
+def demand_excel_response(group_by, rows, filename):
+    """
+    Выгрузка аналитики в Excel (потоковая книга, файл отдается частями).
+
+    Args:
+        rows: строки build_demand_data или iter_demand_rows
+    """
+    group_keys = []
+    for dimension in group_by:
+        group_keys.extend(key for key in DIMENSIONS[dimension]() if key not in group_keys)
+    value_keys = ['requests', 'items', 'requested', 'delivered', 'outstanding']
+    statuses = [status for status, _ in MaterialRequestItem.STATUS_CHOICES]
+
+    workbook = create_workbook()
+    ws = workbook.create_sheet('Потребность')
+    ws.freeze_panes = 'A2'
+    for index in range(len(group_keys) + len(value_keys) + len(statuses)):
+        ws.column_dimensions[get_column_letter(index + 1)].width = 30 if index < len(group_keys) else 16
+
+    ws.append(styled_row(
+        ws,
+        [COLUMN_TITLES[key] for key in group_keys + value_keys] + [STATUS_TITLES[status] for status in statuses],
+        font=Font(bold=True, color='FFFFFF'),
+        fill=PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid'),
+        alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+    ))
+    for row in rows:
+        ws.append(
+            [row.get(key) for key in group_keys + value_keys]
+            + [row['by_status'].get(status, 0) for status in statuses]
+        )
+
+    return workbook_response(workbook, filename)
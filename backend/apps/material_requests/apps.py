@@ -7,3 +7,6 @@ class MaterialRequestsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.material_requests'
     verbose_name = 'Заявки на материалы'
+
+    def ready(self):
+        import apps.material_requests.signals
@@ -0,0 +1,182 @@
+"""
+Массовое согласование и возврат заявок на доработку.
+
+Пачка заявок обрабатывается в одной транзакции фиксированным числом запросов:
+заявки блокируются одним SELECT ... FOR UPDATE, текущие шаги согласования
+читаются одним запросом, а заявки, шаги и история записываются через
+bulk_update/bulk_create. Размер пачки ограничен MATERIAL_REQUEST_BULK_LIMIT
+(проверяется сериализатором). Заявки, которые нельзя обработать (нет доступа,
+не та роль, не на согласовании), не прерывают пачку и возвращаются в
+результатах с причиной.
+"""
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from .history import history_entry, write_history
+from .inbox import MANAGEMENT_ROLES, notify_inbox_changed, project_member_q
+from .models import ApprovalStep, MaterialRequest, MaterialRequestHistory
+
+logger = logging.getLogger(__name__)
+
+
+def _lock_requests(user, ids):
+    """Заявки пачки, доступные пользователю для согласования, с блокировкой строк."""
+    queryset = MaterialRequest.objects.filter(company_id=user.company_id, pk__in=ids)
+    if user.role not in MANAGEMENT_ROLES:
+        queryset = queryset.filter(project_member_q(user))
+    return {
+        material_request.pk: material_request
+        for material_request in queryset.select_for_update(of=('self',)).order_by('pk')
+    }
+
+
+def _failure(request_id, error):
+    return {'id': request_id, 'success': False, 'error': error}
+
+
+def bulk_approve(user, ids, comment=''):
+    """
+    Согласует пачку заявок ролью пользователя.
+
+    Returns:
+        list: результат по каждой заявке в порядке ids:
+            {'id', 'success', 'status', 'next_approval_role'} или {'id', 'success', 'error'}
+    """
+    ids = list(dict.fromkeys(ids))
+    role = user.role
+    now = timezone.now()
+    results = {}
+
+    with transaction.atomic():
+        requests = _lock_requests(user, ids)
+        approvable = []
+        for request_id in ids:
+            material_request = requests.get(request_id)
+            if material_request is None:
+                results[request_id] = _failure(request_id, 'Заявка не найдена или нет доступа к проекту')
+            elif material_request.status != MaterialRequest.STATUS_IN_APPROVAL:
+                results[request_id] = _failure(request_id, 'Заявка не находится на согласовании')
+            elif material_request.current_approval_role != role:
+                results[request_id] = _failure(
+                    request_id,
+                    f'Сейчас заявка ожидает согласования роли: {material_request.current_approval_role}'
+                )
+            else:
+                approvable.append(material_request)
+
+        # Текущие шаги согласования одним запросом (первый ожидающий шаг роли)
+        pending_steps = {}
+        for step in ApprovalStep.objects.filter(
+            material_request__in=approvable, role=role, status=ApprovalStep.STATUS_PENDING
+        ).order_by('created_at'):
+            pending_steps.setdefault(step.material_request_id, step)
+
+        approved_steps, new_steps, history, next_roles = [], [], [], set()
+        history_comment = f'Согласовано ролью {role}. {comment}' if comment else f'Согласовано ролью {role}'
+        for material_request in approvable:
+            step = pending_steps.get(material_request.pk)
+            if step:
+                step.status = ApprovalStep.STATUS_APPROVED
+                step.approved_by = user
+                step.approved_at = now
+                if comment:
+                    step.comment = comment
+                approved_steps.append(step)
+
+            # Маршрут сохранен в заявке при отправке, следующая роль определяется без запросов
+            next_role = material_request.get_next_approval_role(role)
+            material_request.updated_at = now
+            if next_role:
+                material_request.current_approval_role = next_role
+                new_steps.append(ApprovalStep(
+                    material_request=material_request, role=next_role, status=ApprovalStep.STATUS_PENDING
+                ))
+                next_roles.add(next_role)
+            else:
+                material_request.status = MaterialRequest.STATUS_APPROVED
+                material_request.current_approval_role = None
+                material_request.approved_at = now
+
+            history.append(history_entry(
+                material_request, user, MaterialRequestHistory.ACTION_APPROVED, comment=history_comment,
+            ))
+            results[material_request.pk] = {
+                'id': material_request.pk,
+                'success': True,
+                'status': material_request.status,
+                'next_approval_role': material_request.current_approval_role,
+            }
+
+        ApprovalStep.objects.bulk_update(approved_steps, ['status', 'approved_by', 'approved_at', 'comment'])
+        MaterialRequest.objects.bulk_update(
+            approvable, ['status', 'current_approval_role', 'approved_at', 'updated_at']
+        )
+        ApprovalStep.objects.bulk_create(new_steps)
+        write_history(*history)
+
+        if approvable:
+            notify_inbox_changed(user.company_id, role, *next_roles)
+
+    logger.info(f'[Bulk] {user.email}: согласовано {len(approvable)} из {len(ids)} заявок')
+    return [results[request_id] for request_id in ids]
+
+
+def bulk_reject(user, ids, reason):
+    """
+    Возвращает пачку заявок на согласовании авторам на доработку.
+
+    Returns:
+        list: результат по каждой заявке в порядке ids:
+            {'id', 'success', 'status'} или {'id', 'success', 'error'}
+    """
+    ids = list(dict.fromkeys(ids))
+    now = timezone.now()
+    results = {}
+
+    with transaction.atomic():
+        requests = _lock_requests(user, ids)
+        rejectable = []
+        for request_id in ids:
+            material_request = requests.get(request_id)
+            if material_request is None:
+                results[request_id] = _failure(request_id, 'Заявка не найдена или нет доступа к проекту')
+            elif material_request.status != MaterialRequest.STATUS_IN_APPROVAL:
+                results[request_id] = _failure(request_id, 'Заявка не находится на согласовании')
+            else:
+                rejectable.append(material_request)
+
+        previous_roles = {material_request.current_approval_role for material_request in rejectable}
+        history = []
+        for material_request in rejectable:
+            material_request.status = MaterialRequest.STATUS_REJECTED
+            material_request.rejection_reason = reason
+            material_request.rejected_by = user
+            material_request.rejected_at = now
+            material_request.current_approval_role = None
+            material_request.updated_at = now
+            history.append(history_entry(
+                material_request, user, MaterialRequestHistory.ACTION_REJECTED,
+                comment=f'Возвращено на доработку: {reason}',
+            ))
+            results[material_request.pk] = {
+                'id': material_request.pk,
+                'success': True,
+                'status': material_request.status,
+            }
+
+        MaterialRequest.objects.bulk_update(
+            rejectable,
+            ['status', 'rejection_reason', 'rejected_by', 'rejected_at', 'current_approval_role', 'updated_at'],
+        )
+        ApprovalStep.objects.filter(
+            material_request__in=rejectable, status=ApprovalStep.STATUS_PENDING
+        ).update(status=ApprovalStep.STATUS_REJECTED, approved_at=now)
+        write_history(*history)
+
+        if rejectable:
+            notify_inbox_changed(user.company_id, *previous_roles)
+
+    logger.info(f'[Bulk] {user.email}: возвращено на доработку {len(rejectable)} из {len(ids)} заявок')
+    return [results[request_id] for request_id in ids]
@@ -0,0 +1,222 @@
+"""
+Справочник материалов компании: нормализация названий, привязка позиций и автодополнение.
+
+Одни и те же материалы в заявках пишут по-разному ("Цемент М500",
+"цемент м-500", "ЦЕМЕНТ  M500" с латинской M), поэтому позиции связываются
+с записью справочника по нормализованному ключу (название, единица):
+- регистр, "ё", лишние пробелы и знаки препинания не различаются
+- марка из 1-3 букв склеивается с числом ("м 500", "м-500" -> "м500")
+- латинские буквы, похожие на кириллические, заменяются в русских словах
+  и марках ("M500" -> "м500"), латинские названия ("Knauf") не меняются
+- размеры пишутся через латинскую x ("57 х 3,5", "57*3.5" -> "57x3.5")
+- десятичная запятая заменяется точкой ("2,5" -> "2.5")
+- синонимы единиц приводятся к одному виду ("штук", "шт." -> "шт", "м³" -> "м3")
+
+Позиции новых заявок связываются при создании (link_items), существующие -
+задачей build_material_catalog, которая группирует различные написания
+одним GROUP BY по позициям компании и обновляет позиции пакетами.
+"""
+import logging
+import re
+from collections import Counter, defaultdict
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+
+from .models import Material, MaterialRequestItem
+
+logger = logging.getLogger(__name__)
+
+# Позиций в одном bulk_update при заполнении справочника
+BACKFILL_CHUNK_SIZE = 1000
+
+# Латинские буквы, которые в русских названиях набирают вместо кириллических
+LATIN_TO_CYRILLIC = str.maketrans('aceopxykmthb', 'асеорхукмтнв')
+
+CYRILLIC_RE = re.compile(r'[а-я]')
+# Марка: 1-3 латинские буквы перед числом ("m500", "ct17")
+LATIN_GRADE_RE = re.compile(r'^[a-z]{1,3}\d')
+DECIMAL_COMMA_RE = re.compile(r'(?<=\d),(?=\d)')
+DIMENSION_RE = re.compile(r'(?<=\d)\s*[xх×*]\s*(?=\d)')
+# Все, кроме букв, цифр и символов, значимых в размерах (12.5, 50x50, 1/2)
+PUNCTUATION_RE = re.compile(r'[^\w./]+')
+# Марка материала: 1-3 буквы, отделенные от числа пробелом ("м 500" после замены дефиса)
+GRADE_RE = re.compile(r'(?<![\w.])([а-яa-z]{1,3})\s+(?=\d)')
+
+# Синонимы единиц измерения -> единица справочника
+UNIT_SYNONYMS = {
+    'шт': 'шт', 'штук': 'шт', 'штука': 'шт', 'штуки': 'шт', 'pcs': 'шт',
+    'м': 'м', 'метр': 'м', 'метров': 'м', 'мп': 'м', 'пм': 'м', 'погм': 'м',
+    'м2': 'м2', 'м²': 'м2', 'квм': 'м2',
+    'м3': 'м3', 'м³': 'м3', 'кубм': 'м3', 'куб': 'м3', 'кубов': 'м3',
+    'кг': 'кг', 'килограмм': 'кг', 'кило': 'кг',
+    'т': 'т', 'тн': 'т', 'тонна': 'т', 'тонн': 'т', 'тонны': 'т',
+    'л': 'л', 'литр': 'л', 'литров': 'л',
+    'уп': 'уп', 'упак': 'уп', 'упаковка': 'уп',
+    'меш': 'меш', 'мешок': 'меш', 'мешков': 'меш',
+    'компл': 'компл', 'комплект': 'компл', 'кт': 'компл',
+    'рул': 'рул', 'рулон': 'рул', 'рулонов': 'рул',
+    'лист': 'лист', 'листов': 'лист', 'лст': 'лист',
+}
+
+
+def _normalize_word(word):
+    if CYRILLIC_RE.search(word) or LATIN_GRADE_RE.match(word):
+        return word.translate(LATIN_TO_CYRILLIC)
+    return word
+
+
+def normalize_material_name(name):
+    """Ключ сопоставления названия материала ('' для пустого названия)."""
+    value = (name or '').lower().replace('ё', 'е')
+    value = DECIMAL_COMMA_RE.sub('.', value)
+    value = DIMENSION_RE.sub('x', value)
+    value = PUNCTUATION_RE.sub(' ', value).replace('_', ' ')
+    value = GRADE_RE.sub(r'\1', value)
+    return ' '.join(_normalize_word(word) for word in value.split())[:255]
+
+
+def normalize_unit(unit):
+    """Единица измерения справочника (неизвестные единицы - без точек и пробелов)."""
+    value = (unit or '').lower().replace('ё', 'е')
+    value = re.sub(r'[\s.\-]+', '', value)
+    return UNIT_SYNONYMS.get(value, value)[:50]
+
+
+def material_key(name, unit):
+    """Ключ записи справочника: (нормализованное название, единица)."""
+    return normalize_material_name(name), normalize_unit(unit)
+
+
+def get_or_create_materials(company_id, names_by_key):
+    """
+    Записи справочника компании по ключам, недостающие создаются.
+
+    Три запроса независимо от числа ключей: чтение, вставка недостающих
+    (ON CONFLICT DO NOTHING - параллельная заявка могла создать ту же запись)
+    и повторное чтение созданных.
+
+    Args:
+        names_by_key: {(нормализованное название, единица): отображаемое название}
+
+    Returns:
+        dict: {(нормализованное название, единица): id записи}
+    """
+    if not names_by_key:
+        return {}
+
+    def load(keys):
+        materials = Material.objects.filter(
+            company_id=company_id, normalized_name__in={name for name, _ in keys}
+        ).values_list('normalized_name', 'unit', 'id')
+        return {(name, unit): pk for name, unit, pk in materials if (name, unit) in keys}
+
+    found = load(set(names_by_key))
+    missing = set(names_by_key) - set(found)
+    if missing:
+        Material.objects.bulk_create(
+            [
+                Material(
+                    company_id=company_id, normalized_name=name, unit=unit,
+                    name=names_by_key[(name, unit)][:255],
+                )
+                for name, unit in missing
+            ],
+            ignore_conflicts=True,
+        )
+        found.update(load(missing))
+    return found
+
+
+def link_items(company_id, items):
+    """
+    Проставляет несохраненным позициям ссылку на справочник (до bulk_create).
+
+    Позиции без названия остаются без ссылки.
+    """
+    keys = {}
+    for item in items:
+        key = material_key(item.material_name, item.unit)
+        item._material_key = key
+        if key[0]:
+            keys.setdefault(key, item.material_name.strip())
+
+    materials = get_or_create_materials(company_id, keys)
+    for item in items:
+        item.material_id = materials.get(item._material_key)
+    return items
+
+
+def autocomplete(company_id, text, limit=10):
+    """
+    Записи справочника для автодополнения: сначала совпадения с начала названия,
+    затем по части слова и похожие написания (pg_trgm), по убыванию сходства.
+    """
+    query = normalize_material_name(text)
+    if not query:
+        return Material.objects.none()
+    return Material.objects.filter(company_id=company_id).filter(
+        Q(normalized_name__contains=query) | Q(normalized_name__trigram_word_similar=query)
+    ).annotate(
+        is_prefix=Case(
+            When(normalized_name__startswith=query, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+        similarity=TrigramWordSimilarity(query, 'normalized_name'),
+    ).order_by('-is_prefix', '-similarity', 'normalized_name')[:limit]
+
+
+def build_catalog(company_id, chunk_size=BACKFILL_CHUNK_SIZE):
+    """
+    Заполняет справочник компании по позициям без ссылки на него и связывает их.
+
+    Различные написания (название, единица) собираются одним GROUP BY,
+    группируются по нормализованному ключу; отображаемым названием записи
+    становится самое частое написание. Позиции обновляются через bulk_update
+    частями по chunk_size, каждая часть - в своей транзакции.
+
+    Returns:
+        dict: {'variants', 'materials', 'items'} - написаний, записей справочника, связанных позиций
+    """
+    unlinked = MaterialRequestItem.objects.filter(
+        material_request__company_id=company_id, material__isnull=True
+    )
+
+    spellings = defaultdict(Counter)
+    variant_keys = {}
+    variants = unlinked.values('material_name', 'unit').annotate(n=Count('id')).order_by()
+    for variant in variants:
+        key = material_key(variant['material_name'], variant['unit'])
+        variant_keys[(variant['material_name'], variant['unit'])] = key
+        if key[0]:
+            spellings[key][variant['material_name'].strip()] += variant['n']
+
+    materials = get_or_create_materials(
+        company_id, {key: counter.most_common(1)[0][0] for key, counter in spellings.items()}
+    )
+
+    linked = 0
+    last_pk = 0
+    while True:
+        chunk = list(
+            unlinked.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'material_name', 'unit')[:chunk_size]
+        )
+        if not chunk:
+            break
+        last_pk = chunk[-1][0]
+
+        items = []
+        for pk, name, unit in chunk:
+            key = variant_keys.get((name, unit)) or material_key(name, unit)
+            material_id = materials.get(key)
+            if material_id:
+                items.append(MaterialRequestItem(pk=pk, material_id=material_id))
+        with transaction.atomic():
+            MaterialRequestItem.objects.bulk_update(items, ['material'])
+        linked += len(items)
+
+    stats = {'variants': len(variant_keys), 'materials': len(materials), 'items': linked}
+    logger.info(f'[Catalog] Компания {company_id}: {stats}')
+    return stats
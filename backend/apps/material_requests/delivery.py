@@ -0,0 +1,111 @@
+"""
+Пакетная приемка поставки на объекте.
+
+Фактическое количество и приемка многих позиций заявки применяются одним
+запросом: позиции блокируются одним SELECT ... FOR UPDATE, изменения
+записываются одним bulk_update, история - одним bulk_create (write_history),
+а признак "все позиции приняты" считается одним агрегатом. Позиции, которые
+нельзя обновить (не найдены, уже приняты), не прерывают пачку и
+возвращаются в результатах с причиной.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .history import history_entry, write_history
+from .models import MaterialRequestHistory, MaterialRequestItem
+
+logger = logging.getLogger(__name__)
+
+# Роли, которые принимают материалы на объекте
+RECEIVER_ROLES = ('MASTER', 'FOREMAN', 'SITE_MANAGER', 'SITE_WAREHOUSE_MANAGER')
+
+
+def _failure(item_id, error):
+    return {'item_id': item_id, 'success': False, 'error': error}
+
+
+def receive_items(material_request, user, entries):
+    """
+    Применяет пачку изменений позиций заявки на доставке.
+
+    Args:
+        entries: [{'item_id', 'quantity_actual' (опционально), 'received' (bool),
+                   'notes' (опционально)}, ...] - item_id не повторяются
+
+    Returns:
+        dict: {'results': результат по каждой записи в порядке entries,
+               'all_items_received': bool}
+    """
+    now = timezone.now()
+    results = []
+    changed, history = [], []
+
+    request_items = MaterialRequestItem.objects.filter(material_request=material_request)
+
+    with transaction.atomic():
+        items = request_items.select_for_update().order_by('pk').in_bulk(
+            [entry['item_id'] for entry in entries]
+        )
+        for entry in entries:
+            item_id = entry['item_id']
+            item = items.get(item_id)
+            if item is None:
+                results.append(_failure(item_id, 'Позиция не найдена'))
+                continue
+            if item.status == MaterialRequestItem.STATUS_RECEIVED:
+                results.append(_failure(item_id, 'Эта позиция уже принята'))
+                continue
+
+            notes = entry.get('notes') or ''
+            if notes:
+                item.notes = notes
+            quantity_actual = entry.get('quantity_actual')
+            if quantity_actual is not None:
+                item.quantity_actual = quantity_actual
+                item.apply_quantity_status()
+                history.append(history_entry(
+                    material_request, user, MaterialRequestHistory.ACTION_DELIVERED,
+                    comment=f'Обновлено фактическое количество позиции "{item.material_name}": '
+                            f'{quantity_actual} {item.unit}. {notes}',
+                ))
+            if entry.get('received'):
+                item.status = MaterialRequestItem.STATUS_RECEIVED
+                item.received_at = now
+                history.append(history_entry(
+                    material_request, user, MaterialRequestHistory.ACTION_ITEM_RECEIVED,
+                    comment=f'Позиция "{item.material_name}" ({item.quantity_requested} {item.unit}) принята на объекте',
+                ))
+
+            changed.append(item)
+            results.append({
+                'item_id': item_id,
+                'success': True,
+                'quantity_actual': float(item.quantity_actual) if item.quantity_actual is not None else None,
+                'item_status': item.status,
+                'item_status_display': item.get_status_display(),
+            })
+
+        MaterialRequestItem.objects.bulk_update(changed, ['quantity_actual', 'notes', 'status', 'received_at'])
+
+        counts = request_items.aggregate(
+            total=Count('id'),
+            received=Count('id', filter=Q(status=MaterialRequestItem.STATUS_RECEIVED)),
+        )
+        all_items_received = counts['total'] > 0 and counts['received'] == counts['total']
+
+        newly_received = any(entry.get('received') for entry, result in zip(entries, results) if result['success'])
+        if all_items_received and newly_received:
+            history.append(history_entry(
+                material_request, user, MaterialRequestHistory.ACTION_RECEIVED,
+                comment='Все позиции заявки приняты на объекте',
+            ))
+        write_history(*history)
+
+    logger.info(
+        f'[Delivery] {user.email}: заявка {material_request.request_number}, '
+        f'обновлено позиций {len(changed)} из {len(entries)}, все позиции приняты: {all_items_received}'
+    )
+    return {'results': results, 'all_items_received': all_items_received}
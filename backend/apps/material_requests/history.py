@@ -0,0 +1,40 @@
+"""
+Запись и чтение истории заявок.
+
+Записи одного действия создаются одним bulk_create (write_history), в том
+числе когда действие пишет несколько строк (например, приемка последней
+позиции: "позиция принята" и "материалы приняты").
+
+История отдается отдельным endpoint /api/material-requests/{id}/history/ с
+курсорной пагинацией по (created_at, id) внутри заявки: страница читается по
+индексу mr_history_request_created_idx (material_request, created_at DESC,
+id DESC) без OFFSET, глубина истории не влияет на время запроса.
+"""
+from rest_framework.pagination import CursorPagination
+
+from .models import MaterialRequestHistory
+
+
+def history_entry(material_request, user, action, comment='', details=None):
+    """Несохраненная запись истории (для write_history)."""
+    return MaterialRequestHistory(
+        material_request=material_request,
+        action=action,
+        user=user,
+        comment=comment,
+        details=details or {},
+    )
+
+
+def write_history(*entries):
+    """Сохраняет записи истории одним INSERT."""
+    return MaterialRequestHistory.objects.bulk_create(entries)
+
+
+class HistoryCursorPagination(CursorPagination):
+    """Курсорная пагинация истории заявки: сначала новые записи."""
+
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,138 @@
+"""
+Входящие заявки на согласование ("ожидают моей роли").
+
+Выборка идет по частичному индексу mr_approval_inbox_live_idx
+(company, current_approval_role, status), закрепление за проектом проверяется
+подзапросом EXISTS, без загрузки проектов пользователя в Python.
+
+Счетчики входящих (бейджи) пересчитываются после коммита, когда заявка
+переходит к другой роли, и отправляются пользователям через WebSocket
+событием 'approval_inbox'.
+"""
+import logging
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+
+from apps.projects.models import Project
+from apps.users.models import User
+from .models import MaterialRequest
+
+logger = logging.getLogger(__name__)
+
+# Руководящие роли видят заявки всех проектов компании
+MANAGEMENT_ROLES = (
+    'SUPERADMIN', 'DIRECTOR', 'CHIEF_ENGINEER',
+    'PROJECT_MANAGER', 'CHIEF_POWER_ENGINEER',
+)
+
+INBOX_EVENT = 'approval_inbox'
+
+ProjectMember = Project.team_members.through
+
+
+def project_member_q(user, project_ref='project_id'):
+    """
+    Условие "пользователь закреплен за проектом" (участник или руководитель проекта).
+
+    Args:
+        project_ref: поле с ID проекта в фильтруемой модели
+    """
+    return Q(Exists(
+        ProjectMember.objects.filter(
+            project_id=OuterRef(project_ref), user_id=user.pk, project__is_deleted=False
+        )
+    )) | Q(Exists(
+        Project.objects.filter(pk=OuterRef(project_ref), project_manager_id=user.pk)
+    ))
+
+
+def has_project_access(user, project_id):
+    """Доступ пользователя к проекту заявки одним запросом EXISTS (руководители - без запроса)."""
+    if user.role in MANAGEMENT_ROLES:
+        return True
+    return Project.objects.filter(pk=project_id).filter(project_member_q(user, 'pk')).exists()
+
+
+def inbox_queryset(user):
+    """Заявки компании пользователя, ожидающие согласования его ролью."""
+    queryset = MaterialRequest.objects.filter(
+        company_id=user.company_id,
+        current_approval_role=user.role,
+        status=MaterialRequest.STATUS_IN_APPROVAL,
+    )
+    if user.role not in MANAGEMENT_ROLES:
+        queryset = queryset.filter(project_member_q(user))
+    return queryset
+
+
+def inbox_counts(company_id, role):
+    """
+    Размер входящих каждого активного пользователя роли в компании.
+
+    Выполняет не больше четырех запросов независимо от числа пользователей:
+    пользователи роли, заявки роли по проектам и закрепления за проектами.
+
+    Returns:
+        dict: {user_id: количество заявок}
+    """
+    user_ids = list(
+        User.objects.filter(company_id=company_id, role=role, is_active=True).values_list('id', flat=True)
+    )
+    if not user_ids:
+        return {}
+
+    pending = MaterialRequest.objects.filter(
+        company_id=company_id,
+        current_approval_role=role,
+        status=MaterialRequest.STATUS_IN_APPROVAL,
+    ).order_by()
+
+    if role in MANAGEMENT_ROLES:
+        total = pending.count()
+        return {user_id: total for user_id in user_ids}
+
+    by_project = dict(pending.values('project_id').annotate(n=Count('id')).values_list('project_id', 'n'))
+    user_projects = {user_id: set() for user_id in user_ids}
+    if by_project:
+        memberships = ProjectMember.objects.filter(
+            user_id__in=user_ids, project_id__in=by_project, project__is_deleted=False
+        )
+        for user_id, project_id in memberships.values_list('user_id', 'project_id'):
+            user_projects[user_id].add(project_id)
+        managed = Project.objects.filter(project_manager_id__in=user_ids, pk__in=by_project)
+        for user_id, project_id in managed.values_list('project_manager_id', 'pk'):
+            user_projects[user_id].add(project_id)
+
+    return {
+        user_id: sum(by_project[project_id] for project_id in projects)
+        for user_id, projects in user_projects.items()
+    }
+
+
+def push_inbox_counts(company_id, roles):
+    """Отправляет пользователям ролей актуальные счетчики входящих через WebSocket."""
+    from apps.notifications.utils import send_user_event
+
+    sent = Counter()
+    for role in set(roles):
+        if not role:
+            continue
+        for user_id, count in inbox_counts(company_id, role).items():
+            send_user_event(user_id, INBOX_EVENT, {'count': count})
+            sent[role] += 1
+    logger.debug(f'[Inbox] Компания {company_id}: счетчики отправлены {dict(sent)}')
+
+
+def notify_inbox_changed(company_id, *roles):
+    """
+    Планирует пересчет бейджей ролей после коммита текущей транзакции.
+
+    Вызывается, когда заявка уходит от роли или приходит к ней.
+    """
+    from .tasks import push_approval_inbox_counts
+
+    roles = sorted({role for role in roles if role})
+    if company_id and roles:
+        transaction.on_commit(lambda: push_approval_inbox_counts.delay(company_id, roles))
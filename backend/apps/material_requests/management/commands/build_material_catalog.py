@@ -0,0 +1,37 @@
+"""
+Management команда для заполнения справочника материалов по существующим позициям заявок.
+
+Различные написания одного материала группируются по нормализованному
+названию и единице (см. apps/material_requests/catalog.py), позиции без
+ссылки на справочник связываются пакетами.
+
+Использование:
+    python manage.py build_material_catalog               # Все компании
+    python manage.py build_material_catalog --company 5
+    python manage.py build_material_catalog --async       # Через Celery
+"""
+from django.core.management.base import BaseCommand
+
+from apps.material_requests.tasks import build_material_catalog
+
+
+class Command(BaseCommand):
+    help = 'Заполняет справочник материалов и связывает с ним позиции заявок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help='ID компании (по умолчанию - все)')
+        parser.add_argument('--async', action='store_true', dest='run_async', help='Запустить задачей Celery')
+
+    def handle(self, *args, **options):
+        if options['run_async']:
+            result = build_material_catalog.delay(options['company'])
+            self.stdout.write(self.style.SUCCESS(f'Задача запущена: {result.id}'))
+            return
+
+        stats = build_material_catalog(options['company'])
+        for company_id, company_stats in stats.items():
+            self.stdout.write(
+                f'Компания {company_id}: написаний {company_stats["variants"]}, '
+                f'материалов {company_stats["materials"]}, связано позиций {company_stats["items"]}'
+            )
+        self.stdout.write(self.style.SUCCESS('Справочник материалов заполнен'))
@@ -0,0 +1,99 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:52
+"""
+Частичные индексы по НЕ удаленным записям (WHERE is_deleted = false).
+
+Индексы создаются CONCURRENTLY, без блокировки записи в таблицу. Отдельный
+индекс по is_deleted больше не нужен: все горячие выборки идут через
+SoftDeleteManager и покрываются частичными индексами.
+"""
+
+from django.conf import settings
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    RemoveIndexConcurrently,
+)
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("material_requests", "0009_materialrequestitem_received_at_and_more"),
+    ]
+
+    operations = [
+        RemoveIndexConcurrently(
+            model_name="materialrequest",
+            name="material_re_is_dele_4dfa50_idx",
+        ),
+        migrations.AddField(
+            model_name="materialrequest",
+            name="deleted_by",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Пользователь, удаливший запись",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="deleted_%(app_label)s_%(class)s",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Удалил",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="materialrequest",
+            name="deleted_at",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                help_text="Дата и время когда запись была удалена",
+                null=True,
+                verbose_name="Дата удаления",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="materialrequest",
+            name="is_deleted",
+            field=models.BooleanField(
+                default=False,
+                help_text="Запись помечена как удаленная (soft delete)",
+                verbose_name="Удалено",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="materialrequest",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["company", "status", "-created_at"],
+                name="mr_company_status_live_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="materialrequest",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["project", "status"],
+                name="mr_project_status_live_idx",
+            ),
+        ),
+        # Ручные индексы из 0007 заменены частичными индексами выше
+        migrations.RunSQL(
+            sql=[
+                "DROP INDEX CONCURRENTLY IF EXISTS idx_company_status_deleted;",
+                "DROP INDEX CONCURRENTLY IF EXISTS idx_project_status;",
+            ],
+            reverse_sql=[
+                """
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_company_status_deleted
+                ON material_requests (company_id, status, is_deleted);
+                """,
+                """
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_project_status
+                ON material_requests (project_id, status);
+                """,
+            ],
+        ),
+    ]
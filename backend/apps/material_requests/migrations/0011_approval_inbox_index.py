@@ -0,0 +1,36 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:58
+"""
+Частичный индекс входящих на согласование (company, current_approval_role, status).
+
+Создается CONCURRENTLY и заменяет ручной индекс idx_company_approval_role из 0007.
+"""
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("material_requests", "0010_soft_delete_live_indexes"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="materialrequest",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["company", "current_approval_role", "status"],
+                name="mr_approval_inbox_live_idx",
+            ),
+        ),
+        migrations.RunSQL(
+            sql="DROP INDEX CONCURRENTLY IF EXISTS idx_company_approval_role;",
+            reverse_sql="""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_company_approval_role
+            ON material_requests (company_id, current_approval_role);
+            """,
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("material_requests", "0011_approval_inbox_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="materialrequest",
+            name="approval_route",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Роли, согласующие заявку по порядку (фиксируется при отправке на согласование)",
+                verbose_name="Маршрут согласования",
+            ),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:10
+"""
+Полнотекстовый поиск по заявкам на материалы.
+
+Колонка search_vector заполняется триггером material_requests_search_vector_update
+при изменении request_number, title, description, существующие записи пересчитываются
+в миграции. GIN индексы создаются CONCURRENTLY.
+"""
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+SEARCH_VECTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION material_requests_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.request_number, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER material_requests_search_vector_trigger
+BEFORE INSERT OR UPDATE OF request_number, title, description ON material_requests
+FOR EACH ROW EXECUTE FUNCTION material_requests_search_vector_update();
+
+UPDATE material_requests SET title = title;
+"""
+
+DROP_SEARCH_VECTOR_FUNCTION = """
+DROP TRIGGER IF EXISTS material_requests_search_vector_trigger ON material_requests;
+DROP FUNCTION IF EXISTS material_requests_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("core", "0014_pg_trgm_extension"),
+        ("material_requests", "0012_materialrequest_approval_route"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="materialrequest",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunSQL(
+            sql=SEARCH_VECTOR_FUNCTION, reverse_sql=DROP_SEARCH_VECTOR_FUNCTION
+        ),
+        AddIndexConcurrently(
+            model_name="materialrequest",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="mr_search_vector_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="materialrequest",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["request_number"],
+                name="mr_number_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="materialrequest",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"], name="mr_title_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+    ]
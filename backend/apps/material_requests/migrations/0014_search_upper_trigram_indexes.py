@@ -0,0 +1,54 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:18
+"""
+Индексы pg_trgm по UPPER(поле) вместо поля.
+
+Django строит icontains как UPPER(поле::text) LIKE UPPER(...), индекс по самой
+колонке такое условие не покрывает. Индексы пересоздаются CONCURRENTLY.
+"""
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    RemoveIndexConcurrently,
+)
+from django.db import migrations
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("material_requests", "0013_search_vector"),
+    ]
+
+    operations = [
+        RemoveIndexConcurrently(
+            model_name="materialrequest",
+            name="mr_number_trgm_idx",
+        ),
+        RemoveIndexConcurrently(
+            model_name="materialrequest",
+            name="mr_title_trgm_idx",
+        ),
+        AddIndexConcurrently(
+            model_name="materialrequest",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("request_number"),
+                    name="gin_trgm_ops",
+                ),
+                name="mr_number_upper_trgm_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="materialrequest",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("title"), name="gin_trgm_ops"
+                ),
+                name="mr_title_upper_trgm_idx",
+            ),
+        ),
+    ]
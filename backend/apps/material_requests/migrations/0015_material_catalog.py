@@ -0,0 +1,129 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:21
+"""
+Справочник материалов компании и ссылка на него из позиций заявок.
+
+Индекс позиций (material, status) создается CONCURRENTLY. Существующие
+позиции связываются со справочником задачей build_material_catalog
+(python manage.py build_material_catalog).
+"""
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("users", "0022_user_live_indexes"),
+        ("material_requests", "0014_search_upper_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Material",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        help_text="Отображаемое название (самое частое написание в заявках)",
+                        max_length=255,
+                        verbose_name="Название",
+                    ),
+                ),
+                (
+                    "normalized_name",
+                    models.CharField(
+                        help_text="Название для сопоставления и поиска (см. catalog.normalize_material_name)",
+                        max_length=255,
+                        verbose_name="Нормализованное название",
+                    ),
+                ),
+                (
+                    "unit",
+                    models.CharField(
+                        help_text="Нормализованная единица измерения (шт, м, м2, м3, кг, т и т.д.)",
+                        max_length=50,
+                        verbose_name="Единица измерения",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата создания"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Материал",
+                "verbose_name_plural": "Справочник материалов",
+                "db_table": "material_catalog",
+                "ordering": ["normalized_name"],
+            },
+        ),
+        migrations.AddField(
+            model_name="material",
+            name="company",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="materials",
+                to="users.company",
+                verbose_name="Компания",
+            ),
+        ),
+        migrations.AddField(
+            model_name="materialrequestitem",
+            name="material",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                help_text="Заполняется автоматически по названию и единице измерения",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="items",
+                to="material_requests.material",
+                verbose_name="Материал из справочника",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="material",
+            index=models.Index(
+                fields=["company", "normalized_name"],
+                name="material_name_prefix_idx",
+                opclasses=["int8_ops", "varchar_pattern_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="material",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["normalized_name"],
+                name="material_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="material",
+            constraint=models.UniqueConstraint(
+                fields=("company", "normalized_name", "unit"),
+                name="unique_material_per_company",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="materialrequestitem",
+            index=models.Index(
+                fields=["material", "status"], name="mr_item_material_status_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:32
+"""
+Составной индекс истории заявки (material_request, created_at DESC, id DESC).
+
+Страницы /history/ читаются по нему без сортировки; индекс по одному
+material_request становится лишним и удаляется после создания нового.
+Индексы создаются и удаляются CONCURRENTLY.
+"""
+
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    RemoveIndexConcurrently,
+)
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("material_requests", "0015_material_catalog"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="materialrequesthistory",
+            index=models.Index(
+                fields=["material_request", "-created_at", "-id"],
+                name="mr_history_request_created_idx",
+            ),
+        ),
+        RemoveIndexConcurrently(
+            model_name="materialrequesthistory",
+            name="material_re_materia_115a25_idx",
+        ),
+    ]
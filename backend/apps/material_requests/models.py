@@ -4,20 +4,24 @@
 
 Система включает:
 1. MaterialRequest - основная заявка
-2. MaterialRequestItem - позиция заявки (материал)
-3. ApprovalStep - этап согласования заявки
-4. MaterialRequestHistory - история изменений заявки
+2. Material - материал из справочника компании (нормализованные название и единица)
+3. MaterialRequestItem - позиция заявки (материал)
+4. ApprovalStep - этап согласования заявки
+5. MaterialRequestHistory - история изменений заявки
 """
 
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-from django.core.cache import cache
+from apps.core.mixins import SoftDeleteMixin, SoftDeleteManager, live_index
 from apps.users.models import User, Company
 from apps.projects.models import Project
 
 
-class MaterialRequest(models.Model):
+class MaterialRequest(SoftDeleteMixin, models.Model):
     """
     Основная модель заявки на строительные материалы.
 
@@ -117,6 +121,13 @@ class MaterialRequest(models.Model):
         help_text='Роль сотрудника, который должен согласовать заявку сейчас'
     )
 
+    approval_route = models.JSONField(
+        'Маршрут согласования',
+        default=list,
+        blank=True,
+        help_text='Роли, согласующие заявку по порядку (фиксируется при отправке на согласование)'
+    )
+
     # Даты
     created_at = models.DateTimeField(
         'Дата создания',
@@ -174,18 +185,12 @@ class MaterialRequest(models.Model):
         blank=True
     )
 
-    # Soft delete
-    is_deleted = models.BooleanField(
-        'Удалена',
-        default=False,
-        help_text='Мягкое удаление'
-    )
+    # Поисковый вектор (номер, название, описание) - заполняет триггер БД, см. apps/core/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
 
-    deleted_at = models.DateTimeField(
-        'Дата удаления',
-        null=True,
-        blank=True
-    )
+    # Managers для soft delete
+    objects = SoftDeleteManager()  # По умолчанию: только активные (не удаленные)
+    all_objects = models.Manager()  # Для доступа ко всем записям (включая удаленные)
 
     class Meta:
         db_table = 'material_requests'
@@ -202,13 +207,23 @@ class MaterialRequest(models.Model):
             models.Index(fields=['company']),
             models.Index(fields=['project']),
             models.Index(fields=['current_approval_role']),
-            models.Index(fields=['is_deleted']),
+
+            # Частичные индексы по живым заявкам (созданы с CONCURRENTLY)
+            live_index('company', 'status', '-created_at', name='mr_company_status_live_idx'),
+            live_index('project', 'status', name='mr_project_status_live_idx'),
+            # Входящие на согласование (см. inbox.py)
+            live_index('company', 'current_approval_role', 'status', name='mr_approval_inbox_live_idx'),
+
+            # Поиск: полнотекстовый и по части номера/названия (pg_trgm).
+            # icontains строится как UPPER(поле) LIKE UPPER(...), поэтому индекс по UPPER(поле)
+            GinIndex(fields=['search_vector'], name='mr_search_vector_idx'),
+            GinIndex(OpClass(Upper('request_number'), name='gin_trgm_ops'), name='mr_number_upper_trgm_idx'),
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='mr_title_upper_trgm_idx'),
 
             # Составные индексы созданы вручную через SQL с CONCURRENTLY (см. DEPLOY_PRODUCTION.md)
-            # idx_company_status_deleted: project_id, status, is_deleted
-            # idx_company_approval_step: project_id, current_step_id
-            # idx_project_status: project_id, status
             # idx_author_created: author_id, created_at DESC
+            # (idx_company_status_deleted, idx_project_status и idx_company_approval_role
+            # заменены частичными индексами выше)
         ]
 
     def __str__(self):
@@ -216,12 +231,8 @@ class MaterialRequest(models.Model):
 
     def save(self, *args, **kwargs):
         """Переопределяем save для автогенерации номера заявки."""
-        from django.db import transaction
-
         if not self.request_number:
-            # Генерируем номер внутри транзакции с блокировкой для предотвращения race condition
-            with transaction.atomic():
-                self.request_number = self.generate_request_number()
+            self.request_number = self.generate_request_number()
         super().save(*args, **kwargs)
 
     def generate_request_number(self):
@@ -231,31 +242,13 @@ class MaterialRequest(models.Model):
         Номер продолжается (не сбрасывается) и уникален в рамках компании.
         Пример: 12112025-1, 12112025-2, 13112025-3 (номер 3 продолжается на следующий день)
 
-        ВАЖНО: Метод должен вызываться внутри transaction.atomic() для предотвращения race condition.
+        Порядковый номер выдает счетчик компании (apps/core/numbering.py)
+        одним атомарным запросом, без блокировки заявок компании.
         """
-        import re
+        from apps.core.numbering import KIND_MATERIAL_REQUEST, next_number
 
-        # Текущая дата в формате ДДММГГГГ
         today = timezone.now().strftime('%d%m%Y')
-
-        # Используем select_for_update для блокировки строк при чтении
-        # ВАЖНО: aggregate() не работает с select_for_update(), используем order_by().first()
-        # Блокируем последнюю заявку компании для предотвращения race condition
-        last_request_obj = MaterialRequest.objects.filter(
-            company=self.company
-        ).select_for_update().order_by('-id').first()
-
-        if last_request_obj and last_request_obj.request_number:
-            # Извлекаем последний порядковый номер (после дефиса)
-            match = re.search(r'-(\d+)$', last_request_obj.request_number)
-            if match:
-                next_number = int(match.group(1)) + 1
-            else:
-                next_number = 1
-        else:
-            next_number = 1
-
-        return f'{today}-{next_number}'
+        return f'{today}-{next_number(KIND_MATERIAL_REQUEST, self.company_id)}'
 
     def submit_for_approval(self):
         """
@@ -264,12 +257,14 @@ class MaterialRequest(models.Model):
         Все операции выполняются атомарно для предотвращения несогласованного состояния.
         """
         from django.db import transaction
+        from .inbox import notify_inbox_changed
 
         if self.status != self.STATUS_DRAFT:
             raise ValidationError('Только черновики можно отправить на согласование')
 
-        # Определяем первую роль в цепочке согласования на основе роли автора
-        first_role = self.get_first_approval_role()
+        # Маршрут согласования по роли автора и составу компании (из кэша маршрутов)
+        route = self.build_approval_route()
+        first_role = route[0] if route else None
 
         # Проверка на fallback: если нет доступных ролей для согласования
         if not first_role:
@@ -282,6 +277,7 @@ class MaterialRequest(models.Model):
         with transaction.atomic():
             self.status = self.STATUS_IN_APPROVAL
             self.current_approval_role = first_role
+            self.approval_route = route
             self.submitted_at = timezone.now()
             self.save()
 
@@ -292,41 +288,31 @@ class MaterialRequest(models.Model):
                 status=ApprovalStep.STATUS_PENDING
             )
 
-    def get_first_approval_role(self):
+            notify_inbox_changed(self.company_id, first_role)
+
+    def build_approval_route(self):
         """
-        Определяет первую роль в цепочке согласования на основе роли автора.
+        Маршрут согласования заявки на основе роли автора.
 
         Правила:
         - Если автор Мастер или Прораб -> начинаем с Начальника участка
         - Если автор Начальник участка -> начинаем с Инженера ПТО
 
-        ВАЖНО: Проверяет наличие роли в компании и использует fallback.
+        ВАЖНО: Учитывает наличие ролей в компании и использует fallback
+        (см. apps/material_requests/routes.py).
         """
+        from .routes import route_for_author
+
         # Проверка на NULL автора
         if not self.author:
             raise ValidationError('Заявка должна иметь автора для отправки на согласование')
 
-        # Определяем первую роль по автору
-        if self.author.role in ['MASTER', 'FOREMAN']:
-            first_role = 'SITE_MANAGER'
-        elif self.author.role == 'SITE_MANAGER':
-            first_role = 'ENGINEER'
-        else:
-            # Если роль не соответствует ожидаемым, начинаем с Начальника участка
-            first_role = 'SITE_MANAGER'
-
-        # Fallback: проверяем наличие роли в компании
-        available_roles = self.get_company_available_roles()
-        if first_role not in available_roles:
-            # Ищем следующую доступную роль в цепочке
-            approval_chain = ['SITE_MANAGER', 'ENGINEER', 'SUPPLY_MANAGER']
-            for role in approval_chain:
-                if role in available_roles:
-                    return role
-            # Если ни одна роль не найдена - возвращаем None (обработка в submit_for_approval)
-            return None
-
-        return first_role
+        return route_for_author(self.company_id, self.author.role)
+
+    def get_first_approval_role(self):
+        """Первая роль в маршруте согласования (None, если согласовать некому)."""
+        route = self.build_approval_route()
+        return route[0] if route else None
 
     def approve_by_role(self, user, role):
         """
@@ -339,6 +325,7 @@ class MaterialRequest(models.Model):
         Все операции выполняются атомарно для предотвращения несогласованного состояния.
         """
         from django.db import transaction
+        from .inbox import notify_inbox_changed
 
         if self.status != self.STATUS_IN_APPROVAL:
             raise ValidationError('Заявка не находится на согласовании')
@@ -382,65 +369,33 @@ class MaterialRequest(models.Model):
                 self.approved_at = timezone.now()
                 self.save()
 
+            notify_inbox_changed(self.company_id, role, self.current_approval_role)
+
     def get_company_available_roles(self):
         """
-        Получает список доступных ролей в компании (с кэшированием).
+        Роли активных сотрудников компании.
 
-        Кэширование на 60 секунд для баланса между производительностью и актуальностью данных.
+        Берутся из кэша маршрутов компании, который сбрасывается сигналами User.
         """
-        company_id = self.company_id
-        cache_key = f'company_available_roles_{company_id}'
-        available_roles = cache.get(cache_key)
-
-        if available_roles is None:
-            # Получаем все активные роли пользователей в компании
-            available_roles = set(
-                User.objects.filter(company_id=company_id, is_active=True)
-                .values_list('role', flat=True)
-                .distinct()
-            )
-            # Кэшируем на 60 секунд (1 минута) для быстрого обновления
-            cache.set(cache_key, available_roles, timeout=60)
+        from .routes import compiled_company
 
-        return available_roles
+        return set(compiled_company(self.company_id)['roles'])
 
     def get_next_approval_role(self, current_role):
         """
-        Определяет следующую роль в цепочке согласования.
+        Определяет следующую роль в маршруте согласования заявки.
 
         Цепочка: Мастер → Прораб → Начальник участка → Инженер ПТО →
                  Руководитель проекта → Главный инженер → Директор → (конец)
 
-        Пропускаем роль, если нет пользователя с такой ролью в компании.
-        Использует кэширование для предотвращения N+1 проблемы.
+        Маршрут фиксируется при отправке заявки, поэтому это поиск в коротком
+        списке без запросов. Для заявок, отправленных раньше, маршрут строится
+        по текущему составу компании из кэша.
         """
-        approval_chain = [
-            'MASTER',
-            'FOREMAN',
-            'SITE_MANAGER',
-            'ENGINEER',
-            'PROJECT_MANAGER',
-            'CHIEF_ENGINEER',
-            'DIRECTOR',
-        ]
-
-        try:
-            current_index = approval_chain.index(current_role)
-        except ValueError:
-            return None
+        from .routes import next_role_in_route, route_from_role
 
-        # Получаем доступные роли в компании (с кэшированием)
-        available_roles = self.get_company_available_roles()
-
-        # Ищем следующую роль, для которой есть пользователи в компании
-        for i in range(current_index + 1, len(approval_chain)):
-            next_role = approval_chain[i]
-            # Проверяем через кэшированный set (O(1) вместо запроса к БД)
-            if next_role in available_roles:
-                return next_role
-
-        # Если дошли до конца цепочки
-        return None
+        route = self.approval_route or route_from_role(self.company_id, current_role)
+        return next_role_in_route(route, current_role)
 
     def reject_to_author(self, user, reason):
         """
@@ -453,10 +408,13 @@ class MaterialRequest(models.Model):
         Все операции выполняются атомарно для предотвращения несогласованного состояния.
         """
         from django.db import transaction
+        from .inbox import notify_inbox_changed
 
         if not reason:
             raise ValidationError('Необходимо указать причину возврата')
 
+        previous_role = self.current_approval_role
+
         # Атомарная транзакция для обновления заявки и шагов согласования
         with transaction.atomic():
             self.status = self.STATUS_REJECTED
@@ -475,6 +433,8 @@ class MaterialRequest(models.Model):
                 approved_at=timezone.now()
             )
 
+            notify_inbox_changed(self.company_id, previous_role)
+
     def mark_as_payment(self, user):
         """
         Снабженец переводит заявку в статус "На оплате".
@@ -529,6 +489,66 @@ class MaterialRequest(models.Model):
         self.save()
 
 
+class Material(models.Model):
+    """
+    Материал из справочника компании.
+
+    Позиции заявок с разным написанием одного материала ("Цемент М500",
+    "цемент м-500") ссылаются на одну запись справочника: записи уникальны
+    по нормализованным названию и единице измерения (см. catalog.py).
+    """
+
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name='materials',
+        verbose_name='Компания'
+    )
+
+    name = models.CharField(
+        'Название',
+        max_length=255,
+        help_text='Отображаемое название (самое частое написание в заявках)'
+    )
+
+    normalized_name = models.CharField(
+        'Нормализованное название',
+        max_length=255,
+        help_text='Название для сопоставления и поиска (см. catalog.normalize_material_name)'
+    )
+
+    unit = models.CharField(
+        'Единица измерения',
+        max_length=50,
+        help_text='Нормализованная единица измерения (шт, м, м2, м3, кг, т и т.д.)'
+    )
+
+    created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+
+    class Meta:
+        db_table = 'material_catalog'
+        verbose_name = 'Материал'
+        verbose_name_plural = 'Справочник материалов'
+        ordering = ['normalized_name']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['company', 'normalized_name', 'unit'], name='unique_material_per_company'
+            ),
+        ]
+        indexes = [
+            # Автодополнение: по началу названия и по части слова (pg_trgm)
+            models.Index(
+                fields=['company', 'normalized_name'],
+                opclasses=['int8_ops', 'varchar_pattern_ops'],
+                name='material_name_prefix_idx',
+            ),
+            GinIndex(fields=['normalized_name'], opclasses=['gin_trgm_ops'], name='material_name_trgm_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.unit})"
+
+
 class MaterialRequestItem(models.Model):
     """
     Позиция заявки на материалы (конкретный материал).
@@ -557,6 +577,18 @@ class MaterialRequestItem(models.Model):
     )
 
     # Информация о материале
+    material = models.ForeignKey(
+        Material,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='items',
+        # Отдельный индекс не нужен: material - первое поле mr_item_material_status_idx
+        db_index=False,
+        verbose_name='Материал из справочника',
+        help_text='Заполняется автоматически по названию и единице измерения'
+    )
+
     material_name = models.CharField(
         'Название материала',
         max_length=255,
@@ -649,9 +681,9 @@ class MaterialRequestItem(models.Model):
         self.received_at = timezone.now()  # Сохраняем дату и время принятия
         self.save()
 
-    def update_status_based_on_quantity(self):
+    def apply_quantity_status(self):
         """
-        Автоматически обновить статус позиции на основе фактического количества.
+        Проставить статус позиции по фактическому количеству (без сохранения).
         """
         if self.quantity_actual is None or self.quantity_actual == 0:
             self.status = self.STATUS_PENDING
@@ -659,6 +691,12 @@ class MaterialRequestItem(models.Model):
             self.status = self.STATUS_PARTIALLY_DELIVERED
         elif self.quantity_actual >= self.quantity_requested:
             self.status = self.STATUS_DELIVERED
+
+    def update_status_based_on_quantity(self):
+        """
+        Автоматически обновить статус позиции на основе фактического количества.
+        """
+        self.apply_quantity_status()
         self.save()
 
     class Meta:
@@ -669,6 +707,7 @@ class MaterialRequestItem(models.Model):
         indexes = [
             models.Index(fields=['material_request']),
             models.Index(fields=['material_name']),
+            models.Index(fields=['material', 'status'], name='mr_item_material_status_idx'),
         ]
 
     def __str__(self):
@@ -850,7 +889,10 @@ class MaterialRequestHistory(models.Model):
         verbose_name_plural = 'История заявок'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['material_request']),
+            # Страницы истории заявки (курсор по created_at, см. history.py)
+            models.Index(
+                fields=['material_request', '-created_at', '-id'], name='mr_history_request_created_idx'
+            ),
             models.Index(fields=['action']),
             models.Index(fields=['created_at']),
         ]
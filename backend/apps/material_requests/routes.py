@@ -0,0 +1,137 @@
+"""
+Скомпилированные маршруты согласования заявок по компаниям.
+
+Маршрут - упорядоченный список ролей, которые согласуют заявку. Он зависит
+только от состава ролей активных сотрудников компании и от того, с какой
+роли начинается согласование, поэтому маршруты компании считаются один раз
+(один запрос DISTINCT role) и хранятся в общем кэше без срока жизни вместе
+с составом ролей.
+Кэш сбрасывается сигналами User, когда у сотрудника меняется роль, компания,
+активность или он удаляется (см. apps/material_requests/signals.py).
+
+При отправке на согласование маршрут копируется в заявку
+(MaterialRequest.approval_route): следующий этап - поиск в коротком списке
+без обращения к кэшу и БД, а изменение состава компании не меняет маршрут
+уже отправленных заявок.
+"""
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Цепочка: Мастер → Прораб → Начальник участка → Инженер ПТО →
+#          Руководитель проекта → Главный инженер → Директор → (конец)
+APPROVAL_CHAIN = [
+    'MASTER',
+    'FOREMAN',
+    'SITE_MANAGER',
+    'ENGINEER',
+    'PROJECT_MANAGER',
+    'CHIEF_ENGINEER',
+    'DIRECTOR',
+]
+
+# Первая роль, если нужной нет в компании (Снабженец согласует последним)
+FIRST_ROLE_FALLBACK = ['SITE_MANAGER', 'ENGINEER', 'SUPPLY_MANAGER']
+
+# Роли сотрудников, с которых может начинаться согласование
+START_ROLES = ['SITE_MANAGER', 'ENGINEER']
+
+CACHE_KEY = 'approval_routes_{company_id}'
+
+
+def first_role_for_author(author_role):
+    """
+    Первая роль согласования по роли автора.
+
+    - Мастер или Прораб -> Начальник участка
+    - Начальник участка -> Инженер ПТО
+    - остальные -> Начальник участка
+    """
+    if author_role == 'SITE_MANAGER':
+        return 'ENGINEER'
+    return 'SITE_MANAGER'
+
+
+def compile_route(start_role, available_roles):
+    """
+    Маршрут согласования, начиная с start_role, по ролям, которые есть в компании.
+
+    Returns:
+        list: роли по порядку (пустой, если согласовать некому)
+    """
+    first_role = start_role
+    if first_role not in available_roles:
+        first_role = next((role for role in FIRST_ROLE_FALLBACK if role in available_roles), None)
+        if first_role is None:
+            return []
+
+    if first_role not in APPROVAL_CHAIN:
+        return [first_role]
+    tail = APPROVAL_CHAIN[APPROVAL_CHAIN.index(first_role) + 1:]
+    return [first_role] + [role for role in tail if role in available_roles]
+
+
+def load_company_roles(company_id):
+    """Роли активных (не удаленных) сотрудников компании одним запросом."""
+    from apps.users.models import User
+
+    return set(
+        User.objects.filter(company_id=company_id, is_active=True)
+        .order_by().values_list('role', flat=True).distinct()
+    )
+
+
+def compiled_company(company_id):
+    """
+    Роли и маршруты компании (из кэша или собранные заново).
+
+    Returns:
+        dict: {'roles': [роли компании], 'routes': {стартовая роль: [роли маршрута]}}
+    """
+    key = CACHE_KEY.format(company_id=company_id)
+    compiled = cache.get(key)
+    if compiled is None:
+        available_roles = load_company_roles(company_id)
+        compiled = {
+            'roles': sorted(available_roles),
+            'routes': {role: compile_route(role, available_roles) for role in START_ROLES},
+        }
+        cache.set(key, compiled, timeout=None)
+        logger.debug(f'[Routes] Компания {company_id}: маршруты собраны {compiled["routes"]}')
+    return compiled
+
+
+def route_for_author(company_id, author_role):
+    """Маршрут согласования заявки автора с ролью author_role."""
+    return list(compiled_company(company_id)['routes'][first_role_for_author(author_role)])
+
+
+def route_from_role(company_id, current_role):
+    """
+    Маршрут по текущему составу компании, начиная с current_role.
+
+    Для заявок, отправленных до появления сохраненных маршрутов.
+    """
+    roles = set(compiled_company(company_id)['roles'])
+    if current_role not in APPROVAL_CHAIN:
+        return [current_role]
+    tail = APPROVAL_CHAIN[APPROVAL_CHAIN.index(current_role) + 1:]
+    return [current_role] + [role for role in tail if role in roles]
+
+
+def next_role_in_route(route, current_role):
+    """Роль после current_role в маршруте (None - маршрут завершен)."""
+    try:
+        index = route.index(current_role)
+    except ValueError:
+        return None
+    return route[index + 1] if index + 1 < len(route) else None
+
+
+def invalidate_company_routes(*company_ids):
+    """Сбрасывает маршруты компаний (пересоберутся при следующей отправке заявки)."""
+    keys = [CACHE_KEY.format(company_id=company_id) for company_id in set(company_ids) if company_id]
+    if keys:
+        cache.delete_many(keys)
@@ -3,13 +3,25 @@
 Сериализаторы для API заявок на материалы.
 """
 
+from decimal import Decimal
+
 from rest_framework import serializers
+from django.conf import settings
 from django.utils import timezone
-from .models import MaterialRequest, MaterialRequestItem, ApprovalStep, MaterialRequestHistory
+from .models import MaterialRequest, MaterialRequestItem, ApprovalStep, MaterialRequestHistory, Material
+from .catalog import link_items
+from .history import history_entry, write_history
 from apps.users.models import User
 from apps.projects.models import Project
 
 
+def create_request_items(material_request, items_data):
+    """Создает позиции заявки одним bulk_create со ссылками на справочник материалов."""
+    items = [MaterialRequestItem(material_request=material_request, **item_data) for item_data in items_data]
+    link_items(material_request.company_id, items)
+    return MaterialRequestItem.objects.bulk_create(items)
+
+
 class UserBriefSerializer(serializers.ModelSerializer):
     """Краткая информация о пользователе."""
 
@@ -23,6 +35,15 @@ class UserBriefSerializer(serializers.ModelSerializer):
         return obj.get_full_name()
 
 
+class MaterialSerializer(serializers.ModelSerializer):
+    """Материал из справочника компании."""
+
+    class Meta:
+        model = Material
+        fields = ['id', 'name', 'unit']
+        read_only_fields = fields
+
+
 class MaterialRequestItemSerializer(serializers.ModelSerializer):
     """Сериализатор для позиций заявки на материалы."""
 
@@ -36,6 +57,7 @@ class MaterialRequestItemSerializer(serializers.ModelSerializer):
         fields = [
             'id',
             'position_number',
+            'material',
             'material_name',
             'unit',
             'quantity_requested',
@@ -46,7 +68,7 @@ class MaterialRequestItemSerializer(serializers.ModelSerializer):
             'status_display',
             'received_at',  # Дата принятия позиции на объекте
         ]
-        read_only_fields = ['id', 'status_display', 'received_at']
+        read_only_fields = ['id', 'material', 'status_display', 'received_at']
 
     def validate_quantity_requested(self, value):
         """Проверка, что количество положительное."""
@@ -197,7 +219,7 @@ class MaterialRequestListSerializer(serializers.ModelSerializer):
 class MaterialRequestDetailSerializer(serializers.ModelSerializer):
     """
     Детальный сериализатор заявки на материалы.
-    Включает всю информацию: позиции, этапы согласования, историю.
+    Включает позиции и этапы согласования; история - отдельным endpoint /history/.
     """
 
     author_data = UserBriefSerializer(source='author', read_only=True)
@@ -206,7 +228,6 @@ class MaterialRequestDetailSerializer(serializers.ModelSerializer):
     current_approval_role_display = serializers.SerializerMethodField()
     items = MaterialRequestItemSerializer(many=True, read_only=False)
     approval_steps = ApprovalStepSerializer(many=True, read_only=True)
-    history = MaterialRequestHistorySerializer(many=True, read_only=True)
     rejected_by_data = UserBriefSerializer(source='rejected_by', read_only=True)
 
     class Meta:
@@ -220,6 +241,7 @@ class MaterialRequestDetailSerializer(serializers.ModelSerializer):
             'status_display',
             'current_approval_role',
             'current_approval_role_display',
+            'approval_route',
             'author',
             'author_data',
             'project',
@@ -227,7 +249,6 @@ class MaterialRequestDetailSerializer(serializers.ModelSerializer):
             'company',
             'items',
             'approval_steps',
-            'history',
             'created_at',
             'updated_at',
             'submitted_at',
@@ -243,6 +264,7 @@ class MaterialRequestDetailSerializer(serializers.ModelSerializer):
             'request_number',
             'status',
             'current_approval_role',
+            'approval_route',
             'created_at',
             'updated_at',
             'submitted_at',
@@ -301,18 +323,13 @@ class MaterialRequestDetailSerializer(serializers.ModelSerializer):
             # Если position_number не указан, автоматически проставляем
             if 'position_number' not in item_data or item_data['position_number'] is None:
                 item_data['position_number'] = index
-            MaterialRequestItem.objects.create(
-                material_request=material_request,
-                **item_data
-            )
+        create_request_items(material_request, items_data)
 
         # Записываем в историю
-        MaterialRequestHistory.objects.create(
-            material_request=material_request,
-            action=MaterialRequestHistory.ACTION_CREATED,
-            user=user,
-            comment='Заявка создана'
-        )
+        write_history(history_entry(
+            material_request, user, MaterialRequestHistory.ACTION_CREATED,
+            comment='Заявка создана',
+        ))
 
         return material_request
 
@@ -333,11 +350,7 @@ class MaterialRequestDetailSerializer(serializers.ModelSerializer):
             instance.items.all().delete()
 
             # Создаем новые позиции
-            for item_data in items_data:
-                MaterialRequestItem.objects.create(
-                    material_request=instance,
-                    **item_data
-                )
+            create_request_items(instance, items_data)
 
         return instance
 
@@ -425,19 +438,14 @@ class MaterialRequestCreateSerializer(serializers.ModelSerializer):
 
         # Создаем позиции заявки
         for idx, item_data in enumerate(items_data, start=1):
-            MaterialRequestItem.objects.create(
-                material_request=material_request,
-                position_number=idx,
-                **item_data
-            )
+            item_data['position_number'] = idx
+        create_request_items(material_request, items_data)
 
         # Записываем в историю
-        MaterialRequestHistory.objects.create(
-            material_request=material_request,
-            action=MaterialRequestHistory.ACTION_CREATED,
-            user=user,
-            comment='Заявка создана'
-        )
+        write_history(history_entry(
+            material_request, user, MaterialRequestHistory.ACTION_CREATED,
+            comment='Заявка создана',
+        ))
 
         return material_request
 
@@ -472,6 +480,31 @@ class MaterialRequestRejectSerializer(serializers.Serializer):
         return value
 
 
+class MaterialRequestBulkIdsMixin(serializers.Serializer):
+    """Список ID заявок для массовых действий (не больше MATERIAL_REQUEST_BULK_LIMIT)."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        help_text='ID заявок'
+    )
+
+    def validate_ids(self, value):
+        """Проверка размера пачки."""
+        limit = settings.MATERIAL_REQUEST_BULK_LIMIT
+        if len(set(value)) > limit:
+            raise serializers.ValidationError(f'За один запрос можно обработать не больше {limit} заявок')
+        return value
+
+
+class MaterialRequestBulkApproveSerializer(MaterialRequestBulkIdsMixin, MaterialRequestApproveSerializer):
+    """Сериализатор для массового согласования заявок."""
+
+
+class MaterialRequestBulkRejectSerializer(MaterialRequestBulkIdsMixin, MaterialRequestRejectSerializer):
+    """Сериализатор для массового возврата заявок на доработку."""
+
+
 class MaterialRequestActualQuantitySerializer(serializers.Serializer):
     """Сериализатор для обновления фактического количества материалов."""
 
@@ -488,3 +521,40 @@ class MaterialRequestActualQuantitySerializer(serializers.Serializer):
         if value < 0:
             raise serializers.ValidationError('Фактическое количество не может быть отрицательным')
         return value
+
+
+class MaterialRequestReceiveEntrySerializer(serializers.Serializer):
+    """Изменение одной позиции в пакетной приемке."""
+
+    item_id = serializers.IntegerField(min_value=1, help_text='ID позиции заявки')
+    quantity_actual = serializers.DecimalField(
+        required=False,
+        max_digits=10,
+        decimal_places=2,
+        min_value=Decimal('0'),
+        help_text='Фактическое количество'
+    )
+    received = serializers.BooleanField(default=False, help_text='Принять позицию на объекте')
+    notes = serializers.CharField(required=False, allow_blank=True, help_text='Примечание к позиции')
+
+    def validate(self, attrs):
+        """Запись должна что-то менять."""
+        if attrs.get('quantity_actual') is None and not attrs['received']:
+            raise serializers.ValidationError('Укажите фактическое количество или received=true')
+        return attrs
+
+
+class MaterialRequestBatchReceiveSerializer(serializers.Serializer):
+    """Сериализатор для пакетной приемки позиций (не больше MATERIAL_REQUEST_RECEIVE_LIMIT)."""
+
+    items = MaterialRequestReceiveEntrySerializer(many=True, allow_empty=False)
+
+    def validate_items(self, value):
+        """Проверка размера пачки и повторов позиций."""
+        limit = settings.MATERIAL_REQUEST_RECEIVE_LIMIT
+        if len(value) > limit:
+            raise serializers.ValidationError(f'За один запрос можно обновить не больше {limit} позиций')
+        item_ids = [entry['item_id'] for entry in value]
+        if len(set(item_ids)) != len(item_ids):
+            raise serializers.ValidationError('Позиция указана несколько раз')
+        return value
@@ -0,0 +1,44 @@
+# apps/material_requests/signals.py
+"""
+Сброс скомпилированных маршрутов согласования при изменении состава компании.
+
+Маршруты зависят только от ролей активных сотрудников, поэтому кэш
+сбрасывается, когда у сотрудника меняются компания, роль, активность или
+пометка удаления, а также при удалении сотрудника. Прежние значения
+запоминаются при загрузке объекта (post_init), без дополнительных запросов.
+
+bulk_create/bulk_update сигналов не вызывают - пакетный импорт персонала
+сбрасывает маршруты сам (apps/users/utils/personnel_import.py).
+"""
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from apps.users.models import User
+from .routes import invalidate_company_routes
+
+ROUTE_FIELDS = ('company_id', 'role', 'is_active', 'is_deleted')
+
+
+def _route_state(instance):
+    return tuple(instance.__dict__.get(field) for field in ROUTE_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def remember_route_state(sender, instance, **kwargs):
+    """Запоминает поля, влияющие на маршруты согласования."""
+    instance._route_state = _route_state(instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_routes_on_user_save(sender, instance, created, **kwargs):
+    """Сбрасывает маршруты компаний, если сотрудник появился или изменились его роль/активность."""
+    previous = instance._route_state
+    current = _route_state(instance)
+    if created or previous != current:
+        invalidate_company_routes(previous[0], instance.company_id)
+    instance._route_state = current
+
+
+@receiver(post_delete, sender=User)
+def invalidate_routes_on_user_delete(sender, instance, **kwargs):
+    invalidate_company_routes(instance.company_id)
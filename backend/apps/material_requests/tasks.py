@@ -0,0 +1,43 @@
+# apps/material_requests/tasks.py
+"""
+Celery задачи для заявок на материалы.
+"""
+
+from celery import shared_task
+
+
+@shared_task(ignore_result=True)
+def push_approval_inbox_counts(company_id, roles):
+    """Пересчитывает и отправляет через WebSocket счетчики входящих заявок ролей компании."""
+    from .inbox import push_inbox_counts
+
+    push_inbox_counts(company_id, roles)
+
+
+@shared_task
+def build_material_catalog(company_id=None):
+    """
+    Заполняет справочник материалов по позициям заявок без ссылки на него.
+
+    Args:
+        company_id: компания (None - все компании с такими позициями)
+
+    Returns:
+        dict: {company_id: статистика build_catalog}
+    """
+    from .catalog import build_catalog
+    from .models import MaterialRequestItem
+
+    if company_id is None:
+        company_ids = list(
+            MaterialRequestItem.objects.filter(material__isnull=True)
+            .order_by().values_list('material_request__company_id', flat=True).distinct()
+        )
+    else:
+        company_ids = [company_id]
+
+    return {
+        company: build_catalog(company)
+        for company in company_ids
+        if company is not None
+    }
@@ -0,0 +1,390 @@
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from apps.material_requests.models import MaterialRequest
+from apps.projects.models import Project
+from apps.users.models import Company
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def company():
+    return Company.objects.create(name='Test Company')
+
+
+@pytest.fixture
+def create_user(company):
+    def make_user(email, role, **kwargs):
+        return User.objects.create_user(
+            email=email, password='testpass123', first_name='Test', last_name='User',
+            role=role, company=company, **kwargs
+        )
+    return make_user
+
+
+@pytest.fixture
+def create_request(company):
+    def make_request(project, author, **kwargs):
+        defaults = {
+            'title': 'Арматура',
+            'status': MaterialRequest.STATUS_IN_APPROVAL,
+            'current_approval_role': 'ENGINEER',
+        }
+        defaults.update(kwargs)
+        return MaterialRequest.objects.create(company=company, project=project, author=author, **defaults)
+    return make_request
+
+
+@pytest.mark.django_db
+class TestApprovalInbox:
+    def test_inbox_shows_only_requests_waiting_for_role_on_member_projects(
+        self, api_client, company, create_user, create_request
+    ):
+        create_user('director@example.com', 'DIRECTOR')
+        author = create_user('master@example.com', 'MASTER')
+        engineer = create_user('engineer@example.com', 'ENGINEER')
+        own_project = Project.objects.create(name='Свой объект', company=company, address='Адрес')
+        own_project.team_members.add(engineer)
+        other_project = Project.objects.create(name='Чужой объект', company=company, address='Адрес')
+
+        waiting = create_request(own_project, author)
+        create_request(own_project, author, current_approval_role='DIRECTOR')
+        create_request(own_project, author, status=MaterialRequest.STATUS_DRAFT, current_approval_role=None)
+        create_request(other_project, author)
+
+        api_client.force_authenticate(engineer)
+        response = api_client.get('/api/material-requests/inbox/')
+        assert response.status_code == 200
+        assert [item['id'] for item in response.data['results']] == [waiting.id]
+
+        response = api_client.get('/api/material-requests/inbox/count/')
+        assert response.data == {'count': 1}
+
+    def test_project_access_is_checked_with_exists(self, company, create_user, django_assert_num_queries):
+        from apps.material_requests.inbox import has_project_access
+
+        director = create_user('director@example.com', 'DIRECTOR')
+        engineer = create_user('engineer@example.com', 'ENGINEER')
+        manager = create_user('manager@example.com', 'SITE_MANAGER')
+        project = Project.objects.create(name='Объект', company=company, address='Адрес', project_manager=manager)
+        foreign_project = Project.objects.create(name='Чужой объект', company=company, address='Адрес')
+        project.team_members.add(engineer)
+
+        with django_assert_num_queries(0):
+            assert has_project_access(director, foreign_project.id)
+        with django_assert_num_queries(1):
+            assert has_project_access(engineer, project.id)
+        assert has_project_access(manager, project.id)
+        assert not has_project_access(engineer, foreign_project.id)
+
+    def test_counts_are_pushed_to_new_and_previous_roles(self, company, create_user, create_request):
+        from unittest import mock
+
+        from apps.material_requests.inbox import inbox_counts, push_inbox_counts
+
+        director = create_user('director@example.com', 'DIRECTOR')
+        author = create_user('master@example.com', 'MASTER')
+        engineer = create_user('engineer@example.com', 'ENGINEER')
+        outsider = create_user('engineer2@example.com', 'ENGINEER')
+        project = Project.objects.create(name='Объект', company=company, address='Адрес', project_manager=engineer)
+        create_request(project, author)
+        create_request(project, author, current_approval_role='DIRECTOR')
+
+        assert inbox_counts(company.id, 'ENGINEER') == {engineer.id: 1, outsider.id: 0}
+
+        with mock.patch('apps.notifications.utils.send_user_event') as send:
+            push_inbox_counts(company.id, ['ENGINEER', 'DIRECTOR'])
+        sent = {call.args[0]: call.args[2]['count'] for call in send.call_args_list}
+        assert sent == {engineer.id: 1, outsider.id: 0, director.id: 1}
+
+
+@pytest.mark.django_db
+class TestBulkApproval:
+    def test_bulk_approve_moves_requests_on_and_reports_failures(
+        self, api_client, company, create_user, create_request, django_assert_max_num_queries
+    ):
+        from apps.material_requests.models import ApprovalStep, MaterialRequestHistory
+
+        director = create_user('director@example.com', 'DIRECTOR')
+        author = create_user('master@example.com', 'MASTER')
+        create_user('engineer@example.com', 'ENGINEER')
+        project = Project.objects.create(name='Объект', company=company, address='Адрес')
+        waiting = [create_request(project, author, current_approval_role='DIRECTOR') for _ in range(5)]
+        for material_request in waiting:
+            ApprovalStep.objects.create(material_request=material_request, role='DIRECTOR')
+        foreign_role = create_request(project, author, current_approval_role='ENGINEER')
+        ids = [material_request.id for material_request in waiting] + [foreign_role.id, 999999]
+
+        api_client.force_authenticate(director)
+        with django_assert_max_num_queries(12):
+            response = api_client.post(
+                '/api/material-requests/bulk-approve/', {'ids': ids, 'comment': 'Ок'}, format='json'
+            )
+
+        assert response.status_code == 200
+        assert response.data['succeeded'] == 5
+        assert response.data['failed'] == 2
+        assert [result['success'] for result in response.data['results']] == [True] * 5 + [False, False]
+        assert MaterialRequest.objects.filter(status=MaterialRequest.STATUS_APPROVED).count() == 5
+        assert ApprovalStep.objects.filter(status=ApprovalStep.STATUS_APPROVED, comment='Ок').count() == 5
+        assert MaterialRequestHistory.objects.filter(action=MaterialRequestHistory.ACTION_APPROVED).count() == 5
+        foreign_role.refresh_from_db()
+        assert foreign_role.current_approval_role == 'ENGINEER'
+
+    def test_bulk_reject_requires_reason_and_limit(self, api_client, company, create_user, create_request, settings):
+        settings.MATERIAL_REQUEST_BULK_LIMIT = 2
+        director = create_user('director@example.com', 'DIRECTOR')
+        project = Project.objects.create(name='Объект', company=company, address='Адрес')
+        material_request = create_request(project, director)
+
+        api_client.force_authenticate(director)
+        response = api_client.post('/api/material-requests/bulk-reject/', {'ids': [1, 2, 3], 'reason': 'Нет'}, format='json')
+        assert response.status_code == 400
+        response = api_client.post('/api/material-requests/bulk-reject/', {'ids': [material_request.id]}, format='json')
+        assert response.status_code == 400
+
+        response = api_client.post(
+            '/api/material-requests/bulk-reject/', {'ids': [material_request.id], 'reason': 'Нет'}, format='json'
+        )
+        assert response.data['succeeded'] == 1
+        material_request.refresh_from_db()
+        assert material_request.status == MaterialRequest.STATUS_REJECTED
+        assert material_request.rejection_reason == 'Нет'
+
+
+@pytest.mark.django_db
+class TestApprovalRoutes:
+    def test_route_is_fixed_at_submit_and_rebuilt_only_on_roster_change(
+        self, company, create_user, django_assert_num_queries
+    ):
+        from django.core.cache import cache
+
+        from apps.material_requests.routes import compiled_company
+
+        cache.clear()
+        create_user('director@example.com', 'DIRECTOR')
+        master = create_user('master@example.com', 'MASTER')
+        engineer = create_user('engineer@example.com', 'ENGINEER')
+        project = Project.objects.create(name='Объект', company=company, address='Адрес')
+
+        material_request = MaterialRequest.objects.create(
+            company=company, project=project, author=master, title='Арматура'
+        )
+        material_request.submit_for_approval()
+        # Начальника участка нет - согласование начинается с Инженера ПТО
+        assert material_request.approval_route == ['ENGINEER', 'DIRECTOR']
+        assert material_request.current_approval_role == 'ENGINEER'
+
+        # Маршрут компании в кэше: повторная сборка не нужна
+        with django_assert_num_queries(0):
+            compiled_company(company.id)
+
+        # Новая роль в компании сбрасывает кэш, но не меняет маршрут отправленной заявки
+        create_user('pm@example.com', 'PROJECT_MANAGER')
+        assert 'PROJECT_MANAGER' in compiled_company(company.id)['routes']['SITE_MANAGER']
+        with django_assert_num_queries(0):
+            assert material_request.get_next_approval_role('ENGINEER') == 'DIRECTOR'
+
+        # Смена роли тоже сбрасывает кэш
+        engineer.role = 'SITE_MANAGER'
+        engineer.save()
+        assert compiled_company(company.id)['routes']['SITE_MANAGER'][0] == 'SITE_MANAGER'
+
+
+@pytest.mark.django_db
+class TestRequestSearch:
+    def test_search_matches_word_forms_and_number_part_ranked(self, company, create_user, create_request):
+        from apps.core.search import order_by_rank, search_queryset
+
+        director = create_user('director@example.com', 'DIRECTOR')
+        project = Project.objects.create(name='Объект', company=company, address='Адрес')
+        rebar = create_request(project, director, title='Арматура А500', description='Для фундамента')
+        mention = create_request(project, director, title='Бетон', description='Бетон и арматура для перекрытия')
+        concrete = create_request(project, director, title='Бетон', description='Марка М300')
+
+        def search(text):
+            queryset = search_queryset(MaterialRequest.objects.all(), text, ['request_number', 'title'])
+            return list(order_by_rank(queryset).values_list('id', flat=True))
+
+        # Другая форма слова; совпадение в названии (вес A) выше совпадения в описании (вес B)
+        assert search('арматуры') == [rebar.id, mention.id]
+        # Начало слова
+        assert search('перекр') == [mention.id]
+        # Часть номера
+        assert concrete.id in search(concrete.request_number[-6:])
+
+
+@pytest.mark.django_db
+class TestMaterialCatalog:
+    def test_names_and_units_are_normalized(self):
+        from apps.material_requests.catalog import material_key
+
+        # Латинская M, дефис в марке, регистр и лишние пробелы
+        assert material_key('ЦЕМЕНТ  M500', 'Мешок') == material_key('цемент м-500', 'меш.')
+        assert material_key('Труба 57 х 3,5', 'пог. м') == ('труба 57x3.5', 'м')
+        assert material_key('Knauf Ротбанд', 'шт.')[0] == 'knauf ротбанд'
+
+    def test_new_items_are_linked_and_existing_items_clustered(self, company, create_user, create_request):
+        from apps.material_requests.catalog import build_catalog
+        from apps.material_requests.models import Material, MaterialRequestItem
+        from apps.material_requests.serializers import create_request_items
+
+        director = create_user('director@example.com', 'DIRECTOR')
+        project = Project.objects.create(name='Объект', company=company, address='Адрес')
+        material_request = create_request(project, director)
+
+        created = create_request_items(material_request, [
+            {'position_number': 1, 'material_name': 'Цемент М500', 'unit': 'меш', 'quantity_requested': 10},
+            {'position_number': 2, 'material_name': 'цемент м-500', 'unit': 'мешок', 'quantity_requested': 5},
+        ])
+        assert created[0].material_id is not None
+        assert created[0].material_id == created[1].material_id
+
+        # Позиции, созданные до справочника
+        MaterialRequestItem.objects.bulk_create([
+            MaterialRequestItem(
+                material_request=material_request, position_number=position,
+                material_name=name, unit=unit, quantity_requested=1,
+            )
+            for position, (name, unit) in enumerate(
+                [
+                    ('Арматура А500', 'т'), ('Арматура А500', 'т'), ('арматура a500', 'тн'),
+                    ('АРМАТУРА А500', 'т'), ('ЦЕМЕНТ  M500', 'меш.'),
+                ],
+                start=3,
+            )
+        ])
+
+        stats = build_catalog(company.id, chunk_size=2)
+
+        assert stats['items'] == 5
+        assert not MaterialRequestItem.objects.filter(material__isnull=True).exists()
+        assert Material.objects.filter(company=company).count() == 2
+        rebar = Material.objects.get(company=company, normalized_name='арматура а500')
+        # Отображаемое название - самое частое написание
+        assert (rebar.name, rebar.unit, rebar.items.count()) == ('Арматура А500', 'т', 4)
+
+
+@pytest.mark.django_db
+class TestDemandAnalytics:
+    def test_quantities_and_statuses_are_grouped_in_one_query(
+        self, api_client, company, create_user, create_request, django_assert_num_queries
+    ):
+        from apps.material_requests.analytics import demand_queryset
+        from apps.material_requests.serializers import create_request_items
+
+        director = create_user('director@example.com', 'DIRECTOR')
+        project = Project.objects.create(name='Объект', company=company, address='Адрес')
+        for actual in (8, 15):
+            material_request = create_request(project, director, status=MaterialRequest.STATUS_IN_DELIVERY)
+            create_request_items(material_request, [
+                {'position_number': 1, 'material_name': 'Цемент М500', 'unit': 'меш', 'quantity_requested': 10,
+                 'quantity_actual': actual, 'status': 'PARTIAL' if actual < 10 else 'DELIVERED'},
+            ])
+        draft = create_request(project, director, status=MaterialRequest.STATUS_DRAFT)
+        create_request_items(draft, [
+            {'position_number': 1, 'material_name': 'цемент м-500', 'unit': 'мешок', 'quantity_requested': 100},
+        ])
+
+        with django_assert_num_queries(1):
+            rows = list(demand_queryset(director, ['material', 'project']))
+
+        assert len(rows) == 1
+        row = rows[0]
+        assert (row['group_material_name'], row['group_unit'], row['group_project_id']) == ('Цемент М500', 'меш', project.id)
+        assert (row['requests'], row['items']) == (2, 2)
+        # Перепоставка по второй заявке не закрывает недопоставку по первой; черновик не учитывается
+        assert (row['requested'], row['delivered'], row['outstanding']) == (20, 23, 2)
+        assert (row['status_PARTIAL'], row['status_DELIVERED'], row['status_PENDING']) == (1, 1, 0)
+
+        api_client.force_authenticate(director)
+        response = api_client.get('/api/material-requests/analytics/', {'group_by': 'material,week', 'snapshot': 'true'})
+        assert response.status_code == 200
+        assert response.data['rows'][0]['by_status']['DELIVERED'] == 1
+
+        response = api_client.get('/api/material-requests/analytics/', {'group_by': 'supplier'})
+        assert response.status_code == 400
+
+        response = api_client.get('/api/material-requests/analytics/', {'export': 'excel'})
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('application/vnd.openxmlformats')
+
+
+@pytest.mark.django_db
+class TestRequestHistory:
+    def test_history_is_paginated_by_cursor_and_not_in_payloads(self, api_client, company, create_user, create_request):
+        from apps.material_requests.history import history_entry, write_history
+        from apps.material_requests.models import MaterialRequestHistory
+
+        director = create_user('director@example.com', 'DIRECTOR')
+        project = Project.objects.create(name='Объект', company=company, address='Адрес')
+        material_request = create_request(project, director)
+        write_history(*[
+            history_entry(material_request, director, MaterialRequestHistory.ACTION_APPROVED, comment=f'Запись {n}')
+            for n in range(5)
+        ])
+
+        api_client.force_authenticate(director)
+        response = api_client.get('/api/material-requests/', {'tab': 'all'})
+        assert response.status_code == 200
+        response = api_client.get(f'/api/material-requests/{material_request.id}/')
+        assert 'history' not in response.data
+
+        url = f'/api/material-requests/{material_request.id}/history/?page_size=2'
+        comments = []
+        while url:
+            response = api_client.get(url)
+            assert response.status_code == 200
+            assert len(response.data['results']) <= 2
+            comments += [entry['comment'] for entry in response.data['results']]
+            url = response.data['next']
+        assert sorted(comments) == [f'Запись {n}' for n in range(5)]
+
+
+@pytest.mark.django_db
+class TestBatchReceive:
+    def test_items_are_updated_in_one_batch_with_one_history_insert(
+        self, api_client, company, create_user, create_request, django_assert_max_num_queries
+    ):
+        from apps.material_requests.delivery import receive_items
+        from apps.material_requests.models import MaterialRequestHistory, MaterialRequestItem
+        from apps.material_requests.serializers import create_request_items
+
+        create_user('director@example.com', 'DIRECTOR')
+        foreman = create_user('foreman@example.com', 'FOREMAN')
+        project = Project.objects.create(name='Объект', company=company, address='Адрес')
+        material_request = create_request(project, foreman, status=MaterialRequest.STATUS_IN_DELIVERY)
+        items = create_request_items(material_request, [
+            {'position_number': n, 'material_name': f'Материал {n}', 'unit': 'шт', 'quantity_requested': 10}
+            for n in range(1, 41)
+        ])
+
+        entries = [{'item_id': item.id, 'quantity_actual': 10, 'received': True} for item in items[:39]]
+        entries.append({'item_id': items[39].id, 'quantity_actual': 4, 'received': False})
+        entries.append({'item_id': 999999, 'received': True})
+
+        # Блокировка позиций, bulk_update, агрегат, вставка истории - не зависит от числа позиций
+        with django_assert_max_num_queries(8):
+            result = receive_items(material_request, foreman, entries)
+
+        assert [r['success'] for r in result['results']].count(False) == 1
+        assert result['all_items_received'] is False
+        assert MaterialRequestItem.objects.filter(status=MaterialRequestItem.STATUS_RECEIVED).count() == 39
+        assert MaterialRequestItem.objects.get(pk=items[39].id).status == MaterialRequestItem.STATUS_PARTIALLY_DELIVERED
+
+        api_client.force_authenticate(foreman)
+        url = f'/api/material-requests/{material_request.id}/receive-items/'
+        response = api_client.post(url, {'items': [{'item_id': items[0].id, 'received': True}]}, format='json')
+        assert response.data['failed'] == 1
+
+        response = api_client.post(url, {'items': [{'item_id': items[39].id, 'quantity_actual': 10, 'received': True}]}, format='json')
+        assert response.status_code == 200
+        assert response.data['all_items_received'] is True
+        assert MaterialRequestHistory.objects.filter(action=MaterialRequestHistory.ACTION_RECEIVED).count() == 1
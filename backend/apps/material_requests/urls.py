@@ -5,11 +5,12 @@ URL маршруты для API заявок на материалы.
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import MaterialRequestViewSet
+from .views import MaterialRequestViewSet, MaterialCatalogViewSet
 
 # Создаем роутер для автоматической генерации маршрутов
 router = DefaultRouter()
 router.register(r'material-requests', MaterialRequestViewSet, basename='material-request')
+router.register(r'material-catalog', MaterialCatalogViewSet, basename='material-catalog')
 
 urlpatterns = [
     path('', include(router.urls)),
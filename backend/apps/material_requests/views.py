@@ -10,11 +10,16 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q, Prefetch
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
-logger = logging.getLogger(__name__)
-
-from .models import MaterialRequest, MaterialRequestItem, ApprovalStep, MaterialRequestHistory
+from .models import MaterialRequest, MaterialRequestItem, ApprovalStep, MaterialRequestHistory, Material
+from . import catalog
+from apps.core.search import order_by_rank, search_queryset
+from .inbox import MANAGEMENT_ROLES, has_project_access, inbox_queryset, project_member_q
+from . import analytics, bulk, delivery
+from .history import HistoryCursorPagination, history_entry, write_history
 from .serializers import (
     MaterialRequestListSerializer,
     MaterialRequestDetailSerializer,
@@ -22,10 +27,17 @@ from .serializers import (
     MaterialRequestSubmitSerializer,
     MaterialRequestApproveSerializer,
     MaterialRequestRejectSerializer,
+    MaterialRequestBulkApproveSerializer,
+    MaterialRequestBulkRejectSerializer,
     MaterialRequestActualQuantitySerializer,
+    MaterialRequestBatchReceiveSerializer,
     MaterialRequestItemSerializer,
+    MaterialRequestHistorySerializer,
+    MaterialSerializer,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class MaterialRequestViewSet(viewsets.ModelViewSet):
     """
@@ -39,11 +51,11 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
     """
 
     permission_classes = [IsAuthenticated]
-    queryset = MaterialRequest.objects.filter(is_deleted=False)
+    queryset = MaterialRequest.objects.all()
 
     def get_serializer_class(self):
         """Выбор сериализатора в зависимости от действия."""
-        if self.action == 'list':
+        if self.action in ('list', 'inbox'):
             return MaterialRequestListSerializer
         elif self.action == 'create':
             return MaterialRequestCreateSerializer
@@ -53,8 +65,14 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
             return MaterialRequestApproveSerializer
         elif self.action == 'reject':
             return MaterialRequestRejectSerializer
+        elif self.action == 'bulk_approve':
+            return MaterialRequestBulkApproveSerializer
+        elif self.action == 'bulk_reject':
+            return MaterialRequestBulkRejectSerializer
         elif self.action == 'update_actual_quantity':
             return MaterialRequestActualQuantitySerializer
+        elif self.action == 'receive_items':
+            return MaterialRequestBatchReceiveSerializer
         return MaterialRequestDetailSerializer
 
     def get_queryset(self):
@@ -69,25 +87,15 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
         user = self.request.user
 
         # Базовая фильтрация по компании
-        queryset = MaterialRequest.objects.filter(
-            company=user.company,
-            is_deleted=False
-        )
+        queryset = MaterialRequest.objects.filter(company=user.company)
 
         # Фильтрация по закрепленным проектам
         # Руководящие роли видят все заявки компании
-        management_roles = [
-            'SUPERADMIN', 'DIRECTOR', 'CHIEF_ENGINEER',
-            'PROJECT_MANAGER', 'CHIEF_POWER_ENGINEER'
-        ]
-
         # Если пользователь НЕ руководитель и НЕ снабженец,
         # показываем только заявки по закрепленным проектам ИЛИ созданные самим пользователем
-        if user.role not in management_roles and user.role != 'SUPPLY_MANAGER':
-            # Получаем проекты, где пользователь в team_members или является руководителем
-            user_projects = user.projects.all() | user.managed_projects.all()
+        if user.role not in MANAGEMENT_ROLES and user.role != 'SUPPLY_MANAGER':
             # ВАЖНО: пользователь должен видеть свои собственные заявки + заявки по закрепленным проектам
-            queryset = queryset.filter(Q(author=user) | Q(project__in=user_projects))
+            queryset = queryset.filter(Q(author=user) | project_member_q(user))
 
         # Оптимизация запросов
         queryset = queryset.select_related(
@@ -98,9 +106,7 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
         ).prefetch_related(
             Prefetch('items', queryset=MaterialRequestItem.objects.order_by('position_number')),
             Prefetch('approval_steps', queryset=ApprovalStep.objects.order_by('created_at')),
-            # Ограничиваем историю последними 50 записями для оптимизации производительности
-            # Полную историю можно получить через отдельный endpoint если понадобится
-            Prefetch('history', queryset=MaterialRequestHistory.objects.order_by('-created_at')[:50])
+            # История не загружается: она отдается постранично через /history/
         )
 
         # Фильтрация по вкладкам (tab parameter)
@@ -148,22 +154,41 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
         if status_filter:
             queryset = queryset.filter(status=status_filter)
 
-        # Поиск по номеру заявки или названию
+        queryset = queryset.order_by('-created_at')
+
+        # Полнотекстовый поиск по номеру, названию и описанию (сначала самые релевантные)
         search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(request_number__icontains=search) |
-                Q(title__icontains=search) |
-                Q(description__icontains=search)
+        if search and search.strip():
+            queryset = order_by_rank(
+                search_queryset(queryset, search, trigram_fields=['request_number', 'title'])
             )
 
-        return queryset.order_by('-created_at')
+        return queryset
 
     def perform_create(self, serializer):
         """Создание заявки с автором и компанией."""
         # author и company устанавливаются в сериализаторе из context
         serializer.save()
 
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """
+        История заявки постранично, сначала новые записи.
+
+        Endpoint: GET /api/material-requests/{id}/history/?cursor=...&page_size=20
+        Следующая страница - по ссылке next из ответа (курсор по created_at).
+        """
+        # Позиции и этапы согласования для проверки доступа не нужны
+        material_request = get_object_or_404(
+            self.get_queryset().select_related(None).prefetch_related(None), pk=pk
+        )
+
+        queryset = MaterialRequestHistory.objects.filter(material_request=material_request).select_related('user')
+        paginator = HistoryCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = MaterialRequestHistorySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=['post'])
     def submit(self, request, pk=None):
         """
@@ -184,12 +209,10 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
             material_request.submit_for_approval()
 
             # Записываем в историю
-            MaterialRequestHistory.objects.create(
-                material_request=material_request,
-                action=MaterialRequestHistory.ACTION_SUBMITTED,
-                user=request.user,
-                comment='Заявка отправлена на согласование'
-            )
+            write_history(history_entry(
+                material_request, request.user, MaterialRequestHistory.ACTION_SUBMITTED,
+                comment='Заявка отправлена на согласование',
+            ))
 
             return Response({
                 'message': 'Заявка успешно отправлена на согласование',
@@ -199,6 +222,40 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
         except DjangoValidationError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['get'])
+    def inbox(self, request):
+        """
+        Заявки, ожидающие согласования ролью текущего пользователя.
+
+        Endpoint: GET /api/material-requests/inbox/
+        Руководящие роли видят заявки всех проектов компании, остальные -
+        только по закрепленным проектам. Новые счетчики приходят через
+        WebSocket событием 'approval_inbox'.
+        """
+        # Для списка нужны только автор, проект, компания и позиции
+        queryset = inbox_queryset(request.user).select_related(
+            'author', 'project', 'company'
+        ).prefetch_related(
+            Prefetch('items', queryset=MaterialRequestItem.objects.order_by('position_number'))
+        ).order_by('submitted_at', 'id')
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='inbox/count')
+    def inbox_count(self, request):
+        """
+        Количество заявок во входящих (для бейджа при загрузке страницы).
+
+        Endpoint: GET /api/material-requests/inbox/count/
+        """
+        return Response({'count': inbox_queryset(request.user).count()})
+
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         """
@@ -216,19 +273,11 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
 
         # БЕЗОПАСНОСТЬ: Проверка доступа к проекту заявки
         # Руководящие роли имеют доступ ко всем проектам компании
-        management_roles = [
-            'SUPERADMIN', 'DIRECTOR', 'CHIEF_ENGINEER',
-            'PROJECT_MANAGER', 'CHIEF_POWER_ENGINEER'
-        ]
-
-        if user_role not in management_roles:
-            # Проверяем, что пользователь закреплен за проектом заявки
-            user_projects = user.projects.all() | user.managed_projects.all()
-            if material_request.project not in user_projects:
-                return Response(
-                    {'error': 'У вас нет доступа к этому проекту'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
+        if not has_project_access(user, material_request.project_id):
+            return Response(
+                {'error': 'У вас нет доступа к этому проекту'},
+                status=status.HTTP_403_FORBIDDEN
+            )
 
         # Проверка, что сейчас очередь этой роли
         if material_request.current_approval_role != user_role:
@@ -255,12 +304,10 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
                     approval_step.save()
 
             # Записываем в историю
-            MaterialRequestHistory.objects.create(
-                material_request=material_request,
-                action=MaterialRequestHistory.ACTION_APPROVED,
-                user=request.user,
-                comment=f'Согласовано ролью {user_role}. {comment}' if comment else f'Согласовано ролью {user_role}'
-            )
+            write_history(history_entry(
+                material_request, request.user, MaterialRequestHistory.ACTION_APPROVED,
+                comment=f'Согласовано ролью {user_role}. {comment}' if comment else f'Согласовано ролью {user_role}',
+            ))
 
             return Response({
                 'message': 'Заявка успешно согласована',
@@ -284,23 +331,14 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
 
         user = request.user
-        user_role = user.role
 
         # БЕЗОПАСНОСТЬ: Проверка доступа к проекту заявки
         # Руководящие роли имеют доступ ко всем проектам компании
-        management_roles = [
-            'SUPERADMIN', 'DIRECTOR', 'CHIEF_ENGINEER',
-            'PROJECT_MANAGER', 'CHIEF_POWER_ENGINEER'
-        ]
-
-        if user_role not in management_roles:
-            # Проверяем, что пользователь закреплен за проектом заявки
-            user_projects = user.projects.all() | user.managed_projects.all()
-            if material_request.project not in user_projects:
-                return Response(
-                    {'error': 'У вас нет доступа к этому проекту'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
+        if not has_project_access(user, material_request.project_id):
+            return Response(
+                {'error': 'У вас нет доступа к этому проекту'},
+                status=status.HTTP_403_FORBIDDEN
+            )
 
         reason = serializer.validated_data['reason']
 
@@ -308,12 +346,10 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
             material_request.reject_to_author(user, reason)
 
             # Записываем в историю
-            MaterialRequestHistory.objects.create(
-                material_request=material_request,
-                action=MaterialRequestHistory.ACTION_REJECTED,
-                user=request.user,
-                comment=f'Возвращено на доработку: {reason}'
-            )
+            write_history(history_entry(
+                material_request, request.user, MaterialRequestHistory.ACTION_REJECTED,
+                comment=f'Возвращено на доработку: {reason}',
+            ))
 
             return Response({
                 'message': 'Заявка возвращена на доработку',
@@ -323,6 +359,50 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
         except DjangoValidationError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='bulk-approve')
+    def bulk_approve(self, request):
+        """
+        Массовое согласование заявок ролью текущего пользователя в одной транзакции.
+
+        Endpoint: POST /api/material-requests/bulk-approve/
+        Body: {"ids": [1, 2, 3], "comment": "Согласовано"} (comment опционально)
+        Ответ содержит результат по каждой заявке; заявки, которые нельзя
+        согласовать, не мешают согласованию остальных.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = bulk.bulk_approve(
+            request.user,
+            serializer.validated_data['ids'],
+            serializer.validated_data.get('comment', ''),
+        )
+        return Response(self._bulk_response(results))
+
+    @action(detail=False, methods=['post'], url_path='bulk-reject')
+    def bulk_reject(self, request):
+        """
+        Массовый возврат заявок на доработку в одной транзакции.
+
+        Endpoint: POST /api/material-requests/bulk-reject/
+        Body: {"ids": [1, 2, 3], "reason": "Причина возврата"}
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = bulk.bulk_reject(request.user, serializer.validated_data['ids'], serializer.validated_data['reason'])
+        return Response(self._bulk_response(results))
+
+    @staticmethod
+    def _bulk_response(results):
+        """Сводка массового действия: количество успешных/неуспешных и результаты по заявкам."""
+        succeeded = sum(1 for result in results if result['success'])
+        return {
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results,
+        }
+
     @action(detail=True, methods=['post'], url_path='mark-payment')
     def mark_payment(self, request, pk=None):
         """
@@ -342,12 +422,10 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
             material_request.mark_as_payment(request.user)
 
             # Записываем в историю
-            MaterialRequestHistory.objects.create(
-                material_request=material_request,
-                action=MaterialRequestHistory.ACTION_PAYMENT,
-                user=request.user,
-                comment='Заявка переведена на оплату'
-            )
+            write_history(history_entry(
+                material_request, request.user, MaterialRequestHistory.ACTION_PAYMENT,
+                comment='Заявка переведена на оплату',
+            ))
 
             return Response({'message': 'Заявка переведена на оплату'})
 
@@ -373,12 +451,10 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
             material_request.mark_as_paid(request.user)
 
             # Записываем в историю
-            MaterialRequestHistory.objects.create(
-                material_request=material_request,
-                action=MaterialRequestHistory.ACTION_PAID,
-                user=request.user,
-                comment='Заявка оплачена, переведена на доставку'
-            )
+            write_history(history_entry(
+                material_request, request.user, MaterialRequestHistory.ACTION_PAID,
+                comment='Заявка оплачена, переведена на доставку',
+            ))
 
             return Response({'message': 'Заявка оплачена и переведена на доставку'})
 
@@ -405,12 +481,10 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
             material_request.mark_as_received(request.user)
 
             # Записываем в историю
-            MaterialRequestHistory.objects.create(
-                material_request=material_request,
-                action=MaterialRequestHistory.ACTION_COMPLETED,
-                user=request.user,
-                comment='Материалы приняты на объекте'
-            )
+            write_history(history_entry(
+                material_request, request.user, MaterialRequestHistory.ACTION_COMPLETED,
+                comment='Материалы приняты на объекте',
+            ))
 
             return Response({'message': 'Материалы успешно приняты на объекте'})
 
@@ -457,22 +531,18 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
                 material_request=material_request
             )
 
-            # Обновляем фактическое количество и примечание
+            # Обновляем фактическое количество, примечание и статус позиции одним сохранением
             item.quantity_actual = quantity_actual
             if notes:
                 item.notes = notes
+            item.apply_quantity_status()
             item.save()
 
-            # Автоматически обновляем статус позиции на основе количества
-            item.update_status_based_on_quantity()
-
             # Записываем в историю
-            MaterialRequestHistory.objects.create(
-                material_request=material_request,
-                action=MaterialRequestHistory.ACTION_DELIVERED,
-                user=request.user,
-                comment=f'Обновлено фактическое количество позиции "{item.material_name}": {quantity_actual} {item.unit}. {notes}'
-            )
+            write_history(history_entry(
+                material_request, request.user, MaterialRequestHistory.ACTION_DELIVERED,
+                comment=f'Обновлено фактическое количество позиции "{item.material_name}": {quantity_actual} {item.unit}. {notes}',
+            ))
 
             return Response({
                 'message': 'Фактическое количество успешно обновлено',
@@ -531,19 +601,22 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
             # Отмечаем позицию как принятую
             item.mark_as_received(request.user)
 
-            # Записываем в историю
-            MaterialRequestHistory.objects.create(
-                material_request=material_request,
-                action=MaterialRequestHistory.ACTION_ITEM_RECEIVED,
-                user=request.user,
-                comment=f'Позиция "{item.material_name}" ({item.quantity_requested} {item.unit}) принята на объекте'
-            )
-
-            # Проверяем, все ли позиции приняты (для информации)
-            all_items_received = all(
-                i.status == MaterialRequestItem.STATUS_RECEIVED
-                for i in material_request.items.all()
-            )
+            # Проверяем, все ли позиции приняты
+            all_items_received = not material_request.items.exclude(
+                status=MaterialRequestItem.STATUS_RECEIVED
+            ).exists()
+
+            # Записываем в историю (приемка последней позиции - еще и запись о приемке материалов)
+            history = [history_entry(
+                material_request, request.user, MaterialRequestHistory.ACTION_ITEM_RECEIVED,
+                comment=f'Позиция "{item.material_name}" ({item.quantity_requested} {item.unit}) принята на объекте',
+            )]
+            if all_items_received:
+                history.append(history_entry(
+                    material_request, request.user, MaterialRequestHistory.ACTION_RECEIVED,
+                    comment='Все позиции заявки приняты на объекте',
+                ))
+            write_history(*history)
 
             logger.info(
                 f"Позиция '{item.material_name}' заявки {material_request.request_number} принята. "
@@ -568,6 +641,44 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
         except DjangoValidationError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=['post'], url_path='receive-items')
+    def receive_items(self, request, pk=None):
+        """
+        Пакетная приемка поставки: фактическое количество и приемка многих позиций за один запрос.
+
+        Доступно для ролей: Мастер, Прораб, Начальник участка, Завсклад объекта.
+
+        Endpoint: POST /api/material-requests/{id}/receive-items/
+        Body: {"items": [{"item_id": 1, "quantity_actual": 100.5, "received": true, "notes": "..."}, ...]}
+        (quantity_actual, received и notes опциональны, но запись должна что-то менять)
+        Ответ содержит результат по каждой позиции; позиции, которые нельзя
+        обновить, не мешают обновлению остальных.
+        """
+        material_request = self.get_object()
+
+        if request.user.role not in delivery.RECEIVER_ROLES:
+            return Response(
+                {'error': 'У вас нет прав для приёмки материалов'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        if material_request.status != MaterialRequest.STATUS_IN_DELIVERY:
+            return Response(
+                {'error': 'Можно принимать только позиции заявок на доставке'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        result = delivery.receive_items(material_request, request.user, serializer.validated_data['items'])
+        response = self._bulk_response(result['results'])
+        response.update({
+            'all_items_received': result['all_items_received'],
+            'request_status': material_request.status,
+        })
+        return Response(response)
+
     @action(detail=False, methods=['get'], url_path='statistics')
     def statistics(self, request):
         """
@@ -591,19 +702,13 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
 
         if stats is None:
             # Базовая фильтрация по компании
-            base_queryset = MaterialRequest.objects.filter(company=company, is_deleted=False)
-
-            # Применяем ту же логику фильтрации, что и в get_queryset
-            management_roles = [
-                'SUPERADMIN', 'DIRECTOR', 'CHIEF_ENGINEER',
-                'PROJECT_MANAGER', 'CHIEF_POWER_ENGINEER'
-            ]
+            base_queryset = MaterialRequest.objects.filter(company=company)
 
-            # Если пользователь НЕ руководитель и НЕ снабженец,
+            # Применяем ту же логику фильтрации, что и в get_queryset:
+            # если пользователь НЕ руководитель и НЕ снабженец,
             # показываем только заявки по закрепленным проектам или созданные самим пользователем
-            if user.role not in management_roles and user.role != 'SUPPLY_MANAGER':
-                user_projects = user.projects.all() | user.managed_projects.all()
-                base_queryset = base_queryset.filter(Q(author=user) | Q(project__in=user_projects))
+            if user.role not in MANAGEMENT_ROLES and user.role != 'SUPPLY_MANAGER':
+                base_queryset = base_queryset.filter(Q(author=user) | project_member_q(user))
 
             # Статистика по вкладкам
             stats = {
@@ -614,10 +719,105 @@ class MaterialRequestViewSet(viewsets.ModelViewSet):
                 'in_payment': base_queryset.filter(status=MaterialRequest.STATUS_IN_PAYMENT).count(),
                 'in_delivery': base_queryset.filter(status=MaterialRequest.STATUS_IN_DELIVERY).count(),
                 'completed': base_queryset.filter(status=MaterialRequest.STATUS_COMPLETED).count(),
-                'my': MaterialRequest.objects.filter(author=user, company=company, is_deleted=False).count(),
+                'my': MaterialRequest.objects.filter(author=user, company=company).count(),
             }
 
             # Кэшируем результат на 60 секунд
             cache.set(cache_key, stats, timeout=60)
 
         return Response(stats)
+
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        """
+        Потребность и поставки материалов: запрошено, поставлено, осталось
+        и позиции по статусам одним запросом GROUP BY.
+
+        Endpoint: GET /api/material-requests/analytics/
+
+        Query params:
+        - group_by: разрезы через запятую - material, unit, project, week, month (по умолчанию material)
+        - date_from, date_to: период по дате создания заявки YYYY-MM-DD (опционально)
+        - project: ID проекта (опционально)
+        - snapshot: true - вернуть снимок из кэша (опционально)
+        - export: excel - скачать Excel вместо JSON (опционально)
+        """
+        from django.utils.dateparse import parse_date
+
+        user = request.user
+        if not user.company_id:
+            return Response({'error': 'Пользователь не привязан к компании'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            group_by = analytics.parse_group_by(request.query_params.get('group_by'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        dates = {}
+        for param in ('date_from', 'date_to'):
+            value = request.query_params.get(param)
+            try:
+                dates[param] = parse_date(value) if value else None
+            except ValueError:
+                dates[param] = None
+            if value and dates[param] is None:
+                return Response(
+                    {'error': f'{param}: неверный формат даты, ожидается YYYY-MM-DD'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        project_id = request.query_params.get('project')
+        if project_id and not project_id.isdigit():
+            return Response({'error': 'project должен быть числом'}, status=status.HTTP_400_BAD_REQUEST)
+        project_id = int(project_id) if project_id else None
+
+        params = dict(group_by=group_by, project_id=project_id, **dates)
+        use_snapshot = request.query_params.get('snapshot', '').lower() in ('1', 'true')
+
+        if request.query_params.get('export') == 'excel':
+            filename = f'material_demand_{user.company_id}_{timezone.localdate():%Y%m%d}.xlsx'
+            if use_snapshot:
+                rows = analytics.get_demand_analytics(user, use_snapshot=True, **params)['rows']
+            else:
+                rows = analytics.iter_demand_rows(analytics.demand_queryset(user, **params))
+            return analytics.demand_excel_response(group_by, rows, filename)
+
+        return Response(analytics.get_demand_analytics(user, use_snapshot=use_snapshot, **params))
+
+
+class MaterialCatalogViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Справочник материалов компании.
+
+    Endpoints:
+    - GET /api/material-catalog/ - материалы компании (?search= - по названию)
+    - GET /api/material-catalog/autocomplete/?q=цем&limit=10 - автодополнение названия
+    """
+
+    serializer_class = MaterialSerializer
+    permission_classes = [IsAuthenticated]
+
+    # Максимум вариантов автодополнения
+    AUTOCOMPLETE_MAX_LIMIT = 20
+
+    def get_queryset(self):
+        queryset = Material.objects.filter(company_id=self.request.user.company_id)
+        search = self.request.query_params.get('search', '')
+        if search.strip():
+            queryset = queryset.filter(normalized_name__contains=catalog.normalize_material_name(search))
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Варианты названия материала по началу или части слова, с учетом опечаток.
+
+        Endpoint: GET /api/material-catalog/autocomplete/?q=цем
+        """
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), self.AUTOCOMPLETE_MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'limit должен быть числом'}, status=status.HTTP_400_BAD_REQUEST)
+
+        materials = catalog.autocomplete(request.user.company_id, request.query_params.get('q', ''), limit)
+        return Response(MaterialSerializer(materials, many=True).data)
@@ -70,6 +70,13 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             'data': event['data']
         }))
 
+    async def user_event(self, event):
+        """Send service event (job progress, counters) to WebSocket."""
+        await self.send(text_data=json.dumps({
+            'type': event['event'],
+            'data': event['data']
+        }))
+
     @database_sync_to_async
     def mark_notification_read(self, notification_id):
         """Mark notification as read in database."""
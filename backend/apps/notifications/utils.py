@@ -0,0 +1,37 @@
+"""
+Утилиты для отправки событий пользователю через WebSocket.
+"""
+import logging
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+
+logger = logging.getLogger(__name__)
+
+
+def send_user_event(user_id, event, data):
+    """
+    Отправляет событие в WebSocket-группу пользователя (без записи Notification в БД).
+
+    Используется для служебных событий: прогресс фоновых заданий, счетчики и т.д.
+    Ошибки channel layer не пробрасываются - событие просто теряется.
+
+    Args:
+        user_id: ID пользователя
+        event: Тип события для клиента (например, 'report_job')
+        data: JSON-сериализуемые данные события
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    try:
+        async_to_sync(channel_layer.group_send)(
+            f'user_{user_id}',
+            {
+                'type': 'user_event',
+                'event': event,
+                'data': data,
+            }
+        )
+    except Exception as e:
+        logger.warning(f'Не удалось отправить событие {event} пользователю {user_id}: {str(e)}')
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Project, Site, Category, Drawing
+from apps.users.storage import format_file_size
 
 
 @admin.register(Project)
@@ -74,20 +75,8 @@ class DrawingAdmin(admin.ModelAdmin):
 
     def get_file_size(self, obj):
         """Отображение размера файла в удобочитаемом формате."""
-        if obj.file and hasattr(obj.file, 'size'):
-            size_bytes = obj.file.size
-            # Форматируем размер файла
-            if size_bytes < 1024:
-                return f"{size_bytes} B"
-            elif size_bytes < 1024 * 1024:
-                size_kb = size_bytes / 1024
-                return f"{size_kb:.2f} KB"
-            elif size_bytes < 1024 * 1024 * 1024:
-                size_mb = size_bytes / (1024 * 1024)
-                return f"{size_mb:.2f} MB"
-            else:
-                size_gb = size_bytes / (1024 * 1024 * 1024)
-                return f"{size_gb:.2f} GB"
+        if obj.file:
+            return format_file_size(obj.file_size)
         return "-"
 
     get_file_size.short_description = 'Размер файла'
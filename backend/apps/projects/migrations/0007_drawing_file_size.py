@@ -0,0 +1,20 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0006_project_deleted_at_project_deleted_by_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="drawing",
+            name="file_size",
+            field=models.PositiveBigIntegerField(
+                default=0, editable=False, verbose_name="Размер файла, байт"
+            ),
+        ),
+    ]
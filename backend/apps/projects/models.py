@@ -1,7 +1,7 @@
 from django.db import models
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
-from apps.core.mixins import SoftDeleteMixin, SoftDeleteManager
+from apps.core.mixins import SoftDeleteMixin, SoftDeleteManager, live_index
 
 
 class Project(SoftDeleteMixin, models.Model):
@@ -65,6 +65,9 @@ class Project(SoftDeleteMixin, models.Model):
         verbose_name = _('Объект')
         verbose_name_plural = _('Объекты')
         ordering = ['-created_at']
+        indexes = [
+            live_index('company', '-created_at', name='project_company_live_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -177,6 +180,7 @@ class Drawing(models.Model):
     )
 
     file_name = models.CharField(_('Название файла'), max_length=255)
+    file_size = models.PositiveBigIntegerField(_('Размер файла, байт'), default=0, editable=False)
 
     uploaded_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Project, Site, Category, Drawing
 from apps.users.serializers import UserSerializer
+from apps.users.storage import format_file_size
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -51,21 +52,9 @@ class DrawingListSerializer(serializers.ModelSerializer):
     )
 
     def get_file_size(self, obj):
-        """Возвращает размер файла в удобочитаемом формате."""
-        if obj.file and hasattr(obj.file, 'size'):
-            size_bytes = obj.file.size
-            # Форматируем размер файла
-            if size_bytes < 1024:
-                return f"{size_bytes} B"
-            elif size_bytes < 1024 * 1024:
-                size_kb = size_bytes / 1024
-                return f"{size_kb:.2f} KB"
-            elif size_bytes < 1024 * 1024 * 1024:
-                size_mb = size_bytes / (1024 * 1024)
-                return f"{size_mb:.2f} MB"
-            else:
-                size_gb = size_bytes / (1024 * 1024 * 1024)
-                return f"{size_gb:.2f} GB"
+        """Возвращает размер файла в удобочитаемом формате (из колонки, без обращения к диску)."""
+        if obj.file:
+            return format_file_size(obj.file_size)
         return None
 
     def to_representation(self, instance):
@@ -164,21 +153,9 @@ class DrawingSerializer(serializers.ModelSerializer):
     )
 
     def get_file_size(self, obj):
-        """Возвращает размер файла в удобочитаемом формате."""
-        if obj.file and hasattr(obj.file, 'size'):
-            size_bytes = obj.file.size
-            # Форматируем размер файла
-            if size_bytes < 1024:
-                return f"{size_bytes} B"
-            elif size_bytes < 1024 * 1024:
-                size_kb = size_bytes / 1024
-                return f"{size_kb:.2f} KB"
-            elif size_bytes < 1024 * 1024 * 1024:
-                size_mb = size_bytes / (1024 * 1024)
-                return f"{size_mb:.2f} MB"
-            else:
-                size_gb = size_bytes / (1024 * 1024 * 1024)
-                return f"{size_gb:.2f} GB"
+        """Возвращает размер файла в удобочитаемом формате (из колонки, без обращения к диску)."""
+        if obj.file:
+            return format_file_size(obj.file_size)
         return None
 
     def to_representation(self, instance):
@@ -209,6 +186,11 @@ class ProjectImportSerializer(serializers.Serializer):
         help_text='Excel файл с проектами (.xlsx)',
         required=True
     )
+    mode = serializers.ChoiceField(
+        choices=['create', 'upsert'],
+        default='create',
+        help_text='create - только новые проекты, upsert - также обновить адрес и заказчика существующих'
+    )
 
     def validate_file(self, value):
         """Валидация загруженного файла."""
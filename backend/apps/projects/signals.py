@@ -0,0 +1,27 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.users import storage
+from .models import Drawing
+
+
+# ==================== Учет места, занятого чертежами ====================
+
+@receiver(pre_save, sender=Drawing)
+def remember_drawing_size(sender, instance, update_fields=None, **kwargs):
+    """Записывает размер нового файла чертежа в file_size."""
+    storage.remember_file_size(instance, 'file', 'file_size', update_fields)
+
+
+@receiver(post_save, sender=Drawing)
+def update_company_storage_on_drawing_save(sender, instance, **kwargs):
+    """Сдвигает счетчик занятого места компании на разницу размеров чертежа."""
+    delta = storage.pop_storage_delta(instance)
+    if delta:
+        storage.add_company_storage(storage.get_project_company_id(instance.project_id), delta)
+
+
+@receiver(post_delete, sender=Drawing)
+def update_company_storage_on_drawing_delete(sender, instance, **kwargs):
+    if instance.file_size:
+        storage.add_company_storage(storage.get_project_company_id(instance.project_id), -instance.file_size)
@@ -9,6 +9,8 @@ from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
 
+from apps.users.storage import format_file_size
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,7 +36,6 @@ def send_drawing_upload_notification(self, drawing_id):
 
         # Получаем всех участников проекта
         team_members = drawing.project.team_members.filter(
-            is_deleted=False,
             is_active=True
         ).exclude(
             email=''
@@ -55,7 +56,7 @@ def send_drawing_upload_notification(self, drawing_id):
             'project': drawing.project,
             'uploaded_by': drawing.uploaded_by,
             'file_name': drawing.file_name,
-            'file_size': drawing.file_size,
+            'file_size': format_file_size(drawing.file_size),
             'uploaded_at': drawing.created_at,
             'site_url': settings.SITE_URL,
             'site_name': settings.SITE_NAME,
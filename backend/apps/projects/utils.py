@@ -6,7 +6,9 @@ from typing import List, Dict, Any
 from openpyxl import Workbook, load_workbook
 from openpyxl.styles import Font, Alignment, PatternFill
 from openpyxl.utils import get_column_letter
+from django.db import transaction
 from django.http import HttpResponse
+from django.utils import timezone
 
 
 def generate_excel_template() -> HttpResponse:
@@ -167,6 +169,7 @@ def parse_excel_file(file) -> Dict[str, Any]:
 
             # Добавляем валидированные данные
             result['data'].append({
+                'row': row_num,
                 'name': name,
                 'address': address,
                 'customer': country if country else ''  # Используем поле customer для страны
@@ -186,6 +189,104 @@ def parse_excel_file(file) -> Dict[str, Any]:
     return result
 
 
+def parse_import_job(job) -> tuple:
+    """Разбор файла фонового задания импорта проектов (см. apps.core.imports)."""
+    with job.file.open('rb') as file:
+        result = parse_excel_file(file)
+
+    if result['success']:
+        return result['data'], []
+    # Ошибки parse_excel_file уже содержат номер строки в тексте
+    return result['data'], [{'row': None, 'errors': [error]} for error in result['errors']]
+
+
+def import_projects(company, user, rows, mode='create') -> Dict[str, Any]:
+    """
+    Записывает валидные строки импорта проектов пакетными операциями.
+
+    Существующие проекты компании загружаются одним запросом, новые создаются
+    через bulk_create, а в режиме upsert существующие обновляются через
+    bulk_update - все в одной транзакции.
+
+    Args:
+        rows: Валидные строки parse_excel_file()
+        mode: 'create' - существующие названия пропускаются с ошибкой,
+              'upsert' - у существующих обновляются адрес и заказчик
+
+    Returns:
+        Dict с ключами:
+            - 'created': int
+            - 'updated': int
+            - 'errors': List[Dict] - [{'row': ..., 'errors': [...]}]
+    """
+    from apps.core.global_search import index_objects
+
+    from .models import Project
+
+    existing = {
+        project.name: project
+        for project in Project.objects.filter(
+            company=company, name__in={row['name'] for row in rows}
+        ).only('id', 'name', 'address', 'customer')
+    }
+
+    to_create = []
+    to_update = {}
+    seen_names = set()
+    errors = []
+    now = timezone.now()
+
+    for row in rows:
+        name = row['name']
+        if name in seen_names:
+            errors.append({'row': row.get('row'), 'errors': [f'Проект "{name}" повторяется в файле']})
+            continue
+        seen_names.add(name)
+
+        project = existing.get(name)
+        if project is None:
+            to_create.append(Project(
+                company=company,
+                name=name,
+                address=row['address'],
+                customer=row.get('customer', ''),
+                project_manager=user
+            ))
+        elif mode == 'upsert':
+            project.address = row['address']
+            project.customer = row.get('customer', '')
+            # bulk_update не обновляет auto_now поля
+            project.updated_at = now
+            to_update[project.id] = project
+        else:
+            errors.append({'row': row.get('row'), 'errors': [f'Проект "{name}" уже существует']})
+
+    with transaction.atomic():
+        Project.objects.bulk_create(to_create, batch_size=500)
+        Project.objects.bulk_update(
+            to_update.values(), ['address', 'customer', 'updated_at'], batch_size=500
+        )
+        # bulk-операции не вызывают сигналы - обновляем общий поисковый индекс явно
+        index_objects(Project.objects.filter(pk__in=[project.pk for project in to_create] + list(to_update)))
+
+    return {
+        'created': len(to_create),
+        'updated': len(to_update),
+        'errors': errors,
+    }
+
+
+def apply_import_chunk(job, rows) -> tuple:
+    """Запись части строк фонового задания импорта проектов (см. apps.core.imports)."""
+    result = import_projects(job.company, job.user, rows, mode=job.mode)
+    stats = {
+        'new_records': result['created'],
+        'updated_records': result['updated'],
+        'skipped_records': len(result['errors']),
+    }
+    return stats, result['errors']
+
+
 def generate_excel_export(projects: List) -> HttpResponse:
     """
     Генерирует Excel файл с экспортом всех проектов компании.
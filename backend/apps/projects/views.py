@@ -191,6 +191,10 @@ class ProjectViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
         POST /api/projects/import-excel/
 
         Ожидается multipart/form-data с файлом 'file'.
+        Поле mode: 'create' (по умолчанию) - существующие названия пропускаются с ошибкой,
+        'upsert' - у существующих проектов обновляются адрес и заказчик.
+        С полем background=true импорт выполняется в фоне: ответ 202 с заданием,
+        прогресс - GET /api/import-jobs/{id}/ и WebSocket событие 'import_job'.
 
         Структура Excel файла:
         - Наименование объекта* (обязательное)
@@ -201,10 +205,14 @@ class ProjectViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
         {
             "success": true,
             "created": 10,
+            "updated": 0,
             "errors": []
         }
         """
-        from .utils import parse_excel_file
+        from .utils import parse_excel_file, import_projects
+        from apps.core.imports import wants_background, create_import_job
+        from apps.core.models import ImportJob
+        from apps.core.serializers import ImportJobSerializer
 
         # Валидация файла через сериализатор
         serializer = ProjectImportSerializer(data=request.data)
@@ -214,8 +222,23 @@ class ProjectViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
                 status=http_status.HTTP_400_BAD_REQUEST
             )
 
-        # Парсим Excel файл
         file = serializer.validated_data['file']
+        mode = serializer.validated_data['mode']
+
+        # Фоновый импорт: файл сохраняется в задании, ответ сразу с id задания
+        if wants_background(request):
+            if not request.user.company:
+                return Response(
+                    {'success': False, 'errors': ['Пользователь не привязан к компании']},
+                    status=http_status.HTTP_400_BAD_REQUEST
+                )
+            job = create_import_job(request.user, ImportJob.ImportType.PROJECTS, mode, file)
+            return Response(
+                {'success': True, 'status': 'queued', 'job': ImportJobSerializer(job).data},
+                status=http_status.HTTP_202_ACCEPTED
+            )
+
+        # Парсим Excel файл
         result = parse_excel_file(file)
 
         if not result['success']:
@@ -224,40 +247,18 @@ class ProjectViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
                 status=http_status.HTTP_400_BAD_REQUEST
             )
 
-        # Создаем проекты
-        created_count = 0
-        errors = []
-
-        for idx, project_data in enumerate(result['data'], start=2):
-            try:
-                # Проверяем, есть ли уже проект с таким названием в компании
-                existing_project = Project.objects.filter(
-                    company=request.user.company,
-                    name=project_data['name']
-                ).first()
-
-                if existing_project:
-                    errors.append(
-                        f'Строка {idx}: Проект "{project_data["name"]}" уже существует'
-                    )
-                    continue
-
-                # Создаем новый проект
-                Project.objects.create(
-                    company=request.user.company,
-                    name=project_data['name'],
-                    address=project_data['address'],
-                    customer=project_data.get('customer', ''),
-                    project_manager=request.user
-                )
-                created_count += 1
-
-            except Exception as e:
-                errors.append(f'Строка {idx}: Ошибка при создании проекта - {str(e)}')
+        # Записываем проекты пакетно (существующие названия проверяются одним запросом)
+        import_result = import_projects(request.user.company, request.user, result['data'], mode=mode)
+        errors = [
+            f'Строка {row_error["row"]}: {message}'
+            for row_error in import_result['errors']
+            for message in row_error['errors']
+        ]
 
         return Response({
             'success': True,
-            'created': created_count,
+            'created': import_result['created'],
+            'updated': import_result['updated'],
             'errors': errors
         })
 
@@ -1,4 +1,17 @@
 from django.contrib import admin
+from .models import ReportJob
 
-# Register your models here.
-# No models for reports app
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    """Admin interface for ReportJob model."""
+
+    list_display = ['id', 'report_type', 'format', 'user', 'status', 'progress', 'created_at', 'expires_at']
+    list_filter = ['report_type', 'format', 'status', 'created_at']
+    search_fields = ['user__email']
+    date_hierarchy = 'created_at'
+    readonly_fields = ['params_hash', 'created_at', 'finished_at']
+
+    def get_queryset(self, request):
+        """Optimize queryset."""
+        return super().get_queryset(request).select_related('user')
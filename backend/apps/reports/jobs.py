@@ -0,0 +1,105 @@
+"""
+Фоновые задания на формирование отчетов.
+
+Содержит:
+- дедупликацию одинаковых запросов в пределах окна REPORT_JOB_DEDUP_SECONDS
+- подписанные ссылки на скачивание с ограниченным сроком действия
+- отправку прогресса задания через WebSocket уведомлений
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.notifications.utils import send_user_event
+from .models import ReportJob
+
+DOWNLOAD_SIGNER_SALT = 'reports.report-job-download'
+
+
+def compute_params_hash(report_type, format_type, params):
+    """Стабильный хэш параметров отчета (порядок ключей не важен)."""
+    payload = json.dumps(
+        {'report_type': report_type, 'format': format_type, 'params': params},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_or_create_report_job(user, report_type, format_type, params):
+    """
+    Возвращает задание на отчет, создавая новое только при необходимости.
+
+    Если этот же пользователь запрашивал отчет с теми же параметрами в пределах
+    окна дедупликации и задание не завершилось ошибкой, возвращается существующее.
+
+    Returns:
+        tuple: (ReportJob, created)
+    """
+    from .tasks import generate_report_job
+
+    params_hash = compute_params_hash(report_type, format_type, params)
+    window_start = timezone.now() - timedelta(seconds=settings.REPORT_JOB_DEDUP_SECONDS)
+
+    existing = ReportJob.objects.filter(
+        user=user,
+        params_hash=params_hash,
+        created_at__gte=window_start,
+    ).exclude(status=ReportJob.Status.FAILED).order_by('-created_at').first()
+
+    if existing and not existing.is_expired:
+        return existing, False
+
+    job = ReportJob.objects.create(
+        user=user,
+        company=user.company,
+        report_type=report_type,
+        format=format_type,
+        params=params,
+        params_hash=params_hash,
+    )
+    # Ставим в очередь только после коммита, иначе воркер может не найти запись
+    transaction.on_commit(lambda: generate_report_job.delay(str(job.id)))
+    return job, True
+
+
+def make_download_token(job):
+    """Подписанный токен для скачивания файла задания."""
+    return signing.TimestampSigner(salt=DOWNLOAD_SIGNER_SALT).sign(str(job.id))
+
+
+def resolve_download_token(token):
+    """
+    Проверяет токен скачивания и возвращает ID задания.
+
+    Raises:
+        signing.SignatureExpired: срок действия ссылки истек
+        signing.BadSignature: токен поврежден или подделан
+    """
+    max_age = settings.REPORT_JOB_TTL_HOURS * 3600
+    return signing.TimestampSigner(salt=DOWNLOAD_SIGNER_SALT).unsign(token, max_age=max_age)
+
+
+def get_download_url(job):
+    """Относительная ссылка на скачивание готового отчета (или None)."""
+    if job.status != ReportJob.Status.SUCCESS or not job.file or job.is_expired:
+        return None
+    return f"{reverse('report-job-download')}?token={make_download_token(job)}"
+
+
+def notify_job_progress(job):
+    """Отправляет текущее состояние задания пользователю через WebSocket."""
+    send_user_event(job.user_id, 'report_job', {
+        'id': str(job.id),
+        'report_type': job.report_type,
+        'status': job.status,
+        'progress': job.progress,
+        'error': job.error,
+        'download_url': get_download_url(job),
+    })
@@ -0,0 +1,142 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("users", "0020_alter_user_role"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReportJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "report_type",
+                    models.CharField(
+                        choices=[
+                            ("project_summary", "Отчет по проекту"),
+                            ("contractor_performance", "Отчет по исполнителю"),
+                            ("overdue_issues", "Просроченные замечания"),
+                        ],
+                        max_length=50,
+                        verbose_name="Тип отчета",
+                    ),
+                ),
+                (
+                    "format",
+                    models.CharField(
+                        choices=[("pdf", "PDF"), ("excel", "Excel")],
+                        default="pdf",
+                        max_length=10,
+                        verbose_name="Формат",
+                    ),
+                ),
+                (
+                    "params",
+                    models.JSONField(
+                        blank=True, default=dict, verbose_name="Параметры"
+                    ),
+                ),
+                (
+                    "params_hash",
+                    models.CharField(
+                        db_index=True, max_length=64, verbose_name="Хэш параметров"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "В очереди"),
+                            ("RUNNING", "Формируется"),
+                            ("SUCCESS", "Готов"),
+                            ("FAILED", "Ошибка"),
+                        ],
+                        default="PENDING",
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "progress",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Прогресс, %"
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Ошибка")),
+                (
+                    "file",
+                    models.FileField(
+                        blank=True,
+                        upload_to="reports/%Y/%m/%d/",
+                        verbose_name="Файл отчета",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Создано"),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Завершено"
+                    ),
+                ),
+                (
+                    "expires_at",
+                    models.DateTimeField(
+                        blank=True, db_index=True, null=True, verbose_name="Доступен до"
+                    ),
+                ),
+                (
+                    "company",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="report_jobs",
+                        to="users.company",
+                        verbose_name="Компания",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="report_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Задание на отчет",
+                "verbose_name_plural": "Задания на отчеты",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["user", "params_hash", "created_at"],
+                        name="reports_rep_user_id_72eaeb_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:55
+"""
+Файлы отчетов - в private/reports/<id задания>/ со случайным именем (не раздается nginx).
+"""
+
+import apps.reports.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="reportjob",
+            name="file",
+            field=models.FileField(
+                blank=True,
+                upload_to=apps.reports.models.report_upload_to,
+                verbose_name="Файл отчета",
+            ),
+        ),
+    ]
@@ -1,4 +1,103 @@
+import secrets
+import uuid
+
 from django.db import models
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+def report_upload_to(instance, filename):
+    """
+    Путь файла отчета: private/reports/<id задания>/<случайное имя>.<расширение>.
+
+    Каталог private/ не раздается nginx как /media/, а имя не содержит ID
+    объектов и времени - файл можно получить только через download.
+    """
+    extension = filename.rsplit('.', 1)[-1]
+    return f'private/reports/{instance.id}/{secrets.token_urlsafe(16)}.{extension}'
+
+
+class ReportJob(models.Model):
+    """
+    Фоновое задание на формирование отчета.
+
+    Отчет формируется Celery воркером, готовый файл сохраняется в MEDIA_ROOT
+    и доступен по подписанной ссылке до истечения expires_at.
+    """
+
+    class ReportType(models.TextChoices):
+        PROJECT_SUMMARY = 'project_summary', _('Отчет по проекту')
+        CONTRACTOR_PERFORMANCE = 'contractor_performance', _('Отчет по исполнителю')
+        OVERDUE_ISSUES = 'overdue_issues', _('Просроченные замечания')
+
+    class Format(models.TextChoices):
+        PDF = 'pdf', 'PDF'
+        EXCEL = 'excel', 'Excel'
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', _('В очереди')
+        RUNNING = 'RUNNING', _('Формируется')
+        SUCCESS = 'SUCCESS', _('Готов')
+        FAILED = 'FAILED', _('Ошибка')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='report_jobs',
+        verbose_name=_('Пользователь')
+    )
+    company = models.ForeignKey(
+        'users.Company',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='report_jobs',
+        verbose_name=_('Компания')
+    )
+
+    report_type = models.CharField(_('Тип отчета'), max_length=50, choices=ReportType.choices)
+    format = models.CharField(_('Формат'), max_length=10, choices=Format.choices, default=Format.PDF)
+    params = models.JSONField(_('Параметры'), default=dict, blank=True)
+
+    # Хэш (тип, формат, параметры) для дедупликации одинаковых запросов
+    params_hash = models.CharField(_('Хэш параметров'), max_length=64, db_index=True)
+
+    status = models.CharField(
+        _('Статус'),
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    progress = models.PositiveSmallIntegerField(_('Прогресс, %'), default=0)
+    error = models.TextField(_('Ошибка'), blank=True)
+
+    file = models.FileField(_('Файл отчета'), upload_to=report_upload_to, blank=True)
+
+    created_at = models.DateTimeField(_('Создано'), auto_now_add=True)
+    finished_at = models.DateTimeField(_('Завершено'), null=True, blank=True)
+    expires_at = models.DateTimeField(_('Доступен до'), null=True, blank=True, db_index=True)
+
+    class Meta:
+        verbose_name = _('Задание на отчет')
+        verbose_name_plural = _('Задания на отчеты')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'params_hash', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_report_type_display()} ({self.get_status_display()}) - {self.user_id}"
+
+    @property
+    def download_filename(self):
+        """Имя файла для скачивания (имя в хранилище случайное)."""
+        extension = self.file.name.rsplit('.', 1)[-1]
+        return f'{self.report_type}_report_{timezone.localtime(self.finished_at):%Y%m%d_%H%M%S}.{extension}'
 
-# Create your models here.
-# Reports are generated dynamically, no models needed
+    @property
+    def is_expired(self):
+        """Истек ли срок хранения готового файла."""
+        return bool(self.expires_at and self.expires_at <= timezone.now())
@@ -0,0 +1,199 @@
+"""
+PDF рендеринг отчетов через WeasyPrint в отдельном пуле процессов.
+
+WeasyPrint нагружает CPU и не рассчитан на работу из нескольких потоков,
+поэтому в web процессе верстка выполняется в ProcessPoolExecutor (см. pdf_worker.py).
+
+В Celery воркере (generate_report_job) пул не создается: процессы prefork
+воркера - демоны billiard, им нельзя запускать дочерние процессы
+("daemonic processes are not allowed to have children"). Там верстка идет прямо
+в процессе задачи, а число одновременных рендеров ограничивает отдельная
+очередь reports (воркер с --concurrency=REPORT_PDF_WORKERS, см. docker-compose.yml).
+
+Большие списки замечаний разбиваются на части по REPORT_PDF_CHUNK_SIZE строк:
+каждая часть рендерится отдельно и сразу дописывается в итоговый PDF, поэтому
+в памяти одновременно находится верстка только одной части.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from io import BytesIO
+from itertools import islice
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils import timezone
+from pypdf import PdfWriter
+
+from . import pdf_worker
+
+logger = logging.getLogger(__name__)
+
+REPORT_TITLES = {
+    'project_summary': 'Отчет по проекту',
+    'contractor_performance': 'Отчет по исполнителю',
+    'overdue_issues': 'Просроченные замечания',
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _get_stylesheet_text():
+    """CSS отчетов читается с диска один раз на процесс."""
+    return render_to_string('reports/pdf/report.css')
+
+
+def _get_executor():
+    """Ленивая инициализация пула процессов рендеринга."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.REPORT_PDF_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=pdf_worker.init_worker,
+                initargs=(_get_stylesheet_text(),),
+                # Периодически пересоздаем процессы, чтобы не копить фрагментированную память
+                max_tasks_per_child=settings.REPORT_PDF_MAX_TASKS_PER_WORKER,
+            )
+        return _executor
+
+
+def _reset_executor():
+    """Сбрасывает сломанный пул (например, процесс был убит OOM killer)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _render_in_process(html):
+    """Рендерит часть в текущем процессе (CSS и шрифты инициализируются один раз на процесс)."""
+    if pdf_worker._stylesheet is None:
+        pdf_worker.init_worker(_get_stylesheet_text())
+    return pdf_worker.render_chunk(html)
+
+
+def _render_in_pool(html):
+    try:
+        future = _get_executor().submit(pdf_worker.render_chunk, html)
+        return future.result(timeout=settings.REPORT_PDF_TIMEOUT)
+    except BrokenProcessPool:
+        _reset_executor()
+        raise
+
+
+def _format_datetime(value, fmt='%d.%m.%Y %H:%M'):
+    if not value:
+        return '-'
+    if hasattr(value, 'tzinfo') and value.tzinfo is not None:
+        value = timezone.localtime(value)
+    return value.strftime(fmt)
+
+
+def _issue_rows(issues, report_type):
+    """Превращает замечания в плоские строки таблицы (без обращений к ORM в шаблоне)."""
+    now = timezone.now()
+    for idx, issue in enumerate(issues.iterator(chunk_size=settings.REPORT_PDF_CHUNK_SIZE), 1):
+        row = {
+            'index': idx,
+            'title': issue.title,
+            'site': issue.site.name,
+            'assigned_to': issue.assigned_to.get_full_name() if issue.assigned_to else '-',
+        }
+        if report_type == 'overdue_issues':
+            row['project'] = issue.project.name
+            row['deadline'] = _format_datetime(issue.deadline)
+            row['days_overdue'] = (now - issue.deadline).days if issue.deadline else '-'
+        else:
+            row['status'] = issue.get_status_display()
+            row['priority'] = issue.get_priority_display()
+            row['deadline'] = _format_datetime(issue.deadline, '%d.%m.%Y')
+        yield row
+
+
+def _summary_context(data, report_type):
+    """Шапка отчета (выводится только в первой части)."""
+    context = {
+        'title': REPORT_TITLES[report_type],
+        'generated_at': _format_datetime(data['generated_at']),
+    }
+
+    if report_type == 'project_summary':
+        context['project_name'] = data['project'].name
+        context['stats'] = [
+            ('Всего замечаний', data['total_issues']),
+            ('Выполнено', data['completed']),
+            ('В процессе', data['in_progress']),
+            ('Просрочено', data['overdue']),
+        ]
+    elif report_type == 'contractor_performance':
+        context['contractor_name'] = data['contractor'].get_full_name()
+        context['period'] = f"{data.get('start_date') or 'Начало'} - {data.get('end_date') or 'Сейчас'}"
+        context['stats'] = [
+            ('Всего назначено', data['total_assigned']),
+            ('Выполнено', data['completed']),
+            ('В процессе', data['in_progress']),
+            ('Просрочено', data['overdue']),
+        ]
+        if data['total_assigned'] > 0:
+            completion_rate = (data['completed'] / data['total_assigned']) * 100
+            context['stats'].append(('Процент выполнения', f"{completion_rate:.1f}%"))
+    else:
+        context['stats'] = [('Всего просрочено', data['total_overdue'])]
+
+    return context
+
+
+def _iter_html_chunks(data, report_type):
+    """Генерирует HTML частей отчета по REPORT_PDF_CHUNK_SIZE строк."""
+    template_name = f'reports/pdf/{report_type}.html'
+    context = _summary_context(data, report_type)
+
+    if report_type == 'contractor_performance':
+        # Отчет по исполнителю содержит только статистику
+        yield render_to_string(template_name, {**context, 'is_first_chunk': True, 'rows': []})
+        return
+
+    rows = _issue_rows(data['issues'], report_type)
+    is_first_chunk = True
+    while True:
+        chunk = list(islice(rows, settings.REPORT_PDF_CHUNK_SIZE))
+        if not chunk and not is_first_chunk:
+            return
+        yield render_to_string(template_name, {**context, 'is_first_chunk': is_first_chunk, 'rows': chunk})
+        is_first_chunk = False
+        if len(chunk) < settings.REPORT_PDF_CHUNK_SIZE:
+            return
+
+
+def render_pdf_report(data, report_type, in_process=False):
+    """
+    Рендерит отчет в PDF.
+
+    Args:
+        data: Данные отчета (см. build_*_data в utils.py)
+        report_type: 'project_summary', 'contractor_performance' или 'overdue_issues'
+        in_process: рендерить в текущем процессе без пула (Celery воркер)
+
+    Returns:
+        bytes: содержимое PDF файла
+    """
+    render = _render_in_process if in_process else _render_in_pool
+    writer = PdfWriter()
+    chunks = 0
+
+    for html in _iter_html_chunks(data, report_type):
+        writer.append(BytesIO(render(html)))
+        chunks += 1
+
+    output = BytesIO()
+    writer.write(output)
+    logger.info(f'[Reports] PDF {report_type} сформирован из {chunks} частей')
+    return output.getvalue()
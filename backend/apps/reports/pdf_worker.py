@@ -0,0 +1,31 @@
+"""
+Код, выполняемый в процессах пула рендеринга PDF.
+
+Модуль намеренно не импортирует Django: процессы пула запускаются через spawn
+и получают уже готовый HTML. Скомпилированная таблица стилей и конфигурация
+шрифтов создаются один раз при старте процесса и переиспользуются между рендерами.
+"""
+
+_stylesheet = None
+_font_config = None
+
+
+def init_worker(css_text):
+    """Инициализатор процесса пула: компилирует CSS и загружает шрифты."""
+    global _stylesheet, _font_config
+
+    from weasyprint import CSS
+    from weasyprint.text.fonts import FontConfiguration
+
+    _font_config = FontConfiguration()
+    _stylesheet = CSS(string=css_text, font_config=_font_config)
+
+
+def render_chunk(html):
+    """Рендерит HTML одной части отчета в PDF (bytes)."""
+    from weasyprint import HTML
+
+    return HTML(string=html).write_pdf(
+        stylesheets=[_stylesheet],
+        font_config=_font_config,
+    )
@@ -0,0 +1,80 @@
+from rest_framework import serializers
+from django.contrib.auth import get_user_model
+from apps.projects.models import Project
+from .models import ReportJob
+from .jobs import get_download_url
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    """Serializer for ReportJob model."""
+
+    download_url = serializers.SerializerMethodField(read_only=True)
+
+    class Meta:
+        model = ReportJob
+        fields = [
+            'id', 'report_type', 'format', 'params', 'status', 'progress',
+            'error', 'download_url', 'created_at', 'finished_at', 'expires_at'
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        """Возвращает подписанную ссылку на скачивание готового отчета."""
+        return get_download_url(obj)
+
+
+class ReportJobCreateSerializer(serializers.Serializer):
+    """
+    Сериализатор для постановки отчета в очередь.
+
+    Параметры совпадают с синхронными endpoints ReportViewSet.
+    """
+
+    report_type = serializers.ChoiceField(choices=ReportJob.ReportType.choices)
+    format = serializers.ChoiceField(choices=ReportJob.Format.choices, default=ReportJob.Format.PDF)
+    project_id = serializers.IntegerField(required=False, allow_null=True)
+    contractor_id = serializers.IntegerField(required=False, allow_null=True)
+    start_date = serializers.DateField(required=False, allow_null=True)
+    end_date = serializers.DateField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        """Проверяет обязательные параметры и доступ к объектам компании."""
+        user = self.context['request'].user
+        report_type = attrs['report_type']
+        project_id = attrs.get('project_id')
+        contractor_id = attrs.get('contractor_id')
+
+        if report_type == ReportJob.ReportType.PROJECT_SUMMARY and not project_id:
+            raise serializers.ValidationError({'project_id': 'project_id обязателен'})
+        if report_type == ReportJob.ReportType.CONTRACTOR_PERFORMANCE and not contractor_id:
+            raise serializers.ValidationError({'contractor_id': 'contractor_id обязателен'})
+        if not user.is_superuser and not user.company_id:
+            raise serializers.ValidationError('Пользователь не привязан к компании')
+
+        if project_id:
+            projects = Project.objects.filter(id=project_id)
+            if not user.is_superuser:
+                projects = projects.filter(company=user.company)
+            if not projects.exists():
+                raise serializers.ValidationError({'project_id': 'Проект не найден'})
+
+        if contractor_id and report_type == ReportJob.ReportType.CONTRACTOR_PERFORMANCE:
+            contractors = get_user_model().objects.filter(id=contractor_id)
+            if not user.is_superuser:
+                contractors = contractors.filter(company=user.company)
+            if not contractors.exists():
+                raise serializers.ValidationError({'contractor_id': 'Подрядчик не найден'})
+
+        return attrs
+
+    def get_params(self):
+        """Параметры отчета в JSON-совместимом виде (только значимые ключи)."""
+        data = self.validated_data
+        params = {}
+        for key in ('project_id', 'contractor_id'):
+            if data.get(key):
+                params[key] = data[key]
+        for key in ('start_date', 'end_date'):
+            if data.get(key):
+                params[key] = data[key].isoformat()
+        return params
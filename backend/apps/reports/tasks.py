@@ -1,10 +1,20 @@
-from celery import shared_task
+import logging
+from collections import defaultdict
+from celery import shared_task, group, chord
+from django.conf import settings
+from django.core.files.base import ContentFile
 from django.core.mail import EmailMessage
+from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import timedelta
 from apps.projects.models import Project
 from apps.issues.models import Issue
-from .utils import generate_excel_report
+from .utils import (
+    generate_daily_digest_excel, build_project_summary_data,
+    build_contractor_performance_data, build_overdue_issues_data, render_report
+)
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task
@@ -12,64 +22,242 @@ def send_daily_reports():
     """
     Send daily reports to project managers.
     Run every day at 9:00 AM via Celery Beat.
+
+    Statistics for all active projects are computed in one grouped query,
+    then one digest per manager is generated in parallel (Celery chord).
     """
-    projects = Project.objects.filter(is_active=True)
+    since = timezone.now() - timedelta(days=1)
 
-    for project in projects:
-        if not project.project_manager or not project.project_manager.email:
-            continue
+    # Один GROUP BY по вчерашним замечаниям всех активных проектов
+    project_stats = Issue.objects.filter(
+        created_at__gte=since,
+        project__is_active=True,
+        project__is_deleted=False,
+        project__project_manager__isnull=False,
+    ).exclude(
+        project__project_manager__email=''
+    ).values(
+        'project_id', 'project__project_manager_id'
+    ).annotate(
+        total_issues=Count('id'),
+        completed=Count('id', filter=Q(status=Issue.Status.COMPLETED)),
+        in_progress=Count('id', filter=Q(status=Issue.Status.IN_PROGRESS)),
+        overdue=Count('id', filter=Q(status=Issue.Status.OVERDUE)),
+    )
 
-        # Get yesterday's issues
-        yesterday = timezone.now() - timedelta(days=1)
-        issues = Issue.objects.filter(
-            project=project,
-            created_at__gte=yesterday
-        )
+    stats_by_manager = defaultdict(list)
+    for row in project_stats:
+        manager_id = row.pop('project__project_manager_id')
+        stats_by_manager[manager_id].append(row)
+
+    if not stats_by_manager:
+        return "No issues for daily reports"
+
+    digests = group(
+        send_manager_daily_digest.s(manager_id, stats, since.isoformat())
+        for manager_id, stats in stats_by_manager.items()
+    )
+    chord(digests)(summarize_daily_reports.s())
+
+    return f"Scheduled daily digests for {len(stats_by_manager)} managers"
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def send_manager_daily_digest(self, manager_id, project_stats, since):
+    """
+    Generate and send one daily digest (all projects of the manager) by email.
+
+    Args:
+        manager_id: ID руководителя проектов
+        project_stats: список {'project_id', 'total_issues', 'completed', 'in_progress', 'overdue'}
+        since: начало периода (ISO datetime)
+    """
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+
+    try:
+        manager = User.objects.get(id=manager_id)
+    except User.DoesNotExist:
+        return {'manager_id': manager_id, 'status': 'skipped', 'projects': 0}
+
+    stats_by_project = {row['project_id']: row for row in project_stats}
+    projects = Project.objects.in_bulk(list(stats_by_project))
 
-        if not issues.exists():
-            continue
+    # Все вчерашние замечания проектов руководителя - одним запросом
+    issues_by_project = defaultdict(list)
+    issues = Issue.objects.filter(
+        project_id__in=list(projects),
+        created_at__gte=since
+    ).select_related('site', 'assigned_to')
+    for issue in issues:
+        issues_by_project[issue.project_id].append(issue)
 
-        # Generate report data
-        data = {
+    generated_at = timezone.now()
+    sections = []
+    for project_id, project in sorted(projects.items(), key=lambda item: item[1].name):
+        stats = stats_by_project[project_id]
+        sections.append({
             'project': project,
-            'issues': issues,
-            'total_issues': issues.count(),
-            'completed': issues.filter(status=Issue.Status.COMPLETED).count(),
-            'in_progress': issues.filter(status=Issue.Status.IN_PROGRESS).count(),
-            'overdue': issues.filter(status=Issue.Status.OVERDUE).count(),
-            'generated_at': timezone.now(),
-        }
-
-        # Generate Excel report
-        report_content = generate_excel_report(data, 'project_summary')
-
-        # Send email
+            'issues': issues_by_project[project_id],
+            'total_issues': stats['total_issues'],
+            'completed': stats['completed'],
+            'in_progress': stats['in_progress'],
+            'overdue': stats['overdue'],
+            'generated_at': generated_at,
+        })
+
+    if not sections:
+        return {'manager_id': manager_id, 'status': 'skipped', 'projects': 0}
+
+    project_lines = '\n'.join(
+        f"""
+"{data['project'].name}":
+- Новых замечаний: {data['total_issues']}
+- Выполнено: {data['completed']}
+- В процессе: {data['in_progress']}
+- Просрочено: {data['overdue']}"""
+        for data in sections
+    )
+
+    try:
         email = EmailMessage(
-            subject=f'Ежедневный отчет: {project.name}',
+            subject=f'Ежедневный отчет по проектам ({len(sections)})',
             body=f"""
 Добрый день!
 
-Ежедневный отчет по проекту "{project.name}".
+Ежедневный отчет по вашим проектам.
 
 Статистика за последние 24 часа:
-- Новых замечаний: {issues.count()}
-- Выполнено: {data['completed']}
-- В процессе: {data['in_progress']}
-- Просрочено: {data['overdue']}
+{project_lines}
 
 С уважением,
 Система Check Site
             """,
             from_email='noreply@checksite.com',
-            to=[project.project_manager.email],
+            to=[manager.email],
         )
 
         email.attach(
-            f'daily_report_{project.id}_{timezone.now().strftime("%Y%m%d")}.xlsx',
-            report_content,
+            f'daily_report_{generated_at.strftime("%Y%m%d")}.xlsx',
+            generate_daily_digest_excel(sections),
             'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         )
 
         email.send()
+    except Exception as exc:
+        logger.error(f'[Reports] Ошибка отправки ежедневного отчета руководителю {manager_id}: {str(exc)}')
+        raise self.retry(exc=exc)
+
+    return {'manager_id': manager_id, 'status': 'sent', 'projects': len(sections)}
+
+
+@shared_task
+def summarize_daily_reports(results):
+    """Chord callback: logs the outcome of the daily digest fan-out."""
+    sent = [r for r in results if r and r.get('status') == 'sent']
+    projects = sum(r['projects'] for r in sent)
+    logger.info(f'[Reports] Ежедневные отчеты: {len(sent)} писем по {projects} проектам')
+    return f"Sent daily reports to {len(sent)} managers for {projects} projects"
+
+
+def _collect_job_data(job):
+    """Собирает данные отчета по параметрам задания."""
+    from .models import ReportJob
+    params = job.params
+
+    if job.report_type == ReportJob.ReportType.PROJECT_SUMMARY:
+        project = Project.objects.get(id=params['project_id'])
+        return build_project_summary_data(project)
+
+    if job.report_type == ReportJob.ReportType.CONTRACTOR_PERFORMANCE:
+        from django.contrib.auth import get_user_model
+        contractor = get_user_model().objects.get(id=params['contractor_id'])
+        return build_contractor_performance_data(
+            contractor, params.get('start_date'), params.get('end_date')
+        )
+
+    # Суперадмин видит просрочки всех компаний, остальные - только своей
+    company = None if job.user.is_superuser else job.company
+    return build_overdue_issues_data(params.get('project_id'), company)
+
+
+@shared_task(bind=True)
+def generate_report_job(self, job_id):
+    """
+    Формирует отчет для ReportJob и сохраняет файл в MEDIA_ROOT.
+
+    Прогресс и результат отправляются пользователю через WebSocket.
+    """
+    from .models import ReportJob
+    from .jobs import notify_job_progress
+
+    try:
+        job = ReportJob.objects.get(id=job_id)
+    except ReportJob.DoesNotExist:
+        logger.error(f'[Reports] Задание {job_id} не найдено')
+        return {'status': 'error', 'job_id': job_id}
+
+    if job.status != ReportJob.Status.PENDING:
+        # Повторная доставка сообщения брокером - задание уже обработано
+        return {'status': 'skipped', 'job_id': job_id}
+
+    def set_progress(progress, **fields):
+        job.progress = progress
+        for name, value in fields.items():
+            setattr(job, name, value)
+        job.save(update_fields=['progress', *fields.keys()])
+        notify_job_progress(job)
+
+    try:
+        set_progress(10, status=ReportJob.Status.RUNNING)
+
+        data = _collect_job_data(job)
+        set_progress(40)
+
+        # Процесс prefork воркера - демон, пул процессов в нем создать нельзя (см. pdf.py)
+        file_content, _, extension = render_report(data, job.report_type, job.format, in_process=True)
+        set_progress(80)
+
+        now = timezone.now()
+        # Имя в хранилище случайное (см. report_upload_to), задается только расширение
+        job.file.save(f'report.{extension}', ContentFile(file_content), save=False)
+        set_progress(
+            100,
+            file=job.file,
+            status=ReportJob.Status.SUCCESS,
+            finished_at=now,
+            expires_at=now + timedelta(hours=settings.REPORT_JOB_TTL_HOURS),
+        )
+
+        logger.info(f'[Reports] Отчет {job.report_type} для задания {job_id} сформирован')
+        return {'status': 'success', 'job_id': job_id}
+
+    except Exception as e:
+        logger.error(f'[Reports] Ошибка формирования отчета для задания {job_id}: {str(e)}', exc_info=True)
+        set_progress(job.progress, status=ReportJob.Status.FAILED, error=str(e), finished_at=timezone.now())
+        return {'status': 'error', 'job_id': job_id, 'error': str(e)}
+
+
+@shared_task
+def cleanup_expired_report_jobs():
+    """
+    Удаляет задания на отчеты с истекшим сроком хранения вместе с файлами.
+    Run every hour via Celery Beat.
+    """
+    from .models import ReportJob
+
+    now = timezone.now()
+    # Незавершенные/ошибочные задания без expires_at чистим через сутки после создания
+    expired = ReportJob.objects.filter(expires_at__lte=now) | ReportJob.objects.filter(
+        expires_at__isnull=True,
+        created_at__lte=now - timedelta(hours=settings.REPORT_JOB_TTL_HOURS),
+    )
+
+    count = 0
+    for job in expired.iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        count += 1
 
-    return f"Sent daily reports for {projects.count()} projects"
+    return f"Removed {count} expired report jobs"
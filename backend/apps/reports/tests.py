@@ -0,0 +1,184 @@
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import timedelta
+from apps.projects.models import Project, Site
+from apps.issues.models import Issue
+from apps.users.models import Company
+from apps.reports.jobs import compute_params_hash
+from apps.reports.models import ReportJob
+from apps.reports.tasks import _collect_job_data, generate_report_job
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def company():
+    return Company.objects.create(name='Test Company')
+
+
+@pytest.fixture
+def director(company):
+    return User.objects.create_user(
+        email='director@example.com',
+        password='testpass123',
+        first_name='Test',
+        last_name='Director',
+        role=User.Role.DIRECTOR,
+        company=company
+    )
+
+
+def weasyprint_available():
+    # WeasyPrint без системных библиотек pango/cairo падает при импорте с OSError
+    try:
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError):
+        return False
+    return True
+
+
+class TestReportJobHash:
+    def test_hash_ignores_param_order(self):
+        first = compute_params_hash('project_summary', 'pdf', {'project_id': 1, 'start_date': '2025-01-01'})
+        second = compute_params_hash('project_summary', 'pdf', {'start_date': '2025-01-01', 'project_id': 1})
+        assert first == second
+
+    def test_hash_depends_on_format(self):
+        pdf = compute_params_hash('project_summary', 'pdf', {'project_id': 1})
+        excel = compute_params_hash('project_summary', 'excel', {'project_id': 1})
+        assert pdf != excel
+
+
+@pytest.mark.django_db
+class TestReportJobAPI:
+    def test_identical_requests_are_deduplicated(self, api_client, director, company):
+        project = Project.objects.create(name='Test Project', company=company)
+        api_client.force_authenticate(user=director)
+        payload = {'report_type': 'project_summary', 'format': 'excel', 'project_id': project.id}
+
+        first = api_client.post('/api/reports/jobs/', payload)
+        second = api_client.post('/api/reports/jobs/', payload)
+
+        assert first.status_code == status.HTTP_202_ACCEPTED
+        assert second.status_code == status.HTTP_200_OK
+        assert second.data['deduplicated'] is True
+        assert first.data['id'] == second.data['id']
+        assert ReportJob.objects.count() == 1
+
+    def test_project_of_other_company_is_rejected(self, api_client, director):
+        other_company = Company.objects.create(name='Other Company')
+        project = Project.objects.create(name='Foreign Project', company=other_company)
+        api_client.force_authenticate(user=director)
+
+        response = api_client.post('/api/reports/jobs/', {
+            'report_type': 'project_summary',
+            'project_id': project.id,
+        })
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestContractorScorecard:
+    def test_rates_are_computed_per_contractor(self, api_client, director, company):
+        contractor = User.objects.create_user(
+            email='contractor@example.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='Contractor',
+            role=User.Role.CONTRACTOR,
+            company=company
+        )
+        project = Project.objects.create(name='Test Project', company=company)
+        site = Site.objects.create(project=project, name='Test Site')
+        for issue_status in (Issue.Status.COMPLETED, Issue.Status.OVERDUE):
+            issue = Issue.objects.create(
+                title='Issue', description='Description', project=project, site=site,
+                status=issue_status, assigned_to=contractor
+            )
+        Issue.objects.filter(status=Issue.Status.COMPLETED).update(
+            completed_at=issue.created_at + timedelta(hours=4)
+        )
+        api_client.force_authenticate(user=director)
+
+        response = api_client.get('/api/reports/reports/contractor_scorecard/')
+
+        assert response.status_code == status.HTTP_200_OK
+        row = response.data['contractors'][0]
+        assert row['total'] == 2
+        assert row['completion_rate'] == 50.0
+        assert row['overdue_rate'] == 50.0
+
+
+@pytest.mark.django_db
+class TestOverdueIssuesReport:
+    def test_other_company_issues_are_excluded(self, director, company):
+        other_company = Company.objects.create(name='Other Company')
+        for issue_company in (company, other_company):
+            project = Project.objects.create(name=f'{issue_company.name} Project', company=issue_company)
+            site = Site.objects.create(project=project, name='Test Site')
+            Issue.objects.create(
+                title=issue_company.name, description='Description', project=project, site=site,
+                status=Issue.Status.OVERDUE
+            )
+        job = ReportJob.objects.create(
+            user=director, company=company,
+            report_type=ReportJob.ReportType.OVERDUE_ISSUES, format=ReportJob.Format.EXCEL,
+            params_hash='overdue',
+        )
+
+        data = _collect_job_data(job)
+
+        assert data['total_overdue'] == 1
+        assert [issue.title for issue in data['issues']] == ['Test Company']
+
+
+@pytest.mark.django_db
+class TestGenerateReportJob:
+    @pytest.mark.skipif(not weasyprint_available(), reason='WeasyPrint недоступен')
+    def test_pdf_is_rendered_without_process_pool(self, director, company, monkeypatch):
+        def daemonic_pool():
+            raise AssertionError('daemonic processes are not allowed to have children')
+
+        # В prefork воркере Celery пул процессов создать нельзя
+        monkeypatch.setattr('apps.reports.pdf._get_executor', daemonic_pool)
+        project = Project.objects.create(name='Test Project', company=company)
+        job = ReportJob.objects.create(
+            user=director, company=company,
+            report_type=ReportJob.ReportType.PROJECT_SUMMARY, format=ReportJob.Format.PDF,
+            params={'project_id': project.id}, params_hash='pdf',
+        )
+
+        generate_report_job(str(job.id))
+
+        job.refresh_from_db()
+        assert job.status == ReportJob.Status.SUCCESS, job.error
+        assert job.file.read(4) == b'%PDF'
+
+    def test_report_file_name_is_not_guessable(self, director, company, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        project = Project.objects.create(name='Test Project', company=company)
+        job = ReportJob.objects.create(
+            user=director, company=company,
+            report_type=ReportJob.ReportType.PROJECT_SUMMARY, format=ReportJob.Format.EXCEL,
+            params={'project_id': project.id}, params_hash='excel',
+        )
+
+        generate_report_job(str(job.id))
+
+        job.refresh_from_db()
+        assert job.status == ReportJob.Status.SUCCESS, job.error
+        directory, name = job.file.name.rsplit('/', 1)
+        stem, extension = name.rsplit('.', 1)
+        assert directory == f'private/reports/{job.id}'
+        assert extension == 'xlsx'
+        assert 'project' not in stem and 'report' not in stem
+        assert f'{job.finished_at:%Y%m%d}' not in stem
+        assert job.download_filename.startswith('project_summary_report_')
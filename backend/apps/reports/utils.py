@@ -2,27 +2,244 @@
 Utilities for generating PDF and Excel reports.
 """
 from io import BytesIO
+from datetime import timedelta
 import xlsxwriter
-from django.template.loader import render_to_string
-# from weasyprint import HTML  # Uncomment when using PDF generation
+from django.utils import timezone
+from apps.issues.models import Issue, IssueDailyStat
+from apps.issues.metrics import summarize
 
 
-def generate_pdf_report(data, template_name):
+EXCEL_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+PDF_CONTENT_TYPE = 'application/pdf'
+
+
+def build_project_summary_data(project):
+    """Collect data for the project summary report."""
+    issues = Issue.objects.filter(project=project).select_related(
+        'site', 'category', 'created_by', 'assigned_to'
+    )
+
+    return {
+        'project': project,
+        'issues': issues,
+        'total_issues': issues.count(),
+        'completed': issues.filter(status=Issue.Status.COMPLETED).count(),
+        'in_progress': issues.filter(status=Issue.Status.IN_PROGRESS).count(),
+        'overdue': issues.filter(status=Issue.Status.OVERDUE).count(),
+        'generated_at': timezone.now(),
+    }
+
+
+def build_contractor_performance_data(contractor, start_date=None, end_date=None):
+    """
+    Collect data for the contractor performance report.
+
+    Счетчики читаются из суточных агрегатов IssueDailyStat (дни включительно).
+    """
+    issues = Issue.objects.filter(assigned_to=contractor)
+    stats = IssueDailyStat.objects.filter(contractor=contractor)
+
+    if start_date:
+        issues = issues.filter(created_at__date__gte=start_date)
+        stats = stats.filter(day__gte=start_date)
+    if end_date:
+        issues = issues.filter(created_at__date__lte=end_date)
+        stats = stats.filter(day__lte=end_date)
+
+    counts = summarize(stats)
+
+    return {
+        'contractor': contractor,
+        'issues': issues,
+        'total_assigned': counts['total'],
+        'completed': counts['completed'],
+        'overdue': counts['overdue'],
+        'in_progress': counts['in_progress'],
+        'start_date': start_date,
+        'end_date': end_date,
+        'generated_at': timezone.now(),
+    }
+
+
+def build_overdue_issues_data(project_id=None, company=None):
+    """
+    Collect data for the overdue issues report.
+
+    Args:
+        company: only issues of the company projects (None - all companies, superadmin only)
+    """
+    issues = Issue.objects.filter(status=Issue.Status.OVERDUE)
+
+    if company is not None:
+        issues = issues.filter(project__company=company)
+
+    if project_id:
+        issues = issues.filter(project_id=project_id)
+
+    issues = issues.select_related(
+        'project', 'site', 'assigned_to'
+    ).order_by('deadline')
+
+    return {
+        'issues': issues,
+        'total_overdue': issues.count(),
+        'generated_at': timezone.now(),
+    }
+
+
+def build_contractor_scorecard_data(company, start_date=None, end_date=None):
     """
-    Generate PDF report from template.
+    Collect scorecard rows for all contractors of the company in one grouped query.
 
-    Note: WeasyPrint requires additional system dependencies.
-    For now, returning a placeholder. Install WeasyPrint dependencies:
-    - On Ubuntu: apt-get install python3-dev python3-pip python3-setuptools python3-wheel python3-cffi libcairo2 libpango-1.0-0 libpangocairo-1.0-0 libgdk-pixbuf2.0-0 libffi-dev shared-mime-info
-    - On macOS: brew install cairo pango gdk-pixbuf libffi
+    Считаются замечания проектов компании, созданные в периоде (дни включительно):
+    - completion_rate: доля принятых (COMPLETED)
+    - overdue_rate: доля просроченных сейчас или принятых после срока
+    - avg_completion_hours: среднее completed_at - created_at по принятым
     """
-    # Placeholder implementation
-    # html_content = render_to_string(f'reports/{template_name}.html', data)
-    # pdf_file = HTML(string=html_content).write_pdf()
-    # return pdf_file
+    from django.contrib.auth import get_user_model
+    from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Q
+
+    User = get_user_model()
+
+    in_period = Q(assigned_issues__project__company=company)
+    if start_date:
+        in_period &= Q(assigned_issues__created_at__date__gte=start_date)
+    if end_date:
+        in_period &= Q(assigned_issues__created_at__date__lte=end_date)
+
+    completed = in_period & Q(assigned_issues__status=Issue.Status.COMPLETED)
+    overdue = in_period & (
+        Q(assigned_issues__status=Issue.Status.OVERDUE) |
+        Q(assigned_issues__completed_at__gt=F('assigned_issues__deadline'))
+    )
 
-    # For now, return a simple text
-    return b"PDF generation requires WeasyPrint setup. Please configure system dependencies."
+    contractors = User.objects.filter(
+        company=company, role=User.Role.CONTRACTOR
+    ).annotate(
+        total=Count('assigned_issues', filter=in_period),
+        completed=Count('assigned_issues', filter=completed),
+        overdue=Count('assigned_issues', filter=overdue),
+        avg_completion=Avg(
+            ExpressionWrapper(
+                F('assigned_issues__completed_at') - F('assigned_issues__created_at'),
+                output_field=DurationField()
+            ),
+            filter=completed & Q(assigned_issues__completed_at__isnull=False)
+        ),
+    ).order_by('last_name', 'first_name')
+
+    rows = []
+    for contractor in contractors:
+        total = contractor.total
+        rows.append({
+            'contractor_id': contractor.id,
+            'full_name': contractor.get_full_name(),
+            'company_name': contractor.external_company_name,
+            'work_type': contractor.work_type,
+            'total': total,
+            'completed': contractor.completed,
+            'overdue': contractor.overdue,
+            'completion_rate': round(contractor.completed / total * 100, 1) if total else None,
+            'overdue_rate': round(contractor.overdue / total * 100, 1) if total else None,
+            'avg_completion_hours': (
+                round(contractor.avg_completion.total_seconds() / 3600, 1)
+                if contractor.avg_completion is not None else None
+            ),
+        })
+
+    return {
+        'company_id': company.id,
+        'start_date': start_date.isoformat() if start_date else None,
+        'end_date': end_date.isoformat() if end_date else None,
+        'generated_at': timezone.now().isoformat(),
+        'contractors': rows,
+    }
+
+
+def get_contractor_scorecard(company, start_date=None, end_date=None, use_snapshot=False):
+    """
+    Scorecard данные, при use_snapshot - из суточного снимка в кэше.
+
+    Снимок строится при первом запросе за день и живет до полуночи,
+    поэтому все пользователи компании в течение дня видят одинаковые цифры.
+    """
+    if not use_snapshot:
+        return build_contractor_scorecard_data(company, start_date, end_date)
+
+    from django.core.cache import cache
+
+    today = timezone.localdate()
+    cache_key = f'contractor_scorecard_{company.id}_{today.isoformat()}_{start_date}_{end_date}'
+    data = cache.get(cache_key)
+    if data is None:
+        data = build_contractor_scorecard_data(company, start_date, end_date)
+        tomorrow = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        cache.set(cache_key, data, timeout=int((tomorrow - timezone.localtime()).total_seconds()) + 1)
+    return data
+
+
+def render_report(data, report_type, format_type, in_process=False):
+    """
+    Render report data into a file.
+
+    Args:
+        in_process: render PDF without the process pool (Celery worker, see pdf.py)
+
+    Returns:
+        tuple: (file content, content type, file extension)
+    """
+    if format_type == 'excel':
+        return generate_excel_report(data, report_type), EXCEL_CONTENT_TYPE, 'xlsx'
+    return generate_pdf_report(data, report_type, in_process), PDF_CONTENT_TYPE, 'pdf'
+
+
+def generate_pdf_report(data, report_type, in_process=False):
+    """
+    Generate PDF report via WeasyPrint.
+
+    Web requests render in a dedicated process pool, Celery tasks render in the
+    task process (see pdf.py). WeasyPrint requires pango/cairo system libraries,
+    they are installed in the backend Dockerfile.
+    """
+    from .pdf import render_pdf_report
+    return render_pdf_report(data, report_type, in_process)
+
+
+def _write_project_summary(worksheet, data, header_format, cell_format):
+    """Write project summary section (stats + issues list) to the worksheet."""
+    worksheet.write('A1', 'Отчет по проекту', header_format)
+    worksheet.write('A2', 'Проект:', cell_format)
+    worksheet.write('B2', data['project'].name, cell_format)
+    worksheet.write('A3', 'Дата формирования:', cell_format)
+    worksheet.write('B3', data['generated_at'].strftime('%d.%m.%Y %H:%M'), cell_format)
+
+    # Statistics
+    worksheet.write('A5', 'Статистика:', header_format)
+    worksheet.write('A6', 'Всего замечаний:', cell_format)
+    worksheet.write('B6', data['total_issues'], cell_format)
+    worksheet.write('A7', 'Выполнено:', cell_format)
+    worksheet.write('B7', data['completed'], cell_format)
+    worksheet.write('A8', 'В процессе:', cell_format)
+    worksheet.write('B8', data['in_progress'], cell_format)
+    worksheet.write('A9', 'Просрочено:', cell_format)
+    worksheet.write('B9', data['overdue'], cell_format)
+
+    # Issues list
+    worksheet.write('A11', 'Список замечаний:', header_format)
+    headers = ['№', 'Название', 'Участок', 'Статус', 'Приоритет', 'Исполнитель', 'Срок']
+    for col, header in enumerate(headers):
+        worksheet.write(11, col, header, header_format)
+
+    row = 12
+    for idx, issue in enumerate(data['issues'], 1):
+        worksheet.write(row, 0, idx, cell_format)
+        worksheet.write(row, 1, issue.title, cell_format)
+        worksheet.write(row, 2, issue.site.name, cell_format)
+        worksheet.write(row, 3, issue.get_status_display(), cell_format)
+        worksheet.write(row, 4, issue.get_priority_display(), cell_format)
+        worksheet.write(row, 5, issue.assigned_to.get_full_name() if issue.assigned_to else '-', cell_format)
+        worksheet.write(row, 6, issue.deadline.strftime('%d.%m.%Y') if issue.deadline else '-', cell_format)
+        row += 1
 
 
 def generate_excel_report(data, report_type):
@@ -44,39 +261,7 @@ def generate_excel_report(data, report_type):
 
     if report_type == 'project_summary':
         # Project Summary Report
-        worksheet.write('A1', 'Отчет по проекту', header_format)
-        worksheet.write('A2', 'Проект:', cell_format)
-        worksheet.write('B2', data['project'].name, cell_format)
-        worksheet.write('A3', 'Дата формирования:', cell_format)
-        worksheet.write('B3', data['generated_at'].strftime('%d.%m.%Y %H:%M'), cell_format)
-
-        # Statistics
-        worksheet.write('A5', 'Статистика:', header_format)
-        worksheet.write('A6', 'Всего замечаний:', cell_format)
-        worksheet.write('B6', data['total_issues'], cell_format)
-        worksheet.write('A7', 'Выполнено:', cell_format)
-        worksheet.write('B7', data['completed'], cell_format)
-        worksheet.write('A8', 'В процессе:', cell_format)
-        worksheet.write('B8', data['in_progress'], cell_format)
-        worksheet.write('A9', 'Просрочено:', cell_format)
-        worksheet.write('B9', data['overdue'], cell_format)
-
-        # Issues list
-        worksheet.write('A11', 'Список замечаний:', header_format)
-        headers = ['№', 'Название', 'Участок', 'Статус', 'Приоритет', 'Исполнитель', 'Срок']
-        for col, header in enumerate(headers):
-            worksheet.write(11, col, header, header_format)
-
-        row = 12
-        for idx, issue in enumerate(data['issues'], 1):
-            worksheet.write(row, 0, idx, cell_format)
-            worksheet.write(row, 1, issue.title, cell_format)
-            worksheet.write(row, 2, issue.site.name, cell_format)
-            worksheet.write(row, 3, issue.get_status_display(), cell_format)
-            worksheet.write(row, 4, issue.get_priority_display(), cell_format)
-            worksheet.write(row, 5, issue.assigned_to.get_full_name() if issue.assigned_to else '-', cell_format)
-            worksheet.write(row, 6, issue.deadline.strftime('%d.%m.%Y') if issue.deadline else '-', cell_format)
-            row += 1
+        _write_project_summary(worksheet, data, header_format, cell_format)
 
     elif report_type == 'contractor_performance':
         # Contractor Performance Report
@@ -143,3 +328,93 @@ def generate_excel_report(data, report_type):
     workbook.close()
     output.seek(0)
     return output.getvalue()
+
+
+def _safe_sheet_name(name, used_names):
+    """Excel sheet name: max 31 chars, no []:*?/\\ and unique within workbook."""
+    for char in '[]:*?/\\':
+        name = name.replace(char, ' ')
+    base = name.strip()[:28] or 'Проект'
+    candidate = base
+    counter = 2
+    while candidate.lower() in used_names:
+        candidate = f'{base}~{counter}'
+        counter += 1
+    used_names.add(candidate.lower())
+    return candidate
+
+
+def generate_daily_digest_excel(sections):
+    """
+    Generate one Excel workbook with a project summary sheet per project.
+
+    Args:
+        sections: list of project summary data dicts (see build_project_summary_data)
+    """
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+
+    header_format = workbook.add_format({
+        'bold': True,
+        'bg_color': '#4472C4',
+        'font_color': 'white',
+        'border': 1
+    })
+    cell_format = workbook.add_format({'border': 1})
+
+    used_names = set()
+    for data in sections:
+        worksheet = workbook.add_worksheet(_safe_sheet_name(data['project'].name, used_names))
+        _write_project_summary(worksheet, data, header_format, cell_format)
+        worksheet.set_column('A:A', 20)
+        worksheet.set_column('B:G', 25)
+
+    workbook.close()
+    output.seek(0)
+    return output.getvalue()
+
+
+def generate_contractor_scorecard_excel(data):
+    """
+    Generate Excel workbook with contractor scorecard (one row per contractor).
+    """
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+    worksheet = workbook.add_worksheet('Подрядчики')
+
+    header_format = workbook.add_format({
+        'bold': True,
+        'bg_color': '#4472C4',
+        'font_color': 'white',
+        'border': 1
+    })
+    cell_format = workbook.add_format({'border': 1})
+
+    worksheet.write('A1', 'Сравнение подрядчиков', header_format)
+    worksheet.write('A2', 'Период:', cell_format)
+    worksheet.write('B2', f"{data['start_date'] or 'Начало'} - {data['end_date'] or 'Сейчас'}", cell_format)
+
+    headers = [
+        '№', 'Подрядчик', 'Компания', 'Вид работ', 'Всего назначено', 'Выполнено',
+        'Просрочено', '% выполнения', '% просрочки', 'Среднее время устранения (ч)'
+    ]
+    for col, header in enumerate(headers):
+        worksheet.write(3, col, header, header_format)
+
+    for idx, item in enumerate(data['contractors'], 1):
+        row = 3 + idx
+        values = [
+            idx, item['full_name'], item['company_name'], item['work_type'], item['total'],
+            item['completed'], item['overdue'], item['completion_rate'], item['overdue_rate'],
+            item['avg_completion_hours'],
+        ]
+        for col, value in enumerate(values):
+            worksheet.write(row, col, '-' if value is None else value, cell_format)
+
+    worksheet.set_column('A:A', 6)
+    worksheet.set_column('B:D', 30)
+    worksheet.set_column('E:J', 18)
+
+    workbook.close()
+    output.seek(0)
+    return output.getvalue()
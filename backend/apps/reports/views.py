@@ -1,12 +1,20 @@
-from rest_framework import viewsets, status
+from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from django.http import HttpResponse
+from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.core import signing
+from django.http import HttpResponse, FileResponse
 from django.utils import timezone
 from django.db import models
 from datetime import datetime, timedelta
-from .utils import generate_pdf_report, generate_excel_report
+from .utils import (
+    build_project_summary_data, build_contractor_performance_data,
+    build_overdue_issues_data, render_report, get_contractor_scorecard,
+    generate_contractor_scorecard_excel, EXCEL_CONTENT_TYPE
+)
+from .models import ReportJob
+from .serializers import ReportJobSerializer, ReportJobCreateSerializer
+from .jobs import get_or_create_report_job, resolve_download_token
 from apps.projects.models import Project
 from apps.issues.models import Issue
 
@@ -36,32 +44,10 @@ class ReportViewSet(viewsets.ViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Get issues for project
-        issues = Issue.objects.filter(project=project).select_related(
-            'site', 'category', 'created_by', 'assigned_to'
-        ).prefetch_related('photos')
-
-        data = {
-            'project': project,
-            'issues': issues,
-            'total_issues': issues.count(),
-            'completed': issues.filter(status=Issue.Status.COMPLETED).count(),
-            'in_progress': issues.filter(status=Issue.Status.IN_PROGRESS).count(),
-            'overdue': issues.filter(status=Issue.Status.OVERDUE).count(),
-            'generated_at': timezone.now(),
-        }
-
-        if format_type == 'excel':
-            file_content = generate_excel_report(data, 'project_summary')
-            response = HttpResponse(
-                file_content,
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            response['Content-Disposition'] = f'attachment; filename="project_{project.id}_report.xlsx"'
-        else:
-            file_content = generate_pdf_report(data, 'project_summary')
-            response = HttpResponse(file_content, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="project_{project.id}_report.pdf"'
+        data = build_project_summary_data(project)
+        file_content, content_type, extension = render_report(data, 'project_summary', format_type)
+        response = HttpResponse(file_content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="project_{project.id}_report.{extension}"'
 
         return response
 
@@ -90,37 +76,10 @@ class ReportViewSet(viewsets.ViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Filter issues
-        issues = Issue.objects.filter(assigned_to=contractor)
-
-        if start_date:
-            issues = issues.filter(created_at__gte=start_date)
-        if end_date:
-            issues = issues.filter(created_at__lte=end_date)
-
-        data = {
-            'contractor': contractor,
-            'issues': issues,
-            'total_assigned': issues.count(),
-            'completed': issues.filter(status=Issue.Status.COMPLETED).count(),
-            'overdue': issues.filter(status=Issue.Status.OVERDUE).count(),
-            'in_progress': issues.filter(status=Issue.Status.IN_PROGRESS).count(),
-            'start_date': start_date,
-            'end_date': end_date,
-            'generated_at': timezone.now(),
-        }
-
-        if format_type == 'excel':
-            file_content = generate_excel_report(data, 'contractor_performance')
-            response = HttpResponse(
-                file_content,
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            response['Content-Disposition'] = f'attachment; filename="contractor_{contractor.id}_report.xlsx"'
-        else:
-            file_content = generate_pdf_report(data, 'contractor_performance')
-            response = HttpResponse(file_content, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="contractor_{contractor.id}_report.pdf"'
+        data = build_contractor_performance_data(contractor, start_date, end_date)
+        file_content, content_type, extension = render_report(data, 'contractor_performance', format_type)
+        response = HttpResponse(file_content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="contractor_{contractor.id}_report.{extension}"'
 
         return response
 
@@ -130,34 +89,75 @@ class ReportViewSet(viewsets.ViewSet):
         project_id = request.data.get('project_id')
         format_type = request.data.get('format', 'pdf')
 
-        issues = Issue.objects.filter(status=Issue.Status.OVERDUE)
+        user = request.user
+        company = None
+        if not user.is_superuser:
+            company = user.company
+            if not company:
+                return Response(
+                    {'error': 'Компания не найдена'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+        data = build_overdue_issues_data(project_id, company)
+        file_content, content_type, extension = render_report(data, 'overdue_issues', format_type)
+        response = HttpResponse(file_content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="overdue_issues_report.{extension}"'
+
+        return response
 
-        if project_id:
-            issues = issues.filter(project_id=project_id)
+    @action(detail=False, methods=['get'])
+    def contractor_scorecard(self, request):
+        """
+        Сравнение подрядчиков компании: % выполнения, % просрочки, среднее время устранения.
 
-        issues = issues.select_related(
-            'project', 'site', 'assigned_to'
-        ).order_by('deadline')
+        Query params:
+        - start_date, end_date: период по дате создания замечаний YYYY-MM-DD (опционально)
+        - snapshot: true - вернуть суточный снимок из кэша (опционально)
+        - export: excel - скачать Excel вместо JSON (опционально)
+        - company_id: компания (только для суперадмина)
+        """
+        from django.utils.dateparse import parse_date
+        from apps.users.models import Company
 
-        data = {
-            'issues': issues,
-            'total_overdue': issues.count(),
-            'generated_at': timezone.now(),
-        }
+        user = request.user
+        if not (user.is_superuser or user.is_management or user.is_itr):
+            return Response(
+                {'error': 'Недостаточно прав для просмотра отчета'},
+                status=status.HTTP_403_FORBIDDEN
+            )
 
-        if format_type == 'excel':
-            file_content = generate_excel_report(data, 'overdue_issues')
-            response = HttpResponse(
-                file_content,
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        company = user.company
+        if user.is_superuser and request.query_params.get('company_id'):
+            company = Company.objects.filter(id=request.query_params['company_id']).first()
+        if not company:
+            return Response(
+                {'error': 'Компания не найдена'},
+                status=status.HTTP_404_NOT_FOUND
             )
-            response['Content-Disposition'] = 'attachment; filename="overdue_issues_report.xlsx"'
-        else:
-            file_content = generate_pdf_report(data, 'overdue_issues')
-            response = HttpResponse(file_content, content_type='application/pdf')
-            response['Content-Disposition'] = 'attachment; filename="overdue_issues_report.pdf"'
 
-        return response
+        dates = {}
+        for param in ('start_date', 'end_date'):
+            value = request.query_params.get(param)
+            try:
+                dates[param] = parse_date(value) if value else None
+            except ValueError:
+                dates[param] = None
+            if value and dates[param] is None:
+                return Response(
+                    {'error': f'{param}: неверный формат даты, ожидается YYYY-MM-DD'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        use_snapshot = request.query_params.get('snapshot', '').lower() in ('1', 'true')
+        data = get_contractor_scorecard(company, dates['start_date'], dates['end_date'], use_snapshot)
+
+        if request.query_params.get('export') == 'excel':
+            response = HttpResponse(generate_contractor_scorecard_excel(data), content_type=EXCEL_CONTENT_TYPE)
+            response['Content-Disposition'] = f'attachment; filename="contractor_scorecard_{company.id}.xlsx"'
+            return response
+
+        return Response(data)
 
     @action(detail=False, methods=['get'])
     def dashboard_stats(self, request):
@@ -193,3 +193,73 @@ class ReportViewSet(viewsets.ViewSet):
         }
 
         return Response(stats)
+
+
+class ReportJobViewSet(mixins.CreateModelMixin,
+                       mixins.RetrieveModelMixin,
+                       mixins.ListModelMixin,
+                       viewsets.GenericViewSet):
+    """
+    ViewSet для фонового формирования отчетов.
+
+    Endpoints:
+    - POST /api/reports/jobs/ - поставить отчет в очередь, возвращает id задания
+    - GET /api/reports/jobs/ - задания текущего пользователя
+    - GET /api/reports/jobs/{id}/ - статус и прогресс задания
+    - GET /api/reports/jobs/download/?token=... - скачать готовый файл по подписанной ссылке
+
+    Прогресс отправляется через WebSocket уведомлений событием 'report_job'.
+    Одинаковые запросы в пределах REPORT_JOB_DEDUP_SECONDS возвращают уже созданное задание.
+    """
+
+    serializer_class = ReportJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Пользователь видит только свои задания."""
+        return ReportJob.objects.filter(user=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        """Поставить отчет в очередь (или вернуть идентичное недавнее задание)."""
+        serializer = ReportJobCreateSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+
+        job, created = get_or_create_report_job(
+            request.user,
+            serializer.validated_data['report_type'],
+            serializer.validated_data['format'],
+            serializer.get_params(),
+        )
+
+        return Response(
+            {**ReportJobSerializer(job).data, 'deduplicated': not created},
+            status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    def download(self, request):
+        """
+        Скачать готовый отчет по подписанной ссылке.
+
+        Ссылка сама по себе является доступом и действует REPORT_JOB_TTL_HOURS часов.
+        """
+        token = request.query_params.get('token', '')
+
+        try:
+            job_id = resolve_download_token(token)
+        except signing.SignatureExpired:
+            return Response({'error': 'Срок действия ссылки истек'}, status=status.HTTP_410_GONE)
+        except signing.BadSignature:
+            return Response({'error': 'Неверная ссылка'}, status=status.HTTP_404_NOT_FOUND)
+
+        job = ReportJob.objects.filter(id=job_id, status=ReportJob.Status.SUCCESS).first()
+        if not job or not job.file:
+            return Response({'error': 'Отчет не найден'}, status=status.HTTP_404_NOT_FOUND)
+        if job.is_expired:
+            return Response({'error': 'Срок хранения отчета истек'}, status=status.HTTP_410_GONE)
+
+        return FileResponse(
+            job.file.open('rb'),
+            as_attachment=True,
+            filename=job.download_filename
+        )
@@ -0,0 +1,90 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:52
+"""
+Частичные индексы по НЕ удаленным записям (WHERE is_deleted = false).
+
+Индексы создаются CONCURRENTLY, без блокировки записи в таблицу. Отдельный
+индекс по is_deleted больше не нужен: все горячие выборки идут через
+SoftDeleteManager и покрываются частичными индексами.
+"""
+
+from django.conf import settings
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    RemoveIndexConcurrently,
+)
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("tasks", "0003_alter_task_description"),
+    ]
+
+    operations = [
+        RemoveIndexConcurrently(
+            model_name="task",
+            name="tasks_is_dele_8a1818_idx",
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="deleted_by",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Пользователь, удаливший запись",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="deleted_%(app_label)s_%(class)s",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Удалил",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="task",
+            name="deleted_at",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                help_text="Дата и время когда запись была удалена",
+                null=True,
+                verbose_name="Дата удаления",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="task",
+            name="is_deleted",
+            field=models.BooleanField(
+                default=False,
+                help_text="Запись помечена как удаленная (soft delete)",
+                verbose_name="Удалено",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["company", "status"],
+                name="task_company_status_live_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["company", "-created_at"],
+                name="task_company_live_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["project"],
+                name="task_project_live_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:10
+"""
+Полнотекстовый поиск по задачам.
+
+Колонка search_vector заполняется триггером tasks_search_vector_update
+при изменении task_number, title, description, существующие записи пересчитываются
+в миграции. GIN индексы создаются CONCURRENTLY.
+"""
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+SEARCH_VECTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION tasks_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.task_number, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tasks_search_vector_trigger
+BEFORE INSERT OR UPDATE OF task_number, title, description ON tasks
+FOR EACH ROW EXECUTE FUNCTION tasks_search_vector_update();
+
+UPDATE tasks SET task_number = task_number;
+"""
+
+DROP_SEARCH_VECTOR_FUNCTION = """
+DROP TRIGGER IF EXISTS tasks_search_vector_trigger ON tasks;
+DROP FUNCTION IF EXISTS tasks_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("core", "0014_pg_trgm_extension"),
+        ("tasks", "0004_soft_delete_live_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunSQL(
+            sql=SEARCH_VECTOR_FUNCTION, reverse_sql=DROP_SEARCH_VECTOR_FUNCTION
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="task_search_vector_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["task_number"],
+                name="task_number_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"], name="task_title_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+    ]
@@ -7,13 +7,17 @@
 Автоматическая проверка просроченных задач через Celery.
 """
 
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils import timezone
 from apps.users.models import User, Company
 from apps.projects.models import Project
+from apps.core.mixins import SoftDeleteMixin, SoftDeleteManager, live_index
 
 
-class Task(models.Model):
+class Task(SoftDeleteMixin, models.Model):
     """
     Модель задачи для назначения работ сотрудникам и подрядчикам.
     """
@@ -152,19 +156,12 @@ class Task(models.Model):
         help_text='Проект, к которому относится задача (опционально)'
     )
 
-    # Soft delete (корзина)
-    deleted_at = models.DateTimeField(
-        'Удалено',
-        null=True,
-        blank=True,
-        help_text='Время перемещения в корзину'
-    )
+    # Поисковый вектор (номер, название, описание) - заполняет триггер БД, см. apps/core/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
 
-    is_deleted = models.BooleanField(
-        'В корзине',
-        default=False,
-        help_text='True если задача в корзине'
-    )
+    # Managers для soft delete
+    objects = SoftDeleteManager()  # По умолчанию: только активные (не удаленные)
+    all_objects = models.Manager()  # Для доступа ко всем записям (включая удаленные)
 
     class Meta:
         db_table = 'tasks'
@@ -179,7 +176,14 @@ class Task(models.Model):
             models.Index(fields=['assigned_to_user']),
             models.Index(fields=['assigned_to_contractor']),
             models.Index(fields=['company']),
-            models.Index(fields=['is_deleted']),
+            live_index('company', 'status', name='task_company_status_live_idx'),
+            live_index('company', '-created_at', name='task_company_live_idx'),
+            live_index('project', name='task_project_live_idx'),
+            # Поиск: полнотекстовый и по части номера/названия (pg_trgm).
+            # icontains строится как UPPER(поле) LIKE UPPER(...), поэтому индекс по UPPER(поле)
+            GinIndex(fields=['search_vector'], name='task_search_vector_idx'),
+            GinIndex(OpClass(Upper('task_number'), name='gin_trgm_ops'), name='task_number_upper_trgm_idx'),
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='task_title_upper_trgm_idx'),
         ]
 
     def __str__(self):
@@ -203,31 +207,14 @@ class Task(models.Model):
         Генерирует уникальный номер задачи в формате TASK-YYYYMMDD-XXX.
 
         Пример: TASK-20251105-001
+
+        Порядковый номер выдает счетчик дня (apps/core/numbering.py)
+        одним атомарным запросом, без поиска последней задачи.
         """
-        from django.db.models import Max
-        import re
+        from apps.core.numbering import KIND_TASK, next_number
 
         today = timezone.now().strftime('%Y%m%d')
-        prefix = f'TASK-{today}-'
-
-        # Находим последний номер задачи за сегодня
-        last_task = Task.objects.filter(
-            task_number__startswith=prefix
-        ).aggregate(Max('task_number'))
-
-        last_number = last_task['task_number__max']
-
-        if last_number:
-            # Извлекаем последнюю цифру и увеличиваем на 1
-            match = re.search(r'-(\d{3})$', last_number)
-            if match:
-                next_number = int(match.group(1)) + 1
-            else:
-                next_number = 1
-        else:
-            next_number = 1
-
-        return f'{prefix}{next_number:03d}'
+        return f'TASK-{today}-{next_number(KIND_TASK, today):03d}'
 
     @property
     def assigned_to(self):
@@ -287,11 +274,3 @@ class Task(models.Model):
             task_id=self.id,
             notification_type='rejected'
         )
-
-    def soft_delete(self):
-        """
-        Мягкое удаление (перемещение в корзину).
-        """
-        self.is_deleted = True
-        self.deleted_at = timezone.now()
-        self.save()
@@ -149,8 +149,7 @@ def check_overdue_tasks():
     now = timezone.now()
     overdue_tasks = Task.objects.filter(
         status=Task.STATUS_IN_PROGRESS,
-        deadline__lt=now,
-        is_deleted=False
+        deadline__lt=now
     ).select_related('created_by', 'assigned_to_user', 'assigned_to_contractor')
 
     overdue_count = overdue_tasks.count()
@@ -11,6 +11,8 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 from django.db.models import Q
 
+from apps.core.search import FullTextSearchFilter
+
 from .models import Task
 from .serializers import (
     TaskListSerializer,
@@ -39,9 +41,10 @@ class TaskViewSet(viewsets.ModelViewSet):
     """
 
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # Поиск по search_vector (task_number, title, description) с сортировкой по релевантности
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['status', 'created_by', 'assigned_to_user', 'assigned_to_contractor', 'project', 'company']
-    search_fields = ['task_number', 'title', 'description']
+    search_trigram_fields = ['task_number', 'title']
     ordering_fields = ['created_at', 'deadline', 'updated_at', 'task_number']
     ordering = ['-created_at']
 
@@ -51,10 +54,9 @@ class TaskViewSet(viewsets.ModelViewSet):
         """
         user = self.request.user
 
-        # Базовый queryset - только задачи компании пользователя и не удаленные
+        # Базовый queryset - только задачи компании пользователя (менеджер исключает удаленные)
         queryset = Task.objects.filter(
-            company=user.company,
-            is_deleted=False
+            company=user.company
         ).select_related(
             'created_by',
             'assigned_to_user',
@@ -96,7 +98,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         """
         Soft delete - перемещаем задачу в корзину вместо удаления.
         """
-        instance.soft_delete()
+        instance.soft_delete(self.request.user)
 
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
@@ -1,7 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from apps.projects.models import Project
-from apps.core.mixins import SoftDeleteMixin, SoftDeleteManager
+from apps.core.mixins import SoftDeleteMixin, SoftDeleteManager, live_index
 
 User = get_user_model()
 
@@ -96,6 +96,10 @@ class Tender(SoftDeleteMixin, models.Model):
         verbose_name = 'Тендер'
         verbose_name_plural = 'Тендеры'
         ordering = ['-created_at']
+        indexes = [
+            live_index('project', 'status', name='tender_project_status_live_idx'),
+            live_index('status', '-created_at', name='tender_status_live_idx'),
+        ]
 
     def __str__(self):
         return f'{self.title} ({self.get_status_display()})'
@@ -0,0 +1,38 @@
+"""
+Management команда для пересчета занятого компаниями места в хранилище.
+
+Сканирует MEDIA_ROOT через os.scandir, исправляет колонки размеров файлов
+(User.avatar_size, Drawing.file_size, IssuePhoto.file_size) и пересчитывает
+счетчики Company.storage_used агрегатными запросами. Этой же командой
+заполняются размеры файлов, загруженных до появления колонок.
+
+Использование:
+    python manage.py reconcile_storage                  # Размеры файлов + счетчики
+    python manage.py reconcile_storage --counters-only  # Только счетчики по колонкам
+"""
+from django.core.management.base import BaseCommand
+
+from apps.users.storage import scan_media_sizes, sync_file_sizes, recompute_company_storage
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает размеры файлов и занятое компаниями место в хранилище'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--counters-only',
+            action='store_true',
+            help='Не сканировать файлы, только пересчитать счетчики компаний по колонкам размеров'
+        )
+
+    def handle(self, *args, **options):
+        if not options['counters_only']:
+            media_sizes = scan_media_sizes()
+            self.stdout.write(f'Файлов в хранилище: {len(media_sizes)}')
+            fixed = sync_file_sizes(media_sizes)
+            self.stdout.write(f'Исправлено размеров файлов: {fixed}')
+
+        totals = recompute_company_storage()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано место для {len(totals)} компаний, всего {sum(totals.values())} байт'
+        ))
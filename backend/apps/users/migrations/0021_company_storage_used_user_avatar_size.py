@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0020_alter_user_role"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="storage_used",
+            field=models.PositiveBigIntegerField(
+                default=0, editable=False, verbose_name="Занято места, байт"
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="avatar_size",
+            field=models.PositiveBigIntegerField(
+                default=0, editable=False, verbose_name="Размер аватара, байт"
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:52
+"""
+Частичные индексы по НЕ удаленным записям (WHERE is_deleted = false).
+
+Индексы создаются CONCURRENTLY, без блокировки записи в таблицу. Отдельный
+индекс по is_deleted больше не нужен: все горячие выборки идут через
+SoftDeleteManager и покрываются частичными индексами.
+"""
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("users", "0021_company_storage_used_user_avatar_size"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="is_deleted",
+            field=models.BooleanField(
+                default=False,
+                help_text="Запись помечена как удаленная (soft delete)",
+                verbose_name="Удалено",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["company", "role"],
+                name="user_company_role_live_idx",
+            ),
+        ),
+    ]
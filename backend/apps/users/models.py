@@ -1,7 +1,7 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from apps.core.mixins import SoftDeleteMixin, SoftDeleteManager
+from apps.core.mixins import SoftDeleteMixin, SoftDeleteManager, live_index
 
 
 class Company(models.Model):
@@ -19,6 +19,9 @@ class Company(models.Model):
 
     is_active = models.BooleanField(_('Активна'), default=True)
 
+    # Счетчик занятого места, поддерживается при загрузке/удалении файлов (см. apps/users/storage.py)
+    storage_used = models.PositiveBigIntegerField(_('Занято места, байт'), default=0, editable=False)
+
     created_at = models.DateTimeField(_('Создана'), auto_now_add=True)
     updated_at = models.DateTimeField(_('Обновлена'), auto_now=True)
 
@@ -33,45 +36,13 @@ class Company(models.Model):
 
     def get_total_storage_size(self):
         """
-        Вычисляет общий размер всех файлов, связанных с компанией.
-
-        Включает:
-        - Аватары пользователей компании
-        - Чертежи проектов компании
-        - Фото замечаний в проектах компании
+        Возвращает общий размер всех файлов, связанных с компанией, в байтах.
 
-        Возвращает размер в байтах.
+        Включает аватары пользователей, чертежи проектов и фото замечаний.
+        Значение берется из счетчика storage_used без обращения к файловой системе,
+        пересчет - командой reconcile_storage.
         """
-        total_size = 0
-
-        # 1. Размер аватаров пользователей компании
-        for user in self.users.all():
-            if user.avatar and hasattr(user.avatar, 'size'):
-                try:
-                    total_size += user.avatar.size
-                except (FileNotFoundError, OSError):
-                    # Файл может быть удален с диска, но запись в БД осталась
-                    pass
-
-        # 2. Размер чертежей всех проектов компании
-        for project in self.projects.all():
-            for drawing in project.drawings.all():
-                if drawing.file and hasattr(drawing.file, 'size'):
-                    try:
-                        total_size += drawing.file.size
-                    except (FileNotFoundError, OSError):
-                        pass
-
-            # 3. Размер фото замечаний во всех проектах компании
-            for issue in project.issues.all():
-                for photo in issue.photos.all():
-                    if photo.photo and hasattr(photo.photo, 'size'):
-                        try:
-                            total_size += photo.photo.size
-                        except (FileNotFoundError, OSError):
-                            pass
-
-        return total_size
+        return self.storage_used
 
     def get_formatted_storage_size(self):
         """
@@ -93,7 +64,7 @@ class Company(models.Model):
             return f"{size_gb:.2f} GB"
 
 
-class UserManager(BaseUserManager):
+class UserManager(SoftDeleteManager, BaseUserManager):
     """
     Custom user manager for email-based authentication with soft delete support.
 
@@ -101,18 +72,6 @@ class UserManager(BaseUserManager):
     и SoftDeleteManager (для фильтрации удалённых записей).
     """
 
-    def get_queryset(self):
-        """Возвращает только НЕ удаленные записи."""
-        return super().get_queryset().filter(is_deleted=False)
-
-    def deleted(self):
-        """Возвращает только удаленные записи."""
-        return super().get_queryset().filter(is_deleted=True)
-
-    def all_with_deleted(self):
-        """Возвращает ВСЕ записи (включая удаленные)."""
-        return super().get_queryset()
-
     def create_user(self, email, password=None, **extra_fields):
         """Create and save a regular user with the given email and password."""
         if not email:
@@ -217,6 +176,7 @@ class User(SoftDeleteMixin, AbstractUser):
     )
 
     avatar = models.ImageField(_('Аватар'), upload_to='avatars/', blank=True, null=True)
+    avatar_size = models.PositiveBigIntegerField(_('Размер аватара, байт'), default=0, editable=False)
 
     is_active = models.BooleanField(_('Активен'), default=True)
     is_verified = models.BooleanField(_('Подтвержден'), default=False)
@@ -297,6 +257,9 @@ class User(SoftDeleteMixin, AbstractUser):
         verbose_name = _('Пользователь')
         verbose_name_plural = _('Пользователи')
         ordering = ['-created_at']
+        indexes = [
+            live_index('company', 'role', name='user_company_role_live_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_full_name()} ({self.email})"
@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.signals import user_logged_in
 from .models import User
+from . import storage
 import logging
 
 logger = logging.getLogger(__name__)
@@ -116,3 +117,22 @@ def track_temp_password_login(sender, request, user, **kwargs):
                 f'Пользователь {user.email} вошел с временным паролем. '
                 f'Попыток: {user.login_attempts_with_temp_password}/3'
             )
+
+
+# ==================== Учет места, занятого аватарами ====================
+
+@receiver(pre_save, sender=User)
+def remember_avatar_size(sender, instance, update_fields=None, **kwargs):
+    """Записывает размер нового аватара в avatar_size."""
+    storage.remember_file_size(instance, 'avatar', 'avatar_size', update_fields)
+
+
+@receiver(post_save, sender=User)
+def update_company_storage_on_avatar_save(sender, instance, **kwargs):
+    """Сдвигает счетчик занятого места компании на разницу размеров аватара."""
+    storage.add_company_storage(instance.company_id, storage.pop_storage_delta(instance))
+
+
+@receiver(post_delete, sender=User)
+def update_company_storage_on_user_delete(sender, instance, **kwargs):
+    storage.add_company_storage(instance.company_id, -instance.avatar_size)
@@ -0,0 +1,177 @@
+"""
+Учет занятого компанией места в хранилище.
+
+Размер файла записывается в колонку модели при загрузке (User.avatar_size,
+Drawing.file_size, IssuePhoto.file_size), а сумма по компании поддерживается
+счетчиком Company.storage_used: сигналы моделей сдвигают его на разницу размеров
+при загрузке, замене и удалении файла. Файлы объектов в корзине продолжают
+занимать место и учитываются.
+
+Команда reconcile_storage пересчитывает размеры по файлам на диске (os.scandir)
+и счетчики компаний агрегатными запросами - для исправления расхождений
+(файлы, загруженные в обход моделей, bulk операции).
+"""
+import logging
+import os
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import F, Sum
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def tracked_files():
+    """(модель, поле файла, поле размера, путь к компании) для всех учитываемых файлов."""
+    from apps.issues.models import IssuePhoto
+    from apps.projects.models import Drawing
+    from apps.users.models import User
+
+    return [
+        (User.all_objects, 'avatar', 'avatar_size', 'company_id'),
+        (Drawing.objects, 'file', 'file_size', 'project__company_id'),
+        (IssuePhoto.objects, 'photo', 'file_size', 'issue__project__company_id'),
+    ]
+
+
+def format_file_size(size_bytes):
+    """Размер файла в удобочитаемом формате (B, KB, MB, GB)."""
+    if size_bytes < 1024:
+        return f"{size_bytes} B"
+    elif size_bytes < 1024 * 1024:
+        return f"{size_bytes / 1024:.2f} KB"
+    elif size_bytes < 1024 * 1024 * 1024:
+        return f"{size_bytes / (1024 * 1024):.2f} MB"
+    return f"{size_bytes / (1024 * 1024 * 1024):.2f} GB"
+
+
+def remember_file_size(instance, field_name, size_field, update_fields=None):
+    """
+    pre_save: записывает размер нового файла в колонку и запоминает разницу для счетчика.
+
+    Размер нового (еще не сохраненного в storage) файла берется из загруженного
+    объекта, без обращения к файловой системе.
+    """
+    if update_fields is not None and field_name not in update_fields:
+        return
+
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        new_size = 0
+    elif not field_file._committed:
+        new_size = field_file.size
+    else:
+        # Файл не менялся
+        return
+
+    instance._storage_delta = new_size - getattr(instance, size_field)
+    setattr(instance, size_field, new_size)
+
+
+def pop_storage_delta(instance):
+    """Разница размеров, запомненная remember_file_size() (0, если файл не менялся)."""
+    return instance.__dict__.pop('_storage_delta', 0)
+
+
+def add_company_storage(company_id, delta):
+    """Атомарно сдвигает счетчик занятого места компании."""
+    from .models import Company
+
+    if company_id and delta:
+        Company.objects.filter(pk=company_id).update(storage_used=F('storage_used') + delta)
+
+
+def get_project_company_id(project_id):
+    """Компания проекта (включая проекты в корзине)."""
+    from apps.projects.models import Project
+
+    return Project.all_objects.filter(pk=project_id).values_list('company_id', flat=True).first()
+
+
+def get_issue_company_id(issue_id):
+    """Компания проекта замечания."""
+    from apps.projects.models import Project
+
+    return Project.all_objects.filter(issues__id=issue_id).values_list('company_id', flat=True).first()
+
+
+def scan_media_sizes(root=None):
+    """
+    Размеры всех файлов в MEDIA_ROOT.
+
+    Returns:
+        dict: {относительный путь (как в FileField.name): размер в байтах}
+    """
+    root = root or settings.MEDIA_ROOT
+    sizes = {}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError as e:
+            logger.warning(f'[Storage] Не удалось прочитать {directory}: {e}')
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    relative_path = os.path.relpath(entry.path, root).replace(os.sep, '/')
+                    sizes[relative_path] = entry.stat().st_size
+    return sizes
+
+
+def sync_file_sizes(media_sizes):
+    """
+    Обновляет колонки размеров по фактическим размерам файлов.
+
+    Отсутствующий на диске файл считается нулевым.
+
+    Returns:
+        int: количество исправленных записей
+    """
+    fixed = 0
+    for manager, field_name, size_field, _ in tracked_files():
+        model = manager.model
+        to_update = []
+        rows = manager.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+        for pk, name, stored_size in rows.values_list('pk', field_name, size_field).iterator(chunk_size=BATCH_SIZE):
+            actual_size = media_sizes.get(name, 0)
+            if actual_size != stored_size:
+                to_update.append(model(pk=pk, **{size_field: actual_size}))
+        # all_objects для пользователей: размеры пишутся и для удаленных в корзину
+        manager.bulk_update(to_update, [size_field], batch_size=BATCH_SIZE)
+        fixed += len(to_update)
+        logger.info(f'[Storage] {model.__name__}: исправлено размеров {len(to_update)}')
+    return fixed
+
+
+def recompute_company_storage():
+    """
+    Пересчитывает Company.storage_used по колонкам размеров (по одному запросу на модель).
+
+    Returns:
+        dict: {company_id: занятое место в байтах}
+    """
+    from .models import Company
+
+    totals = Counter()
+    for manager, _, size_field, company_path in tracked_files():
+        rows = manager.order_by().values(company_path).annotate(total=Sum(size_field))
+        for row in rows:
+            if row[company_path]:
+                totals[row[company_path]] += row['total'] or 0
+
+    companies = list(Company.objects.only('id', 'storage_used'))
+    changed = []
+    for company in companies:
+        if company.storage_used != totals[company.id]:
+            company.storage_used = totals[company.id]
+            changed.append(company)
+    Company.objects.bulk_update(changed, ['storage_used'], batch_size=BATCH_SIZE)
+
+    logger.info(f'[Storage] Пересчитано место {len(companies)} компаний, изменено {len(changed)}')
+    return {company.id: company.storage_used for company in companies}
@@ -214,3 +214,65 @@ def send_permanent_credentials_email(self, user_id, plain_password):
         )
         # Повторная попытка при ошибке (максимум 3 попытки с интервалом 60 секунд)
         raise self.retry(exc=exc)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def send_permanent_credentials_emails(self, credentials):
+    """
+    Пакетная отправка постоянных credentials после массового импорта персонала.
+
+    Все письма отправляются через одно SMTP соединение. При повторной попытке
+    отправляются только письма, которые не удалось отправить.
+
+    Args:
+        credentials (list): [(user_id, plain_password), ...]
+
+    Returns:
+        dict: Количество отправленных писем
+    """
+    from django.core.mail import EmailMultiAlternatives, get_connection
+
+    passwords = dict((user_id, password) for user_id, password in credentials)
+    users = User.objects.filter(id__in=list(passwords)).select_related('company')
+
+    site_url = settings.SITE_URL or 'http://localhost:5174'
+    site_name = settings.SITE_NAME or 'Check_Site'
+    subject = f'Доступ к системе {settings.SITE_NAME or "Check_Site"}'
+
+    sent = 0
+    failed = []
+    with get_connection() as connection:
+        for user in users:
+            context = {
+                'user': user,
+                'email': user.email,
+                'password': passwords[user.id],
+                'site_url': site_url,
+                'site_name': site_name,
+                'company_name': user.company.name if user.company else 'Неизвестная компания',
+                'login_url': f"{site_url}/login",
+            }
+            message = EmailMultiAlternatives(
+                subject=subject,
+                body=render_to_string('users/emails/permanent_credentials.txt', context),
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[user.email],
+                connection=connection,
+            )
+            message.attach_alternative(
+                render_to_string('users/emails/permanent_credentials.html', context), 'text/html'
+            )
+            try:
+                message.send(fail_silently=False)
+                sent += 1
+            except Exception as exc:
+                logger.error(f'Ошибка отправки credentials пользователю {user.email}: {str(exc)}')
+                failed.append((user.id, passwords[user.id]))
+
+    logger.info(f'Пакетная отправка credentials: отправлено {sent}, ошибок {len(failed)}')
+
+    if failed:
+        # Повторяем только неотправленные письма
+        raise self.retry(args=(failed,), exc=RuntimeError(f'Не отправлено писем: {len(failed)}'))
+
+    return {'status': 'success', 'sent': sent}
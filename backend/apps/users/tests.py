@@ -1,3 +1,6 @@
+import io
+from unittest import mock
+
 import pytest
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
@@ -70,3 +73,150 @@ class TestAuthAPI:
         response = api_client.get('/api/auth/users/me/')
         assert response.status_code == status.HTTP_200_OK
         assert response.data['email'] == user.email
+
+
+@pytest.mark.django_db
+class TestPersonnelImport:
+    def test_create_mode_bulk_creates_users_and_project_links(self, create_user, django_capture_on_commit_callbacks):
+        from unittest import mock
+        from apps.projects.models import Project
+        from apps.users.models import Company
+        from apps.users.utils.personnel_import import apply_personnel_import
+
+        company = Company.objects.create(name='Test Company')
+        create_user(company=company)
+        project = Project.objects.create(name='Test Project', company=company)
+        rows = [
+            {
+                'email': f'worker{idx}@example.com', 'last_name': 'Worker', 'first_name': str(idx),
+                'middle_name': '', 'role': User.Role.FOREMAN, 'position': '', 'phone': '',
+                'project_ids': [project.id],
+            }
+            for idx in range(3)
+        ]
+
+        with mock.patch('apps.users.tasks.send_permanent_credentials_emails.delay') as send_emails:
+            with django_capture_on_commit_callbacks(execute=True):
+                stats = apply_personnel_import(company, rows, 'create')
+
+        assert stats['new_records'] == 3
+        assert stats['projects_assigned'] == 3
+        assert project.team_members.count() == 3
+        assert User.objects.get(email='worker0@example.com').role_category == 'MANAGEMENT'
+        send_emails.assert_called_once()
+        assert len(send_emails.call_args.args[0]) == 3
+
+    def test_contractors_hash_passwords_in_parallel(self, create_user):
+        from unittest import mock
+        from django.contrib.auth.hashers import check_password
+        from apps.users.models import Company
+        from apps.users.utils.personnel_import import apply_personnel_import
+
+        company = Company.objects.create(name='Test Company')
+        rows = [
+            {
+                'email': f'contractor{idx}@example.com', 'last_name': 'Contractor', 'first_name': str(idx),
+                'middle_name': '', 'contractor_company': 'ТОО Подрядчик', 'work_type': '', 'phone': '',
+                'project_ids': [],
+            }
+            for idx in range(30)
+        ]
+        progress = []
+
+        with mock.patch('apps.users.tasks.send_permanent_credentials_emails.delay'):
+            stats = apply_personnel_import(
+                company, rows, 'create', kind='contractors',
+                progress_callback=lambda done, total: progress.append(done),
+            )
+
+        assert stats['new_records'] == 30
+        assert progress == [25, 30]
+        contractor = User.objects.get(email='contractor0@example.com')
+        assert contractor.role == User.Role.CONTRACTOR
+        assert contractor.external_company_name == 'ТОО Подрядчик'
+        assert not check_password('', contractor.password)
+
+    def test_import_v2_runs_in_background_by_default(self, api_client, create_user):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from apps.core.models import ImportJob
+        from apps.users.models import Company
+
+        company = Company.objects.create(name='Test Company')
+        director = create_user(company=company, role=User.Role.DIRECTOR)
+        api_client.force_authenticate(user=director)
+
+        with mock.patch('apps.core.access_helpers.has_button_access', return_value=True), \
+                mock.patch('apps.core.tasks.run_import_job.delay'):
+            response = api_client.post('/api/auth/users/import-v2/', {
+                'file': SimpleUploadedFile('users.xlsx', b'data'),
+                'mode': 'create',
+            }, format='multipart')
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job = ImportJob.objects.get(id=response.data['job']['id'])
+        assert job.import_type == ImportJob.ImportType.USERS
+
+
+@pytest.mark.django_db
+class TestPersonnelExport:
+    def test_export_uses_prefetched_projects(self, create_user, django_assert_max_num_queries):
+        import openpyxl
+        from apps.projects.models import Project
+        from apps.users.models import Company
+        from apps.users.utils.excel_handler import PersonnelExcelHandler
+
+        company = Company.objects.create(name='Test Company')
+        active = Project.objects.create(name='Активный', company=company)
+        archived = Project.objects.create(name='Архивный', company=company, is_active=False)
+        for idx in range(5):
+            user = create_user(email=f'worker{idx}@example.com', company=company)
+            user.projects.set([active, archived])
+
+        handler = PersonnelExcelHandler(company=company)
+        # Пользователи, prefetch проектов и проекты для dropdown - независимо от числа пользователей
+        with django_assert_max_num_queries(3):
+            workbook = handler.generate_export_v2()
+
+        content = io.BytesIO()
+        workbook.save(content)
+        rows = list(openpyxl.load_workbook(content)['Данные'].values)
+        assert len(rows) == 6
+        assert rows[1][5] == 'Активный'
+
+
+@pytest.mark.django_db
+class TestCompanyStorage:
+    def test_storage_counter_follows_uploads_and_deletes(self, create_user, settings, tmp_path):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.core.management import call_command
+        from apps.projects.models import Drawing, Project
+        from apps.users.models import Company
+
+        settings.MEDIA_ROOT = str(tmp_path)
+        company = Company.objects.create(name='Test Company')
+        project = Project.objects.create(name='Test Project', company=company)
+        create_user(company=company)
+
+        drawing = Drawing.objects.create(
+            project=project, file=SimpleUploadedFile('plan.pdf', b'x' * 1000), file_name='plan.pdf'
+        )
+        Drawing.objects.create(project=project, file=SimpleUploadedFile('cut.pdf', b'x' * 500), file_name='cut.pdf')
+        company.refresh_from_db()
+        assert drawing.file_size == 1000
+        assert company.get_total_storage_size() == 1500
+
+        # Размер отдается из колонки, файл на диске не читается
+        from apps.projects.serializers import DrawingListSerializer
+        with mock.patch('django.core.files.storage.FileSystemStorage.size') as storage_size:
+            assert DrawingListSerializer(drawing).data['file_size'] == '1000 B'
+        storage_size.assert_not_called()
+
+        drawing.delete()
+        company.refresh_from_db()
+        assert company.storage_used == 500
+
+        Company.objects.update(storage_used=0)
+        Drawing.objects.update(file_size=0)
+        call_command('reconcile_storage', stdout=io.StringIO())
+        company.refresh_from_db()
+        assert company.storage_used == 500
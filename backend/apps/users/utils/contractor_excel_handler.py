@@ -21,6 +21,8 @@ from datetime import datetime
 import re
 import logging
 
+from .excel_stream import create_workbook, styled_row, iter_users, get_project_names
+
 logger = logging.getLogger(__name__)
 
 
@@ -247,26 +249,25 @@ class ContractorExcelHandler:
         """
         from apps.users.models import User
 
-        workbook = openpyxl.Workbook()
-        ws = workbook.active
-        ws.title = "Подрядчики"
+        workbook = create_workbook()
+        ws = workbook.create_sheet("Подрядчики")
 
-        # Заголовки
-        headers = list(self.COLUMNS.values())
-        for col_idx, header in enumerate(headers, start=1):
-            cell = ws.cell(row=1, column=col_idx, value=header)
-            cell.font = self.HEADER_FONT
-            cell.fill = self.HEADER_FILL
-            cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-            cell.border = self.CELL_BORDER
-
-        # Устанавливаем ширину колонок
+        # Устанавливаем ширину колонок (до записи строк)
         for col_letter, width in self.COLUMN_WIDTHS.items():
             ws.column_dimensions[col_letter].width = width
 
         # Устанавливаем высоту заголовка
         ws.row_dimensions[1].height = 30
 
+        # Заголовки
+        ws.append(styled_row(
+            ws, self.COLUMNS.values(),
+            font=self.HEADER_FONT,
+            fill=self.HEADER_FILL,
+            alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+            border=self.CELL_BORDER
+        ))
+
         # ===== DROPDOWN ДЛЯ ПРОЕКТОВ =====
         # Используем ТОТ ЖЕ метод что и у сотрудников
         company_projects = self.company.projects.filter(is_active=True).values_list('name', flat=True)
@@ -289,13 +290,13 @@ class ContractorExcelHandler:
                     prompt='Выберите один объект из списка или введите несколько через запятую'
                 )
                 projects_validation.add('F2:F1000')
-                ws.add_data_validation(projects_validation)
+                ws.data_validations.append(projects_validation)
             else:
                 # Если список длинный, создаем скрытый лист
                 ws_projects = workbook.create_sheet("__Объекты__")
 
-                for idx, project_name in enumerate(company_projects, start=1):
-                    ws_projects.cell(row=idx, column=1, value=project_name)
+                for project_name in company_projects:
+                    ws_projects.append([project_name])
 
                 ws_projects.sheet_state = 'hidden'
 
@@ -309,19 +310,20 @@ class ContractorExcelHandler:
                     prompt='Выберите один объект из списка или введите несколько через запятую'
                 )
                 projects_validation.add('F2:F1000')
-                ws.add_data_validation(projects_validation)
+                ws.data_validations.append(projects_validation)
 
         # ===== ДАННЫЕ ПОДРЯДЧИКОВ =====
         # Получаем только подрядчиков компании (не удаленных)
         contractors = User.objects.filter(
             company=self.company,
-            role='CONTRACTOR',
-            is_deleted=False
+            role='CONTRACTOR'
         ).prefetch_related('projects')
 
-        for row_idx, contractor in enumerate(contractors, start=2):
-            # Формируем список проектов через запятую
-            project_names = ', '.join([p.name for p in contractor.projects.all()])
+        cell_alignment = Alignment(vertical='center', wrap_text=True)
+
+        for contractor in iter_users(contractors):
+            # Формируем список проектов через запятую (из prefetch, без запросов)
+            project_names = get_project_names(contractor)
 
             # Формируем ФИО (Фамилия Имя Отчество)
             full_name_parts = [contractor.last_name, contractor.first_name]
@@ -338,10 +340,10 @@ class ContractorExcelHandler:
                 'projects': project_names
             }
 
-            for col_idx, field in enumerate(self.COLUMNS.keys(), start=1):
-                cell = ws.cell(row=row_idx, column=col_idx, value=row_data.get(field, ''))
-                cell.border = self.CELL_BORDER
-                cell.alignment = Alignment(vertical='center', wrap_text=True)
+            ws.append(styled_row(
+                ws, [row_data.get(field, '') for field in self.COLUMNS],
+                alignment=cell_alignment, border=self.CELL_BORDER
+            ))
 
         return workbook
 
@@ -356,11 +358,11 @@ class ContractorExcelHandler:
         """
         from apps.users.models import User
 
-        workbook = openpyxl.Workbook()
+        workbook = create_workbook()
 
         # ===== ЛИСТ 1: ИНФОРМАЦИЯ О BACKUP =====
-        ws_info = workbook.active
-        ws_info.title = "Информация"
+        ws_info = workbook.create_sheet("Информация")
+        ws_info.column_dimensions['A'].width = 80
 
         backup_info = [
             ("BACKUP ПОДРЯДЧИКОВ", 16, True),
@@ -378,12 +380,12 @@ class ContractorExcelHandler:
             ("- Анализ и отчетность", 11, False),
         ]
 
-        for idx, (text, font_size, is_bold) in enumerate(backup_info, start=1):
-            cell = ws_info.cell(row=idx, column=1, value=text)
-            cell.font = Font(name='Arial', size=font_size, bold=is_bold)
-            cell.alignment = Alignment(wrap_text=True, vertical='top')
-
-        ws_info.column_dimensions['A'].width = 80
+        for text, font_size, is_bold in backup_info:
+            ws_info.append(styled_row(
+                ws_info, [text],
+                font=Font(name='Arial', size=font_size, bold=is_bold),
+                alignment=Alignment(wrap_text=True, vertical='top')
+            ))
 
         # ===== ЛИСТ 2: ДАННЫЕ ПОДРЯДЧИКОВ =====
         ws_data = workbook.create_sheet("Подрядчики")
@@ -403,14 +405,6 @@ class ContractorExcelHandler:
             'updated_at': 'Дата обновления'
         }
 
-        # Заголовки
-        for col_idx, header in enumerate(backup_columns.values(), start=1):
-            cell = ws_data.cell(row=1, column=col_idx, value=header)
-            cell.font = self.HEADER_FONT
-            cell.fill = self.HEADER_FILL
-            cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-            cell.border = self.CELL_BORDER
-
         # Устанавливаем ширину колонок
         column_widths = [6, 30, 30, 30, 30, 18, 40, 10, 12, 20, 20]
         for idx, width in enumerate(column_widths, start=1):
@@ -419,15 +413,26 @@ class ContractorExcelHandler:
         # Устанавливаем высоту заголовка
         ws_data.row_dimensions[1].height = 30
 
+        # Заголовки
+        ws_data.append(styled_row(
+            ws_data, backup_columns.values(),
+            font=self.HEADER_FONT,
+            fill=self.HEADER_FILL,
+            alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+            border=self.CELL_BORDER
+        ))
+
         # ===== ДАННЫЕ ПОДРЯДЧИКОВ (ВСЕ, включая архивированных) =====
         contractors = User.objects.filter(
             company=self.company,
             role='CONTRACTOR'
         ).prefetch_related('projects')
 
-        for row_idx, contractor in enumerate(contractors, start=2):
-            # Формируем список проектов через запятую
-            project_names = ', '.join([p.name for p in contractor.projects.all()])
+        cell_alignment = Alignment(vertical='center', wrap_text=True)
+
+        for contractor in iter_users(contractors):
+            # Формируем список проектов через запятую (из prefetch, без запросов)
+            project_names = get_project_names(contractor)
 
             # Формируем ФИО (Фамилия Имя Отчество)
             full_name_parts = [contractor.last_name, contractor.first_name]
@@ -449,10 +454,10 @@ class ContractorExcelHandler:
                 'updated_at': contractor.updated_at.strftime('%Y-%m-%d %H:%M:%S') if contractor.updated_at else ''
             }
 
-            for col_idx, field in enumerate(backup_columns.keys(), start=1):
-                cell = ws_data.cell(row=row_idx, column=col_idx, value=row_data.get(field, ''))
-                cell.border = self.CELL_BORDER
-                cell.alignment = Alignment(vertical='center', wrap_text=True)
+            ws_data.append(styled_row(
+                ws_data, [row_data.get(field, '') for field in backup_columns],
+                alignment=cell_alignment, border=self.CELL_BORDER
+            ))
 
         return workbook
 
@@ -472,6 +477,7 @@ class ContractorExcelHandler:
         """
         from apps.users.models import User
         from apps.projects.models import Project
+        from django.db.models.functions import Lower
 
         try:
             workbook = openpyxl.load_workbook(file)
@@ -486,6 +492,29 @@ class ContractorExcelHandler:
         valid_rows = []
         errors = []
 
+        # Email-ы и проекты проверяем одним запросом на файл, а не запросом на каждую строку.
+        # При создании учитываются и удаленные пользователи: email уникален на уровне БД
+        file_emails = {
+            str(ws.cell(row=row_idx, column=1).value).strip().lower()
+            for row_idx in range(2, ws.max_row + 1)
+            if ws.cell(row=row_idx, column=1).value
+        }
+        users = User.all_objects if mode == 'create' else User.objects.filter(
+            company=self.company, role='CONTRACTOR'
+        )
+        known_emails = set(
+            users.annotate(email_lower=Lower('email')).filter(
+                email_lower__in=file_emails
+            ).values_list('email_lower', flat=True)
+        )
+        seen_emails = set()
+
+        company_projects = {}
+        for project_id, name in Project.objects.filter(
+            company=self.company, is_active=True
+        ).values_list('id', 'name'):
+            company_projects.setdefault(name.lower(), []).append(project_id)
+
         # Начинаем с 2-й строки (1-я строка — заголовки)
         for row_idx in range(2, ws.max_row + 1):
             row_errors = []
@@ -513,12 +542,16 @@ class ContractorExcelHandler:
                 if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email):
                     row_errors.append('Некорректный формат email')
                 else:
+                    if email in seen_emails:
+                        row_errors.append(f'Email {email} повторяется в файле')
+                    seen_emails.add(email)
+
                     # Проверка уникальности email
                     if mode == 'create':
-                        if User.objects.filter(email__iexact=email).exists():
+                        if email in known_emails:
                             row_errors.append(f'Email {email} уже существует в системе')
                     elif mode == 'update':
-                        if not User.objects.filter(email__iexact=email, company=self.company, role='CONTRACTOR').exists():
+                        if email not in known_emails:
                             row_errors.append(f'Подрядчик с email {email} не найден')
 
             # ФИО (парсим на фамилию, имя, отчество)
@@ -570,17 +603,13 @@ class ContractorExcelHandler:
                 project_names = [p.strip() for p in projects_str.split(',') if p.strip()]
 
                 for project_name in project_names:
-                    try:
-                        project = Project.objects.get(
-                            name__iexact=project_name,
-                            company=self.company,
-                            is_active=True
-                        )
-                        project_ids.append(project.id)
-                    except Project.DoesNotExist:
+                    matches = company_projects.get(project_name.lower(), [])
+                    if not matches:
                         row_errors.append(f'Проект "{project_name}" не найден')
-                    except Project.MultipleObjectsReturned:
+                    elif len(matches) > 1:
                         row_errors.append(f'Найдено несколько проектов с названием "{project_name}"')
+                    else:
+                        project_ids.append(matches[0])
 
             # Если есть ошибки валидации, добавляем в список ошибок
             if row_errors:
@@ -591,6 +620,7 @@ class ContractorExcelHandler:
             else:
                 # Добавляем валидную строку
                 valid_rows.append({
+                    'row': row_idx,
                     'email': email,
                     'last_name': last_name,
                     'first_name': first_name,
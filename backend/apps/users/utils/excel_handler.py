@@ -20,6 +20,8 @@ from datetime import datetime
 import re
 import logging
 
+from .excel_stream import create_workbook, styled_row, iter_users, get_project_names
+
 logger = logging.getLogger(__name__)
 
 
@@ -265,49 +267,54 @@ class PersonnelExcelHandler:
         Генерация Excel с текущими пользователями компании.
 
         Аналогична шаблону, но с реальными данными пользователей.
+        Книга потоковая (write_only), см. excel_stream.py.
 
         Returns:
             openpyxl.Workbook: Готовый workbook для сохранения
         """
         from apps.users.models import User
 
-        workbook = openpyxl.Workbook()
-        ws_data = workbook.active
-        ws_data.title = "Данные"
-
-        # Заголовки
-        headers = list(self.COLUMNS.values())
-        for col_idx, header in enumerate(headers, start=1):
-            cell = ws_data.cell(row=1, column=col_idx, value=header)
-            cell.font = self.HEADER_FONT
-            cell.fill = self.HEADER_FILL
-            cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-            cell.border = self.CELL_BORDER
+        workbook = create_workbook()
+        ws_data = workbook.create_sheet("Данные")
 
-        # Устанавливаем ширину колонок
+        # Устанавливаем ширину колонок (до записи строк)
         for col_letter, width in self.COLUMN_WIDTHS.items():
             ws_data.column_dimensions[col_letter].width = width
 
         ws_data.row_dimensions[1].height = 30
 
+        # Замораживаем первую строку
+        ws_data.freeze_panes = 'A2'
+
+        # Заголовки
+        ws_data.append(styled_row(
+            ws_data, self.COLUMNS.values(),
+            font=self.HEADER_FONT,
+            fill=self.HEADER_FILL,
+            alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+            border=self.CELL_BORDER
+        ))
+
         # Получаем пользователей компании (исключая суперадминов)
         users = User.objects.filter(
             company=self.company
         ).exclude(
             is_superuser=True
-        ).select_related('company').prefetch_related('projects').order_by('email')
+        ).prefetch_related('projects').order_by('email')
+
+        cell_font = Font(name='Arial', size=10)
+        cell_alignment = Alignment(horizontal='left', vertical='center')
 
         # Заполняем данными
-        for row_idx, user in enumerate(users, start=2):
+        users_count = 0
+        for user in iter_users(users):
+            users_count += 1
+
             # ФИО
             full_name = f"{user.last_name} {user.first_name}"
             if user.middle_name:
                 full_name += f" {user.middle_name}"
 
-            # Проекты
-            user_projects = user.projects.filter(is_active=True).values_list('name', flat=True)
-            projects_str = ', '.join(user_projects) if user_projects else ''
-
             # Данные строки
             # Используем get_role_display() для получения русского названия роли
             row_data = [
@@ -316,14 +323,12 @@ class PersonnelExcelHandler:
                 user.get_role_display(),  # Русское название роли вместо кода
                 user.position or '',
                 user.phone or '',
-                projects_str
+                get_project_names(user, active_only=True)
             ]
 
-            for col_idx, value in enumerate(row_data, start=1):
-                cell = ws_data.cell(row=row_idx, column=col_idx, value=value)
-                cell.font = Font(name='Arial', size=10)
-                cell.alignment = Alignment(horizontal='left', vertical='center')
-                cell.border = self.CELL_BORDER
+            ws_data.append(styled_row(
+                ws_data, row_data, font=cell_font, alignment=cell_alignment, border=self.CELL_BORDER
+            ))
 
         # Добавляем dropdown валидацию для ролей и проектов (как в шаблоне)
         # Используем role[1] для получения русских названий вместо кодов
@@ -336,8 +341,8 @@ class PersonnelExcelHandler:
             formula1=role_formula,
             allow_blank=False
         )
-        role_validation.add(f'C2:C{len(users) + 1}')
-        ws_data.add_data_validation(role_validation)
+        role_validation.add(f'C2:C{users_count + 1}')
+        ws_data.data_validations.append(role_validation)
 
         # Dropdown для проектов (разрешаем множественный выбор)
         company_projects = self.company.projects.filter(is_active=True).values_list('name', flat=True)
@@ -354,11 +359,8 @@ class PersonnelExcelHandler:
                     promptTitle='Выбор проектов',
                     prompt='Выберите один проект из списка или введите несколько через запятую'
                 )
-                projects_validation.add(f'F2:F{len(users) + 1}')
-                ws_data.add_data_validation(projects_validation)
-
-        # Замораживаем первую строку
-        ws_data.freeze_panes = 'A2'
+                projects_validation.add(f'F2:F{users_count + 1}')
+                ws_data.data_validations.append(projects_validation)
 
         return workbook
 
@@ -372,14 +374,15 @@ class PersonnelExcelHandler:
         - Дата обновления
         - Статус (активен, одобрен, подтвержден)
 
+        Книга потоковая (write_only), см. excel_stream.py.
+
         Returns:
             openpyxl.Workbook: Готовый workbook для сохранения
         """
         from apps.users.models import User
 
-        workbook = openpyxl.Workbook()
-        ws_data = workbook.active
-        ws_data.title = "Backup"
+        workbook = create_workbook()
+        ws_data = workbook.create_sheet("Backup")
 
         # Расширенные заголовки для backup
         backup_headers = [
@@ -389,14 +392,6 @@ class PersonnelExcelHandler:
             'Дата создания', 'Дата обновления'
         ]
 
-        # Заголовки
-        for col_idx, header in enumerate(backup_headers, start=1):
-            cell = ws_data.cell(row=1, column=col_idx, value=header)
-            cell.font = self.HEADER_FONT
-            cell.fill = self.HEADER_FILL
-            cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-            cell.border = self.CELL_BORDER
-
         # Устанавливаем ширину колонок
         ws_data.column_dimensions['A'].width = 8   # ID
         ws_data.column_dimensions['B'].width = 30  # Email
@@ -417,24 +412,38 @@ class PersonnelExcelHandler:
 
         ws_data.row_dimensions[1].height = 30
 
+        # Замораживаем первую строку
+        ws_data.freeze_panes = 'A2'
+
+        # Заголовки
+        ws_data.append(styled_row(
+            ws_data, backup_headers,
+            font=self.HEADER_FONT,
+            fill=self.HEADER_FILL,
+            alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+            border=self.CELL_BORDER
+        ))
+
         # Получаем пользователей
         users = User.objects.filter(
             company=self.company
         ).exclude(
             is_superuser=True
-        ).select_related('company').prefetch_related('projects').order_by('created_at')
+        ).prefetch_related('projects').order_by('created_at')
+
+        cell_font = Font(name='Arial', size=10)
+        cell_alignment = Alignment(horizontal='left', vertical='center')
 
         # Заполняем данными
-        for row_idx, user in enumerate(users, start=2):
+        users_count = 0
+        for user in iter_users(users):
+            users_count += 1
+
             # ФИО
             full_name = f"{user.last_name} {user.first_name}"
             if user.middle_name:
                 full_name += f" {user.middle_name}"
 
-            # Проекты
-            user_projects = user.projects.all().values_list('name', flat=True)
-            projects_str = ', '.join(user_projects) if user_projects else ''
-
             # Данные строки
             row_data = [
                 user.id,
@@ -443,7 +452,7 @@ class PersonnelExcelHandler:
                 user.get_role_display(),
                 user.position or '',
                 user.phone or '',
-                projects_str,
+                get_project_names(user),
                 user.get_role_category_display() if user.role_category else '',
                 'Да' if user.is_active else 'Нет',
                 'Да' if user.is_verified else 'Нет',
@@ -455,29 +464,28 @@ class PersonnelExcelHandler:
                 user.updated_at.strftime('%Y-%m-%d %H:%M:%S')
             ]
 
-            for col_idx, value in enumerate(row_data, start=1):
-                cell = ws_data.cell(row=row_idx, column=col_idx, value=value)
-                cell.font = Font(name='Arial', size=10)
-                cell.alignment = Alignment(horizontal='left', vertical='center')
-                cell.border = self.CELL_BORDER
-
-        # Замораживаем первую строку
-        ws_data.freeze_panes = 'A2'
+            ws_data.append(styled_row(
+                ws_data, row_data, font=cell_font, alignment=cell_alignment, border=self.CELL_BORDER
+            ))
 
         # Добавляем информационный лист
         ws_info = workbook.create_sheet("Информация")
-        ws_info.cell(row=1, column=1, value="ИНФОРМАЦИЯ О BACKUP").font = Font(size=14, bold=True)
-        ws_info.cell(row=2, column=1, value=f"Компания: {self.company.name}")
-        ws_info.cell(row=3, column=1, value=f"Дата создания backup: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        ws_info.cell(row=4, column=1, value=f"Количество пользователей: {users.count()}")
-        ws_info.cell(row=5, column=1, value="")
-        ws_info.cell(row=6, column=1, value="ВАЖНО:").font = Font(bold=True)
-        ws_info.cell(row=7, column=1, value="Этот файл содержит полную информацию о пользователях.")
-        ws_info.cell(row=8, column=1, value="Не используйте его для импорта (используйте Export для редактирования данных).")
-        ws_info.cell(row=9, column=1, value="Файл предназначен для архивных целей и восстановления в случае необходимости.")
-
         ws_info.column_dimensions['A'].width = 80
 
+        info_rows = [
+            ("ИНФОРМАЦИЯ О BACKUP", Font(size=14, bold=True)),
+            (f"Компания: {self.company.name}", None),
+            (f"Дата создания backup: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", None),
+            (f"Количество пользователей: {users_count}", None),
+            ("", None),
+            ("ВАЖНО:", Font(bold=True)),
+            ("Этот файл содержит полную информацию о пользователях.", None),
+            ("Не используйте его для импорта (используйте Export для редактирования данных).", None),
+            ("Файл предназначен для архивных целей и восстановления в случае необходимости.", None),
+        ]
+        for text, font in info_rows:
+            ws_info.append(styled_row(ws_info, [text], font=font))
+
         return workbook
 
     @staticmethod
@@ -550,6 +558,7 @@ class PersonnelExcelHandler:
             }
         """
         from apps.users.models import User
+        from django.db.models.functions import Lower
 
         try:
             workbook = openpyxl.load_workbook(file, data_only=True)
@@ -571,12 +580,28 @@ class PersonnelExcelHandler:
 
         # Получаем список проектов компании для валидации
         company_projects_dict = {
-            p.name.strip().lower(): p.id
-            for p in self.company.projects.filter(is_active=True)
+            name.strip().lower(): project_id
+            for project_id, name in self.company.projects.filter(is_active=True).values_list('id', 'name')
         }
 
+        rows = list(sheet.iter_rows(min_row=2, values_only=True))
+
+        # Email-ы из файла проверяем одним запросом, а не запросом на каждую строку.
+        # При создании учитываются и удаленные пользователи: email уникален на уровне БД
+        file_emails = {str(row[0]).strip().lower() for row in rows if row and row[0] is not None}
+        users = User.all_objects if mode == 'create' else User.objects.filter(company=self.company)
+        known_emails = set(
+            users.annotate(email_lower=Lower('email')).filter(
+                email_lower__in=file_emails
+            ).values_list('email_lower', flat=True)
+        )
+        seen_emails = set()
+
+        role_mapping = self.get_role_mapping()
+        role_codes = {code for code, _ in User.Role.choices}
+
         # Парсим строки (начиная со 2-й, т.к. 1-я — заголовок)
-        for idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
+        for idx, row in enumerate(rows, start=2):
             # Пропускаем пустые строки
             if not any(row):
                 continue
@@ -608,16 +633,13 @@ class PersonnelExcelHandler:
             if not role:
                 row_errors.append('Роль обязательна')
             else:
-                # Создаём маппинг русских названий к кодам (с поддержкой обратной совместимости)
-                role_mapping = self.get_role_mapping()
-
                 # Конвертируем русское название в код (если это русское название)
                 # Если это уже код - он останется без изменений благодаря обратной совместимости
                 if role in role_mapping:
                     role = role_mapping[role]  # 'Директор' -> 'DIRECTOR' или 'DIRECTOR' -> 'DIRECTOR'
 
                 # Валидируем код роли
-                if role not in [r[0] for r in User.Role.choices]:
+                if role not in role_codes:
                     row_errors.append(f'Неверная роль: {role}. Выберите роль из списка.')
                 elif role == 'SUPERADMIN':
                     row_errors.append('Нельзя создавать пользователей с ролью SUPERADMIN через импорт')
@@ -625,14 +647,19 @@ class PersonnelExcelHandler:
             # ===== ВАЛИДАЦИЯ ДУБЛИКАТОВ EMAIL =====
 
             if email and self._is_valid_email(email):
+                email_lower = email.lower()
+                if email_lower in seen_emails:
+                    row_errors.append(f'Email {email} повторяется в файле')
+                seen_emails.add(email_lower)
+
                 if mode == 'create':
                     # При создании проверяем, что email не существует
-                    if User.objects.filter(email__iexact=email).exists():
+                    if email_lower in known_emails:
                         row_errors.append(f'Email {email} уже существует в системе')
 
                 elif mode == 'update':
                     # При обновлении проверяем, что пользователь существует в компании
-                    if not User.objects.filter(email__iexact=email, company=self.company).exists():
+                    if email_lower not in known_emails:
                         row_errors.append(
                             f'Пользователь с email {email} не найден в вашей компании. '
                             f'Используйте режим "Массовое добавление" для создания новых пользователей.'
@@ -676,6 +703,7 @@ class PersonnelExcelHandler:
                 middle_name = name_parts[2] if len(name_parts) > 2 else ''
 
                 valid_rows.append({
+                    'row': idx,
                     'email': email.lower(),  # Приводим к нижнему регистру
                     'last_name': last_name,
                     'first_name': first_name,
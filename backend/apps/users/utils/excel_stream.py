@@ -0,0 +1,66 @@
+"""
+Потоковая запись Excel выгрузок персонала, подрядчиков и надзоров.
+
+Книги создаются в режиме write_only: строки сразу сериализуются во временный файл
+openpyxl, а не хранятся в памяти объектами ячеек. Пользователи читаются через
+.iterator(chunk_size=EXPORT_CHUNK_SIZE) - prefetch_related выполняется на каждую
+пачку, поэтому память и число запросов не зависят от размера компании.
+Готовый файл отдается FileResponse частями с диска.
+"""
+import tempfile
+
+import openpyxl
+from django.http import FileResponse
+from openpyxl.cell import WriteOnlyCell
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Пользователей в одной пачке iterator() (и одном запросе prefetch проектов)
+EXPORT_CHUNK_SIZE = 500
+
+
+def create_workbook():
+    """Пустая книга в режиме write_only (листы создаются через create_sheet)."""
+    return openpyxl.Workbook(write_only=True)
+
+
+def styled_row(ws, values, font=None, fill=None, alignment=None, border=None):
+    """Строка ячеек write_only листа с одинаковым оформлением."""
+    row = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+        if font:
+            cell.font = font
+        if fill:
+            cell.fill = fill
+        if alignment:
+            cell.alignment = alignment
+        if border:
+            cell.border = border
+        row.append(cell)
+    return row
+
+
+def iter_users(queryset):
+    """Итерирует пользователей пачками, не загружая всю выборку в память."""
+    return queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def get_project_names(user, active_only=False):
+    """Проекты пользователя через запятую из prefetch_related('projects') без запросов к БД."""
+    return ', '.join(
+        project.name for project in user.projects.all()
+        if project.is_active or not active_only
+    )
+
+
+def workbook_response(workbook, filename):
+    """
+    HTTP ответ с книгой: файл сохраняется во временный файл и отдается частями.
+
+    Временный файл удаляется при закрытии ответа.
+    """
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
@@ -10,6 +10,8 @@
 
 import secrets
 import string
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
 from django.contrib.auth.hashers import make_password
 import logging
 
@@ -108,3 +110,36 @@ def generate_and_hash_password(length=12):
 
     logger.info('Пароль сгенерирован и хэширован успешно')
     return plain_password, hashed_password
+
+
+def generate_and_hash_passwords(count, length=12, progress_callback=None):
+    """
+    Генерация и параллельное хэширование пачки паролей для массового импорта.
+
+    PBKDF2 занимает 100-300 мс CPU на пароль, поэтому при импорте сотен
+    пользователей хэширование выполняется в пуле из IMPORT_HASH_WORKERS потоков.
+    hashlib.pbkdf2_hmac отпускает GIL, так что потоки работают параллельно
+    и не требуют дочерних процессов (их нельзя создавать из воркеров Celery prefork).
+
+    Args:
+        count (int): Количество паролей
+        length (int): Длина пароля
+        progress_callback: callable(done, total), вызывается по мере хэширования
+
+    Returns:
+        list: [(plain_password, hashed_password), ...] в порядке генерации
+    """
+    plain_passwords = [generate_permanent_password(length) for _ in range(count)]
+    if not plain_passwords:
+        return []
+
+    hashed_passwords = []
+    workers = min(settings.IMPORT_HASH_WORKERS, count)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for done, hashed in enumerate(executor.map(make_password, plain_passwords), start=1):
+            hashed_passwords.append(hashed)
+            if progress_callback and (done % 25 == 0 or done == count):
+                progress_callback(done, count)
+
+    logger.info(f'Сгенерировано и хэшировано паролей: {count} (потоков: {workers})')
+    return list(zip(plain_passwords, hashed_passwords))
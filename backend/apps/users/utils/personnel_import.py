@@ -0,0 +1,253 @@
+"""
+Применение импорта персонала, подрядчиков и надзоров (Excel v2) пакетными операциями.
+
+Строки уже провалидированы соответствующим *ExcelHandler.parse_import_file(), поэтому
+здесь нет запросов на каждую строку:
+- mode=create: пароли хэшируются параллельно, пользователи создаются через bulk_create,
+  связи с проектами - одним bulk_create по промежуточной таблице, письма с паролями -
+  одной задачей
+- mode=update: пользователи читаются одним запросом и сохраняются через bulk_update
+
+bulk_create не вызывает post_save, поэтому категория роли и полный доступ
+выставляются здесь так же, как это делает сигнал update_full_access_for_management,
+а маршруты согласования заявок компании сбрасываются и общий поисковый индекс
+обновляется явно.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from apps.core.global_search import index_objects
+from apps.material_requests.routes import invalidate_company_routes
+from apps.projects.models import Project
+from apps.users.models import User
+from .password_generator import generate_and_hash_passwords
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+# Тип импорта -> какие пользователи обновляются в режиме update и какие поля пишутся
+PERSONNEL_KINDS = {
+    'users': {
+        'update_filter': {},
+        'update_fields': [
+            'first_name', 'last_name', 'middle_name', 'role', 'position', 'phone',
+            'role_category', 'has_full_access',
+        ],
+    },
+    'contractors': {
+        'update_filter': {'role': 'CONTRACTOR'},
+        'update_fields': [
+            'first_name', 'last_name', 'middle_name', 'external_company_name', 'work_type', 'phone',
+        ],
+    },
+    'supervisions': {
+        'update_filter': {'role__in': ['SUPERVISOR', 'OBSERVER']},
+        'update_fields': ['first_name', 'last_name', 'middle_name', 'role', 'phone'],
+    },
+}
+
+
+def _row_attributes(kind, row):
+    """Поля пользователя из строки импорта."""
+    attributes = {
+        'first_name': row['first_name'],
+        'last_name': row['last_name'],
+        'middle_name': row['middle_name'],
+        'phone': row['phone'],
+    }
+    if kind == 'users':
+        attributes.update(role=row['role'], position=row['position'])
+    elif kind == 'contractors':
+        attributes.update(
+            role='CONTRACTOR',  # Всегда CONTRACTOR
+            external_company_name=row['contractor_company'],
+            work_type=row['work_type'],
+        )
+    else:
+        attributes['role'] = row['role']  # SUPERVISOR или OBSERVER
+    return attributes
+
+
+def _apply_role_category(user):
+    """Категория роли и полный доступ (как в сигнале update_full_access_for_management)."""
+    if user.is_management_category:
+        user.role_category = 'MANAGEMENT'
+        user.has_full_access = True
+    elif user.is_itr_supply_category:
+        user.role_category = 'ITR_SUPPLY'
+        user.has_full_access = False
+    else:
+        user.role_category = 'ITR_SUPPLY'
+
+
+def _replace_project_links(company, user_projects):
+    """
+    Заменяет проекты пользователей (аналог user.projects.set() для пачки).
+
+    Args:
+        user_projects: {user_id: [project_id, ...]}
+
+    Returns:
+        int: количество созданных связей
+    """
+    if not user_projects:
+        return 0
+
+    Membership = Project.team_members.through
+    company_project_ids = set(
+        Project.objects.filter(company=company).values_list('id', flat=True)
+    )
+
+    Membership.objects.filter(user_id__in=list(user_projects)).delete()
+    links = [
+        Membership(user_id=user_id, project_id=project_id)
+        for user_id, project_ids in user_projects.items()
+        for project_id in dict.fromkeys(project_ids)
+        if project_id in company_project_ids
+    ]
+    Membership.objects.bulk_create(links, batch_size=BATCH_SIZE)
+    return len(links)
+
+
+def create_personnel(company, valid_rows, kind='users', progress_callback=None):
+    """
+    Создает пользователей из валидных строк импорта.
+
+    Args:
+        progress_callback: callable(done, total) - прогресс хэширования паролей
+
+    Returns:
+        tuple: (stats, credentials) - credentials: [(user_id, plain_password), ...]
+    """
+    passwords = generate_and_hash_passwords(len(valid_rows), progress_callback=progress_callback)
+
+    users = []
+    for row, (_, hashed_password) in zip(valid_rows, passwords):
+        user = User(
+            email=row['email'],
+            company=company,
+            password=hashed_password,
+            is_active=True,
+            approved=True,
+            # Постоянный пароль - НЕ требует смены
+            password_change_required=False,
+            **_row_attributes(kind, row)
+        )
+        _apply_role_category(user)
+        users.append(user)
+
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        index_objects(users)
+        transaction.on_commit(lambda: invalidate_company_routes(company.id))
+        projects_assigned = _replace_project_links(company, {
+            user.id: row['project_ids']
+            for user, row in zip(users, valid_rows)
+            if row['project_ids']
+        })
+
+    credentials = [(user.id, plain_password) for user, (plain_password, _) in zip(users, passwords)]
+    stats = {
+        'new_records': len(users),
+        'updated_records': 0,
+        'projects_assigned': projects_assigned,
+    }
+    return stats, credentials
+
+
+def update_personnel(company, valid_rows, kind='users'):
+    """
+    Обновляет существующих пользователей компании по email.
+
+    Returns:
+        dict: статистика импорта
+    """
+    config = PERSONNEL_KINDS[kind]
+    rows_by_email = {row['email'].lower(): row for row in valid_rows}
+    # email в БД может храниться в другом регистре
+    users = list(
+        User.objects.annotate(email_lower=Lower('email')).filter(
+            company=company, email_lower__in=list(rows_by_email), **config['update_filter']
+        )
+    )
+
+    user_projects = {}
+    for user in users:
+        row = rows_by_email[user.email.lower()]
+        for field, value in _row_attributes(kind, row).items():
+            setattr(user, field, value)
+        if kind == 'users':
+            _apply_role_category(user)
+        if row['project_ids']:
+            user_projects[user.id] = row['project_ids']
+
+    with transaction.atomic():
+        User.objects.bulk_update(users, config['update_fields'], batch_size=BATCH_SIZE)
+        index_objects(users)
+        transaction.on_commit(lambda: invalidate_company_routes(company.id))
+        projects_assigned = _replace_project_links(company, user_projects)
+
+    return {
+        'new_records': 0,
+        'updated_records': len(users),
+        'projects_assigned': projects_assigned,
+    }
+
+
+def apply_personnel_import(company, valid_rows, mode, kind='users', progress_callback=None):
+    """
+    Применяет валидные строки импорта.
+
+    Письма с паролями ставятся в очередь одной задачей после коммита.
+
+    Args:
+        kind: 'users', 'contractors' или 'supervisions'
+
+    Returns:
+        dict: {'new_records', 'updated_records', 'projects_assigned', 'emails_sent'}
+    """
+    from apps.users.tasks import send_permanent_credentials_emails
+
+    if mode == 'update':
+        stats = update_personnel(company, valid_rows, kind)
+        stats['emails_sent'] = 0
+        return stats
+
+    stats, credentials = create_personnel(company, valid_rows, kind, progress_callback)
+    if credentials:
+        transaction.on_commit(lambda: send_permanent_credentials_emails.delay(credentials))
+    stats['emails_sent'] = len(credentials)
+
+    logger.info(
+        f'Импорт ({kind}, {company.name}): создано {stats["new_records"]}, '
+        f'связей с проектами {stats["projects_assigned"]}'
+    )
+    return stats
+
+
+def get_excel_handler(kind, company):
+    """Обработчик Excel файла для типа импорта."""
+    if kind == 'contractors':
+        from .contractor_excel_handler import ContractorExcelHandler
+        return ContractorExcelHandler(company=company)
+    if kind == 'supervisions':
+        from .supervision_excel_handler import SupervisionExcelHandler
+        return SupervisionExcelHandler(company=company)
+    from .excel_handler import PersonnelExcelHandler
+    return PersonnelExcelHandler(company=company)
+
+
+def parse_import_job(job):
+    """Разбор файла фонового задания импорта (см. apps.core.imports)."""
+    handler = get_excel_handler(job.import_type, job.company)
+    with job.file.open('rb') as file:
+        parse_result = handler.parse_import_file(file, mode=job.mode)
+    return parse_result['valid_rows'], parse_result['errors']
+
+
+def apply_import_chunk(job, rows):
+    """Запись части строк фонового задания импорта (см. apps.core.imports)."""
+    return apply_personnel_import(job.company, rows, job.mode, kind=job.import_type), []
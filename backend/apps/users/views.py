@@ -16,6 +16,7 @@ from .serializers import (
 from .permissions import IsManagementOrSuperAdmin, CanManageProjects, CanManageUsers
 from .models import Company
 from .resources import UserResource
+from .utils.excel_stream import workbook_response
 from apps.core.viewsets import SoftDeleteViewSetMixin
 
 User = get_user_model()
@@ -692,15 +693,8 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
             current_date = datetime.now().strftime('%Y-%m-%d')
             filename = f'users_export_v2_{current_date}.xlsx'
 
-            response = HttpResponse(
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            response['Content-Disposition'] = f'attachment; filename={filename}'
-
-            # Сохраняем workbook в response
-            workbook.save(response)
-
-            return response
+            # Отдаем файл потоково (книга write_only сохраняется во временный файл)
+            return workbook_response(workbook, filename)
 
         except Exception as e:
             return Response({
@@ -755,15 +749,8 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f'users_backup_{timestamp}.xlsx'
 
-            response = HttpResponse(
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            response['Content-Disposition'] = f'attachment; filename={filename}'
-
-            # Сохраняем workbook в response
-            workbook.save(response)
-
-            return response
+            # Отдаем файл потоково (книга write_only сохраняется во временный файл)
+            return workbook_response(workbook, filename)
 
         except Exception as e:
             return Response({
@@ -791,8 +778,11 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
         Request:
             - file: Excel файл (multipart/form-data)
             - mode: 'create' | 'update' (optional, default: 'create')
+            - background: 'false' (optional) - синхронный импорт, только для файлов
+              до IMPORT_SYNC_MAX_BYTES. По умолчанию импорт выполняется в фоне:
+              ответ 202 с заданием ImportJob, прогресс - GET /api/import-jobs/{id}/
 
-        Response:
+        Response (синхронный импорт):
             {
                 'status': 'success',
                 'stats': {
@@ -813,9 +803,10 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
         """
         from .permissions import CanManagePersonnelExcel
         from .utils.excel_handler import PersonnelExcelHandler
-        from .utils.password_generator import generate_and_hash_password
-        from .tasks import send_permanent_credentials_email
-        from apps.projects.models import Project
+        from .utils.personnel_import import apply_personnel_import
+        from apps.core.imports import wants_background, create_import_job
+        from apps.core.models import ImportJob
+        from apps.core.serializers import ImportJobSerializer
 
         try:
             user = request.user
@@ -853,6 +844,15 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
                     'details': 'Допустимые значения: create, update'
                 }, status=status.HTTP_400_BAD_REQUEST)
 
+            # Фоновый импорт (по умолчанию): файл сохраняется в задании, ответ сразу с id задания
+            if wants_background(request, file, default=True):
+                job = create_import_job(user, ImportJob.ImportType.USERS, mode, file)
+                return Response({
+                    'status': 'queued',
+                    'message': 'Импорт поставлен в очередь',
+                    'job': ImportJobSerializer(job).data
+                }, status=status.HTTP_202_ACCEPTED)
+
             # Парсим и валидируем файл
             handler = PersonnelExcelHandler(company=user.company)
             parse_result = handler.parse_import_file(file, mode=mode)
@@ -873,106 +873,8 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
                     'details': {'errors': errors}
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Обрабатываем валидные строки
-            new_records = 0
-            updated_records = 0
-            skipped_records = 0
-            projects_assigned = 0
-            emails_sent = 0
-
-            for row_data in valid_rows:
-                try:
-                    email = row_data['email']
-
-                    if mode == 'create':
-                        # Создание нового пользователя
-                        # Генерируем постоянный пароль
-                        plain_password, hashed_password = generate_and_hash_password(length=12)
-
-                        # Определяем категорию роли
-                        management_roles = [
-                            'DIRECTOR', 'CHIEF_ENGINEER', 'PROJECT_MANAGER',
-                            'SITE_MANAGER', 'FOREMAN'
-                        ]
-                        role_category = 'MANAGEMENT' if row_data['role'] in management_roles else 'ITR_SUPPLY'
-
-                        # Создаем пользователя
-                        new_user = User.objects.create(
-                            email=email,
-                            first_name=row_data['first_name'],
-                            last_name=row_data['last_name'],
-                            middle_name=row_data['middle_name'],
-                            role=row_data['role'],
-                            position=row_data['position'],
-                            phone=row_data['phone'],
-                            company=user.company,
-                            role_category=role_category,
-                            password=hashed_password,
-                            is_active=True,
-                            approved=True,
-                            # Постоянный пароль - НЕ требует смены
-                            password_change_required=False
-                        )
-
-                        # Привязываем к проектам
-                        if row_data['project_ids']:
-                            projects = Project.objects.filter(
-                                id__in=row_data['project_ids'],
-                                company=user.company
-                            )
-                            new_user.projects.set(projects)
-                            projects_assigned += projects.count()
-
-                        # Отправляем credentials на email асинхронно
-                        send_permanent_credentials_email.delay(new_user.id, plain_password)
-                        emails_sent += 1
-
-                        new_records += 1
-
-                    elif mode == 'update':
-                        # Обновление существующего пользователя
-                        existing_user = User.objects.get(
-                            email__iexact=email,
-                            company=user.company
-                        )
-
-                        # Обновляем поля
-                        existing_user.first_name = row_data['first_name']
-                        existing_user.last_name = row_data['last_name']
-                        existing_user.middle_name = row_data['middle_name']
-                        existing_user.role = row_data['role']
-                        existing_user.position = row_data['position']
-                        existing_user.phone = row_data['phone']
-
-                        # Обновляем категорию роли
-                        management_roles = [
-                            'DIRECTOR', 'CHIEF_ENGINEER', 'PROJECT_MANAGER',
-                            'SITE_MANAGER', 'FOREMAN'
-                        ]
-                        existing_user.role_category = (
-                            'MANAGEMENT' if row_data['role'] in management_roles else 'ITR_SUPPLY'
-                        )
-
-                        existing_user.save()
-
-                        # Обновляем проекты
-                        if row_data['project_ids']:
-                            projects = Project.objects.filter(
-                                id__in=row_data['project_ids'],
-                                company=user.company
-                            )
-                            existing_user.projects.set(projects)
-                            projects_assigned += projects.count()
-
-                        updated_records += 1
-
-                except Exception as row_error:
-                    # Если ошибка при обработке конкретной строки
-                    skipped_records += 1
-                    errors.append({
-                        'row': '?',
-                        'errors': [f'Ошибка обработки: {str(row_error)}']
-                    })
+            # Применяем валидные строки пакетными операциями (bulk_create/bulk_update)
+            import_stats = apply_personnel_import(user.company, valid_rows, mode)
 
             # Возвращаем результат
             return Response({
@@ -980,15 +882,15 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
                 'message': f'Импорт завершен успешно (режим: {mode})',
                 'stats': {
                     'total_rows': len(valid_rows),
-                    'new_records': new_records,
-                    'updated_records': updated_records,
-                    'skipped_records': skipped_records,
-                    'errors': len(errors),
-                    'projects_assigned': projects_assigned,
-                    'emails_sent': emails_sent
+                    'new_records': import_stats['new_records'],
+                    'updated_records': import_stats['updated_records'],
+                    'skipped_records': 0,
+                    'errors': 0,
+                    'projects_assigned': import_stats['projects_assigned'],
+                    'emails_sent': import_stats['emails_sent']
                 },
                 'details': {
-                    'errors': errors if errors else []
+                    'errors': []
                 }
             }, status=status.HTTP_201_CREATED)
 
@@ -1127,15 +1029,8 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
             current_date = datetime.now().strftime('%Y-%m-%d')
             filename = f'contractors_export_v2_{current_date}.xlsx'
 
-            response = HttpResponse(
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            response['Content-Disposition'] = f'attachment; filename={filename}'
-
-            # Сохраняем workbook в response
-            workbook.save(response)
-
-            return response
+            # Отдаем файл потоково (книга write_only сохраняется во временный файл)
+            return workbook_response(workbook, filename)
 
         except Exception as e:
             return Response({
@@ -1191,15 +1086,8 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f'contractors_backup_{timestamp}.xlsx'
 
-            response = HttpResponse(
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            response['Content-Disposition'] = f'attachment; filename={filename}'
-
-            # Сохраняем workbook в response
-            workbook.save(response)
-
-            return response
+            # Отдаем файл потоково (книга write_only сохраняется во временный файл)
+            return workbook_response(workbook, filename)
 
         except Exception as e:
             return Response({
@@ -1227,8 +1115,11 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
         Request:
             - file: Excel файл (multipart/form-data)
             - mode: 'create' | 'update' (optional, default: 'create')
+            - background: 'false' (optional) - синхронный импорт, только для файлов
+              до IMPORT_SYNC_MAX_BYTES. По умолчанию импорт выполняется в фоне:
+              ответ 202 с заданием ImportJob, прогресс - GET /api/import-jobs/{id}/
 
-        Response:
+        Response (синхронный импорт):
             {
                 'status': 'success',
                 'stats': {
@@ -1249,9 +1140,10 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
         """
         from .permissions import CanManageContractorsExcel
         from .utils.contractor_excel_handler import ContractorExcelHandler
-        from .utils.password_generator import generate_and_hash_password
-        from .tasks import send_permanent_credentials_email
-        from apps.projects.models import Project
+        from .utils.personnel_import import apply_personnel_import
+        from apps.core.imports import wants_background, create_import_job
+        from apps.core.models import ImportJob
+        from apps.core.serializers import ImportJobSerializer
 
         try:
             user = request.user
@@ -1288,6 +1180,15 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
                     'details': 'Допустимые значения: create, update'
                 }, status=status.HTTP_400_BAD_REQUEST)
 
+            # Фоновый импорт (по умолчанию): файл сохраняется в задании, ответ сразу с id задания
+            if wants_background(request, file, default=True):
+                job = create_import_job(user, ImportJob.ImportType.CONTRACTORS, mode, file)
+                return Response({
+                    'status': 'queued',
+                    'message': 'Импорт поставлен в очередь',
+                    'job': ImportJobSerializer(job).data
+                }, status=status.HTTP_202_ACCEPTED)
+
             # Парсим и валидируем файл
             handler = ContractorExcelHandler(company=user.company)
             parse_result = handler.parse_import_file(file, mode=mode)
@@ -1308,91 +1209,8 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
                     'details': {'errors': errors}
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Обрабатываем валидные строки
-            new_records = 0
-            updated_records = 0
-            skipped_records = 0
-            projects_assigned = 0
-            emails_sent = 0
-
-            for row_data in valid_rows:
-                try:
-                    email = row_data['email']
-
-                    if mode == 'create':
-                        # Создание нового подрядчика
-                        # Генерируем постоянный пароль
-                        plain_password, hashed_password = generate_and_hash_password(length=12)
-
-                        # Создаем подрядчика с role='CONTRACTOR'
-                        new_contractor = User.objects.create(
-                            email=email,
-                            first_name=row_data['first_name'],
-                            last_name=row_data['last_name'],
-                            middle_name=row_data['middle_name'],
-                            role='CONTRACTOR',  # Всегда CONTRACTOR
-                            external_company_name=row_data['contractor_company'],  # Компания подрядчика
-                            work_type=row_data['work_type'],  # Вид работ
-                            phone=row_data['phone'],
-                            company=user.company,  # Привязываем к компании пользователя
-                            role_category='ITR_SUPPLY',  # Категория для подрядчиков
-                            password=hashed_password,
-                            is_active=True,
-                            approved=True,
-                            password_change_required=False  # Постоянный пароль
-                        )
-
-                        # Привязываем к проектам
-                        if row_data['project_ids']:
-                            projects = Project.objects.filter(
-                                id__in=row_data['project_ids'],
-                                company=user.company
-                            )
-                            new_contractor.projects.set(projects)
-                            projects_assigned += projects.count()
-
-                        # Отправляем credentials на email асинхронно
-                        send_permanent_credentials_email.delay(new_contractor.id, plain_password)
-                        emails_sent += 1
-
-                        new_records += 1
-
-                    elif mode == 'update':
-                        # Обновление существующего подрядчика
-                        existing_contractor = User.objects.get(
-                            email__iexact=email,
-                            company=user.company,
-                            role='CONTRACTOR'
-                        )
-
-                        # Обновляем поля
-                        existing_contractor.first_name = row_data['first_name']
-                        existing_contractor.last_name = row_data['last_name']
-                        existing_contractor.middle_name = row_data['middle_name']
-                        existing_contractor.external_company_name = row_data['contractor_company']
-                        existing_contractor.work_type = row_data['work_type']  # Обновляем вид работ
-                        existing_contractor.phone = row_data['phone']
-
-                        existing_contractor.save()
-
-                        # Обновляем проекты
-                        if row_data['project_ids']:
-                            projects = Project.objects.filter(
-                                id__in=row_data['project_ids'],
-                                company=user.company
-                            )
-                            existing_contractor.projects.set(projects)
-                            projects_assigned += projects.count()
-
-                        updated_records += 1
-
-                except Exception as row_error:
-                    # Если ошибка при обработке конкретной строки
-                    skipped_records += 1
-                    errors.append({
-                        'row': '?',
-                        'errors': [f'Ошибка обработки: {str(row_error)}']
-                    })
+            # Применяем валидные строки пакетными операциями (bulk_create/bulk_update)
+            import_stats = apply_personnel_import(user.company, valid_rows, mode, kind='contractors')
 
             # Возвращаем результат
             return Response({
@@ -1400,15 +1218,15 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
                 'message': f'Импорт завершен успешно (режим: {mode})',
                 'stats': {
                     'total_rows': len(valid_rows),
-                    'new_records': new_records,
-                    'updated_records': updated_records,
-                    'skipped_records': skipped_records,
-                    'errors': len(errors),
-                    'projects_assigned': projects_assigned,
-                    'emails_sent': emails_sent
+                    'new_records': import_stats['new_records'],
+                    'updated_records': import_stats['updated_records'],
+                    'skipped_records': 0,
+                    'errors': 0,
+                    'projects_assigned': import_stats['projects_assigned'],
+                    'emails_sent': import_stats['emails_sent']
                 },
                 'details': {
-                    'errors': errors if errors else []
+                    'errors': []
                 }
             }, status=status.HTTP_201_CREATED)
 
@@ -1546,15 +1364,8 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
             current_date = datetime.now().strftime('%Y-%m-%d')
             filename = f'supervisions_export_v2_{current_date}.xlsx'
 
-            response = HttpResponse(
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            response['Content-Disposition'] = f'attachment; filename={filename}'
-
-            # Сохраняем workbook в response
-            workbook.save(response)
-
-            return response
+            # Отдаем файл потоково (книга write_only сохраняется во временный файл)
+            return workbook_response(workbook, filename)
 
         except Exception as e:
             return Response({
@@ -1610,15 +1421,8 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f'supervisions_backup_{timestamp}.xlsx'
 
-            response = HttpResponse(
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            response['Content-Disposition'] = f'attachment; filename={filename}'
-
-            # Сохраняем workbook в response
-            workbook.save(response)
-
-            return response
+            # Отдаем файл потоково (книга write_only сохраняется во временный файл)
+            return workbook_response(workbook, filename)
 
         except Exception as e:
             return Response({
@@ -1646,8 +1450,11 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
         Request:
             - file: Excel файл (multipart/form-data)
             - mode: 'create' | 'update' (optional, default: 'create')
+            - background: 'false' (optional) - синхронный импорт, только для файлов
+              до IMPORT_SYNC_MAX_BYTES. По умолчанию импорт выполняется в фоне:
+              ответ 202 с заданием ImportJob, прогресс - GET /api/import-jobs/{id}/
 
-        Response:
+        Response (синхронный импорт):
             {
                 'status': 'success',
                 'stats': {
@@ -1668,9 +1475,10 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
         """
         from .permissions import CanManageSupervisionExcel
         from .utils.supervision_excel_handler import SupervisionExcelHandler
-        from .utils.password_generator import generate_and_hash_password
-        from .tasks import send_permanent_credentials_email
-        from apps.projects.models import Project
+        from .utils.personnel_import import apply_personnel_import
+        from apps.core.imports import wants_background, create_import_job
+        from apps.core.models import ImportJob
+        from apps.core.serializers import ImportJobSerializer
 
         try:
             user = request.user
@@ -1707,6 +1515,15 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
                     'details': 'Допустимые значения: create, update'
                 }, status=status.HTTP_400_BAD_REQUEST)
 
+            # Фоновый импорт (по умолчанию): файл сохраняется в задании, ответ сразу с id задания
+            if wants_background(request, file, default=True):
+                job = create_import_job(user, ImportJob.ImportType.SUPERVISIONS, mode, file)
+                return Response({
+                    'status': 'queued',
+                    'message': 'Импорт поставлен в очередь',
+                    'job': ImportJobSerializer(job).data
+                }, status=status.HTTP_202_ACCEPTED)
+
             # Парсим и валидируем файл
             handler = SupervisionExcelHandler(company=user.company)
             parse_result = handler.parse_import_file(file, mode=mode)
@@ -1727,88 +1544,8 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
                     'details': {'errors': errors}
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Обрабатываем валидные строки
-            new_records = 0
-            updated_records = 0
-            skipped_records = 0
-            projects_assigned = 0
-            emails_sent = 0
-
-            for row_data in valid_rows:
-                try:
-                    email = row_data['email']
-
-                    if mode == 'create':
-                        # Создание нового надзора
-                        # Генерируем постоянный пароль
-                        plain_password, hashed_password = generate_and_hash_password(length=12)
-
-                        # Создаем надзор с role='SUPERVISOR' или 'OBSERVER'
-                        new_supervision = User.objects.create(
-                            email=email,
-                            first_name=row_data['first_name'],
-                            last_name=row_data['last_name'],
-                            middle_name=row_data['middle_name'],
-                            role=row_data['role'],  # SUPERVISOR или OBSERVER
-                            phone=row_data['phone'],
-                            company=user.company,  # Привязываем к компании пользователя
-                            role_category='ITR_SUPPLY',  # Категория для надзоров
-                            password=hashed_password,
-                            is_active=True,
-                            approved=True,
-                            password_change_required=False  # Постоянный пароль
-                        )
-
-                        # Привязываем к проектам
-                        if row_data['project_ids']:
-                            projects = Project.objects.filter(
-                                id__in=row_data['project_ids'],
-                                company=user.company
-                            )
-                            new_supervision.projects.set(projects)
-                            projects_assigned += projects.count()
-
-                        # Отправляем credentials на email асинхронно
-                        send_permanent_credentials_email.delay(new_supervision.id, plain_password)
-                        emails_sent += 1
-
-                        new_records += 1
-
-                    elif mode == 'update':
-                        # Обновление существующего надзора
-                        existing_supervision = User.objects.get(
-                            email__iexact=email,
-                            company=user.company,
-                            role__in=['SUPERVISOR', 'OBSERVER']
-                        )
-
-                        # Обновляем поля
-                        existing_supervision.first_name = row_data['first_name']
-                        existing_supervision.last_name = row_data['last_name']
-                        existing_supervision.middle_name = row_data['middle_name']
-                        existing_supervision.role = row_data['role']
-                        existing_supervision.phone = row_data['phone']
-
-                        existing_supervision.save()
-
-                        # Обновляем проекты
-                        if row_data['project_ids']:
-                            projects = Project.objects.filter(
-                                id__in=row_data['project_ids'],
-                                company=user.company
-                            )
-                            existing_supervision.projects.set(projects)
-                            projects_assigned += projects.count()
-
-                        updated_records += 1
-
-                except Exception as row_error:
-                    # Если ошибка при обработке конкретной строки
-                    skipped_records += 1
-                    errors.append({
-                        'row': '?',
-                        'errors': [f'Ошибка обработки: {str(row_error)}']
-                    })
+            # Применяем валидные строки пакетными операциями (bulk_create/bulk_update)
+            import_stats = apply_personnel_import(user.company, valid_rows, mode, kind='supervisions')
 
             # Возвращаем результат
             return Response({
@@ -1816,15 +1553,15 @@ class UserViewSet(SoftDeleteViewSetMixin, viewsets.ModelViewSet):
                 'message': f'Импорт завершен успешно (режим: {mode})',
                 'stats': {
                     'total_rows': len(valid_rows),
-                    'new_records': new_records,
-                    'updated_records': updated_records,
-                    'skipped_records': skipped_records,
-                    'errors': len(errors),
-                    'projects_assigned': projects_assigned,
-                    'emails_sent': emails_sent
+                    'new_records': import_stats['new_records'],
+                    'updated_records': import_stats['updated_records'],
+                    'skipped_records': 0,
+                    'errors': 0,
+                    'projects_assigned': import_stats['projects_assigned'],
+                    'emails_sent': import_stats['emails_sent']
                 },
                 'details': {
-                    'errors': errors if errors else []
+                    'errors': []
                 }
             }, status=status.HTTP_201_CREATED)
 
@@ -40,6 +40,19 @@ app.conf.beat_schedule = {
         'task': 'apps.tasks.tasks.check_overdue_tasks',
         'schedule': crontab(minute=0),  # Every hour at :00
     },
+    'rebuild-issue-daily-stats': {
+        'task': 'apps.issues.tasks.rebuild_issue_daily_stats',
+        'schedule': crontab(hour=2, minute=0),  # Every day at 2:00 AM
+    },
+    'rebuild-issue-daily-stats-full': {
+        'task': 'apps.issues.tasks.rebuild_issue_daily_stats',
+        'schedule': crontab(hour=4, minute=0, day_of_week=0),  # Every Sunday at 4:00 AM
+        'kwargs': {'full': True},
+    },
+    'cleanup-expired-report-jobs': {
+        'task': 'apps.reports.tasks.cleanup_expired_report_jobs',
+        'schedule': crontab(minute=30),  # Every hour at :30
+    },
 }
 
 @app.task(bind=True, ignore_result=True)
@@ -29,6 +29,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # Полнотекстовый поиск и индексы pg_trgm
 
     # Third party apps
     'rest_framework',
@@ -233,6 +234,20 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Cache
+# В docker (REDIS_HOST задан) кэш общий для всех процессов web/celery: маршруты
+# согласования и счетчики сбрасываются сигналами в одном процессе, а читаются в других.
+if os.getenv('REDIS_HOST'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv(
+                'CACHE_REDIS_URL',
+                f"redis://{os.getenv('REDIS_HOST')}:{os.getenv('REDIS_PORT', 6379)}/1"
+            ),
+        },
+    }
+
 # Celery Configuration
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
@@ -242,6 +257,41 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
+# Формирование отчетов (WeasyPrint, CPU) - в отдельной очереди со своим воркером,
+# его --concurrency ограничивает число одновременных рендеров (см. docker-compose.yml)
+CELERY_TASK_ROUTES = {
+    'apps.reports.tasks.generate_report_job': {'queue': 'reports'},
+}
+
+# Фоновые отчеты: срок хранения файла/ссылки и окно дедупликации одинаковых запросов
+REPORT_JOB_TTL_HOURS = int(os.getenv('REPORT_JOB_TTL_HOURS', 24))
+REPORT_JOB_DEDUP_SECONDS = int(os.getenv('REPORT_JOB_DEDUP_SECONDS', 300))
+
+# PDF отчеты (WeasyPrint): размер пула процессов (web) и воркера очереди reports, строк на часть отчета, таймаут рендеринга части
+REPORT_PDF_WORKERS = int(os.getenv('REPORT_PDF_WORKERS', 2))
+REPORT_PDF_MAX_TASKS_PER_WORKER = int(os.getenv('REPORT_PDF_MAX_TASKS_PER_WORKER', 50))
+REPORT_PDF_CHUNK_SIZE = int(os.getenv('REPORT_PDF_CHUNK_SIZE', 300))
+REPORT_PDF_TIMEOUT = int(os.getenv('REPORT_PDF_TIMEOUT', 300))
+
+# Импорт из Excel: потоков для параллельного хэширования паролей
+IMPORT_HASH_WORKERS = int(os.getenv('IMPORT_HASH_WORKERS', os.cpu_count() or 2))
+# Фоновый импорт из Excel: строк в одной части (каждая часть записывается в своей транзакции)
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', 200))
+# Синхронный импорт (background=false): максимальный размер файла, большие файлы - только в фоне
+IMPORT_SYNC_MAX_BYTES = int(os.getenv('IMPORT_SYNC_MAX_BYTES', 256 * 1024))
+
+# Очистка корзины: объектов в одной части (каждая часть удаляется в своей транзакции)
+PURGE_CHUNK_SIZE = int(os.getenv('PURGE_CHUNK_SIZE', 100))
+
+# Массовое согласование заявок: максимум заявок в одном запросе
+MATERIAL_REQUEST_BULK_LIMIT = int(os.getenv('MATERIAL_REQUEST_BULK_LIMIT', 100))
+# Пакетная приемка поставки: максимум позиций в одном запросе
+MATERIAL_REQUEST_RECEIVE_LIMIT = int(os.getenv('MATERIAL_REQUEST_RECEIVE_LIMIT', 200))
+# Аналитика потребности в материалах: срок жизни снимка в кэше (snapshot=true), секунд
+MATERIAL_ANALYTICS_SNAPSHOT_SECONDS = int(os.getenv('MATERIAL_ANALYTICS_SNAPSHOT_SECONDS', 600))
+
+# Суточные агрегаты замечаний: сколько последних дней ночная задача пересчитывает по таблице Issue
+ISSUE_STATS_RECONCILE_DAYS = int(os.getenv('ISSUE_STATS_RECONCILE_DAYS', 7))
 
 # Email Configuration
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
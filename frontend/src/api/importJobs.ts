@@ -0,0 +1,76 @@
+/**
+ * API фоновых заданий импорта из Excel (ImportJob).
+ *
+ * Импорт персонала по умолчанию выполняется в фоне: сервер отвечает 202 с
+ * заданием, состояние которого опрашивается до завершения.
+ */
+
+import apiClient from './axios'
+
+export type ImportJobStatus = 'PENDING' | 'RUNNING' | 'SUCCESS' | 'PARTIAL' | 'FAILED'
+
+export interface ImportRowError {
+  row: number | null
+  errors: string[]
+}
+
+export interface ImportJob {
+  id: string
+  import_type: string
+  mode: string
+  status: ImportJobStatus
+  progress: number
+  stats: Record<string, number>
+  errors: ImportRowError[]
+  error: string
+  created_at: string
+  finished_at: string | null
+}
+
+const FINISHED_STATUSES: ImportJobStatus[] = ['SUCCESS', 'PARTIAL', 'FAILED']
+
+// Интервал опроса состояния задания, мс
+const POLL_INTERVAL = 2000
+
+/**
+ * Ошибка фонового импорта в том же виде, что ответ синхронного импорта
+ * (error.response.data.error / details.errors), чтобы обработчики не различали режимы
+ */
+export class ImportJobError extends Error {
+  response: { data: { error: string; details: { errors: ImportRowError[] } } }
+
+  constructor(job: ImportJob) {
+    super(job.error || 'Ошибка при импорте данных')
+    this.response = {
+      data: {
+        error: job.error || 'Ошибка при импорте данных',
+        details: { errors: job.errors },
+      },
+    }
+  }
+}
+
+export const importJobsAPI = {
+  /**
+   * Состояние задания импорта
+   */
+  getJob: async (id: string): Promise<ImportJob> => {
+    const response = await apiClient.get(`/import-jobs/${id}/`)
+    return response.data
+  },
+
+  /**
+   * Ожидает завершения задания, опрашивая его состояние
+   * @param onProgress - вызывается с каждым полученным состоянием
+   */
+  waitForJob: async (id: string, onProgress?: (job: ImportJob) => void): Promise<ImportJob> => {
+    for (;;) {
+      const job = await importJobsAPI.getJob(id)
+      onProgress?.(job)
+      if (FINISHED_STATUSES.includes(job.status)) {
+        return job
+      }
+      await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL))
+    }
+  },
+}
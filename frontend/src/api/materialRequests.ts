@@ -25,6 +25,7 @@ export interface MaterialRequestItem {
   id?: number
   material_name: string
   unit: string
+  material?: number | null // Запись справочника материалов компании
   quantity_requested: number
   quantity_actual?: number
   notes?: string
@@ -33,6 +34,50 @@ export interface MaterialRequestItem {
   received_at?: string | null // Дата принятия позиции на объекте
 }
 
+// Запись справочника материалов компании
+export interface CatalogMaterial {
+  id: number
+  name: string
+  unit: string
+}
+
+// Разрезы аналитики потребности в материалах
+export type MaterialDemandDimension = 'material' | 'unit' | 'project' | 'week' | 'month'
+
+export interface MaterialDemandFilters {
+  group_by?: string // Разрезы через запятую, например 'material,project,week'
+  date_from?: string
+  date_to?: string
+  project?: number
+  snapshot?: boolean // Снимок из кэша (быстрее, может отставать на несколько минут)
+}
+
+// Строка аналитики: ключи выбранных разрезов и суммы
+export interface MaterialDemandRow {
+  material_id?: number | null
+  material_name?: string
+  unit?: string
+  project_id?: number
+  project_name?: string
+  week?: string
+  month?: string
+  requests: number
+  items: number
+  requested: number
+  delivered: number
+  outstanding: number
+  by_status: Record<MaterialRequestItemStatus, number>
+}
+
+export interface MaterialDemandAnalytics {
+  group_by: MaterialDemandDimension[]
+  date_from: string | null
+  date_to: string | null
+  project_id: number | null
+  generated_at: string
+  rows: MaterialDemandRow[]
+}
+
 // Интерфейс для этапа согласования
 export interface ApprovalStep {
   id: number
@@ -50,10 +95,24 @@ export interface ApprovalStep {
 export interface MaterialRequestHistory {
   id: number
   action: string
-  user: number
-  user_name: string
-  details?: string
-  timestamp: string
+  action_display: string
+  user: number | null
+  user_data?: {
+    id: number
+    email: string
+    full_name: string
+    role: string
+  } | null
+  created_at: string
+  details?: Record<string, unknown>
+  comment?: string | null
+}
+
+// Страница истории заявки (курсорная пагинация: следующая страница - по ссылке next)
+export interface MaterialRequestHistoryPage {
+  next: string | null
+  previous: string | null
+  results: MaterialRequestHistory[]
 }
 
 // Интерфейс для заявки
@@ -70,7 +129,6 @@ export interface MaterialRequest {
   status_display: string
   items: MaterialRequestItem[]
   approval_steps: ApprovalStep[]
-  history: MaterialRequestHistory[]
   company: number
   company_name?: string
   created_at: string
@@ -80,6 +138,7 @@ export interface MaterialRequest {
   current_approver?: number
   current_approver_name?: string
   current_approval_role?: string
+  approval_route?: string[] // Роли, согласующие заявку по порядку (фиксируется при отправке)
   is_deleted: boolean
 }
 
@@ -111,6 +170,31 @@ export interface UpdateActualQuantityData {
   notes?: string
 }
 
+// Изменение позиции в пакетной приемке (quantity_actual и/или received)
+export interface ReceiveItemEntry {
+  item_id: number
+  quantity_actual?: number
+  received?: boolean
+  notes?: string
+}
+
+export interface ReceiveItemResult {
+  item_id: number
+  success: boolean
+  quantity_actual?: number | null
+  item_status?: MaterialRequestItemStatus
+  item_status_display?: string
+  error?: string
+}
+
+export interface ReceiveItemsResponse {
+  succeeded: number
+  failed: number
+  results: ReceiveItemResult[]
+  all_items_received: boolean
+  request_status: MaterialRequestStatus
+}
+
 // Фильтры для списка заявок
 export interface MaterialRequestFilters {
   tab?: 'draft' | 'all' | 'in_approval' | 'approved' | 'in_payment' | 'in_delivery' | 'completed' | 'my'
@@ -133,6 +217,29 @@ export interface MaterialRequestStats {
   rejected: number
 }
 
+// Страница списка заявок
+export interface PaginatedMaterialRequests {
+  count: number
+  next: string | null
+  previous: string | null
+  results: MaterialRequest[]
+}
+
+// Результат массового согласования/возврата по одной заявке
+export interface BulkActionResult {
+  id: number
+  success: boolean
+  status?: MaterialRequestStatus
+  next_approval_role?: string | null
+  error?: string
+}
+
+export interface BulkActionResponse {
+  succeeded: number
+  failed: number
+  results: BulkActionResult[]
+}
+
 export const materialRequestsAPI = {
   /**
    * Получить список заявок с фильтрацией по табам
@@ -197,6 +304,22 @@ export const materialRequestsAPI = {
     return response.data
   },
 
+  /**
+   * Массово согласовать заявки (до MATERIAL_REQUEST_BULK_LIMIT за запрос)
+   */
+  bulkApprove: async (ids: number[], comment?: string) => {
+    const response = await axios.post<BulkActionResponse>('/material-requests/bulk-approve/', { ids, comment })
+    return response.data
+  },
+
+  /**
+   * Массово вернуть заявки на доработку
+   */
+  bulkReject: async (ids: number[], reason: string) => {
+    const response = await axios.post<BulkActionResponse>('/material-requests/bulk-reject/', { ids, reason })
+    return response.data
+  },
+
   /**
    * Взять заявку в работу (Завсклад)
    */
@@ -248,13 +371,31 @@ export const materialRequestsAPI = {
   },
 
   /**
-   * Получить заявки на согласовании у текущего пользователя
+   * Пакетная приемка поставки: фактическое количество и приемка многих позиций одним запросом
+   */
+  receiveItems: async (requestId: number, items: ReceiveItemEntry[]) => {
+    const response = await axios.post<ReceiveItemsResponse>(`/material-requests/${requestId}/receive-items/`, {
+      items,
+    })
+    return response.data
+  },
+
+  /**
+   * Входящие: заявки, ожидающие согласования ролью текущего пользователя
    */
-  getMyApprovals: async () => {
-    const response = await axios.get('/material-requests/my_approvals/')
+  getInbox: async (params?: { page?: number; page_size?: number }) => {
+    const response = await axios.get<PaginatedMaterialRequests>('/material-requests/inbox/', { params })
     return response.data
   },
 
+  /**
+   * Количество входящих заявок (для бейджа; дальше обновляется через WebSocket)
+   */
+  getInboxCount: async () => {
+    const response = await axios.get<{ count: number }>('/material-requests/inbox/count/')
+    return response.data.count
+  },
+
   /**
    * Получить заявки, созданные текущим пользователем
    */
@@ -290,4 +431,46 @@ export const materialRequestsAPI = {
     })
     return response.data
   },
+
+  /**
+   * Автодополнение названия материала по справочнику компании
+   * @param q - начало или часть названия
+   * @param limit - вариантов (по умолчанию 10, максимум 20)
+   */
+  autocompleteMaterials: async (q: string, limit?: number) => {
+    const response = await axios.get<CatalogMaterial[]>('/material-catalog/autocomplete/', {
+      params: { q, limit },
+    })
+    return response.data
+  },
+
+  /**
+   * Потребность и поставки материалов (запрошено / поставлено / осталось)
+   */
+  getDemandAnalytics: async (params?: MaterialDemandFilters) => {
+    const response = await axios.get<MaterialDemandAnalytics>('/material-requests/analytics/', { params })
+    return response.data
+  },
+
+  /**
+   * Экспорт аналитики потребности в Excel
+   */
+  exportDemandAnalytics: async (params?: MaterialDemandFilters) => {
+    const response = await axios.get('/material-requests/analytics/', {
+      params: { ...params, export: 'excel' },
+      responseType: 'blob',
+    })
+    return response.data
+  },
+
+  /**
+   * История заявки постранично (сначала новые)
+   * @param cursor - курсор из ссылки next/previous предыдущей страницы
+   */
+  getHistory: async (id: number, cursor?: string | null, pageSize?: number) => {
+    const response = await axios.get<MaterialRequestHistoryPage>(`/material-requests/${id}/history/`, {
+      params: { cursor: cursor || undefined, page_size: pageSize },
+    })
+    return response.data
+  },
 }
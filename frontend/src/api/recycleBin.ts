@@ -27,6 +27,13 @@ export interface RecycleBinStats {
   expires_soon_count: number
 }
 
+export interface RecycleBinPage {
+  count: number
+  next: string | null
+  previous: string | null
+  results: RecycleBinItem[]
+}
+
 export interface RestoreRequest {
   model: 'Project' | 'User' | 'MaterialRequest' | 'Tender'
   id: number
@@ -48,15 +55,18 @@ export interface CleanExpiredResponse {
  */
 export const recycleBinAPI = {
   /**
-   * Получить список всех удаленных объектов
+   * Получить страницу списка удаленных объектов
    * @param model - фильтр по типу модели (опционально)
    * @param expires_soon - фильтр по срочности (опционально)
+   * @param page, page_size - пагинация (опционально)
    */
   getAll: async (params?: {
     model?: 'Project' | 'User' | 'MaterialRequest' | 'Tender'
     expires_soon?: boolean
-  }): Promise<RecycleBinItem[]> => {
-    const response = await apiClient.get<RecycleBinItem[]>('/recycle-bin/', { params })
+    page?: number
+    page_size?: number
+  }): Promise<RecycleBinPage> => {
+    const response = await apiClient.get<RecycleBinPage>('/recycle-bin/', { params })
     return response.data
   },
 
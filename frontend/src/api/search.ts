@@ -0,0 +1,39 @@
+/**
+ * API общего поиска по проектам, замечаниям, заявкам, задачам, тендерам и пользователям.
+ */
+
+import apiClient from './axios'
+
+export type SearchEntityType = 'project' | 'issue' | 'material_request' | 'task' | 'tender' | 'user'
+
+export interface SearchHit {
+  id: number
+  type: SearchEntityType
+  number: string
+  title: string
+  snippet: string
+  project_id: number | null
+  rank: number
+}
+
+export interface GlobalSearchResponse {
+  query: string
+  results: Record<SearchEntityType, SearchHit[]>
+}
+
+/**
+ * API для общего поиска
+ */
+export const searchAPI = {
+  /**
+   * Лучшие результаты каждого типа (одним запросом)
+   * @param q - строка поиска
+   * @param limit - результатов каждого типа (по умолчанию 5, максимум 20)
+   */
+  search: async (q: string, limit?: number): Promise<GlobalSearchResponse> => {
+    const response = await apiClient.get<GlobalSearchResponse>('/search/', { params: { q, limit } })
+    return response.data
+  },
+}
+
+export default searchAPI
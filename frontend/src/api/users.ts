@@ -1,4 +1,5 @@
 import axios from './axios'
+import { ImportJobError, importJobsAPI } from './importJobs'
 
 export interface User {
   id: number
@@ -35,6 +36,36 @@ export interface CreateUserData {
   project_ids?: number[]
 }
 
+/**
+ * Импорт персонала из Excel. Сервер выполняет импорт в фоне (ответ 202 с
+ * заданием ImportJob): ждем завершения задания и возвращаем результат в том
+ * же виде, что синхронный импорт ({ status, stats, details: { errors } }).
+ */
+const importPersonnel = async (url: string, file: File, mode: 'create' | 'update') => {
+  const formData = new FormData()
+  formData.append('file', file)
+  formData.append('mode', mode)
+
+  const response = await axios.post(url, formData, {
+    headers: {
+      'Content-Type': 'multipart/form-data'
+    }
+  })
+  if (response.status !== 202) {
+    return response.data
+  }
+
+  const job = await importJobsAPI.waitForJob(response.data.job.id)
+  if (job.status === 'FAILED') {
+    throw new ImportJobError(job)
+  }
+  return {
+    status: job.status === 'SUCCESS' ? 'success' : 'partial',
+    stats: { skipped_records: 0, ...job.stats, errors: job.errors.length },
+    details: { errors: job.errors }
+  }
+}
+
 export const usersAPI = {
   // Get all users
   getUsers: async () => {
@@ -157,18 +188,8 @@ export const usersAPI = {
   },
 
   // Импорт пользователей v2 с поддержкой режимов
-  importUsersV2: async (file: File, mode: 'create' | 'update' = 'create') => {
-    const formData = new FormData()
-    formData.append('file', file)
-    formData.append('mode', mode)
-
-    const response = await axios.post('/auth/users/import-v2/', formData, {
-      headers: {
-        'Content-Type': 'multipart/form-data'
-      }
-    })
-    return response.data
-  },
+  importUsersV2: (file: File, mode: 'create' | 'update' = 'create') =>
+    importPersonnel('/auth/users/import-v2/', file, mode),
 
   // ===== МЕТОДЫ ДЛЯ CONTRACTORS EXCEL V2 =====
 
@@ -197,18 +218,8 @@ export const usersAPI = {
   },
 
   // Импорт подрядчиков из Excel v2
-  importContractorsV2: async (file: File, mode: 'create' | 'update' = 'create') => {
-    const formData = new FormData()
-    formData.append('file', file)
-    formData.append('mode', mode)
-
-    const response = await axios.post('/auth/users/contractors/import-v2/', formData, {
-      headers: {
-        'Content-Type': 'multipart/form-data'
-      }
-    })
-    return response.data
-  },
+  importContractorsV2: (file: File, mode: 'create' | 'update' = 'create') =>
+    importPersonnel('/auth/users/contractors/import-v2/', file, mode),
 
   // ===== МЕТОДЫ ДЛЯ SUPERVISIONS (НАДЗОРЫ) EXCEL V2 =====
 
@@ -237,16 +248,6 @@ export const usersAPI = {
   },
 
   // Импорт надзоров из Excel v2
-  importSupervisionsV2: async (file: File, mode: 'create' | 'update' = 'create') => {
-    const formData = new FormData()
-    formData.append('file', file)
-    formData.append('mode', mode)
-
-    const response = await axios.post('/auth/users/supervisions/import-v2/', formData, {
-      headers: {
-        'Content-Type': 'multipart/form-data'
-      }
-    })
-    return response.data
-  }
+  importSupervisionsV2: (file: File, mode: 'create' | 'update' = 'create') =>
+    importPersonnel('/auth/users/supervisions/import-v2/', file, mode)
 }
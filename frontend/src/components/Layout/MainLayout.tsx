@@ -1,4 +1,4 @@
-import { useState } from 'react'
+import { useEffect, useState } from 'react'
 import { Outlet, Link, useLocation } from 'react-router-dom'
 import { Layout, Menu, Avatar, Dropdown, Badge, Button } from 'antd'
 import {
@@ -23,6 +23,7 @@ import {
 // УДАЛЕНО: InboxOutlined - функционал склада удален
 import { useAuthStore } from '../../stores/authStore'
 import { useNotificationStore } from '../../stores/notificationStore'
+import { materialRequestsAPI } from '../../api/materialRequests'
 import './MainLayout.css'
 
 const { Header, Sider, Content } = Layout
@@ -31,7 +32,16 @@ const MainLayout = () => {
   const [collapsed, setCollapsed] = useState(false)
   const location = useLocation()
   const { user, logout, hasPageAccess } = useAuthStore()
-  const { unreadCount } = useNotificationStore()
+  const { unreadCount, approvalInboxCount, setApprovalInboxCount } = useNotificationStore()
+
+  // Начальное значение бейджа входящих заявок (дальше обновляется через WebSocket)
+  useEffect(() => {
+    if (!hasPageAccess('material-requests')) return
+    materialRequestsAPI
+      .getInboxCount()
+      .then(setApprovalInboxCount)
+      .catch(() => setApprovalInboxCount(0))
+  }, [user?.id, hasPageAccess, setApprovalInboxCount])
 
   // ===== НОВАЯ ЛОГИКА: Проверка доступа через матрицу в БД =====
   // Все проверки доступа теперь идут через hasPageAccess(page)
@@ -106,7 +116,11 @@ const MainLayout = () => {
     {
       key: '/dashboard/material-requests',
       icon: <ShoppingCartOutlined />,
-      label: <Link to="/dashboard/material-requests">Заявки</Link>,
+      label: (
+        <Link to="/dashboard/material-requests">
+          Заявки <Badge count={approvalInboxCount} size="small" offset={[6, -2]} />
+        </Link>
+      ),
       page: 'material-requests',
       visible: hasPageAccess('material-requests'),
     },
@@ -0,0 +1,69 @@
+import React, { useEffect, useState } from 'react'
+import { AutoComplete, Input } from 'antd'
+import { useQuery } from '@tanstack/react-query'
+import { materialRequestsAPI, CatalogMaterial } from '../../api/materialRequests'
+
+/** Задержка перед запросом автодополнения, мс */
+const AUTOCOMPLETE_DELAY = 250
+
+/**
+ * Интерфейс пропсов поля названия материала
+ */
+interface MaterialNameInputProps {
+  /** Значение поля (передает Form.Item) */
+  value?: string
+  /** Callback изменения значения (передает Form.Item) */
+  onChange?: (value: string) => void
+  /** Callback при выборе записи справочника (например, чтобы подставить единицу) */
+  onSelectMaterial?: (material: CatalogMaterial) => void
+  placeholder?: string
+}
+
+/**
+ * Поле названия материала с автодополнением по справочнику компании
+ *
+ * Можно ввести любое название: новые материалы попадают в справочник
+ * при создании заявки.
+ */
+const MaterialNameInput: React.FC<MaterialNameInputProps> = ({
+  value,
+  onChange,
+  onSelectMaterial,
+  placeholder,
+}) => {
+  const [query, setQuery] = useState('')
+
+  // Запрос отправляется после паузы в наборе
+  useEffect(() => {
+    const timer = setTimeout(() => setQuery((value || '').trim()), AUTOCOMPLETE_DELAY)
+    return () => clearTimeout(timer)
+  }, [value])
+
+  const { data: materials = [] } = useQuery({
+    queryKey: ['material-catalog-autocomplete', query],
+    queryFn: () => materialRequestsAPI.autocompleteMaterials(query),
+    enabled: query.length >= 2,
+    staleTime: 60 * 1000,
+  })
+
+  // Одно название может быть в справочнике с разными единицами - ключ по id
+  const options = materials.map((material) => ({
+    key: material.id,
+    value: material.name,
+    label: `${material.name}, ${material.unit}`,
+    material,
+  }))
+
+  return (
+    <AutoComplete
+      value={value}
+      options={query.length >= 2 ? options : []}
+      onChange={(text) => onChange?.(text)}
+      onSelect={(_, option) => onSelectMaterial?.(option.material)}
+    >
+      <Input placeholder={placeholder} />
+    </AutoComplete>
+  )
+}
+
+export default MaterialNameInput
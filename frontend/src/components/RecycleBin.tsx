@@ -44,6 +44,9 @@ const RecycleBin = () => {
   const { user } = useAuthStore()
   const { canUseButton } = useButtonAccess('recycle-bin')
   const [items, setItems] = useState<RecycleBinItem[]>([])
+  const [total, setTotal] = useState(0)
+  const [page, setPage] = useState(1)
+  const [pageSize, setPageSize] = useState(20)
   const [stats, setStats] = useState<RecycleBinStats | null>(null)
   const [loading, setLoading] = useState(false)
   const [filterModel, setFilterModel] = useState<string | undefined>(undefined)
@@ -57,10 +60,13 @@ const RecycleBin = () => {
         recycleBinAPI.getAll({
           model: filterModel as any,
           expires_soon: filterExpiresSoon || undefined,
+          page,
+          page_size: pageSize,
         }),
         recycleBinAPI.getStats(),
       ])
-      setItems(itemsData)
+      setItems(itemsData.results)
+      setTotal(itemsData.count)
       setStats(statsData)
     } catch (error: any) {
       message.error(error.response?.data?.detail || 'Ошибка при загрузке данных')
@@ -71,7 +77,7 @@ const RecycleBin = () => {
 
   useEffect(() => {
     fetchData()
-  }, [filterModel, filterExpiresSoon])
+  }, [filterModel, filterExpiresSoon, page, pageSize])
 
   // Восстановление объекта
   const handleRestore = async (item: RecycleBinItem) => {
@@ -284,7 +290,10 @@ const RecycleBin = () => {
           style={{ width: 200 }}
           allowClear
           value={filterModel}
-          onChange={(value) => setFilterModel(value)}
+          onChange={(value) => {
+            setFilterModel(value)
+            setPage(1)
+          }}
         >
           <Option value="Project">Проекты</Option>
           <Option value="User">Пользователи</Option>
@@ -296,7 +305,10 @@ const RecycleBin = () => {
           type={filterExpiresSoon ? 'primary' : 'default'}
           danger={filterExpiresSoon}
           icon={<ExclamationCircleOutlined />}
-          onClick={() => setFilterExpiresSoon(!filterExpiresSoon)}
+          onClick={() => {
+            setFilterExpiresSoon(!filterExpiresSoon)
+            setPage(1)
+          }}
         >
           {filterExpiresSoon ? 'Все объекты' : 'Только срочные'}
         </Button>
@@ -324,9 +336,15 @@ const RecycleBin = () => {
         loading={loading}
         rowKey={(record) => `${record.model_name}-${record.id}`}
         pagination={{
-          pageSize: 20,
+          current: page,
+          pageSize,
+          total,
           showSizeChanger: true,
           showTotal: (total) => `Всего: ${total}`,
+          onChange: (newPage, newPageSize) => {
+            setPage(newPageSize !== pageSize ? 1 : newPage)
+            setPageSize(newPageSize)
+          },
         }}
         locale={{
           emptyText: (
@@ -43,6 +43,7 @@ import { useAuthStore } from '../stores/authStore'
 import { useButtonAccess } from '../hooks/useButtonAccess'
 import ActualQuantityModal from '../components/MaterialRequests/ActualQuantityModal'
 import RejectionReasonModal from '../components/MaterialRequests/RejectionReasonModal'
+import MaterialNameInput from '../components/MaterialRequests/MaterialNameInput'
 
 const { Title, Text } = Typography
 const { TextArea } = Input
@@ -1313,7 +1314,12 @@ const MaterialRequests = () => {
                           label="Наименование материала"
                           rules={[{ required: true, message: 'Введите наименование' }]}
                         >
-                          <Input placeholder="Например: Цемент М500" />
+                          <MaterialNameInput
+                            placeholder="Например: Цемент М500"
+                            onSelectMaterial={(material) =>
+                              itemsForm.setFieldValue(['items', field.name, 'unit'], material.unit)
+                            }
+                          />
                         </Form.Item>
                       </Col>
                       <Col span={6}>
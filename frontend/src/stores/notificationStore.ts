@@ -13,6 +13,7 @@ interface Notification {
 interface NotificationState {
   notifications: Notification[]
   unreadCount: number
+  approvalInboxCount: number
   socket: WebSocket | null
   userId: number | null
   reconnectAttempts: number
@@ -21,6 +22,7 @@ interface NotificationState {
   connectWebSocket: (userId: number) => void
   disconnectWebSocket: () => void
   addNotification: (notification: Notification) => void
+  setApprovalInboxCount: (count: number) => void
   markAsRead: (id: number) => void
   markAllAsRead: () => void
   resetReconnectAttempts: () => void
@@ -72,6 +74,7 @@ const getWebSocketUrl = (userId: number) => {
 export const useNotificationStore = create<NotificationState>((set, get) => ({
   notifications: [],
   unreadCount: 0,
+  approvalInboxCount: 0,
   socket: null,
   userId: null,
   reconnectAttempts: 0,
@@ -133,6 +136,9 @@ export const useNotificationStore = create<NotificationState>((set, get) => ({
         } else if (data.type === 'notification' && data.data) {
           // Новое уведомление (backend отправляет в поле 'data', а не 'payload')
           get().addNotification(data.data)
+        } else if (data.type === 'approval_inbox' && data.data) {
+          // Новый счетчик заявок, ожидающих согласования ролью пользователя
+          get().setApprovalInboxCount(data.data.count)
         } else if (data.type === 'pong') {
           // Ответ на ping
           wsLog('pong получен')
@@ -219,6 +225,10 @@ export const useNotificationStore = create<NotificationState>((set, get) => ({
     }))
   },
 
+  setApprovalInboxCount: (count) => {
+    set({ approvalInboxCount: count })
+  },
+
   markAsRead: (id) => {
     set((state) => ({
       notifications: state.notifications.map((n) =>